@@ -0,0 +1,69 @@
+"""
+Поиск сразу по нескольким справочникам: регионам, коллекциям и странам.
+Результаты берутся из общего индекса в памяти (`services.catalog_search`).
+"""
+
+from typing import Any
+
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from services.catalog_search import CATALOGS, get_catalog_search_index
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+class CatalogSearchParamsSerializer(serializers.Serializer):  # type: ignore[type-arg]
+    query = serializers.CharField(required=True)
+    catalogs = serializers.CharField(required=False)
+    country = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT
+    )
+
+    def validate_catalogs(self, value: str) -> list[str]:
+        catalogs = [catalog.strip() for catalog in value.split(',') if catalog.strip()]
+        unknown = sorted(set(catalogs) - set(CATALOGS))
+        if not catalogs or unknown:
+            raise serializers.ValidationError(f'Допустимые справочники: {", ".join(CATALOGS)}')
+        return catalogs
+
+
+@api_view(['GET'])
+def catalog_search(request: Request) -> Response:
+    """
+    Ищет записи справочников по названию.
+
+    GET-параметры:
+      - `query` — строка поиска, обязательный параметр,
+      - `catalogs` — справочники через запятую (`region`, `collection`, `country`),
+        по умолчанию поиск идёт по всем,
+      - `country` — код страны для фильтрации регионов и стран,
+      - `limit` — максимальное количество результатов из каждого справочника.
+
+    Возвращает словарь, в котором для каждого запрошенного справочника
+    указан список найденных записей с полями `id` и `title`.
+
+    :param request: DRF Request с GET-параметрами
+    :return: Response с результатами поиска или ошибкой 400
+    """
+    serializer = CatalogSearchParamsSerializer(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+
+    validated_data = serializer.validated_data
+    catalogs = validated_data.get('catalogs') or list(CATALOGS)
+    entries = get_catalog_search_index().search(
+        validated_data['query'],
+        catalogs=catalogs,
+        country_code=validated_data.get('country'),
+        limit=validated_data['limit'],
+    )
+
+    result: dict[str, list[dict[str, Any]]] = {catalog: [] for catalog in catalogs}
+    for entry in entries:
+        result[entry.catalog].append({'id': entry.id, 'title': entry.title})
+
+    return Response(result, status=status.HTTP_200_OK)
@@ -509,6 +509,14 @@ OVERPASS_ENDPOINTS = (
     else list(_DEFAULT_OVERPASS_ENDPOINTS)
 )
 
+# Срок хранения полигона OSM в кеше (в днях): после него полигон ещё отдаётся из кеша,
+# но обновляется командой `prefetch_osm_polygons --expired`
+GEO_POLYGONS_CACHE_TTL_DAYS = int(os.getenv('GEO_POLYGONS_CACHE_TTL_DAYS', '90'))
+# Срок хранения отрицательного результата Nominatim (полигона нет) в секундах
+GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS = int(
+    os.getenv('GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS', '3600')
+)
+
 PRIVACY_POLICY_VERSION = os.getenv('PRIVACY_POLICY_VERSION')
 
 ALLOWED_HOSTS_FOR_EMBEDDED_REGION_MAPS = (
@@ -625,10 +633,16 @@ AWS_USERS_CITY_PHOTOS_REGION_NAME = (
 AWS_USERS_CITY_PHOTOS_URL_EXPIRE_SECONDS = int(
     os.getenv('AWS_USERS_CITY_PHOTOS_URL_EXPIRE_SECONDS', '120')
 )
+# Минимальный оставшийся срок жизни переиспользуемой подписанной ссылки на фото
+AWS_USERS_CITY_PHOTOS_URL_MIN_TTL_SECONDS = int(
+    os.getenv('AWS_USERS_CITY_PHOTOS_URL_MIN_TTL_SECONDS', '30')
+)
 CITY_USER_PHOTOS_LIMIT = int(os.getenv('CITY_USER_PHOTOS_LIMIT', '10'))
 CITY_USER_PHOTO_MAX_UPLOAD_MB = int(os.getenv('CITY_USER_PHOTO_MAX_UPLOAD_MB', '15'))
 CITY_USER_PHOTO_MAX_UPLOAD_BYTES = CITY_USER_PHOTO_MAX_UPLOAD_MB * 1024 * 1024
 CITY_USER_PHOTO_MAX_PIXELS = int(os.getenv('CITY_USER_PHOTO_MAX_PIXELS', '40000000'))
+# Через сколько секунд взятая в обработку задача фото считается брошенной и забирается повторно
+CITY_USER_PHOTO_TASK_STALE_SECONDS = int(os.getenv('CITY_USER_PHOTO_TASK_STALE_SECONDS', '600'))
 AWS_STANDARD_CITY_PHOTOS_BUCKET_NAME = os.getenv('AWS_STANDARD_CITY_PHOTOS_BUCKET_NAME')
 AWS_STANDARD_CITY_PHOTOS_REGION_NAME = (
     os.getenv('AWS_STANDARD_CITY_PHOTOS_REGION_NAME') or AWS_S3_REGION_NAME
@@ -636,6 +650,10 @@ AWS_STANDARD_CITY_PHOTOS_REGION_NAME = (
 AWS_STANDARD_CITY_PHOTOS_URL_EXPIRE_SECONDS = int(
     os.getenv('AWS_STANDARD_CITY_PHOTOS_URL_EXPIRE_SECONDS', '86400')
 )
+# Бакет выгрузок статистики. По умолчанию используется основной бакет хранилища
+AWS_EXPORTS_BUCKET_NAME = os.getenv('AWS_EXPORTS_BUCKET_NAME') or AWS_STORAGE_BUCKET_NAME
+AWS_EXPORTS_REGION_NAME = os.getenv('AWS_EXPORTS_REGION_NAME') or AWS_S3_REGION_NAME
+AWS_EXPORTS_URL_EXPIRE_SECONDS = int(os.getenv('AWS_EXPORTS_URL_EXPIRE_SECONDS', '600'))
 AWS_DEFAULT_ACL = None
 AWS_QUERYSTRING_AUTH = False
 AWS_S3_OBJECT_PARAMETERS = {
@@ -652,3 +670,13 @@ class Error(TypedDict):
 DMR_SETTINGS: dict[Settings, list[Error]] = {
     Settings.responses: [],
 }
+
+# Количество уведомлений подписчикам, создаваемых одним запросом при рассылке
+SUBSCRIBER_NOTIFICATION_BATCH_SIZE = int(os.getenv('SUBSCRIBER_NOTIFICATION_BATCH_SIZE', '1000'))
+
+# Время хранения готовых выгрузок статистики (в часах)
+EXPORT_JOB_RETENTION_HOURS = int(os.getenv('EXPORT_JOB_RETENTION_HOURS', '24'))
+# Через сколько секунд без обновления прогресса выгрузка считается брошенной и перезапускается
+EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', '900'))
+# Как часто обработчик подтверждает, что выгрузка ещё формируется (меньше EXPORT_JOB_STALE_SECONDS)
+EXPORT_JOB_HEARTBEAT_SECONDS = int(os.getenv('EXPORT_JOB_HEARTBEAT_SECONDS', '60'))
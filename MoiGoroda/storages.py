@@ -1,10 +1,49 @@
+import hashlib
+import posixpath
+import time
+from collections.abc import Iterable
+from urllib.parse import quote
+
 from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import Storage
+from prometheus_client import Counter
 from storages.backends.s3boto3 import S3Boto3Storage  # type: ignore[import-untyped]
 from typing import Any
 
+PRESIGNED_URL_CACHE_ALIAS = 'default'
+
+PRESIGNED_URL_REQUESTS = Counter(
+    'storage_presigned_url_requests_total',
+    'Presigned URL lookups in the presigned URL cache',
+    ['result'],
+)
+
+
+def get_storage_urls(storage: Storage, names: Iterable[str]) -> dict[str, str]:
+    """
+    Возвращает URL нескольких файлов хранилища. Хранилища с кешем подписанных ссылок
+    подписывают их одним обращением к кешу, остальные — по одному файлу.
+    """
+    url_many = getattr(storage, 'url_many', None)
+    if url_many is not None:
+        urls: dict[str, str] = url_many(names)
+        return urls
+    return {name: str(storage.url(name)) for name in names}
+
 
 class UsersCityPhotoStorage(S3Boto3Storage):  # type: ignore[misc]
+    """
+    Приватный бакет пользовательских фото городов.
+
+    Подписанные ссылки кешируются по паре (ключ файла, окно времени): в течение окна
+    все процессы отдают одну и ту же ссылку, поэтому браузер и промежуточные кеши
+    не скачивают фото заново при каждой загрузке страницы. Окно короче срока жизни
+    ссылки на AWS_USERS_CITY_PHOTOS_URL_MIN_TTL_SECONDS, так что ссылка, выданная
+    в конце окна, ещё успевает открыться.
+    """
+
     querystring_auth = True
     default_acl = None
     file_overwrite = False
@@ -21,6 +60,56 @@ class UsersCityPhotoStorage(S3Boto3Storage):  # type: ignore[misc]
 
         super().__init__(**kwargs)
 
+    def get_url_window_seconds(self) -> int:
+        """Длительность окна, в течение которого переиспользуется подписанная ссылка."""
+        expire = int(self.querystring_expire)
+        return max(expire - settings.AWS_USERS_CITY_PHOTOS_URL_MIN_TTL_SECONDS, expire // 2, 1)
+
+    def _get_url_cache_key(self, name: str, window: int) -> str:
+        digest = hashlib.sha1(name.encode(), usedforsecurity=False).hexdigest()
+        return f'presigned-url:{self.bucket_name}:{window}:{digest}'
+
+    def url(
+        self,
+        name: str,
+        parameters: dict[str, Any] | None = None,
+        expire: int | None = None,
+        http_method: str | None = None,
+    ) -> str:
+        if parameters or expire is not None or http_method is not None:
+            url: str = super().url(name, parameters, expire, http_method)
+            return url
+        return self.url_many([name])[name]
+
+    def url_many(self, names: Iterable[str]) -> dict[str, str]:
+        """
+        Возвращает подписанные ссылки на файлы `names` одним запросом к кешу.
+        Недостающие ссылки подписываются и сохраняются в кеш до конца текущего окна.
+        """
+        names = list(dict.fromkeys(names))
+        window_seconds = self.get_url_window_seconds()
+        now = time.time()
+        window = int(now // window_seconds)
+        cache_keys = {name: self._get_url_cache_key(name, window) for name in names}
+
+        cache = caches[PRESIGNED_URL_CACHE_ALIAS]
+        cached = cache.get_many(list(cache_keys.values()))
+        urls: dict[str, str] = {}
+        signed: dict[str, str] = {}
+        for name, cache_key in cache_keys.items():
+            url = cached.get(cache_key)
+            if url is None:
+                url = super().url(name)
+                signed[cache_key] = url
+            urls[name] = url
+
+        PRESIGNED_URL_REQUESTS.labels(result='hit').inc(len(names) - len(signed))
+        if signed:
+            PRESIGNED_URL_REQUESTS.labels(result='miss').inc(len(signed))
+            timeout = max(1, int((window + 1) * window_seconds - now))
+            cache.set_many(signed, timeout=timeout)
+        return urls
+
 
 class CityStandardPhotoStorage(S3Boto3Storage):  # type: ignore[misc]
     """
@@ -47,3 +136,36 @@ class CityStandardPhotoStorage(S3Boto3Storage):  # type: ignore[misc]
             )
 
         super().__init__(**kwargs)
+
+
+class ExportStorage(S3Boto3Storage):  # type: ignore[misc]
+    """
+    Бакет готовых выгрузок статистики пользователей.
+
+    Файлы отдаются только по подписанной ссылке с ограниченным временем жизни.
+    """
+
+    querystring_auth = True
+    default_acl = None
+    file_overwrite = False
+
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault('bucket_name', settings.AWS_EXPORTS_BUCKET_NAME)
+        kwargs.setdefault('region_name', settings.AWS_EXPORTS_REGION_NAME)
+        kwargs.setdefault('querystring_expire', settings.AWS_EXPORTS_URL_EXPIRE_SECONDS)
+
+        if not kwargs.get('bucket_name'):
+            raise ImproperlyConfigured(
+                'Задайте AWS_EXPORTS_BUCKET_NAME в окружении (см. .env.example).'
+            )
+
+        super().__init__(**kwargs)
+
+    def get_object_parameters(self, name: str) -> dict[str, str]:
+        # Браузер сохраняет файл под исходным именем, а не открывает его по подписанной ссылке.
+        # Кэш на год из AWS_S3_OBJECT_PARAMETERS для личных данных не нужен
+        parameters: dict[str, str] = super().get_object_parameters(name)
+        filename = quote(posixpath.basename(name))
+        parameters['ContentDisposition'] = f"attachment; filename*=UTF-8''{filename}"
+        parameters['CacheControl'] = 'private, no-store'
+        return parameters
@@ -0,0 +1,103 @@
+"""
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from collections.abc import Iterator
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from collection.models import Collection
+from country.models import Country
+from region.models import Region, RegionType
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_index() -> Iterator[None]:
+    clear_reference_cache()
+    clear_catalog_search_index()
+    yield
+    clear_catalog_search_index()
+
+
+@pytest.fixture
+def catalogs() -> dict[str, int]:
+    russia = Country.objects.create(name='Россия', fullname='Российская Федерация', code='RU')
+    region_type = RegionType.objects.create(title='область')
+    region = Region.objects.create(
+        title='Московская',
+        full_name='Московская область',
+        country=russia,
+        type=region_type,
+        iso3166='RU-MOS',
+    )
+    collection = Collection.objects.create(title='Подмосковные усадьбы')
+    return {'country': russia.id, 'region': region.id, 'collection': collection.id}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_searches_all_catalogs(client: Client, catalogs: dict[str, int]) -> None:
+    response = client.get(reverse('catalog_search'), {'query': 'моск'})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'region': [{'id': catalogs['region'], 'title': 'Московская область'}],
+        'collection': [{'id': catalogs['collection'], 'title': 'Подмосковные усадьбы'}],
+        'country': [],
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_searches_selected_catalogs(client: Client, catalogs: dict[str, int]) -> None:
+    response = client.get(
+        reverse('catalog_search'), {'query': 'подмосковн', 'catalogs': 'collection,country'}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'collection': [{'id': catalogs['collection'], 'title': 'Подмосковные усадьбы'}],
+        'country': [],
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_tolerates_typos_and_word_forms(client: Client, catalogs: dict[str, int]) -> None:
+    typo = client.get(reverse('catalog_search'), {'query': 'расия'}).json()
+    word_form = client.get(reverse('catalog_search'), {'query': 'московской области'}).json()
+
+    assert typo['country'] == [{'id': catalogs['country'], 'title': 'Россия'}]
+    assert word_form['region'] == [{'id': catalogs['region'], 'title': 'Московская область'}]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'params',
+    [{}, {'query': ''}, {'query': 'моск', 'catalogs': 'city'}, {'query': 'моск', 'limit': 0}],
+)
+def test_returns_400_for_invalid_params(client: Client, params: dict[str, str | int]) -> None:
+    response = client.get(reverse('catalog_search'), params)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_index_is_rebuilt_after_collection_change(client: Client, catalogs: dict[str, int]) -> None:
+    Collection.objects.filter(id=catalogs['collection']).delete()
+    collection = Collection.objects.create(title='Усадьбы Подмосковья')
+
+    response = client.get(reverse('catalog_search'), {'query': 'усадьбы'})
+
+    assert response.json()['collection'] == [{'id': collection.id, 'title': 'Усадьбы Подмосковья'}]
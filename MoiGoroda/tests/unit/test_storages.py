@@ -0,0 +1,130 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from collections.abc import Generator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+
+from MoiGoroda.storages import (
+    PRESIGNED_URL_CACHE_ALIAS,
+    ExportStorage,
+    UsersCityPhotoStorage,
+    get_storage_urls,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_presigned_url_cache() -> Generator[None, None, None]:
+    caches[PRESIGNED_URL_CACHE_ALIAS].clear()
+    yield
+    caches[PRESIGNED_URL_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def photo_storage() -> UsersCityPhotoStorage:
+    return UsersCityPhotoStorage(
+        bucket_name='photos',
+        region_name='ru-1',
+        endpoint_url='https://s3.example.com',
+        access_key='key',
+        secret_key='secret',
+        querystring_expire=120,
+    )
+
+
+@pytest.mark.unit
+def test_export_storage_uses_signed_urls_with_configured_expiry() -> None:
+    storage = ExportStorage(bucket_name='exports', querystring_expire=300)
+
+    assert storage.querystring_auth is True
+    assert storage.querystring_expire == 300
+    assert storage.bucket_name == 'exports'
+
+
+@pytest.mark.unit
+def test_export_storage_requires_bucket_name() -> None:
+    with pytest.raises(ImproperlyConfigured):
+        ExportStorage(bucket_name='')
+
+
+@pytest.mark.unit
+def test_export_storage_sends_files_as_attachments() -> None:
+    storage = ExportStorage(bucket_name='exports')
+
+    parameters = storage.get_object_parameters('exports/1/MoiGoroda__Пётр__1700000000.csv')
+
+    assert parameters['ContentDisposition'] == (
+        "attachment; filename*=UTF-8''MoiGoroda__%D0%9F%D1%91%D1%82%D1%80__1700000000.csv"
+    )
+    assert parameters['CacheControl'] == 'private, no-store'
+
+
+@pytest.mark.unit
+def test_photo_storage_reuses_presigned_url_within_window(
+    photo_storage: UsersCityPhotoStorage, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Окно 120 - 30 = 90 секунд: с 900 по 990 секунду ссылка одна и та же
+    monkeypatch.setattr('MoiGoroda.storages.time.time', lambda: 900.0)
+    first = photo_storage.url('user-1/photo.jpg')
+    monkeypatch.setattr('MoiGoroda.storages.time.time', lambda: 989.0)
+    second = photo_storage.url('user-1/photo.jpg')
+    monkeypatch.setattr('MoiGoroda.storages.time.time', lambda: 990.0)
+    photo_storage.url('user-1/photo.jpg')
+
+    assert photo_storage.get_url_window_seconds() == 90
+    assert first == second
+    assert parse_qs(urlsplit(first).query)['X-Amz-Expires'] == ['120']
+    # Следующее окно начинается с новой ссылки
+    assert caches[PRESIGNED_URL_CACHE_ALIAS].get(
+        photo_storage._get_url_cache_key('user-1/photo.jpg', 11)
+    )
+
+
+@pytest.mark.unit
+def test_photo_storage_signs_only_missing_urls_in_batch(
+    photo_storage: UsersCityPhotoStorage, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cached = photo_storage.url('a.jpg')
+    signed: list[str] = []
+    original_url = UsersCityPhotoStorage.__mro__[1].url
+
+    def track_url(self: UsersCityPhotoStorage, name: str, *args: object) -> str:
+        signed.append(name)
+        url: str = original_url(self, name, *args)
+        return url
+
+    monkeypatch.setattr(UsersCityPhotoStorage.__mro__[1], 'url', track_url)
+
+    urls = photo_storage.url_many(['a.jpg', 'b.jpg', 'b.jpg'])
+
+    assert signed == ['b.jpg']
+    assert urls['a.jpg'] == cached
+    assert set(urls) == {'a.jpg', 'b.jpg'}
+
+
+@pytest.mark.unit
+def test_photo_storage_does_not_cache_urls_with_custom_parameters(
+    photo_storage: UsersCityPhotoStorage,
+) -> None:
+    url = photo_storage.url('a.jpg', expire=30)
+
+    assert parse_qs(urlsplit(url).query)['X-Amz-Expires'] == ['30']
+    assert photo_storage.url('a.jpg') != url
+
+
+@pytest.mark.unit
+def test_get_storage_urls_supports_storages_without_batch_signing(tmp_path: object) -> None:
+    storage = FileSystemStorage(location=str(tmp_path), base_url='/media/')
+
+    assert get_storage_urls(storage, ['a.jpg', 'b.jpg']) == {
+        'a.jpg': '/media/a.jpg',
+        'b.jpg': '/media/b.jpg',
+    }
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.urls import path, include
 from dmr.openapi.views import SwaggerView
 
+from MoiGoroda.search_api import catalog_search
 from MoiGoroda.tinymce_views import upload_image
 from django.views.generic import TemplateView
 from city.urls.api import city_user_photos_schema
@@ -36,6 +37,7 @@ urlpatterns = [
     path('api/region/', include('region.urls.api')),
     path('api/collection/', include('collection.urls.api')),
     path('api/analytics/', include('analytics.urls.api')),
+    path('api/search/', catalog_search, name='catalog_search'),
     path('geo-polygons/', include('geo_polygons.urls')),
     path('api/geo-polygons/', include('geo_polygons.urls_api')),
     # Plugins
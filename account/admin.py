@@ -13,7 +13,7 @@ from django.contrib.auth.models import User as DjangoUser, Group as DjangoGroup
 from django.db.models import Count, QuerySet
 from django.http import HttpRequest
 
-from account.models import ShareSettings, UserConsent, User, Group
+from account.models import ExportJob, ShareSettings, UserConsent, User, Group
 
 
 @admin.register(ShareSettings)
@@ -72,6 +72,24 @@ class UserConsentAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     readonly_fields = ('consent_timestamp',)
 
 
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
+    list_display = (
+        'id',
+        'user',
+        'reporttype',
+        'filetype',
+        'group_city',
+        'status',
+        'progress',
+        'created_at',
+        'finished_at',
+    )
+    search_fields = ('user__username',)
+    list_filter = ('status', 'reporttype', 'filetype')
+    readonly_fields = ('stats_generation', 'created_at', 'updated_at', 'started_at', 'finished_at')
+
+
 admin.site.unregister(DjangoUser)
 admin.site.register(User, CustomUserAdmin)
 
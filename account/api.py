@@ -1,14 +1,11 @@
 from __future__ import annotations
 
-import calendar
 import datetime
-from collections import defaultdict
 from typing import Any, Protocol, cast
 
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, F, Min
-from django.db.models.functions import TruncMonth, TruncYear
+from django.db.models import Count, F
 from dmr import Controller
 from dmr.plugins.msgspec import MsgspecSerializer
 
@@ -32,11 +29,14 @@ from account.schemas import (
 from account.use_cases.visited_cities_countries_coverage import (
     get_personal_visited_cities_countries_coverage,
 )
-from city.models import City, VisitedCity
+from city.models import City, UserCountryVisitCounters, VisitedCity
+from city.services.user_rank import get_total_visits_rank, get_unique_visited_cities_rank
 from country.models import Country, PartOfTheWorld, VisitedCountry
 from country.repository import get_list_of_countries_with_visited_regions
 from region.models import Region
 from region.services.db import get_all_region_with_visited_cities
+from services.cache import cached_user_stats
+from services.db.statistics.visited_cities_statistics import get_visited_cities_statistics
 
 
 class CountryWithVisitedRegionsCounts(Protocol):
@@ -100,174 +100,42 @@ def normalize_treemap_country_code(raw: str | None) -> str:
 
 
 def get_visited_cities_visits_country_rank(country_id: int, visits: int) -> int:
-    users_with_more_visits = (
-        VisitedCity.objects.filter(city__country_id=country_id)
-        .values('user_id')
-        .annotate(visits=Count('id'))
-        .filter(visits__gt=visits)
-        .count()
-    )
+    users_with_more_visits = UserCountryVisitCounters.objects.filter(
+        country_id=country_id, number_of_visits__gt=visits
+    ).count()
     return users_with_more_visits + 1
 
 
+def _yearly_statistics(counts: dict[int, int]) -> list[DailyStatistics]:
+    return [DailyStatistics(label=str(year), count=count) for year, count in counts.items()]
+
+
+def _monthly_statistics(counts: dict[datetime.date, int]) -> list[DailyStatistics]:
+    return [
+        DailyStatistics(label=month.strftime('%m.%Y'), count=count)
+        for month, count in counts.items()
+    ]
+
+
 class GetPersonalVisitedCitiesOverviewController(Controller[MsgspecSerializer]):
     def get(self) -> PersonalVisitedCitiesOverviewResponse:
         user_id = resolve_statistics_user_id(
             self.request.user, self.request.GET.get('shared_user_id')
         )
 
-        visited_cities_queryset = VisitedCity.objects.filter(user_id=user_id)
-
-        unique_total = visited_cities_queryset.filter(is_first_visit=True).count()
-        visits_total = visited_cities_queryset.count()
-        total_users_count = User.objects.count()
-        users_with_more_unique_visited_cities = (
-            VisitedCity.objects.values('user_id')
-            .annotate(unique_visited_cities=Count('city_id', distinct=True))
-            .filter(unique_visited_cities__gt=unique_total)
-            .count()
-        )
-        unique_visited_cities_rank = (
-            users_with_more_unique_visited_cities + 1 if unique_total > 0 else 0
-        )
-        users_with_more_total_visited_cities_visits = (
-            VisitedCity.objects.values('user_id')
-            .annotate(total_visited_cities_visits=Count('id'))
-            .filter(total_visited_cities_visits__gt=visits_total)
-            .count()
-        )
-        total_visited_cities_visits_rank = (
-            users_with_more_total_visited_cities_visits + 1 if visits_total > 0 else 0
-        )
-
-        unique_by_year_queryset = (
-            visited_cities_queryset.annotate(year=TruncYear('date_of_visit'))
-            .exclude(year=None)
-            .values('year')
-            .annotate(qty=Count('city_id', distinct=True))
-            .order_by('year')
-        )
-        visits_by_year_queryset = (
-            visited_cities_queryset.annotate(year=TruncYear('date_of_visit'))
-            .exclude(year=None)
-            .values('year')
-            .annotate(qty=Count('id'))
-            .order_by('year')
-        )
-        new_by_year_queryset = (
-            visited_cities_queryset.filter(is_first_visit=True)
-            .annotate(year=TruncYear('date_of_visit'))
-            .exclude(year=None)
-            .values('year')
-            .annotate(qty=Count('id'))
-            .order_by('year')
-        )
-
-        unique_by_year = [
-            DailyStatistics(label=str(item['year'].year), count=item['qty'])
-            for item in unique_by_year_queryset
-        ]
-        visits_by_year = [
-            DailyStatistics(label=str(item['year'].year), count=item['qty'])
-            for item in visits_by_year_queryset
-        ]
-        new_by_year = [
-            DailyStatistics(label=str(item['year'].year), count=item['qty'])
-            for item in new_by_year_queryset
-        ]
-        regions_scope_qs = visited_cities_queryset.filter(city__region_id__isnull=False)
         regions_country_raw = self.request.GET.get('regions_country_code')
-
-        if regions_country_raw is not None:
-            country_code = normalize_treemap_country_code(regions_country_raw)
-            regions_scope_qs = regions_scope_qs.filter(city__country__code=country_code)
-
-        total_region_visits_count = int(regions_scope_qs.count())
-        unique_regions_distinct_qs = regions_scope_qs.values('city__region_id').distinct()
-        unique_regions_total_count = int(unique_regions_distinct_qs.count())
-        new_regions_total_count = unique_regions_total_count
-
-        total_region_visits_by_year_queryset = (
-            regions_scope_qs.annotate(year=TruncYear('date_of_visit'))
-            .exclude(year=None)
-            .values('year')
-            .annotate(qty=Count('id'))
-            .order_by('year')
+        regions_country_code = (
+            normalize_treemap_country_code(regions_country_raw)
+            if regions_country_raw is not None
+            else None
         )
-        total_region_visits_by_year = [
-            DailyStatistics(label=str(item['year'].year), count=item['qty'])
-            for item in total_region_visits_by_year_queryset
-        ]
-
-        unique_regions_by_year_queryset = (
-            regions_scope_qs.annotate(year=TruncYear('date_of_visit'))
-            .exclude(year=None)
-            .values('year')
-            .annotate(qty=Count('city__region_id', distinct=True))
-            .order_by('year')
-        )
-        unique_visited_regions_by_year = [
-            DailyStatistics(label=str(item['year'].year), count=item['qty'])
-            for item in unique_regions_by_year_queryset
-        ]
-
-        new_regions_by_year_map: defaultdict[int, int] = defaultdict(int)
-        for row in regions_scope_qs.values('city__region_id').annotate(
-            first_visit=Min('date_of_visit')
-        ):
-            first_visit = row['first_visit']
-            if first_visit is None:
-                continue
-            new_regions_by_year_map[int(first_visit.year)] += 1
-        new_visited_regions_by_year = [
-            DailyStatistics(label=str(year), count=qty)
-            for year, qty in sorted(new_regions_by_year_map.items())
-        ]
-        now = datetime.datetime.now()
-        if now.month == 12:
-            month_start = datetime.date(now.year - 1, 1, 1)
-        else:
-            month_start = datetime.date(now.year - 2, now.month + 1, 1)
-        month_end = datetime.date(now.year, now.month, calendar.monthrange(now.year, now.month)[1])
+        statistics = get_visited_cities_statistics(user_id, regions_country_code)
 
-        month_range_queryset = visited_cities_queryset.filter(
-            date_of_visit__range=(month_start, month_end)
-        )
-        unique_by_month_queryset = (
-            month_range_queryset.annotate(month=TruncMonth('date_of_visit'))
-            .exclude(month=None)
-            .values('month')
-            .annotate(qty=Count('city_id', distinct=True))
-            .order_by('month')
-        )
-        visits_by_month_queryset = (
-            month_range_queryset.annotate(month=TruncMonth('date_of_visit'))
-            .exclude(month=None)
-            .values('month')
-            .annotate(qty=Count('id'))
-            .order_by('month')
-        )
-        new_by_month_queryset = (
-            month_range_queryset.filter(is_first_visit=True)
-            .annotate(month=TruncMonth('date_of_visit'))
-            .exclude(month=None)
-            .values('month')
-            .annotate(qty=Count('id'))
-            .order_by('month')
-        )
-
-        unique_by_month = [
-            DailyStatistics(label=item['month'].strftime('%m.%Y'), count=item['qty'])
-            for item in unique_by_month_queryset
-        ]
-        visits_by_month = [
-            DailyStatistics(label=item['month'].strftime('%m.%Y'), count=item['qty'])
-            for item in visits_by_month_queryset
-        ]
-        new_by_month = [
-            DailyStatistics(label=item['month'].strftime('%m.%Y'), count=item['qty'])
-            for item in new_by_month_queryset
-        ]
+        unique_total = statistics.unique_cities
+        visits_total = statistics.total_visits
+        total_users_count = User.objects.count()
+        unique_visited_cities_rank = get_unique_visited_cities_rank(unique_total)
+        total_visited_cities_visits_rank = get_total_visits_rank(visits_total)
 
         return PersonalVisitedCitiesOverviewResponse(
             total_users_count=total_users_count,
@@ -276,18 +144,20 @@ class GetPersonalVisitedCitiesOverviewController(Controller[MsgspecSerializer]):
             total_visited_cities_visits=Quantity(count=visits_total),
             total_visited_cities_visits_rank=total_visited_cities_visits_rank,
             new_visited_cities=Quantity(count=unique_total),
-            new_visited_cities_by_year=new_by_year,
-            unique_visited_cities_by_year=unique_by_year,
-            total_visited_cities_visits_by_year=visits_by_year,
-            total_region_visits=Quantity(count=total_region_visits_count),
-            unique_visited_regions=Quantity(count=unique_regions_total_count),
-            new_visited_regions=Quantity(count=new_regions_total_count),
-            total_region_visits_by_year=total_region_visits_by_year,
-            unique_visited_regions_by_year=unique_visited_regions_by_year,
-            new_visited_regions_by_year=new_visited_regions_by_year,
-            new_visited_cities_by_month=new_by_month,
-            unique_visited_cities_by_month=unique_by_month,
-            total_visited_cities_visits_by_month=visits_by_month,
+            new_visited_cities_by_year=_yearly_statistics(statistics.new_cities_by_year),
+            unique_visited_cities_by_year=_yearly_statistics(statistics.unique_cities_by_year),
+            total_visited_cities_visits_by_year=_yearly_statistics(statistics.total_visits_by_year),
+            total_region_visits=Quantity(count=statistics.region_visits),
+            unique_visited_regions=Quantity(count=statistics.unique_regions),
+            new_visited_regions=Quantity(count=statistics.unique_regions),
+            total_region_visits_by_year=_yearly_statistics(statistics.region_visits_by_year),
+            unique_visited_regions_by_year=_yearly_statistics(statistics.unique_regions_by_year),
+            new_visited_regions_by_year=_yearly_statistics(statistics.new_regions_by_year),
+            new_visited_cities_by_month=_monthly_statistics(statistics.new_cities_by_month),
+            unique_visited_cities_by_month=_monthly_statistics(statistics.unique_cities_by_month),
+            total_visited_cities_visits_by_month=_monthly_statistics(
+                statistics.total_visits_by_month
+            ),
         )
 
 
@@ -506,40 +376,45 @@ class GetRegionsVisitedCitiesCountriesController(Controller[MsgspecSerializer]):
         return RegionsVisitedCitiesCountriesResponse(countries=countries)
 
 
-class GetPersonalVisitedCountriesOverviewController(Controller[MsgspecSerializer]):
-    def get(self) -> PersonalVisitedCountriesOverviewResponse:
-        user_id = resolve_statistics_user_id(
-            self.request.user, self.request.GET.get('shared_user_id')
-        )
-
-        # Общее количество стран
-        total_countries = Country.objects.count()
-        visited_countries = VisitedCountry.objects.filter(user_id=user_id).count()
+@cached_user_stats('visited-countries:overview', ttl_seconds=60 * 60)
+def get_visited_countries_overview(user_id: int) -> PersonalVisitedCountriesOverviewResponse:
+    # Общее количество стран
+    total_countries = Country.objects.count()
+    visited_countries = VisitedCountry.objects.filter(user_id=user_id).count()
 
-        # По частям света
-        parts_of_the_world = PartOfTheWorld.objects.all().order_by('name')
-        by_location = []
+    # По частям света
+    parts_of_the_world = PartOfTheWorld.objects.all().order_by('name')
+    by_location = []
 
-        for part in parts_of_the_world:
-            loc_total = Country.objects.filter(location__part_of_the_world=part).count()
+    for part in parts_of_the_world:
+        loc_total = Country.objects.filter(location__part_of_the_world=part).count()
 
-            if loc_total == 0:
-                continue
+        if loc_total == 0:
+            continue
 
-            loc_visited = VisitedCountry.objects.filter(
-                user_id=user_id,
-                country__location__part_of_the_world=part,
-            ).count()
-            by_location.append(
-                VisitedCountriesByLocationItem(
-                    location_name=part.name,
-                    visited=loc_visited,
-                    total=loc_total,
-                )
+        loc_visited = VisitedCountry.objects.filter(
+            user_id=user_id,
+            country__location__part_of_the_world=part,
+        ).count()
+        by_location.append(
+            VisitedCountriesByLocationItem(
+                location_name=part.name,
+                visited=loc_visited,
+                total=loc_total,
             )
+        )
+
+    return PersonalVisitedCountriesOverviewResponse(
+        visited=visited_countries,
+        total=total_countries,
+        by_location=by_location,
+    )
 
-        return PersonalVisitedCountriesOverviewResponse(
-            visited=visited_countries,
-            total=total_countries,
-            by_location=by_location,
+
+class GetPersonalVisitedCountriesOverviewController(Controller[MsgspecSerializer]):
+    def get(self) -> PersonalVisitedCountriesOverviewResponse:
+        user_id = resolve_statistics_user_id(
+            self.request.user, self.request.GET.get('shared_user_id')
         )
+
+        return get_visited_countries_overview(user_id)
@@ -0,0 +1,335 @@
+"""
+Фоновая выгрузка статистики пользователя в файл.
+
+Большие отчёты (например, CityReport с группировкой городов) не формируются в запросе:
+запрос ставит в очередь задачу ExportJob, а команда `process_export_jobs` формирует файл
+тем же потоковым сериализатором, что и прямое скачивание, и сохраняет его в ExportStorage.
+Клиент опрашивает статус задачи и получает подписанную ссылку на готовый файл.
+
+Повторный запрос той же выгрузки, пока статистика пользователя не менялась (совпадает
+поколение из `services.cache.get_stats_generation`), возвращает уже существующую задачу.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from types import TracebackType
+from datetime import datetime, timedelta
+from typing import TypeVar
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+from account.models import ExportJob
+from account.report import CityReport, Column, Record, Report, Row
+from account.serializer import (
+    CsvSerializer,
+    GeoJsonSerializer,
+    JsonSerializer,
+    NdjsonSerializer,
+    ParquetSerializer,
+    Serializer,
+    TxtSerializer,
+    XlsSerializer,
+)
+from services.cache import get_stats_generation
+from services.metrics import QueueDepthCollector
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+SERIALIZERS: dict[str, type[Serializer]] = {
+    ExportJob.FileType.TXT: TxtSerializer,
+    ExportJob.FileType.CSV: CsvSerializer,
+    ExportJob.FileType.JSON: JsonSerializer,
+    ExportJob.FileType.XLS: XlsSerializer,
+    ExportJob.FileType.PARQUET: ParquetSerializer,
+    ExportJob.FileType.NDJSON: NdjsonSerializer,
+    ExportJob.FileType.GEOJSON: GeoJsonSerializer,
+}
+
+# Считается при сборе метрик в веб-процессе, см. analytics.views.prometheus_metrics_view
+EXPORT_JOBS_QUEUE_DEPTH = QueueDepthCollector(
+    'account_export_jobs_queue_depth',
+    'Export jobs waiting in the queue',
+    lambda: ExportJob.objects.filter(status=ExportJob.Status.PENDING).count(),
+)
+EXPORT_JOB_LATENCY_SECONDS = Histogram(
+    'account_export_job_latency_seconds',
+    'Time from enqueueing an export job to its file being ready',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+EXPORT_JOB_DURATION_SECONDS = Histogram(
+    'account_export_job_duration_seconds',
+    'Time spent generating and uploading one export file',
+    buckets=(0.5, 1, 5, 15, 30, 60, 120, 300, 600),
+)
+EXPORT_JOBS_FINISHED = Counter(
+    'account_export_jobs_finished_total',
+    'Export jobs finished by the worker',
+    ['status'],
+)
+EXPORT_JOBS_DEDUPLICATED = Counter(
+    'account_export_jobs_deduplicated_total',
+    'Export requests answered with an existing job',
+)
+
+
+def create_report(reporttype: str, user_id: int, group_city: bool = False) -> Report | None:
+    """
+    Возвращает отчёт указанного типа или None, если тип неизвестен.
+    Чтобы добавить новый тип отчёта, достаточно реализовать интерфейс report.Report
+    и добавить его сюда и в ExportJob.ReportType.
+    """
+    if reporttype == ExportJob.ReportType.CITY:
+        return CityReport(user_id, group_city)
+    return None
+
+
+def create_serializer(filetype: str) -> Serializer | None:
+    """
+    Возвращает сериализатор для формата файла или None, если формат неизвестен
+    или недоступен в текущем окружении.
+    Чтобы добавить новый формат, достаточно реализовать интерфейс serializer.Serializer
+    и добавить его в SERIALIZERS и в ExportJob.FileType.
+    """
+    serializer_class = SERIALIZERS.get(filetype)
+    if serializer_class is ParquetSerializer and not ParquetSerializer.is_available():
+        # Без pyarrow Parquet не предлагается в форме выгрузки и считается неизвестным форматом
+        return None
+    return serializer_class() if serializer_class is not None else None
+
+
+def get_export_filename(username: str, serializer: Serializer, created_at: datetime) -> str:
+    return f'MoiGoroda__{username}__{int(created_at.timestamp())}.{serializer.filetype()}'
+
+
+def request_export(user_id: int, reporttype: str, filetype: str, group_city: bool) -> ExportJob:
+    """
+    Ставит в очередь выгрузку статистики пользователя `user_id`.
+    Если такая же выгрузка уже поставлена или готова для текущего поколения статистики,
+    возвращает её. Упавшие выгрузки не переиспользуются.
+    """
+    lookup = {
+        'user_id': user_id,
+        'reporttype': reporttype,
+        'filetype': filetype,
+        'group_city': group_city,
+        'stats_generation': get_stats_generation(user_id),
+    }
+    active_jobs = ExportJob.objects.filter(**lookup).exclude(status=ExportJob.Status.FAILED)
+
+    job = active_jobs.first()
+    if job is not None:
+        EXPORT_JOBS_DEDUPLICATED.inc()
+        return job
+
+    try:
+        with transaction.atomic():
+            return ExportJob.objects.create(**lookup)
+    except IntegrityError:
+        # Такую же задачу одновременно поставил параллельный запрос
+        EXPORT_JOBS_DEDUPLICATED.inc()
+        return active_jobs.get()
+
+
+def get_download_url(job: ExportJob) -> str | None:
+    """Возвращает подписанную ссылку на файл готовой выгрузки."""
+    if job.status != ExportJob.Status.DONE or not job.file:
+        return None
+    url: str = job.file.url
+    return url
+
+
+def claim_export_job() -> ExportJob | None:
+    """
+    Забирает из очереди самую старую задачу и переводит её в статус «Формируется».
+    Задача блокируется с SKIP LOCKED, поэтому несколько обработчиков не возьмут одну задачу.
+    Задачи, прогресс которых давно не обновлялся (обработчик упал), забираются повторно.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ExportJob.Status.PENDING)
+                | Q(status=ExportJob.Status.RUNNING, updated_at__lt=stale_before)
+            )
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ExportJob.Status.RUNNING
+        job.progress = 0
+        job.started_at = now
+        job.save(update_fields=['status', 'progress', 'started_at', 'updated_at'])
+    return job
+
+
+class _ProgressReport(Report):
+    """
+    Отчёт-обёртка, который при чтении строк записывает прогресс задачи выгрузки
+    при каждом изменении процента. Сериализатор может пройти отчёт несколько раз,
+    поэтому прогресс не уменьшается.
+    """
+
+    def __init__(self, report: Report, job: ExportJob) -> None:
+        self.report = report
+        self.job = job
+        self.total = report.count_rows()
+
+    def _track(self, rows: Iterable[T]) -> Iterator[T]:
+        read = 0
+        for row in rows:
+            yield row
+            read += 1
+            # 100% выставляется только после сохранения файла
+            progress = min(99, read * 100 // self.total) if self.total else 0
+            if progress > self.job.progress:
+                self.job.progress = progress
+                ExportJob.objects.filter(pk=self.job.pk).update(
+                    progress=progress, updated_at=timezone.now()
+                )
+
+    def iter_report(self) -> Iterator[Row]:
+        return self._track(self.report.iter_report())
+
+    def iter_records(self) -> Iterator[Record]:
+        return self._track(self.report.iter_records())
+
+    def get_columns(self) -> tuple[Column, ...]:
+        return self.report.get_columns()
+
+    def count_rows(self) -> int:
+        return self.total
+
+
+class _Heartbeat:
+    """
+    Пока формируется выгрузка, раз в EXPORT_JOB_HEARTBEAT_SECONDS обновляет `updated_at`
+    задачи из отдельного потока. Прогресс растёт только при чтении строк, а сохранение
+    файла в хранилище или повторный проход сериализатора могут длиться дольше
+    EXPORT_JOB_STALE_SECONDS — без сигнала жизни `claim_export_job` отдал бы такую задачу
+    второму обработчику.
+    """
+
+    def __init__(self, job: ExportJob) -> None:
+        self.job_pk = job.pk
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'export-job-{job.pk}', daemon=True)
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(settings.EXPORT_JOB_HEARTBEAT_SECONDS):
+                ExportJob.objects.filter(pk=self.job_pk, status=ExportJob.Status.RUNNING).update(
+                    updated_at=timezone.now()
+                )
+        except Exception:
+            logger.exception('Export job %s heartbeat failed', self.job_pk)
+        finally:
+            # У потока собственное соединение с базой данных
+            connection.close()
+
+    def __enter__(self) -> _Heartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_export_job(job: ExportJob) -> bool:
+    """
+    Формирует файл выгрузки и сохраняет его в хранилище задачи.
+    Строки читаются из базы порциями и сразу пишутся во временный файл на диске,
+    поэтому память не зависит от размера отчёта. Возвращает True, если файл сформирован.
+    """
+    started_at = time.monotonic()
+    report = create_report(job.reporttype, job.user_id, job.group_city)
+    serializer = create_serializer(job.filetype)
+
+    try:
+        if report is None or serializer is None:
+            raise ValueError(f'Unknown export "{job.reporttype}.{job.filetype}"')
+
+        with _Heartbeat(job), tempfile.TemporaryFile() as file:
+            for chunk in serializer.stream_report(_ProgressReport(report, job)):
+                file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            file.seek(0)
+            filename = get_export_filename(job.user.username, serializer, job.created_at)
+            job.file.save(filename, File(file), save=False)
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        job.status = ExportJob.Status.FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+        EXPORT_JOBS_FINISHED.labels(status=ExportJob.Status.FAILED).inc()
+        return False
+
+    job.status = ExportJob.Status.DONE
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'progress', 'finished_at', 'updated_at'])
+
+    EXPORT_JOB_DURATION_SECONDS.observe(time.monotonic() - started_at)
+    EXPORT_JOB_LATENCY_SECONDS.observe((job.finished_at - job.created_at).total_seconds())
+    EXPORT_JOBS_FINISHED.labels(status=ExportJob.Status.DONE).inc()
+    return True
+
+
+def delete_expired_export_jobs() -> int:
+    """
+    Удаляет завершённые выгрузки старше EXPORT_JOB_RETENTION_HOURS вместе с их файлами.
+    Возвращает количество удалённых задач.
+    """
+    expired_before = timezone.now() - timedelta(hours=settings.EXPORT_JOB_RETENTION_HOURS)
+    deleted = 0
+    for job in ExportJob.objects.filter(finished_at__lt=expired_before).iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
+
+
+def process_export_queue(max_jobs: int | None = None) -> int:
+    """
+    Удаляет устаревшие выгрузки и формирует задачи из очереди, пока она не опустеет
+    или не будет обработано `max_jobs` задач. Возвращает количество обработанных задач.
+    """
+    delete_expired_export_jobs()
+
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_export_job()
+        if job is None:
+            break
+        run_export_job(job)
+        processed += 1
+
+    return processed
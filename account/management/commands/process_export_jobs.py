@@ -0,0 +1,49 @@
+"""
+Команда для формирования файлов выгрузки статистики из очереди ExportJob.
+Запускается по cron или постоянно работающим процессом с ключом `--watch`.
+Процесс должен получать ту же переменную PROMETHEUS_MULTIPROC_DIR, что и Gunicorn,
+иначе его метрики не попадут в /metrics (см. раздел README о фоновых обработчиках).
+"""
+
+import time
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from account.export_jobs import process_export_queue
+from services.metrics import UNSHARED_WORKER_METRICS_WARNING, worker_metrics_are_shared
+
+
+class Command(BaseCommand):
+    help = 'Формирует файлы выгрузки статистики пользователей по задачам из очереди.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Максимальное количество задач, обрабатываемых за один проход.',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Не завершаться после опустошения очереди, а ждать новые задачи.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах между проверками пустой очереди в режиме --watch.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        if not worker_metrics_are_shared():
+            self.stderr.write(self.style.WARNING(UNSHARED_WORKER_METRICS_WARNING))
+        while True:
+            processed = process_export_queue(max_jobs=options['max_jobs'])
+            if not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Обработано задач выгрузки: {processed}'))
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:24
+
+import MoiGoroda.storages
+import account.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('account', '0007_group_user_alter_userconsent_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'reporttype',
+                    models.CharField(
+                        choices=[('city', 'Города')], max_length=16, verbose_name='Тип отчёта'
+                    ),
+                ),
+                (
+                    'filetype',
+                    models.CharField(
+                        choices=[('txt', 'TXT'), ('csv', 'CSV'), ('json', 'JSON'), ('xls', 'XLSX')],
+                        max_length=8,
+                        verbose_name='Формат файла',
+                    ),
+                ),
+                (
+                    'group_city',
+                    models.BooleanField(default=False, verbose_name='Группировать города'),
+                ),
+                ('stats_generation', models.BigIntegerField(verbose_name='Поколение статистики')),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'В очереди'),
+                            ('running', 'Формируется'),
+                            ('done', 'Готова'),
+                            ('failed', 'Ошибка'),
+                        ],
+                        default='pending',
+                        max_length=10,
+                        verbose_name='Статус',
+                    ),
+                ),
+                (
+                    'progress',
+                    models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %'),
+                ),
+                (
+                    'file',
+                    models.FileField(
+                        blank=True,
+                        storage=MoiGoroda.storages.ExportStorage(),
+                        upload_to=account.models.export_job_upload_to,
+                        verbose_name='Файл',
+                    ),
+                ),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name='Дата постановки в очередь'
+                    ),
+                ),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                (
+                    'started_at',
+                    models.DateTimeField(blank=True, null=True, verbose_name='Дата начала'),
+                ),
+                (
+                    'finished_at',
+                    models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения'),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='export_jobs',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Пользователь',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Выгрузка статистики',
+                'verbose_name_plural': 'Выгрузки статистики',
+                'ordering': ('created_at',),
+                'indexes': [
+                    models.Index(fields=['status', 'created_at'], name='export_job_status_created')
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        condition=models.Q(('status', 'failed'), _negated=True),
+                        fields=('user', 'reporttype', 'filetype', 'group_city', 'stats_generation'),
+                        name='unique_active_export_job',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_exportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='filetype',
+            field=models.CharField(choices=[('txt', 'TXT'), ('csv', 'CSV'), ('json', 'JSON'), ('xls', 'XLSX'), ('parquet', 'Parquet'), ('ndjson', 'NDJSON (gzip)'), ('geojson', 'GeoJSON')], max_length=8, verbose_name='Формат файла'),
+        ),
+    ]
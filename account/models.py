@@ -7,11 +7,15 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import uuid
+
 from django.db import models
 from django.db.models import CASCADE
 from django.contrib.auth.models import User as DjangoUser, Group as DjangoGroup
 from django.urls import reverse
 
+from MoiGoroda.storages import ExportStorage
+
 
 class User(DjangoUser):
     """Прокси-модель для добавления русских названий в админке."""
@@ -74,3 +78,84 @@ class UserConsent(models.Model):
     class Meta:
         verbose_name = 'Согласие пользователя'
         verbose_name_plural = 'Согласия пользователей'
+
+
+def export_job_upload_to(instance: 'ExportJob', filename: str) -> str:
+    return f'exports/{instance.user_id}/{filename}'
+
+
+class ExportJob(models.Model):
+    """
+    Задача на выгрузку статистики пользователя в файл.
+    Файл формируется вне запроса командой `process_export_jobs` и сохраняется в ExportStorage.
+    """
+
+    class ReportType(models.TextChoices):
+        CITY = 'city', 'Города'
+
+    class FileType(models.TextChoices):
+        TXT = 'txt', 'TXT'
+        CSV = 'csv', 'CSV'
+        JSON = 'json', 'JSON'
+        XLS = 'xls', 'XLSX'
+        PARQUET = 'parquet', 'Parquet'
+        NDJSON = 'ndjson', 'NDJSON (gzip)'
+        GEOJSON = 'geojson', 'GeoJSON'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Формируется'
+        DONE = 'done', 'Готова'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name='ID')
+    user = models.ForeignKey(
+        DjangoUser,
+        on_delete=CASCADE,
+        related_name='export_jobs',
+        verbose_name='Пользователь',
+    )
+    reporttype = models.CharField(
+        max_length=16, choices=ReportType.choices, verbose_name='Тип отчёта'
+    )
+    filetype = models.CharField(max_length=8, choices=FileType.choices, verbose_name='Формат файла')
+    group_city = models.BooleanField(default=False, verbose_name='Группировать города')
+    stats_generation = models.BigIntegerField(verbose_name='Поколение статистики')
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус',
+    )
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %')
+    file = models.FileField(
+        upload_to=export_job_upload_to,
+        storage=ExportStorage(),
+        blank=True,
+        verbose_name='Файл',
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата изменения')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата начала')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата завершения')
+
+    def __str__(self) -> str:
+        return f'Выгрузка {self.reporttype}.{self.filetype} пользователя {self.user}'
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'Выгрузка статистики'
+        verbose_name_plural = 'Выгрузки статистики'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='export_job_status_created'),
+        ]
+        constraints = [
+            # Повторный запрос той же выгрузки при неизменной статистике возвращает
+            # уже существующую задачу, упавшие задачи можно запустить заново
+            models.UniqueConstraint(
+                fields=['user', 'reporttype', 'filetype', 'group_city', 'stats_generation'],
+                condition=~models.Q(status='failed'),
+                name='unique_active_export_job',
+            ),
+        ]
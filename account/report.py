@@ -8,6 +8,11 @@ Licensed under the Apache License, Version 2.0
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Literal
 
 from django.db.models import F
 
@@ -16,13 +21,84 @@ from city.services.sort import apply_sort_to_queryset
 from services.db.area_repo import get_visited_areas
 from region.services.db import get_all_region_with_visited_cities
 
+Row = tuple[str | int | float, ...]
+# Строка отчёта без оформления для чтения человеком: пропуски — None, даты — date
+Record = tuple[str | int | float | bool | date | None, ...]
+
+ColumnType = Literal['string', 'integer', 'float', 'boolean', 'date']
+
+# Количество строк, которое читается из курсора базы данных за один раз
+REPORT_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class Column:
+    """Столбец типизированной выгрузки."""
+
+    name: str
+    type: ColumnType
+
+
+# Координаты города идут последними: по ним GeoJsonSerializer строит геометрию
+CITY_COLUMNS = (
+    Column('city', 'string'),
+    Column('region', 'string'),
+    Column('country', 'string'),
+    Column('date_of_visit', 'date'),
+    Column('has_souvenir', 'boolean'),
+    Column('rating', 'integer'),
+    Column('latitude', 'float'),
+    Column('longitude', 'float'),
+)
+GROUPED_CITY_COLUMNS = (
+    Column('city', 'string'),
+    Column('region', 'string'),
+    Column('country', 'string'),
+    Column('number_of_visits', 'integer'),
+    Column('first_visit_date', 'date'),
+    Column('last_visit_date', 'date'),
+    Column('has_souvenir', 'boolean'),
+    Column('average_rating', 'float'),
+    Column('latitude', 'float'),
+    Column('longitude', 'float'),
+)
+
 
 class Report(ABC):
     @abstractmethod
     def __init__(self, user_id: int) -> None: ...
 
     @abstractmethod
-    def get_report(self) -> list[tuple[str | int | float, ...]]: ...
+    def iter_report(self) -> Iterator[Row]:
+        """
+        Возвращает строки отчёта по одной, первая строка — заголовки столбцов.
+        Каждый вызов заново читает данные, поэтому отчёт можно пройти несколько раз.
+        """
+
+    def get_report(self) -> list[Row]:
+        return list(self.iter_report())
+
+    def count_rows(self) -> int:
+        """Возвращает количество строк отчёта без строки заголовков."""
+        return sum(1 for _ in self.iter_report()) - 1
+
+    def get_columns(self) -> tuple[Column, ...]:
+        """
+        Возвращает столбцы записей iter_records. По умолчанию все столбцы строковые
+        и называются так же, как заголовки отчёта.
+        """
+        header = next(self.iter_report(), ())
+        return tuple(Column(str(title), 'string') for title in header)
+
+    def iter_records(self) -> Iterator[Record]:
+        """
+        Возвращает строки отчёта без заголовков со значениями типов из get_columns()
+        для типизированных форматов выгрузки.
+        """
+        rows = self.iter_report()
+        next(rows, None)
+        for row in rows:
+            yield tuple(str(value) for value in row)
 
 
 class CityReport(Report):
@@ -30,84 +106,132 @@ class CityReport(Report):
         self.user_id = user_id
         self.group_city = group_city
 
-    def get_report(self) -> list[tuple[str | int | float, ...]]:
-        result: list[tuple[str | int | float, ...]]
+    def count_rows(self) -> int:
+        if self.group_city:
+            return get_unique_visited_cities(self.user_id).count()
+        return get_all_visited_cities(self.user_id).count()
+
+    def get_columns(self) -> tuple[Column, ...]:
+        return GROUPED_CITY_COLUMNS if self.group_city else CITY_COLUMNS
 
+    def _iter_values(self) -> Iterator[tuple[Any, ...]]:
+        """
+        Читает посещения из базы порциями через values_list, без создания объектов моделей,
+        поэтому память не зависит от количества посещений.
+        Значения идут в порядке столбцов get_columns().
+        """
         if self.group_city:
             all_visited_cities = get_unique_visited_cities(self.user_id)
             sorted_visited_cities = apply_sort_to_queryset(
                 all_visited_cities, 'last_visit_date_down'
             )
-            result = [
-                (
-                    'Город',
-                    'Регион',
-                    'Страна',
-                    'Количество посещений',
-                    'Дата первого посещения',
-                    'Дата последнего посещения',
-                    'Наличие сувенира',
-                    'Средняя оценка',
-                ),
-            ]
-            for city in sorted_visited_cities:
-                result.append(
-                    (
-                        city.city.title,
-                        str(city.city.region) if city.city.region else 'Нет региона',
-                        str(city.city.country),
-                        city.number_of_visits,  # type: ignore[attr-defined]
-                        str(city.first_visit_date) if city.first_visit_date else 'Не указана',  # type: ignore[attr-defined]
-                        str(city.last_visit_date) if city.last_visit_date else 'Не указана',  # type: ignore[attr-defined]
-                        '+' if city.has_souvenir else '-',  # type: ignore[attr-defined]
-                        city.average_rating if city.average_rating else '',  # type: ignore[attr-defined]
-                    ),
+            # Агрегаты по посещениям добавлены аннотациями в get_unique_visited_cities
+            return sorted_visited_cities.values_list(  # type: ignore[misc]
+                'city__title',
+                'city__region__full_name',
+                'city__country__name',
+                'number_of_visits',
+                'first_visit_date',
+                'last_visit_date',
+                'has_souvenir',
+                'average_rating',
+                'city__coordinate_width',
+                'city__coordinate_longitude',
+            ).iterator(chunk_size=REPORT_CHUNK_SIZE)
+
+        all_visited_cities = get_all_visited_cities(self.user_id)
+        sorted_visited_cities = all_visited_cities.order_by(
+            F('date_of_visit').desc(nulls_last=True)
+        )
+        return sorted_visited_cities.values_list(
+            'city__title',
+            'city__region__full_name',
+            'city__country__name',
+            'date_of_visit',
+            'has_magnet',
+            'rating',
+            'city__coordinate_width',
+            'city__coordinate_longitude',
+        ).iterator(chunk_size=REPORT_CHUNK_SIZE)
+
+    def iter_report(self) -> Iterator[Row]:
+        if self.group_city:
+            yield (
+                'Город',
+                'Регион',
+                'Страна',
+                'Количество посещений',
+                'Дата первого посещения',
+                'Дата последнего посещения',
+                'Наличие сувенира',
+                'Средняя оценка',
+            )
+            for (
+                title,
+                region,
+                country,
+                number_of_visits,
+                first_visit_date,
+                last_visit_date,
+                has_souvenir,
+                average_rating,
+                *_,
+            ) in self._iter_values():
+                yield (
+                    title,
+                    region if region is not None else 'Нет региона',
+                    country,
+                    number_of_visits,
+                    str(first_visit_date) if first_visit_date else 'Не указана',
+                    str(last_visit_date) if last_visit_date else 'Не указана',
+                    '+' if has_souvenir else '-',
+                    average_rating if average_rating else '',
                 )
         else:
-            all_visited_cities = get_all_visited_cities(self.user_id)
-            sorted_visited_cities = all_visited_cities.order_by(
-                F('date_of_visit').desc(nulls_last=True)
+            yield (
+                'Город',
+                'Регион',
+                'Страна',
+                'Дата посещения',
+                'Наличие сувенира',
+                'Оценка',
             )
-            result = [
-                (
-                    'Город',
-                    'Регион',
-                    'Страна',
-                    'Дата посещения',
-                    'Наличие сувенира',
-                    'Оценка',
-                ),
-            ]
-            for city in sorted_visited_cities:
-                result.append(
-                    (
-                        city.city.title,
-                        str(city.city.region) if city.city.region else 'Нет региона',
-                        str(city.city.country),
-                        str(city.date_of_visit) if city.date_of_visit else 'Не указана',
-                        '+' if city.has_magnet else '-',
-                        city.rating if city.rating else '',
-                    ),
+            for (
+                title,
+                region,
+                country,
+                date_of_visit,
+                has_magnet,
+                rating,
+                *_,
+            ) in self._iter_values():
+                yield (
+                    title,
+                    region if region is not None else 'Нет региона',
+                    country,
+                    str(date_of_visit) if date_of_visit else 'Не указана',
+                    '+' if has_magnet else '-',
+                    rating if rating else '',
                 )
 
-        return result
+    def iter_records(self) -> Iterator[Record]:
+        for values in self._iter_values():
+            yield tuple(float(value) if isinstance(value, Decimal) else value for value in values)
 
 
 class RegionReport(Report):
     def __init__(self, user_id: int) -> None:
         self.user_id = user_id
 
-    def get_report(self) -> list[tuple[str | int | float, ...]]:
+    def iter_report(self) -> Iterator[Row]:
         regions = get_all_region_with_visited_cities(self.user_id)
-        result: list[tuple[str | int | float, ...]] = [
-            (
-                'Регион',
-                'Всего городов',
-                'Посещено городов, шт',
-                'Посещено городов, %',
-                'Осталось посетить, шт',
-            ),
-        ]
+        yield (
+            'Регион',
+            'Всего городов',
+            'Посещено городов, шт',
+            'Посещено городов, %',
+            'Осталось посетить, шт',
+        )
         for region in regions:
             title = region
             num_total_cities = region.num_total  # type: ignore[attr-defined]
@@ -117,33 +241,28 @@ class RegionReport(Report):
             except ZeroDivisionError:
                 ratio_visited_cities = '0%'
             num_not_visited_cities = num_total_cities - num_visited_cities
-            result.append(
-                (
-                    str(title),
-                    num_total_cities,
-                    num_visited_cities,
-                    ratio_visited_cities,
-                    num_not_visited_cities,
-                ),
+            yield (
+                str(title),
+                num_total_cities,
+                num_visited_cities,
+                ratio_visited_cities,
+                num_not_visited_cities,
             )
-        return result
 
 
 class AreaReport(Report):
     def __init__(self, user_id: int) -> None:
         self.user_id = user_id
 
-    def get_report(self) -> list[tuple[str | int | float, ...]]:
+    def iter_report(self) -> Iterator[Row]:
         areas = get_visited_areas(self.user_id)
-        result: list[tuple[str | int | float, ...]] = [
-            (
-                'Федеральный округ',
-                'Всего регионов, шт',
-                'Посещено регионов, шт',
-                'Посещено регионов, %',
-                'Осталось посетить, шт',
-            ),
-        ]
+        yield (
+            'Федеральный округ',
+            'Всего регионов, шт',
+            'Посещено регионов, шт',
+            'Посещено регионов, %',
+            'Осталось посетить, шт',
+        )
         for area in areas:
             title = area.title
             num_total_regions = area.total_regions
@@ -153,13 +272,10 @@ class AreaReport(Report):
             except ZeroDivisionError:
                 ratio_visited_regions = '0%'
             num_not_visited_regions = num_total_regions - num_visited_regions
-            result.append(
-                (
-                    str(title),
-                    num_total_regions,
-                    num_visited_regions,
-                    ratio_visited_regions,
-                    num_not_visited_regions,
-                ),
+            yield (
+                str(title),
+                num_total_regions,
+                num_visited_regions,
+                ratio_visited_regions,
+                num_not_visited_regions,
             )
-        return result
@@ -8,17 +8,55 @@ Licensed under the Apache License, Version 2.0
 """
 
 import csv
+import itertools
 import json
+import tempfile
+import textwrap
+import zlib
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date
 from io import StringIO, BytesIO
-from typing import Sequence
+from typing import Any, Sequence
 
 import openpyxl  # type: ignore[import-untyped]
 
+from account.report import Column, Record, Report
+
+try:
+    import pyarrow  # type: ignore[import-untyped,import-not-found,unused-ignore]
+    import pyarrow.parquet  # type: ignore[import-untyped,import-not-found,unused-ignore]
+except ImportError:  # pragma: no cover - fallback for environments without optional dependency
+    pyarrow = None
+
+Row = tuple[str | int | float, ...]
+# Функция, которая при каждом вызове заново возвращает строки отчёта
+RowsFactory = Callable[[], Iterable[Row]]
+# Функция, которая при каждом вызове заново возвращает типизированные записи отчёта
+RecordsFactory = Callable[[], Iterable[Record]]
+
+# Количество строк отчёта, которые отдаются клиенту одним фрагментом
+STREAM_BATCH_SIZE = 500
+# Количество записей в одной группе строк Parquet
+RECORD_BATCH_SIZE = 10_000
+# Размер фрагмента при отдаче готового файла
+FILE_CHUNK_SIZE = 64 * 1024
+
 
 class Serializer(ABC):
     @abstractmethod
-    def convert(self, report: Sequence[tuple[str | int | float, ...]]) -> StringIO | BytesIO: ...
+    def convert(self, report: Sequence[Row]) -> StringIO | BytesIO: ...
+
+    @abstractmethod
+    def stream(self, rows: RowsFactory) -> Iterator[str] | Iterator[bytes]:
+        """
+        Возвращает файл отчёта по частям для StreamingHttpResponse.
+        Строки отчёта не накапливаются в памяти целиком.
+        """
+
+    def stream_report(self, report: Report) -> Iterator[str] | Iterator[bytes]:
+        """Возвращает файл отчёта `report` по частям."""
+        return self.stream(report.iter_report)
 
     @abstractmethod
     def content_type(self) -> str: ...
@@ -28,23 +66,29 @@ class Serializer(ABC):
 
 
 class TxtSerializer(Serializer):
-    def convert(self, report: Sequence[tuple[str | int | float, ...]]) -> StringIO:
-        buffer = StringIO()
-        number_of_symbols = self.__get_max_length(report)
-        for report_line in report:
-            buffer.write(self.__get_formated_row(report_line, number_of_symbols))
-        return buffer
+    def convert(self, report: Sequence[Row]) -> StringIO:
+        return StringIO(''.join(self.stream(lambda: report)))
+
+    def stream(self, rows: RowsFactory) -> Iterator[str]:
+        # Ширина столбцов известна только после просмотра всех строк,
+        # поэтому отчёт проходится дважды вместо того, чтобы храниться в памяти
+        number_of_symbols = self.__get_max_length(rows())
+        for batch in itertools.batched(rows(), STREAM_BATCH_SIZE):
+            yield ''.join(self.__get_formated_row(row, number_of_symbols) for row in batch)
 
     @staticmethod
-    def __get_max_length(row: Sequence[Sequence[str | int | float]]) -> list[int]:
+    def __get_max_length(rows: Iterable[Sequence[str | int | float]]) -> list[int]:
         """
         Определяет максимальную длину элементов, расположенных в одном столбике многомерного массива.
         Возвращает список с максимальными длинами для каждого столбика.
-        Количество элементов равно количеству столбиков в оригинальной итерируемом объекте.
+        Количество элементов равно количеству столбиков в первой строке.
         """
-        number_of_symbols = []
-        for index, value in enumerate(row[0]):
-            number_of_symbols.append(len(max((str(x[index]) for x in row), key=len)))
+        number_of_symbols: list[int] = []
+        for row in rows:
+            if not number_of_symbols:
+                number_of_symbols = [0] * len(row)
+            for index, length in enumerate(number_of_symbols):
+                number_of_symbols[index] = max(length, len(str(row[index])))
         return number_of_symbols
 
     @staticmethod
@@ -63,13 +107,21 @@ class TxtSerializer(Serializer):
         return 'txt'
 
 
+class _Echo:
+    """Псевдо-буфер для csv.writer: возвращает записанную строку вместо её сохранения."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
 class CsvSerializer(Serializer):
-    def convert(self, report: Sequence[tuple[str | int | float, ...]]) -> StringIO:
-        csv_buffer = StringIO()
-        csv_writer = csv.writer(csv_buffer, delimiter=',', lineterminator='\n')
-        for line in report:
-            csv_writer.writerow([item for item in line])
-        return csv_buffer
+    def convert(self, report: Sequence[Row]) -> StringIO:
+        return StringIO(''.join(self.stream(lambda: report)))
+
+    def stream(self, rows: RowsFactory) -> Iterator[str]:
+        csv_writer = csv.writer(_Echo(), delimiter=',', lineterminator='\n')
+        for batch in itertools.batched(rows(), STREAM_BATCH_SIZE):
+            yield ''.join(csv_writer.writerow(line) for line in batch)
 
     def content_type(self) -> str:
         return 'text/csv'
@@ -79,15 +131,21 @@ class CsvSerializer(Serializer):
 
 
 class XlsSerializer(Serializer):
-    def convert(self, report: Sequence[tuple[str | int | float, ...]]) -> BytesIO:
-        workbook = openpyxl.Workbook()
-        buffer = BytesIO()
-        worksheet = workbook.active
-        for line in report:
+    def convert(self, report: Sequence[Row]) -> BytesIO:
+        return BytesIO(b''.join(self.stream(lambda: report)))
+
+    def stream(self, rows: RowsFactory) -> Iterator[bytes]:
+        # В режиме write-only openpyxl сразу сбрасывает строки листа во временный файл
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        for line in rows():
             worksheet.append(line)
-        workbook.save(buffer)
 
-        return buffer
+        with tempfile.TemporaryFile() as file:
+            workbook.save(file)
+            file.seek(0)
+            while chunk := file.read(FILE_CHUNK_SIZE):
+                yield chunk
 
     def content_type(self) -> str:
         return 'application/vnd.ms-excel'
@@ -97,13 +155,191 @@ class XlsSerializer(Serializer):
 
 
 class JsonSerializer(Serializer):
-    def convert(self, report: Sequence[tuple[str | int | float, ...]]) -> StringIO:
-        buffer = StringIO()
-        json.dump(report, buffer, indent=4, ensure_ascii=False)
-        return buffer
+    def convert(self, report: Sequence[Row]) -> StringIO:
+        return StringIO(''.join(self.stream(lambda: report)))
+
+    def stream(self, rows: RowsFactory) -> Iterator[str]:
+        # Формат совпадает с json.dump(report, indent=4): каждая строка — вложенный массив
+        separator = '[\n'
+        for batch in itertools.batched(rows(), STREAM_BATCH_SIZE):
+            yield separator + ',\n'.join(
+                textwrap.indent(json.dumps(line, indent=4, ensure_ascii=False), '    ')
+                for line in batch
+            )
+            separator = ',\n'
+        yield '[]' if separator == '[\n' else '\n]'
 
     def content_type(self) -> str:
         return 'application/json'
 
     def filetype(self) -> str:
         return 'json'
+
+
+class _RowsReport(Report):
+    """Отчёт из готовых строк, первая строка — заголовки столбцов."""
+
+    def __init__(self, rows: RowsFactory) -> None:
+        self.rows = rows
+
+    def iter_report(self) -> Iterator[Row]:
+        yield from self.rows()
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+
+class RecordSerializer(Serializer):
+    """
+    Сериализатор для аналитики: пишет типизированные записи Report.iter_records,
+    а не оформленные для чтения строки. Строки, переданные в stream(), выгружаются
+    строковыми столбцами с именами из заголовков.
+    """
+
+    def convert(self, report: Sequence[Row]) -> BytesIO:
+        return BytesIO(b''.join(self.stream(lambda: report)))
+
+    def stream(self, rows: RowsFactory) -> Iterator[bytes]:
+        return self.stream_report(_RowsReport(rows))
+
+    def stream_report(self, report: Report) -> Iterator[bytes]:
+        return self.stream_records(report.get_columns(), report.iter_records)
+
+    @abstractmethod
+    def stream_records(self, columns: Sequence[Column], records: RecordsFactory) -> Iterator[bytes]:
+        """Возвращает файл из записей `records` со столбцами `columns` по частям."""
+
+
+class _ChunkSink:
+    """Файл только для записи, из которого записанные данные забираются по частям."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetSerializer(RecordSerializer):
+    """
+    Колоночный формат Apache Parquet со сжатием zstd. Требует необязательную зависимость
+    pyarrow: без неё формат не предлагается в форме выгрузки и отклоняется как неизвестный.
+    """
+
+    @staticmethod
+    def is_available() -> bool:
+        return pyarrow is not None
+
+    def stream_records(self, columns: Sequence[Column], records: RecordsFactory) -> Iterator[bytes]:
+        arrow_types = {
+            'string': pyarrow.string(),
+            'integer': pyarrow.int64(),
+            'float': pyarrow.float64(),
+            'boolean': pyarrow.bool_(),
+            'date': pyarrow.date32(),
+        }
+        schema = pyarrow.schema([(column.name, arrow_types[column.type]) for column in columns])
+        # Каждая порция записей сразу сбрасывается отдельной группой строк
+        sink = _ChunkSink()
+        with pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd') as writer:
+            for batch in itertools.batched(records(), RECORD_BATCH_SIZE):
+                arrays = [
+                    pyarrow.array(values, type=field.type)
+                    for values, field in zip(zip(*batch), schema)
+                ]
+                writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    def content_type(self) -> str:
+        return 'application/vnd.apache.parquet'
+
+    def filetype(self) -> str:
+        return 'parquet'
+
+
+class NdjsonSerializer(RecordSerializer):
+    """JSON Lines, сжатый gzip: по одному объекту на запись, даты в формате ISO 8601."""
+
+    def stream_records(self, columns: Sequence[Column], records: RecordsFactory) -> Iterator[bytes]:
+        names = [column.name for column in columns]
+        # wbits=31 — сжатие в формате gzip, а не zlib
+        compressor = zlib.compressobj(wbits=31)
+        for batch in itertools.batched(records(), STREAM_BATCH_SIZE):
+            lines = ''.join(
+                json.dumps(dict(zip(names, record)), ensure_ascii=False, default=_json_default)
+                + '\n'
+                for record in batch
+            )
+            if chunk := compressor.compress(lines.encode()):
+                yield chunk
+        yield compressor.flush()
+
+    def content_type(self) -> str:
+        return 'application/gzip'
+
+    def filetype(self) -> str:
+        return 'ndjson.gz'
+
+
+class GeoJsonSerializer(RecordSerializer):
+    """
+    GeoJSON FeatureCollection: на каждую запись — точка по столбцам latitude и longitude,
+    остальные столбцы становятся свойствами. Записи без координат выгружаются без геометрии.
+    """
+
+    def stream_records(self, columns: Sequence[Column], records: RecordsFactory) -> Iterator[bytes]:
+        names = [column.name for column in columns]
+        latitude = names.index('latitude') if 'latitude' in names else None
+        longitude = names.index('longitude') if 'longitude' in names else None
+
+        def get_feature(record: Record) -> dict[str, Any]:
+            geometry = None
+            if latitude is not None and longitude is not None:
+                point = (record[longitude], record[latitude])
+                if None not in point:
+                    geometry = {'type': 'Point', 'coordinates': point}
+            properties = {
+                name: value
+                for index, (name, value) in enumerate(zip(names, record))
+                if index not in (latitude, longitude)
+            }
+            return {'type': 'Feature', 'geometry': geometry, 'properties': properties}
+
+        yield b'{"type": "FeatureCollection", "features": [\n'
+        separator = ''
+        for batch in itertools.batched(records(), STREAM_BATCH_SIZE):
+            features = ',\n'.join(
+                json.dumps(get_feature(record), ensure_ascii=False, default=_json_default)
+                for record in batch
+            )
+            yield (separator + features).encode()
+            separator = ',\n'
+        yield b'\n]}\n'
+
+    def content_type(self) -> str:
+        return 'application/geo+json'
+
+    def filetype(self) -> str:
+        return 'geojson'
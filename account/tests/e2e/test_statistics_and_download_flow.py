@@ -34,8 +34,8 @@ def test_view_statistics_and_download_report_flow(client: Any, django_user_model
     assert 'fake_statistics' not in response.context
 
     # Шаг 3: Скачиваем отчёт в формате TXT
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
         with patch('account.views.download.logger'):
             response = client.post(
                 reverse('download'), data={'reporttype': 'city', 'filetype': 'txt'}
@@ -46,8 +46,8 @@ def test_view_statistics_and_download_report_flow(client: Any, django_user_model
     assert '.txt' in response['Content-Disposition']
 
     # Шаг 4: Скачиваем отчёт в формате CSV
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
         with patch('account.views.download.logger'):
             response = client.post(
                 reverse('download'), data={'reporttype': 'city', 'filetype': 'csv'}
@@ -57,8 +57,8 @@ def test_view_statistics_and_download_report_flow(client: Any, django_user_model
     assert response['Content-Type'] == 'text/csv'
 
     # Шаг 5: Скачиваем отчёт в формате JSON
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
         with patch('account.views.download.logger'):
             response = client.post(
                 reverse('download'), data={'reporttype': 'city', 'filetype': 'json'}
@@ -133,8 +133,8 @@ def test_download_multiple_report_types_flow(client: Any, django_user_model: Any
     client.force_login(user)
 
     # Шаг 2: Скачиваем отчёт о городах без группировки
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [
             ('Город', 'Дата'),
             ('Москва', '2024-01-01'),
         ]
@@ -150,8 +150,8 @@ def test_download_multiple_report_types_flow(client: Any, django_user_model: Any
     assert mock_report.call_count == 1
 
     # Шаг 3: Скачиваем отчёт о городах с группировкой
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [
             ('Город', 'Количество посещений'),
             ('Москва', '5'),
         ]
@@ -165,8 +165,8 @@ def test_download_multiple_report_types_flow(client: Any, django_user_model: Any
     assert response['Content-Type'] == 'text/csv'
 
     # Шаг 4: Скачиваем в формате Excel
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
         with patch('account.views.download.logger'):
             response = client.post(
                 reverse('download'), data={'reporttype': 'city', 'filetype': 'xls'}
@@ -239,8 +239,8 @@ def test_download_after_logout_redirects_to_signin(client: Any, django_user_mode
     client.force_login(user)
 
     # Шаг 2: Успешно скачиваем отчёт
-    with patch('account.views.download.CityReport') as mock_report:
-        mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+    with patch('account.export_jobs.CityReport') as mock_report:
+        mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
         with patch('account.views.download.logger'):
             response = client.post(
                 reverse('download'), data={'reporttype': 'city', 'filetype': 'txt'}
@@ -299,8 +299,8 @@ def test_full_statistics_workflow(mock_logger: Any, client: Any, django_user_mod
     # Шаг 5: Скачиваем отчёты в разных форматах
     formats = ['txt', 'csv', 'json', 'xls']
     for fmt in formats:
-        with patch('account.views.download.CityReport') as mock_report:
-            mock_report.return_value.get_report.return_value = [('Город',), ('Москва',)]
+        with patch('account.export_jobs.CityReport') as mock_report:
+            mock_report.return_value.iter_report.return_value = [('Город',), ('Москва',)]
             with patch('account.views.download.logger'):
                 response = client.post(
                     reverse('download'), data={'reporttype': 'city', 'filetype': fmt}
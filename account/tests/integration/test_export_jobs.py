@@ -0,0 +1,359 @@
+"""
+Интеграционные тесты фоновой выгрузки статистики (account/export_jobs.py).
+
+Проверяется:
+- Постановка выгрузки в очередь и опрос её статуса
+- Дедупликация повторных запросов по поколению статистики
+- Формирование файла обработчиком очереди и ссылка на готовый файл
+- Перезапуск упавших и брошенных выгрузок, удаление устаревших
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+import json
+import time
+from collections.abc import Generator
+from io import BytesIO
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from account.export_jobs import (
+    EXPORT_JOBS_QUEUE_DEPTH,
+    _Heartbeat,
+    claim_export_job,
+    delete_expired_export_jobs,
+    process_export_queue,
+    request_export,
+)
+from account.models import ExportJob
+from account.serializer import ParquetSerializer
+from city.models import City, VisitedCity
+from country.models import Country
+
+
+@pytest.fixture(autouse=True)
+def use_local_storage_for_exports(tmp_path: Path) -> Generator[FileSystemStorage, None, None]:
+    storage = FileSystemStorage(location=tmp_path, base_url='/media/')
+    file_field = ExportJob._meta.get_field('file')
+    original_storage = file_field.storage
+    file_field.storage = storage
+    try:
+        yield storage
+    finally:
+        file_field.storage = original_storage
+
+
+@pytest.fixture
+def user(django_user_model: Any) -> Any:
+    return django_user_model.objects.create_user(username='exporter', password='password123')
+
+
+@pytest.fixture
+def city() -> City:
+    country = Country.objects.create(name='Россия', code='RU')
+    return City.objects.create(
+        title='Москва', country=country, coordinate_width=55.7, coordinate_longitude=37.6
+    )
+
+
+def visit(user: Any, city: City, captured: Any, date_of_visit: date) -> None:
+    with captured(execute=True):
+        VisitedCity.objects.create(
+            user=user, city=city, rating=5, is_first_visit=True, date_of_visit=date_of_visit
+        )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestExportJobViews:
+    """Тесты постановки выгрузки в очередь и опроса её статуса."""
+
+    def test_creates_job_and_returns_its_id(self, client: Any, user: Any) -> None:
+        client.force_login(user)
+
+        response = client.post(
+            reverse('download_job_create'), data={'reporttype': 'city', 'filetype': 'csv'}
+        )
+
+        assert response.status_code == 202
+        job = ExportJob.objects.get()
+        assert response.json() == {
+            'id': str(job.id),
+            'status': 'pending',
+            'progress': 0,
+            'status_url': reverse('download_job_status', kwargs={'job_id': job.id}),
+            'download_url': None,
+        }
+        assert job.user == user
+        assert not job.group_city
+
+    def test_repeat_request_returns_same_job(self, client: Any, user: Any) -> None:
+        client.force_login(user)
+        data = {'reporttype': 'city', 'filetype': 'csv', 'group_city': 'on'}
+
+        first = client.post(reverse('download_job_create'), data=data).json()
+        second = client.post(reverse('download_job_create'), data=data).json()
+        other_format = client.post(
+            reverse('download_job_create'), data={**data, 'filetype': 'json'}
+        ).json()
+
+        assert first['id'] == second['id']
+        assert other_format['id'] != first['id']
+        assert ExportJob.objects.count() == 2
+
+    @pytest.mark.parametrize(
+        'data',
+        [
+            {'reporttype': 'region', 'filetype': 'csv'},
+            {'reporttype': 'city', 'filetype': 'pdf'},
+            {'reporttype': 'city'},
+        ],
+    )
+    def test_incorrect_parameters_return_404(
+        self, client: Any, user: Any, data: dict[str, str]
+    ) -> None:
+        client.force_login(user)
+
+        response = client.post(reverse('download_job_create'), data=data)
+
+        assert response.status_code == 404
+        assert not ExportJob.objects.exists()
+
+    def test_parquet_without_pyarrow_returns_404(self, client: Any, user: Any) -> None:
+        client.force_login(user)
+
+        with patch.object(ParquetSerializer, 'is_available', return_value=False):
+            response = client.post(
+                reverse('download_job_create'), data={'reporttype': 'city', 'filetype': 'parquet'}
+            )
+
+        assert response.status_code == 404
+        assert not ExportJob.objects.exists()
+
+    def test_unauthenticated_user_is_redirected(self, client: Any) -> None:
+        response = client.post(
+            reverse('download_job_create'), data={'reporttype': 'city', 'filetype': 'csv'}
+        )
+
+        assert response.status_code == 302
+        assert response.url.startswith('/account/signin')
+
+    def test_status_of_another_users_job_is_not_found(
+        self, client: Any, user: Any, django_user_model: Any
+    ) -> None:
+        other = django_user_model.objects.create_user(username='other', password='password123')
+        job = request_export(other.id, 'city', 'csv', False)
+        client.force_login(user)
+
+        response = client.get(reverse('download_job_status', kwargs={'job_id': job.id}))
+
+        assert response.status_code == 404
+
+    def test_status_of_finished_job_contains_download_url(
+        self, client: Any, user: Any, city: City, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 1, 1))
+        client.force_login(user)
+        job_id = client.post(
+            reverse('download_job_create'), data={'reporttype': 'city', 'filetype': 'csv'}
+        ).json()['id']
+
+        process_export_queue()
+        response = client.get(reverse('download_job_status', kwargs={'job_id': job_id}))
+
+        data = response.json()
+        assert data['status'] == 'done'
+        assert data['progress'] == 100
+        assert data['download_url'].startswith('/media/exports/')
+        assert data['download_url'].endswith('.csv')
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestExportJobQueue:
+    """Тесты обработчика очереди выгрузок."""
+
+    def test_worker_writes_report_file(
+        self, user: Any, city: City, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 1, 1))
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 6, 1))
+        job = request_export(user.id, 'city', 'csv', False)
+
+        assert process_export_queue() == 1
+
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.DONE
+        assert job.progress == 100
+        assert job.started_at is not None
+        assert job.finished_at is not None
+        assert job.file.name.startswith(f'exports/{user.id}/MoiGoroda__exporter__')
+        with job.file.open('rb') as file:
+            assert file.read().decode() == (
+                'Город,Регион,Страна,Дата посещения,Наличие сувенира,Оценка\n'
+                'Москва,Нет региона,Россия,2024-06-01,-,5\n'
+                'Москва,Нет региона,Россия,2024-01-01,-,5\n'
+            )
+
+    def test_worker_writes_grouped_report(
+        self, user: Any, city: City, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 1, 1))
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 6, 1))
+        job = request_export(user.id, 'city', 'json', True)
+
+        process_export_queue()
+
+        job.refresh_from_db()
+        with job.file.open('rb') as file:
+            rows = json.load(file)
+        assert rows[0][3] == 'Количество посещений'
+        assert rows[1] == [
+            'Москва',
+            'Нет региона',
+            'Россия',
+            2,
+            '2024-01-01',
+            '2024-06-01',
+            '-',
+            5.0,
+        ]
+
+    def test_new_visit_invalidates_finished_job(
+        self, user: Any, city: City, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 1, 1))
+        first = request_export(user.id, 'city', 'csv', False)
+        process_export_queue()
+
+        assert request_export(user.id, 'city', 'csv', False) == first
+
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 6, 1))
+        second = request_export(user.id, 'city', 'csv', False)
+
+        assert second != first
+        assert second.status == ExportJob.Status.PENDING
+
+    def test_failed_job_is_not_reused(self, user: Any) -> None:
+        job = request_export(user.id, 'city', 'csv', False)
+        ExportJob.objects.filter(pk=job.pk).update(filetype='pdf')
+
+        process_export_queue()
+
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.FAILED
+        assert 'pdf' in job.error
+        retry = request_export(user.id, 'city', 'pdf', False)
+        assert retry != job
+        assert retry.status == ExportJob.Status.PENDING
+
+    def test_stale_running_job_is_claimed_again(self, user: Any, settings: Any) -> None:
+        settings.EXPORT_JOB_STALE_SECONDS = 60
+        job = request_export(user.id, 'city', 'csv', False)
+        assert claim_export_job() == job
+        assert claim_export_job() is None
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=120)
+        )
+
+        assert claim_export_job() == job
+
+    def test_queue_depth_counts_pending_jobs_at_collection_time(self, user: Any) -> None:
+        request_export(user.id, 'city', 'csv', False)
+        request_export(user.id, 'city', 'txt', False)
+        claim_export_job()
+
+        [metric] = EXPORT_JOBS_QUEUE_DEPTH.collect()
+
+        assert metric.samples[0].value == 1
+
+    def test_max_jobs_limits_processed_jobs(self, user: Any) -> None:
+        request_export(user.id, 'city', 'csv', False)
+        request_export(user.id, 'city', 'txt', False)
+
+        assert process_export_queue(max_jobs=1) == 1
+        assert ExportJob.objects.filter(status=ExportJob.Status.PENDING).count() == 1
+
+    def test_expired_jobs_are_deleted_with_files(
+        self, user: Any, settings: Any, use_local_storage_for_exports: FileSystemStorage
+    ) -> None:
+        settings.EXPORT_JOB_RETENTION_HOURS = 1
+        job = request_export(user.id, 'city', 'csv', False)
+        process_export_queue()
+        job.refresh_from_db()
+        name = job.file.name
+        assert use_local_storage_for_exports.exists(name)
+
+        ExportJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(hours=2))
+
+        assert delete_expired_export_jobs() == 1
+        assert not ExportJob.objects.exists()
+        assert not use_local_storage_for_exports.exists(name)
+
+    def test_management_command_processes_queue(self, user: Any) -> None:
+        request_export(user.id, 'city', 'txt', False)
+        out = StringIO()
+
+        call_command('process_export_jobs', stdout=out)
+
+        assert 'Обработано задач выгрузки: 1' in out.getvalue()
+        assert ExportJob.objects.get().status == ExportJob.Status.DONE
+
+    def test_worker_writes_parquet_file(
+        self, user: Any, city: City, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+        visit(user, city, django_capture_on_commit_callbacks, date(2024, 1, 1))
+        job = request_export(user.id, 'city', 'parquet', False)
+
+        process_export_queue()
+
+        job.refresh_from_db()
+        assert job.file.name.endswith('.parquet')
+        with job.file.open('rb') as file:
+            table = pyarrow_parquet.read_table(BytesIO(file.read()))
+        assert table.to_pylist() == [
+            {
+                'city': 'Москва',
+                'region': None,
+                'country': 'Россия',
+                'date_of_visit': date(2024, 1, 1),
+                'has_souvenir': False,
+                'rating': 5,
+                'latitude': 55.7,
+                'longitude': 37.6,
+            }
+        ]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_keeps_long_running_job_from_being_claimed_again(
+    user: Any, settings: Any
+) -> None:
+    """Долгое сохранение файла без роста прогресса не делает выгрузку брошенной."""
+    settings.EXPORT_JOB_STALE_SECONDS = 60
+    settings.EXPORT_JOB_HEARTBEAT_SECONDS = 0.01
+    job = request_export(user.id, 'city', 'csv', False)
+    assert claim_export_job() == job
+    ExportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+
+    with _Heartbeat(job):
+        time.sleep(0.2)
+
+    assert claim_export_job() is None
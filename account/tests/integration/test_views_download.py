@@ -10,11 +10,16 @@ Licensed under the Apache License, Version 2.0
 import json
 import openpyxl  # type: ignore[import-untyped]
 import pytest
+from datetime import date
 from typing import Any
 from io import BytesIO
 from django.urls import reverse
 from unittest.mock import patch, Mock
 
+from city.models import City, VisitedCity
+from country.models import Country
+from region.models import Region, RegionType
+
 
 # ===== Фикстуры =====
 
@@ -63,7 +68,7 @@ def test_download_view_unauthenticated(client: Any) -> None:
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_txt_format(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -73,7 +78,7 @@ def test_download_view_txt_format(
 
     # Мокаем CityReport
     mock_report = Mock()
-    mock_report.get_report.return_value = [
+    mock_report.iter_report.return_value = [
         ('Город', 'Регион', 'Дата посещения', 'Наличие сувенира', 'Оценка'),
         ('Москва', 'Москва', '2024-01-01', '+', '5'),
     ]
@@ -88,14 +93,14 @@ def test_download_view_txt_format(
     assert 'Content-Disposition' in response
     assert 'attachment' in response['Content-Disposition']
     assert '.txt' in response['Content-Disposition']
-    assert 'Москва' in response.content.decode()
+    assert 'Москва' in response.getvalue().decode()
 
     mock_logger.info.assert_called()
 
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_csv_format(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -105,7 +110,7 @@ def test_download_view_csv_format(
 
     # Мокаем CityReport
     mock_report = Mock()
-    mock_report.get_report.return_value = [
+    mock_report.iter_report.return_value = [
         ('Город', 'Регион', 'Дата посещения', 'Наличие сувенира', 'Оценка'),
         ('Москва', 'Москва', '2024-01-01', '+', '5'),
     ]
@@ -119,14 +124,14 @@ def test_download_view_csv_format(
     assert response['Content-Type'] == 'text/csv'
     assert '.csv' in response['Content-Disposition']
 
-    content = response.content.decode()
+    content = response.getvalue().decode()
     assert 'Город,Регион,Дата посещения,Наличие сувенира,Оценка' in content
     assert 'Москва,Москва,2024-01-01,+,5' in content
 
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_json_format(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -136,7 +141,7 @@ def test_download_view_json_format(
 
     # Мокаем CityReport
     mock_report = Mock()
-    mock_report.get_report.return_value = [
+    mock_report.iter_report.return_value = [
         ('Город', 'Регион'),
         ('Москва', 'Москва'),
     ]
@@ -150,7 +155,7 @@ def test_download_view_json_format(
     assert response['Content-Type'] == 'application/json'
     assert '.json' in response['Content-Disposition']
 
-    content = response.content.decode()
+    content = response.getvalue().decode()
     parsed = json.loads(content)
     assert isinstance(parsed, list)
     assert len(parsed) == 2
@@ -158,7 +163,7 @@ def test_download_view_json_format(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_xls_format(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -168,7 +173,7 @@ def test_download_view_xls_format(
 
     # Мокаем CityReport
     mock_report = Mock()
-    mock_report.get_report.return_value = [
+    mock_report.iter_report.return_value = [
         ('Город', 'Регион'),
         ('Москва', 'Москва'),
     ]
@@ -183,7 +188,7 @@ def test_download_view_xls_format(
     assert '.xls' in response['Content-Disposition']
 
     # Проверяем, что это валидный Excel файл
-    workbook = openpyxl.load_workbook(BytesIO(response.content))
+    workbook = openpyxl.load_workbook(BytesIO(response.getvalue()))
     worksheet = workbook.active
     assert worksheet['A1'].value == 'Город'
     assert worksheet['B1'].value == 'Регион'
@@ -210,7 +215,7 @@ def test_download_view_invalid_reporttype(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_invalid_filetype(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -220,7 +225,7 @@ def test_download_view_invalid_filetype(
 
     # Мокаем CityReport
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     data = {'reporttype': 'city', 'filetype': 'invalid'}
@@ -233,7 +238,7 @@ def test_download_view_invalid_filetype(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_with_group_city_false(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -242,7 +247,7 @@ def test_download_view_with_group_city_false(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     data = {'reporttype': 'city', 'filetype': 'txt'}
@@ -257,7 +262,7 @@ def test_download_view_with_group_city_false(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_with_group_city_true(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -266,7 +271,7 @@ def test_download_view_with_group_city_true(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     data = {'reporttype': 'city', 'filetype': 'txt', 'group_city': 'on'}
@@ -280,7 +285,7 @@ def test_download_view_with_group_city_true(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_filename_format(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -289,7 +294,7 @@ def test_download_view_filename_format(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     data = {'reporttype': 'city', 'filetype': 'txt'}
@@ -306,7 +311,7 @@ def test_download_view_filename_format(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_multiple_downloads(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -315,7 +320,7 @@ def test_download_view_multiple_downloads(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     # Первое скачивание
@@ -335,7 +340,7 @@ def test_download_view_multiple_downloads(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_empty_report(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -344,7 +349,7 @@ def test_download_view_empty_report(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [
+    mock_report.iter_report.return_value = [
         ('Город', 'Регион', 'Дата посещения', 'Наличие сувенира', 'Оценка')
     ]
     mock_report_class.return_value = mock_report
@@ -354,7 +359,7 @@ def test_download_view_empty_report(
     response = client.post(reverse('download'), data=data)
 
     assert response.status_code == 200
-    content = response.content.decode()
+    content = response.getvalue().decode()
     # Проверяем, что есть заголовки
     assert 'Город' in content
     assert 'Регион' in content
@@ -362,7 +367,7 @@ def test_download_view_empty_report(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_logs_success(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -371,7 +376,7 @@ def test_download_view_logs_success(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     data = {'reporttype': 'city', 'filetype': 'txt'}
@@ -386,7 +391,7 @@ def test_download_view_logs_success(
 
 @pytest.mark.integration
 @pytest.mark.django_db
-@patch('account.views.download.CityReport')
+@patch('account.export_jobs.CityReport')
 @patch('account.views.download.logger')
 def test_download_view_missing_parameters(
     mock_logger: Any, mock_report_class: Any, client: Any, create_test_user: Any
@@ -395,7 +400,7 @@ def test_download_view_missing_parameters(
     client.force_login(create_test_user)
 
     mock_report = Mock()
-    mock_report.get_report.return_value = [('Город',), ('Москва',)]
+    mock_report.iter_report.return_value = [('Город',), ('Москва',)]
     mock_report_class.return_value = mock_report
 
     # Отсутствует filetype
@@ -403,3 +408,153 @@ def test_download_view_missing_parameters(
 
     response = client.post(reverse('download'), data=data)
     assert response.status_code == 404
+
+
+@pytest.fixture
+def visited_cities(create_test_user: Any, django_capture_on_commit_callbacks: Any) -> None:
+    """Создаёт посещения городов: два посещения Москвы и одно посещение города без региона"""
+    country = Country.objects.create(name='Россия', code='RU')
+    region_type = RegionType.objects.create(title='область')
+    region = Region.objects.create(
+        country=country,
+        title='Московская',
+        type=region_type,
+        full_name='Московская область',
+        iso3166='RU-MOS',
+    )
+    moscow = City.objects.create(
+        title='Москва',
+        country=country,
+        region=region,
+        coordinate_width=55.7,
+        coordinate_longitude=37.6,
+    )
+    town = City.objects.create(
+        title='Посёлок', country=country, coordinate_width=56.0, coordinate_longitude=38.0
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        VisitedCity.objects.create(
+            user=create_test_user,
+            city=moscow,
+            rating=5,
+            has_magnet=True,
+            is_first_visit=True,
+            date_of_visit=date(2024, 1, 1),
+        )
+        VisitedCity.objects.create(
+            user=create_test_user,
+            city=moscow,
+            rating=3,
+            is_first_visit=False,
+            date_of_visit=date(2024, 6, 1),
+        )
+        VisitedCity.objects.create(
+            user=create_test_user, city=town, rating=4, is_first_visit=True, date_of_visit=None
+        )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_download_view_streams_city_report(
+    client: Any, create_test_user: Any, visited_cities: None
+) -> None:
+    """Тест что отчёт по посещениям отдаётся потоком и строится из базы данных"""
+    client.force_login(create_test_user)
+
+    response = client.post(reverse('download'), data={'reporttype': 'city', 'filetype': 'csv'})
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response.getvalue().decode() == (
+        'Город,Регион,Страна,Дата посещения,Наличие сувенира,Оценка\n'
+        'Москва,Московская область,Россия,2024-06-01,-,3\n'
+        'Москва,Московская область,Россия,2024-01-01,+,5\n'
+        'Посёлок,Нет региона,Россия,Не указана,-,4\n'
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_download_view_streams_grouped_city_report(
+    client: Any, create_test_user: Any, visited_cities: None
+) -> None:
+    """Тест отчёта с группировкой городов в формате XLSX"""
+    client.force_login(create_test_user)
+
+    response = client.post(
+        reverse('download'), data={'reporttype': 'city', 'filetype': 'xls', 'group_city': 'on'}
+    )
+
+    assert response.status_code == 200
+    worksheet = openpyxl.load_workbook(BytesIO(response.getvalue())).active
+    rows = list(worksheet.iter_rows(values_only=True))
+    assert rows[0][:4] == ('Город', 'Регион', 'Страна', 'Количество посещений')
+    assert rows[1][:7] == (
+        'Москва',
+        'Московская область',
+        'Россия',
+        2,
+        '2024-01-01',
+        '2024-06-01',
+        '+',
+    )
+    assert rows[2][:7] == ('Посёлок', 'Нет региона', 'Россия', 1, 'Не указана', 'Не указана', '-')
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_download_view_streams_grouped_city_report_as_json(
+    client: Any, create_test_user: Any, visited_cities: None
+) -> None:
+    """Тест отчёта с группировкой городов в формате JSON: средняя оценка выгружается числом"""
+    client.force_login(create_test_user)
+
+    response = client.post(
+        reverse('download'), data={'reporttype': 'city', 'filetype': 'json', 'group_city': 'on'}
+    )
+
+    assert response.status_code == 200
+    rows = json.loads(b''.join(response.streaming_content))
+    assert rows[1] == [
+        'Москва',
+        'Московская область',
+        'Россия',
+        2,
+        '2024-01-01',
+        '2024-06-01',
+        '+',
+        4.0,
+    ]
+    assert rows[2][-1] == 4.0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_download_view_streams_geojson_with_coordinates(
+    client: Any, create_test_user: Any, visited_cities: None
+) -> None:
+    """Тест выгрузки посещений в GeoJSON с координатами городов"""
+    client.force_login(create_test_user)
+
+    response = client.post(
+        reverse('download'), data={'reporttype': 'city', 'filetype': 'geojson', 'group_city': 'on'}
+    )
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/geo+json'
+    features = json.loads(response.getvalue())['features']
+    assert features[0] == {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [37.6, 55.7]},
+        'properties': {
+            'city': 'Москва',
+            'region': 'Московская область',
+            'country': 'Россия',
+            'number_of_visits': 2,
+            'first_visit_date': '2024-01-01',
+            'last_visit_date': '2024-06-01',
+            'has_souvenir': True,
+            'average_rating': 4.0,
+        },
+    }
+    assert features[1]['properties']['region'] is None
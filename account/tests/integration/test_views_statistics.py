@@ -42,6 +42,22 @@ def test_statistics_view_get_request_authenticated(client: Any, create_test_user
     assert 'Личная статистика' in response.context['page_title']
 
 
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize('available', [True, False])
+def test_statistics_view_offers_parquet_only_with_pyarrow(
+    client: Any, create_test_user: Any, available: bool
+) -> None:
+    """Тест что Parquet есть в форме выгрузки, только если установлен pyarrow"""
+    client.force_login(create_test_user)
+
+    with patch('account.views.statistics.ParquetSerializer.is_available', return_value=available):
+        response = client.get(reverse('stats'))
+
+    assert response.context['parquet_export_available'] is available
+    assert ('id="parquet-radio"' in response.content.decode()) is available
+
+
 @pytest.mark.integration
 @pytest.mark.django_db
 def test_statistics_view_get_request_unauthenticated(client: Any) -> None:
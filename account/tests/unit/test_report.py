@@ -8,16 +8,30 @@ Licensed under the Apache License, Version 2.0
 """
 
 from datetime import date
+from decimal import Decimal
 
 import pytest
 from typing import Any
 
-from account.report import CityReport, RegionReport, AreaReport
+from account.report import (
+    CITY_COLUMNS,
+    GROUPED_CITY_COLUMNS,
+    REPORT_CHUNK_SIZE,
+    CityReport,
+    Column,
+    RegionReport,
+    AreaReport,
+)
 
 
 # ===== Тесты для CityReport =====
 
 
+def mock_rows(queryset: Any, rows: list[tuple[Any, ...]]) -> None:
+    """Настраивает QuerySet так, чтобы values_list(...).iterator() возвращал строки rows"""
+    queryset.values_list.return_value.iterator.return_value = iter(rows)
+
+
 @pytest.mark.unit
 def test_city_report_with_grouped_cities(mocker: Any) -> None:
     """Тест CityReport с группировкой городов"""
@@ -25,30 +39,32 @@ def test_city_report_with_grouped_cities(mocker: Any) -> None:
     mock_get_unique_cities = mocker.patch('account.report.get_unique_visited_cities')
     mock_apply_sort = mocker.patch('account.report.apply_sort_to_queryset')
 
-    # Подготовка фейковых объектов
-    fake_city_1 = mocker.MagicMock()
-    fake_city_1.city.title = 'Город 1'
-    fake_city_1.city.region.__str__ = mocker.Mock(return_value='Регион 1 область')
-    fake_city_1.city.country.__str__ = mocker.Mock(return_value='Россия')
-    fake_city_1.number_of_visits = 1
-    fake_city_1.first_visit_date = date(2024, 1, 1)
-    fake_city_1.last_visit_date = date(2024, 1, 1)
-    fake_city_1.has_souvenir = False
-    fake_city_1.average_rating = 3.0
-
-    fake_city_2 = mocker.MagicMock()
-    fake_city_2.city.title = 'Город 2'
-    fake_city_2.city.region.__str__ = mocker.Mock(return_value='Регион 2 область')
-    fake_city_2.city.country.__str__ = mocker.Mock(return_value='Россия')
-    fake_city_2.number_of_visits = 2
-    fake_city_2.first_visit_date = date(2022, 1, 1)
-    fake_city_2.last_visit_date = date(2023, 1, 1)
-    fake_city_2.has_souvenir = True
-    fake_city_2.average_rating = 4.0
-
-    # Настраиваем возвращаемые значения моков
-    mock_get_unique_cities.return_value = [fake_city_1, fake_city_2]
-    mock_apply_sort.return_value = [fake_city_1, fake_city_2]
+    # Строки values_list: город, регион, страна, посещения, даты, сувенир, оценка
+    mock_rows(
+        mock_apply_sort.return_value,
+        [
+            (
+                'Город 1',
+                'Регион 1 область',
+                'Россия',
+                1,
+                date(2024, 1, 1),
+                date(2024, 1, 1),
+                False,
+                3.0,
+            ),
+            (
+                'Город 2',
+                'Регион 2 область',
+                'Россия',
+                2,
+                date(2022, 1, 1),
+                date(2023, 1, 1),
+                True,
+                4.0,
+            ),
+        ],
+    )
 
     # Выполняем тестируемый код с группировкой
     report = CityReport(1, group_city=True).get_report()
@@ -70,7 +86,12 @@ def test_city_report_with_grouped_cities(mocker: Any) -> None:
     ]
 
     mock_get_unique_cities.assert_called_once_with(1)
-    mock_apply_sort.assert_called_once_with([fake_city_1, fake_city_2], 'last_visit_date_down')
+    mock_apply_sort.assert_called_once_with(
+        mock_get_unique_cities.return_value, 'last_visit_date_down'
+    )
+    mock_apply_sort.return_value.values_list.return_value.iterator.assert_called_once_with(
+        chunk_size=REPORT_CHUNK_SIZE
+    )
 
 
 @pytest.mark.unit
@@ -78,19 +99,12 @@ def test_city_report_without_grouping(mocker: Any) -> None:
     """Тест CityReport без группировки городов"""
     mock_get_all_cities = mocker.patch('account.report.get_all_visited_cities')
 
-    # Подготовка фейковых объектов
-    fake_city = mocker.MagicMock()
-    fake_city.city.title = 'Город 1'
-    fake_city.city.region.__str__ = mocker.Mock(return_value='Регион 1 область')
-    fake_city.city.country.__str__ = mocker.Mock(return_value='Россия')
-    fake_city.date_of_visit = date(2024, 1, 1)
-    fake_city.has_magnet = True
-    fake_city.rating = 5
-
     # Настраиваем мок QuerySet
-    mock_queryset = mocker.MagicMock()
-    mock_queryset.order_by.return_value = [fake_city]
-    mock_get_all_cities.return_value = mock_queryset
+    mock_queryset = mock_get_all_cities.return_value.order_by.return_value
+    mock_rows(
+        mock_queryset,
+        [('Город 1', 'Регион 1 область', 'Россия', date(2024, 1, 1), True, 5)],
+    )
 
     # Выполняем тестируемый код без группировки
     report = CityReport(1, group_city=False).get_report()
@@ -102,6 +116,9 @@ def test_city_report_without_grouping(mocker: Any) -> None:
     ]
 
     mock_get_all_cities.assert_called_once_with(1)
+    mock_queryset.values_list.return_value.iterator.assert_called_once_with(
+        chunk_size=REPORT_CHUNK_SIZE
+    )
 
 
 @pytest.mark.unit
@@ -110,9 +127,7 @@ def test_city_report_no_visited_cities(mocker: Any) -> None:
     mock_get_all_cities = mocker.patch('account.report.get_all_visited_cities')
 
     # Мокаем пустой QuerySet
-    empty_queryset = mocker.MagicMock()
-    empty_queryset.order_by.return_value = []
-    mock_get_all_cities.return_value = empty_queryset
+    mock_rows(mock_get_all_cities.return_value.order_by.return_value, [])
 
     # Выполнение отчёта
     report = CityReport(1).get_report()
@@ -127,18 +142,10 @@ def test_city_report_no_visited_cities(mocker: Any) -> None:
 def test_city_report_city_without_region(mocker: Any) -> None:
     """Тест CityReport с городом без региона"""
     mock_get_all_cities = mocker.patch('account.report.get_all_visited_cities')
-
-    fake_city = mocker.MagicMock()
-    fake_city.city.title = 'Город без региона'
-    fake_city.city.region = None
-    fake_city.city.country.__str__ = mocker.Mock(return_value='Россия')
-    fake_city.date_of_visit = date(2024, 1, 1)
-    fake_city.has_magnet = False
-    fake_city.rating = None
-
-    mock_queryset = mocker.MagicMock()
-    mock_queryset.order_by.return_value = [fake_city]
-    mock_get_all_cities.return_value = mock_queryset
+    mock_rows(
+        mock_get_all_cities.return_value.order_by.return_value,
+        [('Город без региона', None, 'Россия', date(2024, 1, 1), False, None)],
+    )
 
     report = CityReport(1).get_report()
 
@@ -149,21 +156,12 @@ def test_city_report_city_without_region(mocker: Any) -> None:
 @pytest.mark.unit
 def test_city_report_without_dates(mocker: Any) -> None:
     """Тест CityReport с городом без дат посещения"""
-    mock_get_unique_cities = mocker.patch('account.report.get_unique_visited_cities')
+    mocker.patch('account.report.get_unique_visited_cities')
     mock_apply_sort = mocker.patch('account.report.apply_sort_to_queryset')
-
-    fake_city = mocker.MagicMock()
-    fake_city.city.title = 'Город'
-    fake_city.city.region.__str__ = mocker.Mock(return_value='Регион')
-    fake_city.city.country.__str__ = mocker.Mock(return_value='Россия')
-    fake_city.number_of_visits = 1
-    fake_city.first_visit_date = None
-    fake_city.last_visit_date = None
-    fake_city.has_souvenir = False
-    fake_city.average_rating = None
-
-    mock_get_unique_cities.return_value = [fake_city]
-    mock_apply_sort.return_value = [fake_city]
+    mock_rows(
+        mock_apply_sort.return_value,
+        [('Город', 'Регион', 'Россия', 1, None, None, False, None)],
+    )
 
     report = CityReport(1, group_city=True).get_report()
 
@@ -172,6 +170,44 @@ def test_city_report_without_dates(mocker: Any) -> None:
     assert report[1][7] == ''  # average_rating
 
 
+@pytest.mark.unit
+def test_city_report_is_lazy(mocker: Any) -> None:
+    """Тест что CityReport.iter_report не обращается к базе до начала чтения строк"""
+    mock_get_all_cities = mocker.patch('account.report.get_all_visited_cities')
+
+    rows = CityReport(1).iter_report()
+
+    mock_get_all_cities.assert_not_called()
+    assert next(rows)[0] == 'Город'
+
+
+@pytest.mark.unit
+def test_city_report_records_keep_types_and_coordinates(mocker: Any) -> None:
+    """Тест что типизированные записи не форматируются и содержат координаты города"""
+    mocker.patch('account.report.get_unique_visited_cities')
+    mock_apply_sort = mocker.patch('account.report.apply_sort_to_queryset')
+    mock_rows(
+        mock_apply_sort.return_value,
+        [('Город', None, 'Россия', 2, date(2024, 1, 1), None, True, Decimal('4.5'), 55.7, 37.6)],
+    )
+    report = CityReport(1, group_city=True)
+
+    records = list(report.iter_records())
+
+    assert report.get_columns() == GROUPED_CITY_COLUMNS
+    assert records == [('Город', None, 'Россия', 2, date(2024, 1, 1), None, True, 4.5, 55.7, 37.6)]
+    assert isinstance(records[0][7], float)
+
+
+@pytest.mark.unit
+def test_city_report_columns_without_grouping() -> None:
+    """Тест столбцов отчёта без группировки: координаты идут последними"""
+    columns = CityReport(1).get_columns()
+
+    assert columns == CITY_COLUMNS
+    assert [column.name for column in columns[-2:]] == ['latitude', 'longitude']
+
+
 # ===== Тесты для RegionReport =====
 
 
@@ -464,3 +500,21 @@ def test_city_report_accepts_group_city_parameter() -> None:
     assert report_with_grouping.group_city is True
     assert report_without_grouping.group_city is False
     assert report_default.group_city is False
+
+
+@pytest.mark.unit
+def test_report_records_default_to_string_columns(mocker: Any) -> None:
+    """Тест что отчёты без типизированных записей выгружаются строковыми столбцами"""
+    mock_get_regions = mocker.patch('account.report.get_all_region_with_visited_cities')
+    fake_region = mocker.MagicMock()
+    fake_region.__str__.return_value = 'Регион 1 область'
+    fake_region.num_total = 4
+    fake_region.num_visited = 1
+    mock_get_regions.return_value = [fake_region]
+    report = RegionReport(1)
+
+    assert report.get_columns()[:2] == (
+        Column('Регион', 'string'),
+        Column('Всего городов', 'string'),
+    )
+    assert list(report.iter_records()) == [('Регион 1 область', '4', '1', '25%', '3')]
@@ -7,12 +7,26 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import gzip
 import openpyxl  # type: ignore[import-untyped]
 import pytest
 import json
+from collections.abc import Iterator
+from datetime import date
 from io import StringIO, BytesIO
+from unittest.mock import patch
 
-from account.serializer import TxtSerializer, CsvSerializer, XlsSerializer, JsonSerializer
+from account.export_jobs import create_serializer
+from account.report import Column, Record
+from account.serializer import (
+    TxtSerializer,
+    CsvSerializer,
+    XlsSerializer,
+    JsonSerializer,
+    GeoJsonSerializer,
+    NdjsonSerializer,
+    ParquetSerializer,
+)
 
 
 # ===== Фикстуры =====
@@ -429,3 +443,208 @@ def test_all_serializers_return_correct_types(sample_report: list[tuple[str, ...
 
     # XLS сериализатор возвращает BytesIO
     assert isinstance(xls_serializer.convert(sample_report), BytesIO)
+
+
+# ===== Тесты потоковой сериализации =====
+
+
+@pytest.fixture
+def large_report() -> list[tuple[str | int, ...]]:
+    """Отчёт, строки которого не помещаются в один фрагмент потока"""
+    return [('Город', 'Номер')] + [(f'Город {index}', index) for index in range(1200)]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('serializer', [TxtSerializer(), CsvSerializer(), JsonSerializer()])
+def test_text_serializers_stream_report_in_chunks(
+    serializer: TxtSerializer | CsvSerializer | JsonSerializer,
+    large_report: list[tuple[str | int, ...]],
+) -> None:
+    """Тест что текстовые сериализаторы отдают отчёт несколькими фрагментами"""
+    chunks = list(serializer.stream(lambda: iter(large_report)))
+
+    assert len(chunks) > 1
+    assert ''.join(chunks) == serializer.convert(large_report).getvalue()
+
+
+@pytest.mark.unit
+def test_json_serializer_stream_matches_json_dump(
+    large_report: list[tuple[str | int, ...]],
+) -> None:
+    """Тест что потоковый JSON совпадает с результатом json.dump"""
+    content = ''.join(JsonSerializer().stream(lambda: iter(large_report)))
+
+    assert content == json.dumps(large_report, indent=4, ensure_ascii=False)
+    assert ''.join(JsonSerializer().stream(lambda: iter([]))) == '[]'
+
+
+@pytest.mark.unit
+def test_txt_serializer_stream_reads_report_twice(sample_report: list[tuple[str, ...]]) -> None:
+    """Тест что TxtSerializer вычисляет ширину столбцов отдельным проходом по отчёту"""
+    calls = []
+
+    def rows() -> Iterator[tuple[str, ...]]:
+        calls.append(1)
+        return iter(sample_report)
+
+    content = ''.join(TxtSerializer().stream(rows))
+
+    assert len(calls) == 2
+    assert content.startswith('Город      Регион                Количество посещений     \n')
+
+
+@pytest.mark.unit
+def test_xls_serializer_stream(large_report: list[tuple[str | int, ...]]) -> None:
+    """Тест что XlsSerializer отдаёт корректный файл XLSX по частям"""
+    content = b''.join(XlsSerializer().stream(lambda: iter(large_report)))
+
+    worksheet = openpyxl.load_workbook(BytesIO(content)).active
+    assert worksheet.max_row == len(large_report)
+    assert worksheet['A1201'].value == 'Город 1199'
+    assert worksheet['B1201'].value == 1199
+
+
+# ===== Тесты сериализаторов типизированных записей =====
+
+RECORD_COLUMNS = (
+    Column('city', 'string'),
+    Column('date_of_visit', 'date'),
+    Column('has_souvenir', 'boolean'),
+    Column('rating', 'integer'),
+    Column('latitude', 'float'),
+    Column('longitude', 'float'),
+)
+
+
+@pytest.fixture
+def records() -> list[Record]:
+    """Записи посещений: вторая без даты и оценки"""
+    return [
+        ('Москва', date(2024, 1, 1), True, 5, 55.75, 37.62),
+        ('Жуков', None, False, None, 55.03, 36.75),
+    ]
+
+
+@pytest.mark.unit
+def test_ndjson_serializer_writes_gzip_json_lines(records: list[Record]) -> None:
+    """Тест что NdjsonSerializer пишет по объекту JSON на запись в сжатом gzip файле"""
+    content = b''.join(NdjsonSerializer().stream_records(RECORD_COLUMNS, lambda: iter(records)))
+
+    lines = gzip.decompress(content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {
+            'city': 'Москва',
+            'date_of_visit': '2024-01-01',
+            'has_souvenir': True,
+            'rating': 5,
+            'latitude': 55.75,
+            'longitude': 37.62,
+        },
+        {
+            'city': 'Жуков',
+            'date_of_visit': None,
+            'has_souvenir': False,
+            'rating': None,
+            'latitude': 55.03,
+            'longitude': 36.75,
+        },
+    ]
+
+
+@pytest.mark.unit
+def test_ndjson_serializer_streams_untyped_rows(large_report: list[tuple[str | int, ...]]) -> None:
+    """Тест что строки без типов выгружаются строковыми полями с именами из заголовков"""
+    content = b''.join(NdjsonSerializer().stream(lambda: iter(large_report)))
+
+    lines = gzip.decompress(content).decode().splitlines()
+    assert len(lines) == 1200
+    assert json.loads(lines[-1]) == {'Город': 'Город 1199', 'Номер': '1199'}
+
+
+@pytest.mark.unit
+def test_geojson_serializer_writes_feature_collection(records: list[Record]) -> None:
+    """Тест что GeoJsonSerializer строит точки по координатам, остальные поля — свойства"""
+    content = b''.join(GeoJsonSerializer().stream_records(RECORD_COLUMNS, lambda: iter(records)))
+
+    collection = json.loads(content)
+    assert collection['type'] == 'FeatureCollection'
+    assert collection['features'][0] == {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [37.62, 55.75]},
+        'properties': {
+            'city': 'Москва',
+            'date_of_visit': '2024-01-01',
+            'has_souvenir': True,
+            'rating': 5,
+        },
+    }
+    assert collection['features'][1]['properties']['date_of_visit'] is None
+
+
+@pytest.mark.unit
+def test_geojson_serializer_without_coordinates(sample_report: list[tuple[str, ...]]) -> None:
+    """Тест что записи без координат выгружаются без геометрии"""
+    content = b''.join(GeoJsonSerializer().stream(lambda: iter(sample_report)))
+
+    features = json.loads(content)['features']
+    assert len(features) == 2
+    assert features[0]['geometry'] is None
+    assert features[0]['properties']['Город'] == 'Москва'
+    assert json.loads(b''.join(GeoJsonSerializer().stream(lambda: iter([])))) == {
+        'type': 'FeatureCollection',
+        'features': [],
+    }
+
+
+@pytest.mark.unit
+def test_parquet_serializer_writes_typed_columns(records: list[Record]) -> None:
+    """Тест что ParquetSerializer сохраняет типы столбцов и пропуски"""
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+
+    content = b''.join(ParquetSerializer().stream_records(RECORD_COLUMNS, lambda: iter(records)))
+
+    table = pyarrow_parquet.read_table(BytesIO(content))
+    assert [str(field.type) for field in table.schema] == [
+        'string',
+        'date32[day]',
+        'bool',
+        'int64',
+        'double',
+        'double',
+    ]
+    assert table.to_pylist()[1] == {
+        'city': 'Жуков',
+        'date_of_visit': None,
+        'has_souvenir': False,
+        'rating': None,
+        'latitude': 55.03,
+        'longitude': 36.75,
+    }
+
+
+@pytest.mark.unit
+def test_parquet_serializer_writes_row_groups_as_they_are_read() -> None:
+    """Тест что ParquetSerializer отдаёт файл по мере чтения записей, а не в конце"""
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    columns = (Column('number', 'integer'),)
+    read = []
+
+    def records() -> Iterator[Record]:
+        for number in range(25_000):
+            read.append(number)
+            yield (number,)
+
+    chunks = ParquetSerializer().stream_records(columns, records)
+    first_chunk = next(chunks)
+
+    assert first_chunk
+    assert len(read) < 25_000
+    content = first_chunk + b''.join(chunks)
+    assert pyarrow_parquet.read_table(BytesIO(content)).num_rows == 25_000
+
+
+@pytest.mark.unit
+def test_parquet_is_unknown_filetype_without_pyarrow() -> None:
+    """Тест что без pyarrow Parquet не выгружается под видом другого формата"""
+    with patch.object(ParquetSerializer, 'is_available', return_value=False):
+        assert create_serializer('parquet') is None
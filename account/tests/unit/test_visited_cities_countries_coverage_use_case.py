@@ -12,6 +12,7 @@ from django.core.cache import caches
 
 from account.use_cases import visited_cities_countries_coverage as use_case
 from country.dto import CountryVisitedCityCounts
+from services.cache import bump_stats_generation
 
 stats_cache = caches['stats']
 
@@ -54,14 +55,18 @@ def test_get_personal_visited_cities_countries_coverage_uses_cache(mocker: Any)
 
 
 @pytest.mark.unit
-def test_invalidate_personal_visited_cities_countries_coverage_cache(mocker: Any) -> None:
-    mocker.patch.object(use_case, 'get_countries_visited_city_counts', return_value=[])
+def test_stats_generation_bump_invalidates_countries_coverage_cache(mocker: Any) -> None:
+    countries_repo = mocker.patch.object(
+        use_case, 'get_countries_visited_city_counts', return_value=[]
+    )
     mocker.patch.object(use_case, 'get_total_users_count', return_value=0)
     mocker.patch.object(use_case, 'get_unique_visited_cities_country_ranks', return_value={})
 
     use_case.get_personal_visited_cities_countries_coverage(user_id=10)
-    assert stats_cache.get(use_case.CACHE_KEY_TEMPLATE.format(user_id=10)) == []
+    use_case.get_personal_visited_cities_countries_coverage(user_id=10)
+    assert countries_repo.call_count == 1
 
-    use_case.invalidate_personal_visited_cities_countries_coverage_cache(user_id=10)
+    bump_stats_generation(user_id=10)
+    use_case.get_personal_visited_cities_countries_coverage(user_id=10)
 
-    assert stats_cache.get(use_case.CACHE_KEY_TEMPLATE.format(user_id=10)) is None
+    assert countries_repo.call_count == 2
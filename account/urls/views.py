@@ -72,4 +72,10 @@ urlpatterns = [
     # ----- Сохранение настроек "Поделиться статистикой"  ----- #
     path('stats/save_share_settings', statistics.save_share_settings, name='save_share_settings'),
     path('download', download.download, name='download'),
+    path('download/jobs', download.create_download_job, name='download_job_create'),
+    path(
+        'download/jobs/<uuid:job_id>',
+        download.download_job_status,
+        name='download_job_status',
+    ),
 ]
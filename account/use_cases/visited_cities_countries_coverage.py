@@ -21,21 +21,20 @@ from country.repository import (
     get_countries_visited_city_counts,
     get_unique_visited_cities_country_ranks,
 )
-from services.cache import delete_cache, get_or_set_cache
+from services.cache import cached_user_stats
 
 # Rank и total_users_count допускают задержку актуализации до TTL:
 # эти данные являются приблизительной статистикой, а не строгим leaderboard.
+# Собственные данные пользователя сбрасываются сменой поколения его статистики.
 CACHE_TTL_SECONDS = 60 * 60
-CACHE_KEY_TEMPLATE = 'account:stats:visited-cities:countries-coverage:v1:user:{user_id}'
+# После мягкого TTL ранги пересчитывает один воркер, остальные отдают прежнее значение
+CACHE_SOFT_TTL_SECONDS = 15 * 60
+CACHE_FAMILY = 'visited-cities:countries-coverage'
 
 
 type CachedCountryCoverage = dict[str, int | str]
 
 
-def _get_cache_key(user_id: int) -> str:
-    return CACHE_KEY_TEMPLATE.format(user_id=user_id)
-
-
 def _build_response(
     countries_coverage: list[CachedCountryCoverage],
 ) -> PersonalVisitedCitiesCountriesCoverageResponse:
@@ -53,11 +52,9 @@ def _build_response(
     )
 
 
-def invalidate_personal_visited_cities_countries_coverage_cache(user_id: int) -> None:
-    """Удаляет кеш статистики покрытия стран посещёнными городами для пользователя."""
-    delete_cache(_get_cache_key(user_id))
-
-
+@cached_user_stats(
+    CACHE_FAMILY, ttl_seconds=CACHE_TTL_SECONDS, soft_ttl_seconds=CACHE_SOFT_TTL_SECONDS
+)
 def _build_countries_coverage(user_id: int) -> list[CachedCountryCoverage]:
     countries = get_countries_visited_city_counts(user_id)
     total_users_count = get_total_users_count()
@@ -85,10 +82,4 @@ def get_personal_visited_cities_countries_coverage(
     Страны отсортированы по количеству посещённых городов,
     для каждой страны указан rank пользователя среди всех пользователей.
     """
-    countries_coverage = get_or_set_cache(
-        key=_get_cache_key(user_id),
-        ttl_seconds=CACHE_TTL_SECONDS,
-        factory=lambda: _build_countries_coverage(user_id),
-    )
-
-    return _build_response(countries_coverage)
+    return _build_response(_build_countries_coverage(user_id))
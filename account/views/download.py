@@ -7,71 +7,110 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import uuid
 from datetime import datetime
 
-from django.http import HttpResponse, Http404, HttpRequest
+from django.http import Http404, HttpRequest, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
-from account.report import CityReport
-from account.serializer import (
-    Serializer,
-    TxtSerializer,
-    CsvSerializer,
-    JsonSerializer,
-    XlsSerializer,
+from account.export_jobs import (
+    create_report,
+    create_serializer,
+    get_download_url,
+    get_export_filename,
+    request_export,
 )
+from account.models import ExportJob
 from services import logger
 
 
 @require_http_methods(['POST'])
 @login_required()
-def download(request: HttpRequest) -> HttpResponse:
+def download(request: HttpRequest) -> StreamingHttpResponse:
     users_data = request.POST.dict()
     reporttype = users_data.get('reporttype')
     filetype = users_data.get('filetype')
     group_city = users_data.get('group_city') == 'on'
 
-    # Для того чтобы добавить новый формат репорта, достаточно создать класс,
-    # реализующий интерфейс report.Report и добавить его эту секцию if ... else ...
     user_id = request.user.id
     if user_id is None:
         logger.info(request, '(Download stats): User is not authenticated, raise 404')
         raise Http404
 
-    if reporttype == 'city':
-        report = CityReport(user_id, group_city)
-    # elif reporttype == 'region':
-    #     report = RegionReport(request.user.id)
-    # elif reporttype == 'area':
-    #     report = AreaReport(request.user.id)
-    else:
+    # Новые типы отчётов и форматы файлов добавляются в account.export_jobs
+    report = create_report(reporttype or '', user_id, group_city)
+    if report is None:
         logger.info(request, f'(Download stats): Incorrect reporttype "{reporttype}", raise 404')
         raise Http404
 
-    # Для того чтобы добавить новый формат файла, достаточно создать класс,
-    # реализующий интерфейс serialiizer.Serializer и добавить его эту секцию if ... else ...
-    serializer: Serializer
-    if filetype == 'txt':
-        serializer = TxtSerializer()
-    elif filetype == 'csv':
-        serializer = CsvSerializer()
-    elif filetype == 'json':
-        serializer = JsonSerializer()
-    elif filetype == 'xls':
-        serializer = XlsSerializer()
-    else:
+    serializer = create_serializer(filetype or '')
+    if serializer is None:
         logger.info(request, f'(Download stats): Incorrect filetype "{filetype}", raise 404')
         raise Http404
 
-    response = HttpResponse(
-        serializer.convert(report.get_report()).getvalue(), content_type=serializer.content_type()
-    )
-    filename = (
-        f'MoiGoroda__{request.user}__{int(datetime.now().timestamp())}.{serializer.filetype()}'
+    # Отчёт формируется по мере отправки ответа: строки читаются из базы порциями
+    # и сразу сериализуются, не накапливаясь в памяти
+    response = StreamingHttpResponse(
+        serializer.stream_report(report), content_type=serializer.content_type()
     )
+    filename = get_export_filename(str(request.user), serializer, datetime.now())
     response['Content-Disposition'] = f'attachment; filename={filename}'
 
     logger.info(request, f'(Download stats): Successfully downloaded file {filename}')
 
     return response
+
+
+def _export_job_response(job: ExportJob, status: int = 200) -> JsonResponse:
+    return JsonResponse(
+        {
+            'id': str(job.id),
+            'status': job.status,
+            'progress': job.progress,
+            'status_url': reverse('download_job_status', kwargs={'job_id': job.id}),
+            'download_url': get_download_url(job),
+        },
+        status=status,
+    )
+
+
+@require_http_methods(['POST'])
+@login_required()
+def create_download_job(request: HttpRequest) -> JsonResponse:
+    """
+    Ставит выгрузку статистики в очередь и возвращает идентификатор задачи.
+    Параметры те же, что у `download`. Повторный запрос той же выгрузки при неизменной
+    статистике возвращает уже существующую задачу.
+    """
+    users_data = request.POST.dict()
+    reporttype = users_data.get('reporttype')
+    filetype = users_data.get('filetype')
+    group_city = users_data.get('group_city') == 'on'
+
+    user_id = request.user.id
+    if user_id is None:
+        logger.info(request, '(Download job): User is not authenticated, raise 404')
+        raise Http404
+
+    if reporttype not in ExportJob.ReportType.values:
+        logger.info(request, f'(Download job): Incorrect reporttype "{reporttype}", raise 404')
+        raise Http404
+    if filetype not in ExportJob.FileType.values or create_serializer(filetype) is None:
+        logger.info(request, f'(Download job): Incorrect filetype "{filetype}", raise 404')
+        raise Http404
+
+    job = request_export(user_id, reporttype, filetype, group_city)
+    logger.info(request, f'(Download job): Export job {job.id} is {job.status}')
+
+    return _export_job_response(job, status=202)
+
+
+@require_http_methods(['GET'])
+@login_required()
+def download_job_status(request: HttpRequest, job_id: uuid.UUID) -> JsonResponse:
+    """Возвращает статус и прогресс выгрузки, а для готовой — подписанную ссылку на файл."""
+    job = get_object_or_404(ExportJob, pk=job_id, user_id=request.user.id)
+    return _export_job_response(job)
@@ -17,6 +17,7 @@ from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView
 
 from account.models import ShareSettings
+from account.serializer import ParquetSerializer
 from services import logger
 
 
@@ -53,6 +54,8 @@ class Statistics(LoginRequiredMixin, TemplateView):
         )
         context['statistics_user_id'] = user_id
         context['statistics_shared_mode'] = False
+        # Parquet предлагается, только если установлена необязательная зависимость pyarrow
+        context['parquet_export_available'] = ParquetSerializer.is_available()
 
         ##############################################
         # --- Настройки "Поделиться статистикой" --- #
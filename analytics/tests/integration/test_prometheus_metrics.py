@@ -0,0 +1,60 @@
+"""Проверка эндпоинта /metrics: метрики фоновых обработчиков и глубина их очередей."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+
+from city.models import City
+from country.models import Country
+from subscribe.infrastructure.models import NotificationFanoutTask
+
+
+@pytest.fixture
+def metrics_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_metrics_report_queue_depth_counted_on_scrape(
+    client: Client, metrics_dir: Path, django_user_model: type[User]
+) -> None:
+    country = Country.objects.create(name='Россия', code='RU')
+    city = City.objects.create(
+        title='Москва', country=country, coordinate_width=55.7, coordinate_longitude=37.6
+    )
+    sender = django_user_model.objects.create_user(username='sender')
+    NotificationFanoutTask.objects.create(sender=sender, city=city)
+
+    response = client.get(reverse('prometheus-metrics'))
+
+    assert response.status_code == 200
+    assert 'subscribe_notification_fanout_queue_depth 1.0' in response.content.decode()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_metrics_include_counters_written_by_worker_process(
+    client: Client, metrics_dir: Path
+) -> None:
+    """Счётчик, увеличенный отдельным процессом с той же PROMETHEUS_MULTIPROC_DIR, виден в /metrics."""
+    worker_code = (
+        'from prometheus_client import Counter\n'
+        "Counter('worker_test_items', 'Items processed by a worker').inc(7)\n"
+    )
+    subprocess.run(
+        [sys.executable, '-c', worker_code],
+        env={**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(metrics_dir)},
+        check=True,
+    )
+
+    response = client.get(reverse('prometheus-metrics'))
+
+    assert 'worker_test_items_total 7.0' in response.content.decode()
@@ -1,12 +1,27 @@
 from django.http import HttpRequest, HttpResponse
 from prometheus_client import CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
 
+from account.export_jobs import EXPORT_JOBS_QUEUE_DEPTH
+from city.services.photo_pipeline import CITY_PHOTO_QUEUE_DEPTH
+from subscribe.infrastructure.notification_fanout import NOTIFICATION_FANOUT_QUEUE_DEPTH
+
+# Глубина очередей фоновых обработчиков считается запросом к базе данных при каждом сборе метрик
+QUEUE_DEPTH_COLLECTORS = (
+    NOTIFICATION_FANOUT_QUEUE_DEPTH,
+    EXPORT_JOBS_QUEUE_DEPTH,
+    CITY_PHOTO_QUEUE_DEPTH,
+)
+
 
 def prometheus_metrics_view(request: HttpRequest) -> HttpResponse:
     """
     Выводит метрики в мультипроцессном режиме (для Gunicorn).
+    Метрики фоновых обработчиков попадают сюда через общую папку PROMETHEUS_MULTIPROC_DIR,
+    а глубина их очередей считается в момент запроса.
     """
     registry = CollectorRegistry()
     multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    for collector in QUEUE_DEPTH_COLLECTORS:
+        registry.register(collector)
     data = generate_latest(registry)
     return HttpResponse(data, content_type=CONTENT_TYPE_LATEST)
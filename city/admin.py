@@ -116,6 +116,7 @@ class CityAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         ),
         ('Изображение', {'fields': ['image', 'image_source_text', 'image_source_link']}),
         ('Координаты', {'fields': ['coordinate_width', 'coordinate_longitude']}),
+        ('OpenStreetMap', {'fields': ['osm_relation_id']}),
     ]
 
     def get_queryset(self, request: HttpRequest) -> QuerySet[City]:
@@ -251,6 +252,7 @@ class CityUserPhotoAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         'user',
         'position',
         'is_default',
+        'status',
         'created_at',
         'updated_at',
     )
@@ -258,11 +260,12 @@ class CityUserPhotoAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         UserFilter,
         'city',
         'is_default',
+        'status',
         'created_at',
         'updated_at',
     )
     search_fields = ('user__username', 'city__title')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('renditions', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
     autocomplete_fields = ('city',)
     raw_id_fields = ('user',)
@@ -16,14 +16,16 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+from datetime import date
 from http import HTTPStatus
 from typing import Any, cast
 
 from django.contrib.auth.models import User
 import rest_framework.exceptions as drf_exc
 from django.db import IntegrityError
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from django.db.models.functions import ExtractYear
+from django.http import HttpResponse, StreamingHttpResponse
 from dmr import Controller, ResponseSpec, modify
 from dmr.plugins.msgspec import MsgspecSerializer
 from rest_framework import generics, status
@@ -31,8 +33,8 @@ from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from account.models import ShareSettings
 from city.models import (
     City,
     CityDistrict,
@@ -60,11 +62,21 @@ from city.services.db import (
     get_number_of_users_who_visit_city,
     get_number_of_visits_by_city,
     get_unique_visited_cities,
+    get_visited_cities_version,
 )
+from city.services.city_list import get_city_list_items
+from city.services.subscription_cities import get_allowed_user_ids, stream_subscription_cities
 from city.services.filter import apply_filter_to_queryset
 from city.services.search import CitySearchService
 from services import logger
-from subscribe.repository import is_subscribed
+from services.http_cache import (
+    CONDITIONAL_RESPONSE_HEADERS,
+    build_etag,
+    get_catalog_version,
+    get_conditional_headers,
+    is_not_modified,
+)
+from services.reference_cache import COUNTRIES_WITH_CITIES, get_reference_data
 
 
 class GetVisitedCities(generics.ListAPIView):  # type: ignore[type-arg]
@@ -80,7 +92,23 @@ class GetVisitedCities(generics.ListAPIView):  # type: ignore[type-arg]
             f'(API) Successful request for a list of visited cities (user #{user_id})',
         )
 
-        return super().get(*args, **kwargs)
+        # Фильтры по текущему и прошлому году зависят от даты, поэтому она входит в ETag
+        etag = build_etag(
+            self.request.get_full_path(),
+            get_catalog_version(),
+            date.today(),
+            user_id,
+            get_visited_cities_version(cast(int, self.request.user.pk)),
+        )
+        headers = get_conditional_headers(etag, is_public=False)
+        if is_not_modified(self.request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = super().get(*args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+        return response
 
     def get_queryset(self) -> QuerySet[VisitedCity]:
         user_id = self.request.user.pk
@@ -98,58 +126,16 @@ class GetVisitedCities(generics.ListAPIView):  # type: ignore[type-arg]
         return queryset
 
 
-class GetVisitedCitiesFromSubscriptions(generics.ListAPIView):  # type: ignore[type-arg]
-    serializer_class = VisitedCitySerializer
+class GetVisitedCitiesFromSubscriptions(APIView):
+    """
+    Возвращает посещённые города пользователей, на которых подписан текущий пользователь,
+    в компактном потоковом формате (см. `city.services.subscription_cities`).
+    """
+
     permission_classes = (IsAuthenticated,)
     http_method_names = ['get']
 
-    def __init__(self) -> None:
-        # Список ID пользователей, у которых необходимо вернуть посещённые города
-        self.user_ids: list[int] = []
-
-        super().__init__()
-
-    def _user_has_allowed_to_subscribe_to_himself(self, user_id: int) -> bool:
-        try:
-            user_settings = ShareSettings.objects.get(user_id=user_id)
-        except ShareSettings.DoesNotExist:
-            current_user = self.request.user
-            current_user_id = current_user.id if isinstance(current_user, User) else None
-            logger.warning(
-                self.request,
-                f'(API) Attempt to get a list of the cities of a user who did not change initial settings '
-                f'(from #{current_user_id}, to #{user_id})',
-            )
-        else:
-            if user_settings.can_subscribe:
-                return True
-            else:
-                current_user = self.request.user
-                current_user_id = current_user.id if isinstance(current_user, User) else None
-                logger.warning(
-                    self.request,
-                    f'(API) Attempt to get a list of the cities of a user who did not allow it '
-                    f'(from #{current_user_id}, to #{user_id})',
-                )
-        return False
-
-    def _is_subscription_exists(self, to_id: int) -> bool:
-        from_id = self.request.user.pk
-        if from_id is None:
-            return False
-        if is_subscribed(from_id, to_id):
-            return True
-        else:
-            current_user = self.request.user
-            current_user_id = current_user.id if isinstance(current_user, User) else None
-            logger.warning(
-                self.request,
-                f'(API) Attempt to get a list of the cities of a user for whom do not have a subscription '
-                f'(from #{current_user_id}, to #{to_id})',
-            )
-            return False
-
-    def get(self, *args: Any, **kwargs: Any) -> Response:
+    def get(self, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
         user_ids_str = self.request.GET.getlist('user_ids')
 
         try:
@@ -161,46 +147,37 @@ class GetVisitedCitiesFromSubscriptions(generics.ListAPIView):  # type: ignore[t
             )
             raise drf_exc.ParseError('Получен некорректный список идентификаторов пользователей')
 
-        user = self.request.user
-        is_superuser = user.is_superuser if isinstance(user, User) else False
-        if not is_superuser:
-            # Убираем из списка ID тех пользователей, которые не разрешили подписываться на себя.
-            # Вообще это нештатная ситуация, но теоритически возможная, когда пользователь запретил
-            # подписываться после того, как была открыта страница с картой, но до того, как запрос пришёл на сервер.
-            for user_id in user_ids:
-                if self._user_has_allowed_to_subscribe_to_himself(
-                    user_id
-                ) and self._is_subscription_exists(user_id):
-                    self.user_ids.append(user_id)
-                    current_user_id = user.id if isinstance(user, User) else None
-                    logger.info(
-                        self.request,
-                        f'(API) Successful request for a list of visited cities from subscriptions '
-                        f'(from #{current_user_id}, to #{user_id})',
-                    )
-        else:
-            self.user_ids = user_ids
-
-            current_user_id = user.id if isinstance(user, User) else None
+        user = cast(User, self.request.user)
+        if user.is_superuser:
+            allowed_user_ids = list(dict.fromkeys(user_ids))
             logger.info(
                 self.request,
-                f'(API) Successful request from superuser for a list of visited cities from subscriptions (user #{current_user_id})',
+                f'(API) Successful request from superuser for a list of visited cities from subscriptions (user #{user.id})',
             )
+        else:
+            # Убираем из списка ID тех пользователей, которые не разрешили подписываться на себя
+            # или на которых нет подписки. Вообще это нештатная ситуация, но теоритически возможная,
+            # когда пользователь запретил подписываться после того, как была открыта страница с картой,
+            # но до того, как запрос пришёл на сервер.
+            allowed_user_ids = get_allowed_user_ids(user.id, user_ids)
+            denied_user_ids = sorted(set(user_ids) - set(allowed_user_ids))
+            if denied_user_ids:
+                logger.warning(
+                    self.request,
+                    f'(API) Attempt to get a list of the cities of users who did not allow it '
+                    f'or for whom do not have a subscription (from #{user.id}, to {denied_user_ids})',
+                )
+            if allowed_user_ids:
+                logger.info(
+                    self.request,
+                    f'(API) Successful request for a list of visited cities from subscriptions '
+                    f'(from #{user.id}, to {allowed_user_ids})',
+                )
 
-        return super().get(*args, **kwargs)
-
-    def get_queryset(self) -> QuerySet[VisitedCity]:
-        if not self.user_ids:
-            return VisitedCity.objects.none()
-        country_id = self.request.GET.get('country')
-
-        # get_all_visited_cities работает с одним user_id, поэтому она вызывается
-        # несколько раз и результаты собираются в один QuerySet.
-        querysets = [get_unique_visited_cities(user_id, country_id) for user_id in self.user_ids]
-        combined_queryset = querysets[0]
-        for qs in querysets[1:]:
-            combined_queryset = combined_queryset.union(qs)
-        return combined_queryset
+        return StreamingHttpResponse(
+            stream_subscription_cities(allowed_user_ids, self.request.GET.get('country')),
+            content_type='application/json',
+        )
 
 
 class GetNotVisitedCities(Controller[MsgspecSerializer]):
@@ -332,287 +309,147 @@ def city_list_by_country(request: Request) -> Response:
     return Response(serializer.data)
 
 
-@api_view(['GET'])
-def city_list_by_regions(request: Request) -> Response:
-    """
-    Возвращает список городов для одного или нескольких регионов и/или стран.
-
-    Принимает параметры:
-    - region_ids (несколько ID через запятую): для загрузки городов по регионам
-    - country_ids (несколько ID через запятую): для загрузки городов по странам без регионов
+def _parse_ids(raw_ids: str) -> list[int]:
+    return [int(raw_id.strip()) for raw_id in raw_ids.split(',') if raw_id.strip()]
 
-    Возвращает список городов с полями id, title, lat, lon, region, country, regionId, countryCode.
 
-    :param request: DRF Request
-    :return: Response со списком городов
+def _city_list_response(controller: Controller[MsgspecSerializer], city_filter: Q) -> HttpResponse:
     """
-    region_ids_param = request.GET.get('region_ids')
-    country_ids_param = request.GET.get('country_ids')
-
-    if not region_ids_param and not country_ids_param:
-        return Response(
-            {'detail': 'Параметр region_ids или country_ids является обязательным'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    # Обрабатываем region_ids
-    region_ids: list[int] = []
-    if region_ids_param:
-        try:
-            region_ids = [int(id.strip()) for id in region_ids_param.split(',') if id.strip()]
-        except ValueError:
-            return Response(
-                {'detail': 'Параметр region_ids должен содержать список числовых ID через запятую'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-    # Обрабатываем country_ids
-    country_ids: list[int] = []
-    if country_ids_param:
-        try:
-            country_ids = [int(id.strip()) for id in country_ids_param.split(',') if id.strip()]
-        except ValueError:
-            return Response(
-                {
-                    'detail': 'Параметр country_ids должен содержать список числовых ID через запятую'
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-    if not region_ids and not country_ids:
-        return Response(
-            {'detail': 'Не указаны валидные ID регионов или стран'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    # Формируем запрос для получения городов
-    cities_query = City.objects.select_related('region', 'country')
-
-    if region_ids and country_ids:
-        # Если указаны и регионы, и страны - объединяем условия через OR
-        # Для регионов - загружаем города по регионам
-        # Для стран - загружаем все города этих стран (включая те, у которых есть регионы)
-        from django.db.models import Q
-
-        cities_query = cities_query.filter(
-            Q(region_id__in=region_ids) | Q(country_id__in=country_ids)
-        )
-    elif region_ids:
-        # Только регионы
-        cities_query = cities_query.filter(region_id__in=region_ids)
-    else:
-        # Только страны - загружаем все города этих стран
-        # (включая те, у которых есть регионы, если регионы не выбраны)
-        cities_query = cities_query.filter(country_id__in=country_ids)
-
-    cities = cities_query.order_by('title')
-
-    # Получаем информацию о посещениях для авторизованного пользователя
-    user = request.user
+    Возвращает список городов с ETag, зависящим от справочника и посещений пользователя.
+    Если ETag совпадает с If-None-Match, список не строится и возвращается 304.
+    """
+    user = controller.request.user
     user_id = user.pk if user.is_authenticated else None
+    etag = build_etag(
+        controller.request.get_full_path(),
+        get_catalog_version(),
+        user_id,
+        get_visited_cities_version(user_id) if user_id is not None else None,
+    )
+    headers = get_conditional_headers(etag, is_public=user_id is None)
 
-    # Получаем все посещённые города пользователя одним запросом для оптимизации
-    visited_city_ids: set[int] = set()
-    city_visits_data: dict[int, dict[str, Any]] = {}
-
-    if user_id:
-        visited_cities = (
-            VisitedCity.objects.filter(user_id=user_id, city_id__in=[city.id for city in cities])
-            .select_related('city')
-            .order_by('city_id', 'date_of_visit')
-        )
-
-        # Группируем посещения по городам
-        for visited_city in visited_cities:
-            city_id = visited_city.city_id
-            visited_city_ids.add(city_id)
-
-            if city_id not in city_visits_data:
-                city_visits_data[city_id] = {
-                    'first_visit_date': visited_city.date_of_visit,
-                    'last_visit_date': visited_city.date_of_visit,
-                    'number_of_visits': 1,
-                }
-            else:
-                # Обновляем первую и последнюю дату посещения
-                if visited_city.date_of_visit:
-                    if (
-                        city_visits_data[city_id]['first_visit_date'] is None
-                        or visited_city.date_of_visit
-                        < city_visits_data[city_id]['first_visit_date']
-                    ):
-                        city_visits_data[city_id]['first_visit_date'] = visited_city.date_of_visit
-                    if (
-                        city_visits_data[city_id]['last_visit_date'] is None
-                        or visited_city.date_of_visit > city_visits_data[city_id]['last_visit_date']
-                    ):
-                        city_visits_data[city_id]['last_visit_date'] = visited_city.date_of_visit
-                city_visits_data[city_id]['number_of_visits'] += 1
-
-    # Формируем данные вручную, чтобы включить regionId, countryCode и информацию о посещении
-    cities_data = []
-    for city in cities:
-        city_id = city.id
-        is_visited = city_id in visited_city_ids
-
-        city_data = {
-            'id': city_id,
-            'title': city.title,
-            'lat': str(city.coordinate_width),
-            'lon': str(city.coordinate_longitude),
-            'region': city.region.full_name if city.region else None,
-            'country': city.country.name if city.country else None,
-            'regionId': city.region.id if city.region else None,
-            'countryCode': city.country.code if city.country else None,
-            'isVisited': is_visited,
-        }
+    if is_not_modified(controller.request, etag):
+        return controller.to_response(None, status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return controller.to_response(get_city_list_items(city_filter, user_id), headers=headers)
 
-        # Добавляем информацию о посещении, если город посещён
-        if is_visited and city_id in city_visits_data:
-            visits_info = city_visits_data[city_id]
-            city_data['firstVisitDate'] = (
-                visits_info['first_visit_date'].isoformat()
-                if visits_info['first_visit_date']
-                else None
-            )
-            city_data['lastVisitDate'] = (
-                visits_info['last_visit_date'].isoformat()
-                if visits_info['last_visit_date']
-                else None
-            )
-            city_data['numberOfVisits'] = visits_info['number_of_visits']
-        else:
-            city_data['firstVisitDate'] = None
-            city_data['lastVisitDate'] = None
-            city_data['numberOfVisits'] = 0
 
-        cities_data.append(city_data)
+class CityListByRegionsController(Controller[MsgspecSerializer]):
+    @modify(
+        headers=CONDITIONAL_RESPONSE_HEADERS,
+        extra_responses=[
+            ResponseSpec(dict[str, str], status_code=HTTPStatus.BAD_REQUEST),
+            ResponseSpec(
+                None, status_code=HTTPStatus.NOT_MODIFIED, headers=CONDITIONAL_RESPONSE_HEADERS
+            ),
+        ],
+        tags=['Города'],
+    )
+    def get(self) -> Any:
+        """
+        Возвращает список городов для одного или нескольких регионов и/или стран.
 
-    return Response(cities_data, status=status.HTTP_200_OK)
+        Принимает параметры:
+        - region_ids (несколько ID через запятую): для загрузки городов по регионам
+        - country_ids (несколько ID через запятую): для загрузки городов по странам без регионов
 
+        Возвращает список городов с полями id, title, lat, lon, region, country, regionId,
+        countryCode и информацией о посещениях текущего пользователя.
+        """
+        region_ids_param = self.request.GET.get('region_ids')
+        country_ids_param = self.request.GET.get('country_ids')
 
-@api_view(['GET'])
-def city_list_by_ids(request: Request) -> Response:
-    """
-    Возвращает список городов по их ID.
+        if not region_ids_param and not country_ids_param:
+            return self.to_response(
+                raw_data={'detail': 'Параметр region_ids или country_ids является обязательным'},
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
 
-    Принимает параметр:
-    - city_ids (несколько ID через запятую): список ID городов для загрузки
+        region_ids: list[int] = []
+        if region_ids_param:
+            try:
+                region_ids = _parse_ids(region_ids_param)
+            except ValueError:
+                return self.to_response(
+                    raw_data={
+                        'detail': 'Параметр region_ids должен содержать список числовых ID через запятую'
+                    },
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
 
-    Возвращает список городов с полями id, title, lat, lon, region, country, regionId, countryCode.
+        country_ids: list[int] = []
+        if country_ids_param:
+            try:
+                country_ids = _parse_ids(country_ids_param)
+            except ValueError:
+                return self.to_response(
+                    raw_data={
+                        'detail': 'Параметр country_ids должен содержать список числовых ID через запятую'
+                    },
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
 
-    :param request: DRF Request
-    :return: Response со списком городов
-    """
-    city_ids_param = request.GET.get('city_ids')
+        if not region_ids and not country_ids:
+            return self.to_response(
+                raw_data={'detail': 'Не указаны валидные ID регионов или стран'},
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
 
-    if not city_ids_param:
-        return Response(
-            {'detail': 'Параметр city_ids является обязательным'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        # Для стран загружаются все города, включая те, у которых есть регионы
+        city_filter = Q()
+        if region_ids:
+            city_filter |= Q(region_id__in=region_ids)
+        if country_ids:
+            city_filter |= Q(country_id__in=country_ids)
 
-    # Обрабатываем city_ids
-    city_ids: list[int] = []
-    try:
-        city_ids = [int(id.strip()) for id in city_ids_param.split(',') if id.strip()]
-    except ValueError:
-        return Response(
-            {'detail': 'Параметр city_ids должен содержать список числовых ID через запятую'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return _city_list_response(self, city_filter)
 
-    if not city_ids:
-        return Response(
-            {'detail': 'Не указаны валидные ID городов'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
 
-    # Загружаем города
-    cities = (
-        City.objects.select_related('region', 'country').filter(id__in=city_ids).order_by('title')
+class CityListByIdsController(Controller[MsgspecSerializer]):
+    @modify(
+        headers=CONDITIONAL_RESPONSE_HEADERS,
+        extra_responses=[
+            ResponseSpec(dict[str, str], status_code=HTTPStatus.BAD_REQUEST),
+            ResponseSpec(
+                None, status_code=HTTPStatus.NOT_MODIFIED, headers=CONDITIONAL_RESPONSE_HEADERS
+            ),
+        ],
+        tags=['Города'],
     )
+    def get(self) -> Any:
+        """
+        Возвращает список городов по их ID.
 
-    # Получаем информацию о посещениях для авторизованного пользователя
-    user = request.user
-    user_id = user.pk if user.is_authenticated else None
+        Принимает параметр:
+        - city_ids (несколько ID через запятую): список ID городов для загрузки
 
-    visited_city_ids: set[int] = set()
-    city_visits_data: dict[int, dict[str, Any]] = {}
-
-    if user_id:
-        from city.models import VisitedCity
-
-        visited_cities = VisitedCity.objects.filter(
-            user_id=user_id, city_id__in=city_ids
-        ).select_related('city')
-
-        for visited_city in visited_cities:
-            city_id = visited_city.city_id
-            visited_city_ids.add(city_id)
-
-            if city_id not in city_visits_data:
-                city_visits_data[city_id] = {
-                    'first_visit_date': None,
-                    'last_visit_date': None,
-                    'number_of_visits': 0,
-                }
-
-            if visited_city.date_of_visit:
-                if (
-                    not city_visits_data[city_id]['first_visit_date']
-                    or visited_city.date_of_visit < city_visits_data[city_id]['first_visit_date']
-                ):
-                    city_visits_data[city_id]['first_visit_date'] = visited_city.date_of_visit
-
-                if (
-                    not city_visits_data[city_id]['last_visit_date']
-                    or visited_city.date_of_visit > city_visits_data[city_id]['last_visit_date']
-                ):
-                    city_visits_data[city_id]['last_visit_date'] = visited_city.date_of_visit
-
-            city_visits_data[city_id]['number_of_visits'] += 1
-
-    # Формируем данные вручную, чтобы включить regionId, countryCode и информацию о посещении
-    cities_data = []
-    for city in cities:
-        city_id = city.id
-        is_visited = city_id in visited_city_ids
-
-        city_data = {
-            'id': city_id,
-            'title': city.title,
-            'lat': str(city.coordinate_width),
-            'lon': str(city.coordinate_longitude),
-            'region': city.region.full_name if city.region else None,
-            'country': city.country.name if city.country else None,
-            'regionId': city.region.id if city.region else None,
-            'countryCode': city.country.code if city.country else None,
-            'isVisited': is_visited,
-        }
+        Возвращает список городов с полями id, title, lat, lon, region, country, regionId,
+        countryCode и информацией о посещениях текущего пользователя.
+        """
+        city_ids_param = self.request.GET.get('city_ids')
 
-        # Добавляем информацию о посещении, если город посещён
-        if is_visited and city_id in city_visits_data:
-            visits_info = city_visits_data[city_id]
-            city_data['firstVisitDate'] = (
-                visits_info['first_visit_date'].isoformat()
-                if visits_info['first_visit_date']
-                else None
+        if not city_ids_param:
+            return self.to_response(
+                raw_data={'detail': 'Параметр city_ids является обязательным'},
+                status_code=HTTPStatus.BAD_REQUEST,
             )
-            city_data['lastVisitDate'] = (
-                visits_info['last_visit_date'].isoformat()
-                if visits_info['last_visit_date']
-                else None
+
+        try:
+            city_ids = _parse_ids(city_ids_param)
+        except ValueError:
+            return self.to_response(
+                raw_data={
+                    'detail': 'Параметр city_ids должен содержать список числовых ID через запятую'
+                },
+                status_code=HTTPStatus.BAD_REQUEST,
             )
-            city_data['numberOfVisits'] = visits_info['number_of_visits']
-        else:
-            city_data['firstVisitDate'] = None
-            city_data['lastVisitDate'] = None
-            city_data['numberOfVisits'] = 0
 
-        cities_data.append(city_data)
+        if not city_ids:
+            return self.to_response(
+                raw_data={'detail': 'Не указаны валидные ID городов'},
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
 
-    return Response(cities_data, status=status.HTTP_200_OK)
+        return _city_list_response(self, Q(id__in=city_ids))
 
 
 @api_view(['GET'])
@@ -641,8 +478,7 @@ def city_search(request: Request) -> Response:
     limit = validated_data.get('limit', 50)
 
     # Поиск городов через сервис
-    cities_queryset = CitySearchService.search_cities(query=query, country=country, limit=limit)
-    cities_list = list(cities_queryset)
+    cities_list = CitySearchService.search_cities(query=query, country=country, limit=limit)
 
     # Использование сериализатора для формирования ответа
     city_serializer = CitySerializer(cities_list, many=True, context={'request': request})
@@ -650,22 +486,12 @@ def city_search(request: Request) -> Response:
     return Response(city_serializer.data, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
-def country_list_by_cities(request: Request) -> Response:
-    """
-    Возвращает список стран, у которых есть города.
-
-    Возвращает список стран с полями id, code, name, отсортированный по названию.
-    Включаются только те страны, у которых есть хотя бы один город в базе данных.
-
-    :param request: DRF Request
-    :return: Response со списком стран
-    """
+def _get_countries_with_cities() -> list[dict[str, Any]]:
     # Получаем страны, у которых есть города
     countries = Country.objects.filter(city__isnull=False).distinct().order_by('name')
 
     # Формируем простой ответ с нужными полями
-    countries_data = [
+    return [
         {
             'id': country.id,
             'code': country.code,
@@ -674,6 +500,19 @@ def country_list_by_cities(request: Request) -> Response:
         for country in countries
     ]
 
+
+@api_view(['GET'])
+def country_list_by_cities(request: Request) -> Response:
+    """
+    Возвращает список стран, у которых есть города.
+
+    Возвращает список стран с полями id, code, name, отсортированный по названию.
+    Включаются только те страны, у которых есть хотя бы один город в базе данных.
+
+    :param request: DRF Request
+    :return: Response со списком стран
+    """
+    countries_data = get_reference_data(COUNTRIES_WITH_CITIES, _get_countries_with_cities)
     return Response(countries_data, status=status.HTTP_200_OK)
 
 
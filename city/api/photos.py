@@ -28,7 +28,8 @@ import msgspec
 
 from city.models import City, CityUserPhoto
 from city.serializers import CityUserPhotoSerializer
-from city.services.photo_processing import compress_city_photo
+from city.services.photo_pipeline import enqueue_city_photo, get_rendition_keys
+from city.services.photo_processing import inspect_city_photo
 from premium.services.access import has_advanced_premium
 
 
@@ -166,45 +167,46 @@ class UploadCityUserPhotoController(Controller[MsgspecSerializer]):
                 status_code=HTTPStatus.NOT_FOUND,
             )
 
-        with transaction.atomic():
-            user_city_qs = CityUserPhoto.objects.select_for_update().filter(
-                user=self.request.user, city=city
+        try:
+            inspect_city_photo(image)
+        except ValueError as exc:
+            message = str(exc)
+            if message == 'Слишком большое изображение':
+                return self.to_response(
+                    raw_data={'image': [message]},
+                    status_code=HTTPStatus.BAD_REQUEST,
+                )
+            return self.to_response(
+                raw_data={'image': ['Неподдерживаемый формат изображения']},
+                status_code=HTTPStatus.BAD_REQUEST,
             )
 
+        user_city_qs = CityUserPhoto.objects.filter(user=self.request.user, city=city)
+        if user_city_qs.count() >= settings.CITY_USER_PHOTOS_LIMIT:
+            return self._photos_limit_response()
+
+        # Исходник загружается в хранилище до блокировки строк: под блокировкой выполняется
+        # только вставка записи, а варианты фото строит обработчик очереди
+        photo = CityUserPhoto(
+            user=self.request.user, city=city, status=CityUserPhoto.Status.PENDING
+        )
+        photo.image.save(image.name or 'image', image, save=False)
+        image_name = photo.image.name
+        image_storage = photo.image.storage
+
+        with transaction.atomic():
+            user_city_qs = user_city_qs.select_for_update()
+
             if user_city_qs.count() >= settings.CITY_USER_PHOTOS_LIMIT:
-                return self.to_response(
-                    raw_data={
-                        'detail': (
-                            f'Можно загрузить не более {settings.CITY_USER_PHOTOS_LIMIT} '
-                            'фотографий для одного города'
-                        )
-                    },
-                    status_code=HTTPStatus.CONFLICT,
-                )
+                transaction.on_commit(lambda: image_storage.delete(image_name))
+                return self._photos_limit_response()
 
             max_position = user_city_qs.aggregate(max_position=Max('position'))['max_position'] or 0
 
-            try:
-                compressed_file = compress_city_photo(image)
-            except ValueError as exc:
-                message = str(exc)
-                if message == 'Слишком большое изображение':
-                    return self.to_response(
-                        raw_data={'image': [message]},
-                        status_code=HTTPStatus.BAD_REQUEST,
-                    )
-                return self.to_response(
-                    raw_data={'image': ['Неподдерживаемый формат изображения']},
-                    status_code=HTTPStatus.BAD_REQUEST,
-                )
-
-            photo = CityUserPhoto.objects.create(
-                user=self.request.user,
-                city=city,
-                image=compressed_file,
-                is_default=not user_city_qs.exists(),
-                position=max_position + 1,
-            )
+            photo.is_default = not user_city_qs.exists()
+            photo.position = max_position + 1
+            photo.save()
+            enqueue_city_photo(photo)
 
         response_serializer = CityUserPhotoSerializer(photo, context={'request': self.request})
 
@@ -213,6 +215,17 @@ class UploadCityUserPhotoController(Controller[MsgspecSerializer]):
             status_code=HTTPStatus.CREATED,
         )
 
+    def _photos_limit_response(self) -> Any:
+        return self.to_response(
+            raw_data={
+                'detail': (
+                    f'Можно загрузить не более {settings.CITY_USER_PHOTOS_LIMIT} '
+                    'фотографий для одного города'
+                )
+            },
+            status_code=HTTPStatus.CONFLICT,
+        )
+
 
 class CityUserPhotoController(Controller[MsgspecSerializer]):
     @validate(
@@ -234,8 +247,9 @@ class CityUserPhotoController(Controller[MsgspecSerializer]):
 
         assert isinstance(self.request.user, User)
 
+        # До окончания обработки файл фото не отдаётся: это исходник или его уже нет
         photo = CityUserPhoto.objects.filter(
-            id=self.kwargs['photo_id'], user=self.request.user
+            id=self.kwargs['photo_id'], user=self.request.user, status=CityUserPhoto.Status.READY
         ).first()
 
         if photo is None:
@@ -274,7 +288,7 @@ class CityUserPhotoController(Controller[MsgspecSerializer]):
                 status_code=HTTPStatus.FORBIDDEN,
             )
 
-        image_name: str | None = None
+        image_names: list[str] = []
         image_storage = None
 
         with transaction.atomic():
@@ -291,7 +305,7 @@ class CityUserPhotoController(Controller[MsgspecSerializer]):
                 )
 
             city_id = photo.city_id
-            image_name = photo.image.name
+            image_names = [photo.image.name, *get_rendition_keys(photo.renditions)]
             image_storage = photo.image.storage
             photo.delete()
 
@@ -324,8 +338,15 @@ class CityUserPhotoController(Controller[MsgspecSerializer]):
                     default_photo_id = str(item.id)
                     break
 
-            if image_name and image_storage is not None:
-                transaction.on_commit(lambda: image_storage.delete(image_name))
+            if image_storage is not None:
+                storage = image_storage
+
+                def delete_image_files() -> None:
+                    for name in dict.fromkeys(image_names):
+                        if name:
+                            storage.delete(name)
+
+                transaction.on_commit(delete_image_files)
 
         return self.to_response(
             raw_data={'status': 'success', 'default_photo_id': default_photo_id},
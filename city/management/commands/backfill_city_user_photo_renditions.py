@@ -0,0 +1,47 @@
+"""
+Команда для построения вариантов пользовательских фото городов, загруженных
+до появления очереди обработки. Фото ставятся в очередь и сразу обрабатываются
+в пуле процессов; параллельно работающий `process_city_user_photos` помогает разобрать очередь.
+"""
+
+import os
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from city.services.photo_pipeline import (
+    DEFAULT_BATCH_SIZE,
+    create_render_pool,
+    enqueue_city_photos_without_renditions,
+    process_city_photo_queue,
+)
+
+
+class Command(BaseCommand):
+    help = 'Строит варианты для пользовательских фото городов, у которых их ещё нет.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов, в которых декодируются и кодируются фото.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество фото, забираемых из очереди за один раз.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        queued = enqueue_city_photos_without_renditions()
+        self.stdout.write(f'Поставлено в очередь фото: {queued}')
+
+        # Пачка не меньше числа процессов, иначе часть пула простаивает
+        batch_size = max(options['batch_size'], options['workers'])
+        with create_render_pool(options['workers']) as executor:
+            processed = process_city_photo_queue(batch_size=batch_size, executor=executor)
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано фото: {processed}'))
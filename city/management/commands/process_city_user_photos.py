@@ -0,0 +1,70 @@
+"""
+Команда для обработки очереди загруженных пользовательских фото городов:
+строит варианты фото и удаляет исходники.
+Запускается по cron или постоянно работающим процессом с ключом `--watch`.
+Процесс должен получать ту же переменную PROMETHEUS_MULTIPROC_DIR, что и Gunicorn,
+иначе его метрики не попадут в /metrics (см. раздел README о фоновых обработчиках).
+"""
+
+import time
+from argparse import ArgumentParser
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from city.services.photo_pipeline import (
+    DEFAULT_BATCH_SIZE,
+    create_render_pool,
+    process_city_photo_queue,
+)
+from services.metrics import UNSHARED_WORKER_METRICS_WARNING, worker_metrics_are_shared
+
+
+class Command(BaseCommand):
+    help = 'Строит варианты загруженных пользовательских фото городов.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество фото, забираемых из очереди за один раз.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов, в которых декодируются и кодируются фото.',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Не завершаться после опустошения очереди, а ждать новые фото.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах между проверками пустой очереди в режиме --watch.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        if not worker_metrics_are_shared():
+            self.stderr.write(self.style.WARNING(UNSHARED_WORKER_METRICS_WARNING))
+        workers = options['workers']
+        pool: Any = create_render_pool(workers) if workers > 1 else nullcontext()
+        with pool as executor:
+            self._process(executor, options)
+
+    def _process(self, executor: Executor | None, options: dict[str, Any]) -> None:
+        while True:
+            processed = process_city_photo_queue(
+                batch_size=options['batch_size'], executor=executor
+            )
+            if not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Обработано фото: {processed}'))
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,37 @@
+"""
+Команда для заполнения и полной пересборки таблицы UserCitySummary.
+Используется для первичного заполнения и для сверки сводки с VisitedCity
+(например, после массовых правок данных в обход сигналов).
+"""
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from city.services.user_city_summary import rebuild_user_city_summaries
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает сводку посещений городов (UserCitySummary) из VisitedCity.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='ID пользователя, для которого нужно пересобрать сводку. '
+            'Можно указать несколько раз. По умолчанию пересобирается сводка всех пользователей.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк сводки, записываемых за один запрос.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        written = rebuild_user_city_summaries(options['user_ids'], batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Записано строк сводки: {written}'))
@@ -0,0 +1,29 @@
+"""
+Команда для сверки счётчиков популярности городов (CityPopularity) с таблицей VisitedCity.
+Предназначена для периодического запуска по cron: исправляет расхождения,
+накопившиеся из-за изменений данных в обход сигналов.
+"""
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from city.services.city_popularity import reconcile_city_popularity
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики популярности городов и исправляет расхождения.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк счётчиков, записываемых за один запрос.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        changed = reconcile_city_popularity(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Исправлено городов: {changed}'))
@@ -0,0 +1,30 @@
+"""
+Команда для сверки счётчиков рейтинга пользователей (UserVisitCounters, UserCountryVisitCounters)
+с таблицей VisitedCity.
+Предназначена для периодического запуска по cron: исправляет расхождения,
+накопившиеся из-за изменений данных в обход сигналов.
+"""
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from city.services.user_rank import reconcile_user_visit_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики посещений пользователей и исправляет расхождения.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк счётчиков, записываемых за один запрос.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        changed = reconcile_user_visit_counters(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Исправлено строк счётчиков: {changed}'))
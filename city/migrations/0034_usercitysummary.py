@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:33
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FILL_USER_CITY_SUMMARY_SQL = """
+    INSERT INTO city_usercitysummary (
+        user_id, city_id, number_of_visits, average_rating, has_souvenir,
+        visit_dates, first_visit_date, last_visit_date, updated_at
+    )
+    SELECT
+        user_id,
+        city_id,
+        COUNT(id),
+        ROUND(AVG(rating) * 2, 0) / 2,
+        BOOL_OR(has_magnet),
+        ARRAY_AGG(date_of_visit ORDER BY date_of_visit) FILTER (WHERE date_of_visit IS NOT NULL),
+        MIN(date_of_visit),
+        MAX(date_of_visit),
+        NOW()
+    FROM city_visitedcity
+    GROUP BY user_id, city_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0033_add_visitedcity_user_city_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCitySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number_of_visits', models.PositiveIntegerField(default=0, verbose_name='Количество посещений')),
+                ('average_rating', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True, verbose_name='Средний рейтинг (с шагом 0.5)')),
+                ('has_souvenir', models.BooleanField(default=False, verbose_name='Есть сувенир')),
+                ('visit_dates', django.contrib.postgres.fields.ArrayField(base_field=models.DateField(), blank=True, null=True, size=None, verbose_name='Даты посещений')),
+                ('first_visit_date', models.DateField(blank=True, null=True, verbose_name='Дата первого посещения')),
+                ('last_visit_date', models.DateField(blank=True, null=True, verbose_name='Дата последнего посещения')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_summaries', to='city.city', verbose_name='Город')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='city_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Сводка по посещениям города',
+                'verbose_name_plural': 'Сводки по посещениям городов',
+                'constraints': [models.UniqueConstraint(fields=('user', 'city'), name='unique_user_city_summary')],
+            },
+        ),
+        migrations.RunSQL(FILL_USER_CITY_SUMMARY_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FILL_CITY_POPULARITY_SQL = """
+    INSERT INTO city_citypopularity (city_id, number_of_users, number_of_visits, updated_at)
+    SELECT city_id, COUNT(DISTINCT user_id), COUNT(id), NOW()
+    FROM city_visitedcity
+    GROUP BY city_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0034_usercitysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityPopularity',
+            fields=[
+                ('city', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='city.city', verbose_name='Город')),
+                ('number_of_users', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Количество пользователей, посетивших город')),
+                ('number_of_visits', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Общее количество посещений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')),
+            ],
+            options={
+                'verbose_name': 'Популярность города',
+                'verbose_name_plural': 'Популярность городов',
+            },
+        ),
+        migrations.RunSQL(FILL_CITY_POPULARITY_SQL, migrations.RunSQL.noop),
+    ]
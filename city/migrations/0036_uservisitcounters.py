@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FILL_USER_VISIT_COUNTERS_SQL = """
+    INSERT INTO city_uservisitcounters (user_id, number_of_cities, number_of_visits, updated_at)
+    SELECT user_id, COUNT(DISTINCT city_id), COUNT(id), NOW()
+    FROM city_visitedcity
+    GROUP BY user_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('city', '0035_citypopularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserVisitCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='visit_counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('number_of_cities', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Количество уникальных посещённых городов')),
+                ('number_of_visits', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Общее количество посещений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')),
+            ],
+            options={
+                'verbose_name': 'Счётчики посещений пользователя',
+                'verbose_name_plural': 'Счётчики посещений пользователей',
+            },
+        ),
+        migrations.RunSQL(FILL_USER_VISIT_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FILL_USER_COUNTRY_VISIT_COUNTERS_SQL = """
+    INSERT INTO city_usercountryvisitcounters
+        (user_id, country_id, number_of_cities, number_of_visits, updated_at)
+    SELECT visited_city.user_id, city.country_id,
+           COUNT(DISTINCT visited_city.city_id), COUNT(visited_city.id), NOW()
+    FROM city_visitedcity AS visited_city
+    INNER JOIN city_city AS city ON city.id = visited_city.city_id
+    GROUP BY visited_city.user_id, city.country_id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0036_uservisitcounters'),
+        ('country', '0006_alter_country_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCountryVisitCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number_of_cities', models.PositiveIntegerField(default=0, verbose_name='Количество уникальных посещённых городов')),
+                ('number_of_visits', models.PositiveIntegerField(default=0, verbose_name='Общее количество посещений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_visit_counters', to='country.country', verbose_name='Страна')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='country_visit_counters', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Счётчики посещений пользователя в стране',
+                'verbose_name_plural': 'Счётчики посещений пользователей в странах',
+                'indexes': [models.Index(fields=['country', 'number_of_cities'], name='city_userco_country_af2d81_idx'), models.Index(fields=['country', 'number_of_visits'], name='city_userco_country_5f2c95_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'country'), name='unique_user_country_visit_counters')],
+            },
+        ),
+        migrations.RunSQL(FILL_USER_COUNTRY_VISIT_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
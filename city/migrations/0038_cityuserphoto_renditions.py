@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0037_usercountryvisitcounters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cityuserphoto',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Варианты изображения'),
+        ),
+        migrations.AddField(
+            model_name='cityuserphoto',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка обработки')], default='ready', max_length=16, verbose_name='Статус обработки'),
+        ),
+        migrations.CreateModel(
+            name='CityUserPhotoProcessingTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+                ('photo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='city.cityuserphoto', verbose_name='Фото')),
+            ],
+            options={
+                'verbose_name': 'Задача обработки фото',
+                'verbose_name_plural': 'Задачи обработки фото',
+                'ordering': ('id',),
+            },
+        ),
+    ]
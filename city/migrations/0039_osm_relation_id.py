@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0038_cityuserphoto_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='osm_relation_id',
+            field=models.BigIntegerField(blank=True, help_text='Отношение OpenStreetMap с границей города (для кеша полигонов)', null=True, verbose_name='OSM relation ID'),
+        ),
+        migrations.AddField(
+            model_name='citydistrict',
+            name='osm_relation_id',
+            field=models.BigIntegerField(blank=True, help_text='Отношение OpenStreetMap с границей района (для кеша полигонов)', null=True, verbose_name='OSM relation ID'),
+        ),
+    ]
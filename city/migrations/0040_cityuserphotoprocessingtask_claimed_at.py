@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0039_osm_relation_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cityuserphotoprocessingtask',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взята в обработку'),
+        ),
+    ]
@@ -10,6 +10,7 @@ Licensed under the Apache License, Version 2.0
 import uuid
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import CASCADE, PROTECT
@@ -61,6 +62,12 @@ class City(models.Model):
     image_source_link = models.URLField(
         blank=True, null=True, verbose_name='Ссылка на источник изображения'
     )
+    osm_relation_id = models.BigIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='OSM relation ID',
+        help_text='Отношение OpenStreetMap с границей города (для кеша полигонов)',
+    )
 
     class Meta:
         ordering = ['title']
@@ -155,6 +162,169 @@ class VisitedCity(models.Model):
         return reverse('city-selected', kwargs={'pk': self.pk})
 
 
+class UserCitySummary(models.Model):
+    """
+    Денормализованная сводка по всем посещениям одного города одним пользователем.
+    Обновляется сигналами при сохранении и удалении VisitedCity,
+    полностью пересобирается командой `rebuild_user_city_summary`.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=CASCADE,
+        verbose_name='Пользователь',
+        related_name='city_summaries',
+    )
+    city = models.ForeignKey(
+        City,
+        on_delete=CASCADE,
+        verbose_name='Город',
+        related_name='user_summaries',
+    )
+    number_of_visits = models.PositiveIntegerField(verbose_name='Количество посещений', default=0)
+    average_rating = models.DecimalField(
+        verbose_name='Средний рейтинг (с шагом 0.5)',
+        max_digits=2,
+        decimal_places=1,
+        blank=True,
+        null=True,
+    )
+    has_souvenir = models.BooleanField(verbose_name='Есть сувенир', default=False)
+    visit_dates = ArrayField(
+        models.DateField(),
+        verbose_name='Даты посещений',
+        blank=True,
+        null=True,
+    )
+    first_visit_date = models.DateField(
+        verbose_name='Дата первого посещения', blank=True, null=True
+    )
+    last_visit_date = models.DateField(
+        verbose_name='Дата последнего посещения', blank=True, null=True
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')
+
+    class Meta:
+        verbose_name = 'Сводка по посещениям города'
+        verbose_name_plural = 'Сводки по посещениям городов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'city'],
+                name='unique_user_city_summary',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user_id} - {self.city_id}: {self.number_of_visits}'
+
+
+class CityPopularity(models.Model):
+    """
+    Счётчики популярности города среди всех пользователей.
+    Изменяются инкрементально сигналами VisitedCity,
+    сверяются с исходными данными командой `reconcile_city_popularity`.
+    """
+
+    city = models.OneToOneField(
+        City,
+        on_delete=CASCADE,
+        primary_key=True,
+        verbose_name='Город',
+        related_name='popularity',
+    )
+    number_of_users = models.PositiveIntegerField(
+        verbose_name='Количество пользователей, посетивших город', default=0, db_index=True
+    )
+    number_of_visits = models.PositiveIntegerField(
+        verbose_name='Общее количество посещений', default=0, db_index=True
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')
+
+    class Meta:
+        verbose_name = 'Популярность города'
+        verbose_name_plural = 'Популярность городов'
+
+    def __str__(self) -> str:
+        return f'{self.city_id}: {self.number_of_users} / {self.number_of_visits}'
+
+
+class UserVisitCounters(models.Model):
+    """
+    Счётчики посещённых городов пользователя, по которым считается его место в рейтинге.
+    Изменяются инкрементально сигналами VisitedCity,
+    сверяются с исходными данными командой `reconcile_user_visit_counters`.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=CASCADE,
+        primary_key=True,
+        verbose_name='Пользователь',
+        related_name='visit_counters',
+    )
+    number_of_cities = models.PositiveIntegerField(
+        verbose_name='Количество уникальных посещённых городов', default=0, db_index=True
+    )
+    number_of_visits = models.PositiveIntegerField(
+        verbose_name='Общее количество посещений', default=0, db_index=True
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')
+
+    class Meta:
+        verbose_name = 'Счётчики посещений пользователя'
+        verbose_name_plural = 'Счётчики посещений пользователей'
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.number_of_cities} / {self.number_of_visits}'
+
+
+class UserCountryVisitCounters(models.Model):
+    """
+    Счётчики посещённых городов пользователя в одной стране,
+    по которым считается его место в рейтинге страны.
+    Изменяются инкрементально сигналами VisitedCity,
+    сверяются с исходными данными командой `reconcile_user_visit_counters`.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=CASCADE,
+        verbose_name='Пользователь',
+        related_name='country_visit_counters',
+    )
+    country = models.ForeignKey(
+        Country,
+        on_delete=CASCADE,
+        verbose_name='Страна',
+        related_name='user_visit_counters',
+    )
+    number_of_cities = models.PositiveIntegerField(
+        verbose_name='Количество уникальных посещённых городов', default=0
+    )
+    number_of_visits = models.PositiveIntegerField(
+        verbose_name='Общее количество посещений', default=0
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')
+
+    class Meta:
+        verbose_name = 'Счётчики посещений пользователя в стране'
+        verbose_name_plural = 'Счётчики посещений пользователей в странах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'country'], name='unique_user_country_visit_counters'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['country', 'number_of_cities']),
+            models.Index(fields=['country', 'number_of_visits']),
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f'{self.user_id} / {self.country_id}: {self.number_of_cities} / {self.number_of_visits}'
+        )
+
+
 class CityListDefaultSettings(models.Model):
     """
     Модель для хранения настроек по умолчанию фильтрации и сортировки
@@ -195,6 +365,11 @@ class CityListDefaultSettings(models.Model):
 
 
 class CityUserPhoto(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Обрабатывается'
+        READY = 'ready', 'Готово'
+        FAILED = 'failed', 'Ошибка обработки'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name='ID')
     user = models.ForeignKey(
         User,
@@ -213,6 +388,15 @@ class CityUserPhoto(models.Model):
         storage=UsersCityPhotoStorage(),
         verbose_name='Изображение',
     )
+    # Варианты изображения, построенные обработчиком очереди:
+    # {'thumbnail': {'width': 320, 'height': 240, 'jpeg': '<ключ>', 'webp': '<ключ>', ...}, ...}
+    renditions = models.JSONField(default=dict, blank=True, verbose_name='Варианты изображения')
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.READY,
+        verbose_name='Статус обработки',
+    )
     is_default = models.BooleanField(default=False, verbose_name='Фото по умолчанию')
     position = models.PositiveSmallIntegerField(default=0, verbose_name='Позиция')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата и время создания')
@@ -238,6 +422,35 @@ class CityUserPhoto(models.Model):
         return f'Фото {self.city.title} ({self.user.username})'
 
 
+class CityUserPhotoProcessingTask(models.Model):
+    """
+    Задача на построение вариантов пользовательского фото города.
+    Очередь обрабатывается вне запроса командой `process_city_user_photos`.
+
+    Внешний ключ без ограничения в базе: удаление фото не ждёт, пока обработчик держит
+    блокировку задачи, а задачи удалённых фото обработчик просто удаляет.
+    """
+
+    photo = models.ForeignKey(
+        CityUserPhoto,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Фото',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')
+    # Когда обработчик взял задачу; задача, взятая давно, забирается повторно
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='Взята в обработку')
+
+    def __str__(self) -> str:
+        return f'Обработка фото {self.photo_id}'
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Задача обработки фото'
+        verbose_name_plural = 'Задачи обработки фото'
+
+
 class CityDistrict(models.Model):
     """
     Модель для хранения метаданных о районах городов.
@@ -265,6 +478,12 @@ class CityDistrict(models.Model):
         blank=True,
         null=True,
     )
+    osm_relation_id = models.BigIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='OSM relation ID',
+        help_text='Отношение OpenStreetMap с границей района (для кеша полигонов)',
+    )
 
     class Meta:
         ordering = ['title']
@@ -5,6 +5,7 @@ from django.db.models.functions import Rank
 
 from city.models import City
 from city.repository.interfaces import AbstractCityRepository
+from city.services.db import get_number_of_cities
 
 
 class CityRepository(AbstractCityRepository):
@@ -24,10 +25,7 @@ class CityRepository(AbstractCityRepository):
         """
         Возвращает количество городов, сохранённых в базе данных.
         """
-        queryset = City.objects.all()
-        if country_code:
-            queryset = queryset.filter(country__code=country_code)
-        return queryset.count()
+        return get_number_of_cities(country_code)
 
     def get_number_of_cities_in_region_by_city(self, city_id: int) -> int:
         """
@@ -7,6 +7,8 @@
 
 from __future__ import annotations
 
+from datetime import date
+
 import msgspec
 
 
@@ -39,3 +41,18 @@ class CityStatisticsResponse(msgspec.Struct):
     neighboring_cities_by_rank_in_country_by_visits: list[NeighboringCityItem]
     neighboring_cities_by_rank_in_region_by_users: list[NeighboringCityItem]
     neighboring_cities_by_rank_in_region_by_visits: list[NeighboringCityItem]
+
+
+class CityListItem(msgspec.Struct, rename='camel'):
+    id: int
+    title: str
+    lat: str
+    lon: str
+    region: str | None
+    country: str | None
+    region_id: int | None
+    country_code: str | None
+    is_visited: bool
+    first_visit_date: date | None
+    last_visit_date: date | None
+    number_of_visits: int
@@ -231,7 +231,9 @@ class CityUserPhotoSerializer(serializers.ModelSerializer[CityUserPhoto]):
     image_url = serializers.SerializerMethodField()
 
     def get_image_url(self, obj: CityUserPhoto) -> str:
-        if not obj.image:
+        # До окончания обработки в хранилище лежит исходник, а после ошибки файла нет:
+        # клиент узнаёт об этом по полю status
+        if obj.status != CityUserPhoto.Status.READY or not obj.image:
             return ''
 
         request = self.context.get('request')
@@ -244,7 +246,7 @@ class CityUserPhotoSerializer(serializers.ModelSerializer[CityUserPhoto]):
 
     class Meta:
         model = CityUserPhoto
-        fields = ['id', 'city_id', 'is_default', 'position', 'image_url', 'created_at']
+        fields = ['id', 'city_id', 'is_default', 'position', 'status', 'image_url', 'created_at']
 
 
 class CityUserPhotoUploadSerializer(serializers.Serializer[dict[str, Any]]):
@@ -0,0 +1,75 @@
+"""
+Формирование списка городов для карт регионов и стран.
+
+Города вместе с первой и последней датой посещения и количеством посещений
+пользователя загружаются одним агрегирующим запросом: посещения присоединяются
+к городам через FilteredRelation и группируются по городу.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+from django.db.models import Count, FilteredRelation, Max, Min, Q
+
+from city.models import City
+from city.schemas import CityListItem
+
+CITY_LIST_FIELDS = (
+    'id',
+    'title',
+    'coordinate_width',
+    'coordinate_longitude',
+    'region__full_name',
+    'country__name',
+    'region_id',
+    'country__code',
+)
+
+
+def get_city_list_items(city_filter: Q, user_id: int | None = None) -> list[CityListItem]:
+    """
+    Возвращает отсортированный по названию список городов, подходящих под `city_filter`.
+    Для пользователя с ID user_id каждый город дополняется информацией о его посещениях,
+    для анонимного пользователя все города считаются непосещёнными.
+    """
+    queryset = City.objects.filter(city_filter)
+    if user_id is None:
+        rows = queryset.values(*CITY_LIST_FIELDS)
+    else:
+        rows = (
+            queryset.alias(
+                user_visits=FilteredRelation(
+                    'visitedcity', condition=Q(visitedcity__user_id=user_id)
+                )
+            )
+            .values(*CITY_LIST_FIELDS)
+            .annotate(
+                first_visit_date=Min('user_visits__date_of_visit'),
+                last_visit_date=Max('user_visits__date_of_visit'),
+                number_of_visits=Count('user_visits'),
+            )
+        )
+
+    return [
+        CityListItem(
+            id=row['id'],
+            title=row['title'],
+            lat=str(row['coordinate_width']),
+            lon=str(row['coordinate_longitude']),
+            region=row['region__full_name'],
+            country=row['country__name'],
+            region_id=row['region_id'],
+            country_code=row['country__code'],
+            is_visited=row.get('number_of_visits', 0) > 0,
+            first_visit_date=row.get('first_visit_date'),
+            last_visit_date=row.get('last_visit_date'),
+            number_of_visits=row.get('number_of_visits', 0),
+        )
+        for row in rows.order_by('title')
+    ]
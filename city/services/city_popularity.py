@@ -0,0 +1,73 @@
+"""
+Поддержка счётчиков популярности городов (CityPopularity).
+
+Счётчики заменяют подсчёт по всей таблице VisitedCity на каждый запрос:
+количество пользователей, посетивших город, и общее количество посещений
+берутся из одной строки, которая присоединяется к городу по первичному ключу.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from city.models import CityPopularity, VisitedCity
+from city.services.visit_counters import change_counters, reconcile_counters
+
+
+def popularity_annotations(prefix: str = '') -> dict[str, Any]:
+    """
+    Возвращает аннотации `number_of_users_who_visit_city` и `number_of_visits_all_users`,
+    читающие счётчики CityPopularity. `prefix` — путь до города, например `city__`.
+    Для городов без посещений значения равны None, как и при подсчёте подзапросами.
+    """
+    return {
+        'number_of_users_who_visit_city': F(f'{prefix}popularity__number_of_users'),
+        'number_of_visits_all_users': F(f'{prefix}popularity__number_of_visits'),
+    }
+
+
+def change_city_popularity(city_id: int, visits_delta: int, users_delta: int) -> None:
+    """
+    Атомарно изменяет счётчики города на указанные величины.
+    Строка счётчиков создаётся только при добавлении посещений, чтобы не пересоздавать её
+    при каскадном удалении самого города.
+    """
+    change_counters(
+        CityPopularity,
+        {'city_id': city_id},
+        {'number_of_visits': visits_delta, 'number_of_users': users_delta},
+    )
+
+
+def reconcile_city_popularity(batch_size: int = 1000) -> int:
+    """
+    Пересчитывает все счётчики по таблице VisitedCity и исправляет расхождения.
+    Предназначена для периодического запуска по cron командой `reconcile_city_popularity`.
+    Возвращает количество городов, у которых счётчики были изменены.
+    """
+    with transaction.atomic():
+        return reconcile_counters(
+            CityPopularity,
+            key_fields=['city'],
+            counter_fields=['number_of_users', 'number_of_visits'],
+            actual={
+                (row['city_id'],): (row['number_of_users'], row['number_of_visits'])
+                for row in VisitedCity.objects.order_by()
+                .values('city_id')
+                .annotate(
+                    number_of_users=Count('user_id', distinct=True),
+                    number_of_visits=Count('id'),
+                )
+            },
+            batch_size=batch_size,
+        )
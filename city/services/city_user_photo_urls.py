@@ -11,10 +11,34 @@ Licensed under the Apache License, Version 2.0
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
 from uuid import UUID
 
 from city.models import CityUserPhoto
+from MoiGoroda.storages import get_storage_urls
+
+# Варианты фото для карточек списков: карточка не шире ~640 CSS-пикселей,
+# поэтому даже на экранах с двойной плотностью хватает среднего варианта
+LIST_RENDITIONS = ('thumbnail', 'medium')
+
+# Вариант, который отдаётся в ``src`` браузерам без поддержки ``srcset``
+LIST_FALLBACK_RENDITION = 'medium'
+
+# Форматы для ``<source>`` в порядке предпочтения: формат варианта → MIME-тип
+LIST_SOURCE_FORMATS = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+@dataclass(frozen=True, slots=True)
+class CityUserPhotoPicture:
+    """
+    Данные для ``<picture>`` с превью фото: ``src`` и ``srcset`` для ``<img>`` (JPEG)
+    и ``srcset`` для каждого ``<source>`` в более компактных форматах.
+    """
+
+    url: str
+    srcset: str = ''
+    sources: list[dict[str, str]] = field(default_factory=list)
 
 
 def city_user_photo_file_url(photo: CityUserPhoto) -> str:
@@ -33,17 +57,103 @@ def city_user_photo_file_url(photo: CityUserPhoto) -> str:
     return str(photo.image.url)
 
 
+def city_user_photo_srcset(
+    photo: CityUserPhoto,
+    image_format: str,
+    renditions: Iterable[str] = LIST_RENDITIONS,
+    urls: Mapping[str, str] | None = None,
+) -> str:
+    """
+    Возвращает значение атрибута ``srcset`` из вариантов фото в формате ``image_format``.
+
+    Args:
+        photo: Фото с заполненным полем ``renditions``.
+        image_format: Формат варианта: ``jpeg``, ``webp`` или ``avif``.
+        renditions: Имена вариантов, попадающих в ``srcset``.
+        urls: Заранее подписанные URL по ключам файлов (см. ``get_storage_urls``);
+            недостающие URL запрашиваются у хранилища.
+
+    Returns:
+        Строка вида ``<url> 320w, <url> 960w`` или пустая строка, если вариантов
+        в этом формате нет (фото ещё не обработано).
+    """
+    candidates = []
+    for name in renditions:
+        rendition = photo.renditions.get(name)
+        if rendition and rendition.get(image_format):
+            url = _get_file_url(photo, rendition[image_format], urls)
+            candidates.append(f'{url} {rendition["width"]}w')
+    return ', '.join(candidates)
+
+
+def get_city_user_photo_picture_files(photo: CityUserPhoto) -> list[str]:
+    """Возвращает ключи всех файлов, на которые ссылается превью фото в карточке списка."""
+    if photo.status != CityUserPhoto.Status.READY:
+        return []
+    if not photo.renditions.get(LIST_FALLBACK_RENDITION, {}).get('jpeg'):
+        return [photo.image.name]
+    names: list[str] = []
+    for name in LIST_RENDITIONS:
+        rendition = photo.renditions.get(name) or {}
+        names.extend(rendition[key] for key in ('jpeg', *LIST_SOURCE_FORMATS) if rendition.get(key))
+    return names
+
+
+def city_user_photo_picture(
+    photo: CityUserPhoto, urls: Mapping[str, str] | None = None
+) -> CityUserPhotoPicture:
+    """
+    Возвращает превью фото для карточек списков.
+
+    Для обработанного фото ``src`` указывает на средний JPEG-вариант, а ``srcset`` —
+    на уменьшенные варианты, поэтому браузер не скачивает фото в полном размере.
+    Для фото, загруженного до появления вариантов, отдаётся URL основного изображения
+    без ``srcset``. Фото, которое ещё обрабатывается или не обработалось, не показывается:
+    исходник может быть слишком большим или в формате, который браузер не откроет.
+
+    Args:
+        photo: Запись пользовательского фото.
+        urls: Заранее подписанные URL по ключам файлов из
+            ``get_city_user_photo_picture_files``.
+
+    Returns:
+        Данные для шаблона ``city/partials/city_user_photo_picture.html``;
+        для необработанного фото — с пустым ``url``.
+    """
+    if photo.status != CityUserPhoto.Status.READY:
+        return CityUserPhotoPicture(url='')
+
+    fallback = photo.renditions.get(LIST_FALLBACK_RENDITION, {}).get('jpeg')
+    if not fallback:
+        return CityUserPhotoPicture(url=_get_file_url(photo, photo.image.name, urls))
+
+    sources = []
+    for image_format, mime_type in LIST_SOURCE_FORMATS.items():
+        srcset = city_user_photo_srcset(photo, image_format, urls=urls)
+        if srcset:
+            sources.append({'type': mime_type, 'srcset': srcset})
+
+    return CityUserPhotoPicture(
+        url=_get_file_url(photo, fallback, urls),
+        srcset=city_user_photo_srcset(photo, 'jpeg', urls=urls),
+        sources=sources,
+    )
+
+
 def attach_default_city_user_photo_presigned_urls(items: Iterable[Any], user_id: int) -> None:
     """
     Подставляет в элементы списка прямой URL дефолтного фото пользователя по городу.
 
     Ожидается, что у каждого элемента уже есть аннотация
     ``default_city_user_photo_id`` (UUID фото по умолчанию для пары пользователь–город).
-    В объект добавляется атрибут/ключ ``default_city_user_photo_url`` с тем же URL,
-    что даёт хранилище для ``CityUserPhoto.image`` (presigned при приватном S3).
+    В объект добавляются атрибуты/ключи ``default_city_user_photo_url`` (URL для ``src``),
+    ``default_city_user_photo_srcset`` и ``default_city_user_photo_sources`` из
+    ``city_user_photo_picture`` — URL уменьшенных вариантов фото, которые отдаёт
+    хранилище (presigned при приватном S3).
 
     Идентификаторы собираются в первом проходе, затем выполняется один запрос к БД
-    на все фото страницы, во втором проходе URL раздаются по элементам.
+    на все фото страницы, URL всех файлов страницы подписываются одним пакетом
+    (``get_storage_urls``), во втором проходе URL раздаются по элементам.
 
     Args:
         items: Строки текущей страницы списка: экземпляры моделей или словари из ``QuerySet.values()``.
@@ -51,7 +161,8 @@ def attach_default_city_user_photo_presigned_urls(items: Iterable[Any], user_id:
             чтобы не отдавать чужие файлы по id из аннотации.
 
     Side effects:
-        Мутирует переданные объекты/словари, добавляя ``default_city_user_photo_url``.
+        Мутирует переданные объекты/словари, добавляя ``default_city_user_photo_url``,
+        ``default_city_user_photo_srcset`` и ``default_city_user_photo_sources``.
     """
     collected: list[Any] = list(items)
     ids: list[UUID] = []
@@ -70,8 +181,16 @@ def attach_default_city_user_photo_presigned_urls(items: Iterable[Any], user_id:
     if not ids:
         return
 
-    photos = CityUserPhoto.objects.filter(id__in=ids, user_id=user_id).only('id', 'image')
-    url_by_id = {str(photo.pk): city_user_photo_file_url(photo) for photo in photos}
+    photos = list(
+        CityUserPhoto.objects.filter(
+            id__in=ids, user_id=user_id, status=CityUserPhoto.Status.READY
+        ).only('id', 'image', 'renditions', 'status')
+    )
+    urls: dict[str, str] = {}
+    if photos:
+        names = [name for photo in photos for name in get_city_user_photo_picture_files(photo)]
+        urls = get_storage_urls(photos[0].image.storage, names)
+    picture_by_id = {str(photo.pk): city_user_photo_picture(photo, urls) for photo in photos}
 
     for item in collected:
         pid = _get_default_city_user_photo_id(item)
@@ -79,11 +198,18 @@ def attach_default_city_user_photo_presigned_urls(items: Iterable[Any], user_id:
         if pid is None:
             continue
 
-        key = str(pid)
-        url = url_by_id.get(key)
+        picture = picture_by_id.get(str(pid))
+
+        if picture is not None and picture.url:
+            _set_item_value(item, 'default_city_user_photo_url', picture.url)
+            _set_item_value(item, 'default_city_user_photo_srcset', picture.srcset)
+            _set_item_value(item, 'default_city_user_photo_sources', picture.sources)
+
 
-        if url:
-            _set_default_city_user_photo_url(item, url)
+def _get_file_url(photo: CityUserPhoto, name: str, urls: Mapping[str, str] | None) -> str:
+    if urls is not None and name in urls:
+        return urls[name]
+    return str(photo.image.storage.url(name))
 
 
 def _get_default_city_user_photo_id(item: Any) -> UUID | str | None:
@@ -102,19 +228,19 @@ def _get_default_city_user_photo_id(item: Any) -> UUID | str | None:
     return getattr(item, 'default_city_user_photo_id', None)
 
 
-def _set_default_city_user_photo_url(item: Any, url: str) -> None:
+def _set_item_value(item: Any, key: str, value: Any) -> None:
     """
-    Записывает готовый URL превью в элемент списка.
+    Записывает готовое значение для шаблона в элемент списка.
 
     Args:
         item: Тот же тип, что в ``attach_default_city_user_photo_presigned_urls``.
-        url: Строка URL для подстановки в шаблон (например presigned S3).
+        key: Имя ключа словаря или атрибута модели.
+        value: Значение для подстановки в шаблон (например presigned URL S3).
 
     Side effects:
-        У словаря устанавливает ключ ``default_city_user_photo_url``,
-        у модели — атрибут с тем же именем.
+        У словаря устанавливает ключ ``key``, у модели — атрибут с тем же именем.
     """
     if isinstance(item, dict):
-        item['default_city_user_photo_url'] = url
+        item[key] = value
     else:
-        setattr(item, 'default_city_user_photo_url', url)
+        setattr(item, key, value)
@@ -11,12 +11,9 @@ from typing import Any, cast
 from datetime import date
 
 from django.contrib.auth.base_user import AbstractBaseUser
-from django.contrib.postgres.aggregates import ArrayAgg
 from django.db.models import (
     OuterRef,
     Count,
-    Avg,
-    Exists,
     Q,
     Min,
     Max,
@@ -26,12 +23,16 @@ from django.db.models import (
     QuerySet,
     Func,
     F,
+    FilteredRelation,
+    FloatField,
     Window,
 )
-from django.db.models.functions import Round, TruncYear, TruncMonth, Rank, Coalesce
+from django.db.models.functions import TruncYear, TruncMonth, Rank, Coalesce, Cast
 
 from city.models import City, CityUserPhoto, VisitedCity
+from city.services.city_popularity import popularity_annotations
 from country.models import Country
+from services.reference_cache import NUMBER_OF_CITIES, get_reference_data
 
 
 class ExtractYearFromArray(Func):
@@ -67,69 +68,6 @@ def get_unique_visited_cities(
         а не `region.title` и `region.type`, так как `region` через __str__()
         отображает корректное обработанное название)
     """
-    # Подзапрос для количества посещений города пользователем
-    city_visits_subquery = (
-        VisitedCity.objects.filter(user_id=user_id, city_id=OuterRef('city_id'))
-        .values('city_id')  # Группировка по городу
-        .annotate(count=Count('*'))  # Подсчет записей (число посещений)
-        .values('count')  # Передаем только поле count
-    )
-
-    # Подзапрос для вычисления среднего рейтинга посещений города пользователем
-    average_rating_subquery = (
-        VisitedCity.objects.filter(user_id=user_id, city_id=OuterRef('city_id'))
-        .values('city_id')  # Группировка по городу
-        .annotate(avg_rating=Avg('rating'))  # Вычисление среднего рейтинга
-        .values('avg_rating')  # Передаем только рейтинг
-    )
-
-    # Есть ли сувенир из города?
-    has_souvenir = Exists(
-        VisitedCity.objects.filter(city_id=OuterRef('city_id'), user_id=user_id, has_magnet=True)
-    )
-
-    # Подзапрос для сбора всех дат посещений города
-    visit_dates_subquery = (
-        VisitedCity.objects.filter(user_id=user_id, city=OuterRef('city__id'))
-        .values('city')
-        .annotate(
-            visit_dates=ArrayAgg('date_of_visit', distinct=False, filter=~Q(date_of_visit=None))
-        )
-        .values('visit_dates')
-    )
-
-    # Подзапрос для даты первого посещения (first_visit_date)
-    first_visit_date_subquery = (
-        VisitedCity.objects.filter(user_id=user_id, city=OuterRef('city__id'))
-        .values('city')
-        .annotate(first_visit_date=Min('date_of_visit'))
-        .values('first_visit_date')
-    )
-
-    # Подзапрос для даты последнего посещения (first_visit_date)
-    last_visit_date_subquery = (
-        VisitedCity.objects.filter(user_id=user_id, city=OuterRef('city__id'))
-        .values('city')
-        .annotate(last_visit_date=Max('date_of_visit'))
-        .values('last_visit_date')
-    )
-
-    # Подзапрос для получения количество пользователей, посетивших город
-    number_of_users_who_visit_city = (
-        VisitedCity.objects.filter(city=OuterRef('city'), is_first_visit=True)
-        .values('city_id')
-        .annotate(count=Count('*'))
-        .values('count')[:1]
-    )
-
-    # Подзапрос для получения общего количества посещений города
-    number_of_visits_all_users = (
-        VisitedCity.objects.filter(city=OuterRef('city__id'))
-        .values('city_id')
-        .annotate(count=Count('*'))
-        .values('count')[:1]
-    )
-
     if country_code:
         queryset = VisitedCity.objects.filter(city__country__code=country_code)
     else:
@@ -143,19 +81,23 @@ def get_unique_visited_cities(
             'city__country',
             'user',
         )
+        # Пользовательские агрегаты берутся из денормализованной сводки UserCitySummary,
+        # которая присоединяется по уникальному индексу (user_id, city_id)
         .annotate(
-            number_of_visits=Subquery(city_visits_subquery, output_field=IntegerField()),
-            average_rating=(
-                Round((Subquery(average_rating_subquery) * 2), 0) / 2
-            ),  # Округление до 0.5
-            visit_dates=Subquery(visit_dates_subquery),
-            first_visit_date=Subquery(first_visit_date_subquery),
-            last_visit_date=Subquery(last_visit_date_subquery),
-            has_souvenir=has_souvenir,
-            number_of_users_who_visit_city=Subquery(
-                number_of_users_who_visit_city, output_field=IntegerField()
+            summary=FilteredRelation(
+                'city__user_summaries',
+                condition=Q(city__user_summaries__user_id=user_id),
             ),
-            number_of_visits_all_users=Subquery(number_of_visits_all_users),
+        )
+        .annotate(
+            number_of_visits=F('summary__number_of_visits'),
+            # В сводке средняя оценка хранится в Decimal, наружу отдаётся float, как и раньше
+            average_rating=Cast('summary__average_rating', FloatField()),
+            visit_dates=F('summary__visit_dates'),
+            first_visit_date=F('summary__first_visit_date'),
+            last_visit_date=F('summary__last_visit_date'),
+            has_souvenir=Coalesce(F('summary__has_souvenir'), False),
+            **popularity_annotations('city__'),
         )
     )
 
@@ -167,11 +109,13 @@ def annotate_visited_city_list_default_photo(
 ) -> QuerySet[VisitedCity]:
     """
     Аннотация для страницы списка посещённых городов: id фото по умолчанию пользователя для города.
+    Фото, которое ещё обрабатывается или не обработалось, не показывается.
     """
     default_city_user_photo_id_subquery = CityUserPhoto.objects.filter(
         city_id=OuterRef('city_id'),
         user_id=user_id,
         is_default=True,
+        status=CityUserPhoto.Status.READY,
     ).values('id')[:1]
 
     return queryset.annotate(
@@ -186,11 +130,13 @@ def annotate_city_default_user_photo_for_list(
 ) -> QuerySet[City]:
     """
     Аннотация id фото по умолчанию пользователя для записей City (списки городов с авторизацией).
+    Фото, которое ещё обрабатывается или не обработалось, не показывается.
     """
     default_city_user_photo_id_subquery = CityUserPhoto.objects.filter(
         city_id=OuterRef('pk'),
         user_id=user_id,
         is_default=True,
+        status=CityUserPhoto.Status.READY,
     ).values('id')[:1]
 
     annotated_queryset = queryset.annotate(
@@ -242,14 +188,38 @@ def get_all_new_visited_cities(user_id: int) -> QuerySet[VisitedCity]:
     return VisitedCity.objects.filter(is_first_visit=True, user_id=user_id)
 
 
+def get_visited_cities_version(user_id: int) -> str:
+    """
+    Возвращает версию посещённых городов пользователя для ETag карт.
+    Версия меняется при добавлении, изменении и удалении посещений,
+    а также при изменении популярности посещённых городов.
+    """
+    version = VisitedCity.objects.filter(user_id=user_id).aggregate(
+        number_of_visits=Count('id'),
+        updated_at=Max('updated_at'),
+        popularity_updated_at=Max('city__popularity__updated_at'),
+    )
+    return '{number_of_visits}:{updated_at}:{popularity_updated_at}'.format(**version)
+
+
+def _count_cities_by_country() -> dict[str, int]:
+    return dict(
+        City.objects.order_by()
+        .values('country__code')
+        .annotate(number_of_cities=Count('id'))
+        .values_list('country__code', 'number_of_cities')
+    )
+
+
 def get_number_of_cities(country_code: str | None = None) -> int:
     """
     Возвращает количество городов, сохранённых в базе данных.
+    Количество городов по всем странам берётся из кеша справочных данных.
     """
-    queryset = City.objects.all()
+    number_of_cities = get_reference_data(NUMBER_OF_CITIES, _count_cities_by_country)
     if country_code:
-        queryset = queryset.filter(country__code=country_code)
-    return queryset.count()
+        return number_of_cities.get(country_code, 0)
+    return sum(number_of_cities.values())
 
 
 def _get_all_countries_with_visited_city(
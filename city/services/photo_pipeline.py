@@ -0,0 +1,267 @@
+"""
+Обработка пользовательских фото городов вне запроса.
+
+Запрос на загрузку только проверяет заголовок файла, сохраняет исходник в хранилище
+и ставит фото в очередь (таблица CityUserPhotoProcessingTask). Команда
+`process_city_user_photos` строит варианты фото (RENDITION_SIZES) в WebP, AVIF и JPEG,
+при необходимости в пуле процессов, сохраняет их рядом с исходником и удаляет исходник.
+Если фото не удалось обработать, оно получает статус «Ошибка обработки», а исходник
+удаляется: пользователь видит ошибку и может загрузить фото заново.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing
+import time
+from collections.abc import Iterable
+from datetime import timedelta
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+from city.models import CityUserPhoto, CityUserPhotoProcessingTask
+from city.services.photo_processing import RenderedImage, try_render_city_photo
+from services.metrics import QueueDepthCollector
+
+logger = logging.getLogger(__name__)
+
+# Количество задач, забираемых из очереди за один раз
+DEFAULT_BATCH_SIZE = 10
+
+# Вариант, который становится основным изображением фото
+MAIN_RENDITION = 'large'
+MAIN_FORMAT = 'jpeg'
+
+FILE_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+# Считается при сборе метрик в веб-процессе, см. analytics.views.prometheus_metrics_view
+CITY_PHOTO_QUEUE_DEPTH = QueueDepthCollector(
+    'city_user_photo_processing_queue_depth',
+    'City user photos waiting to be processed',
+    lambda: CityUserPhotoProcessingTask.objects.count(),
+)
+CITY_PHOTO_PROCESSING_LATENCY_SECONDS = Histogram(
+    'city_user_photo_processing_latency_seconds',
+    'Time from uploading a city user photo to its renditions being ready',
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600),
+)
+CITY_PHOTO_PROCESSING_DURATION_SECONDS = Histogram(
+    'city_user_photo_processing_duration_seconds',
+    'Time spent processing one batch of city user photos',
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+CITY_PHOTOS_PROCESSED = Counter(
+    'city_user_photos_processed_total',
+    'City user photos processed by the worker',
+    ['status'],
+)
+
+
+def create_render_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Создаёт пул процессов для построения вариантов фото. Процессы запускаются через spawn:
+    fork процесса Django с открытыми соединениями и потоками может зависнуть в дочернем
+    процессе, а функция построения вариантов не требует настроенного Django.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def enqueue_city_photo(photo: CityUserPhoto) -> None:
+    """Ставит фото в очередь обработки в текущей транзакции."""
+    CityUserPhotoProcessingTask.objects.create(photo=photo)
+
+
+def enqueue_city_photos_without_renditions(batch_size: int = 1000) -> int:
+    """
+    Ставит в очередь готовые фото без вариантов (загруженные до появления очереди),
+    переводя их в статус «Обрабатывается». Возвращает количество поставленных фото.
+    """
+    queued = 0
+    while True:
+        with transaction.atomic():
+            photo_ids = list(
+                CityUserPhoto.objects.select_for_update(skip_locked=True)
+                .filter(status=CityUserPhoto.Status.READY, renditions={})
+                .order_by('created_at')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            CityUserPhoto.objects.filter(id__in=photo_ids).update(
+                status=CityUserPhoto.Status.PENDING, updated_at=timezone.now()
+            )
+            CityUserPhotoProcessingTask.objects.bulk_create(
+                [CityUserPhotoProcessingTask(photo_id=photo_id) for photo_id in photo_ids]
+            )
+        queued += len(photo_ids)
+        if len(photo_ids) < batch_size:
+            return queued
+
+
+def get_rendition_name(image_name: str, rendition: str, image_format: str) -> str:
+    """Для `user-1/city-2/abc.heic` возвращает `user-1/city-2/abc-thumbnail.webp`."""
+    stem = image_name.rsplit('.', 1)[0]
+    return f'{stem}-{rendition}.{FILE_EXTENSIONS[image_format]}'
+
+
+def get_rendition_keys(renditions: dict[str, Any]) -> list[str]:
+    """Возвращает ключи в хранилище всех файлов вариантов фото."""
+    return [
+        key
+        for rendition in renditions.values()
+        for image_format, key in rendition.items()
+        if image_format in FILE_EXTENSIONS
+    ]
+
+
+def store_renditions(
+    storage: Storage, image_name: str, rendered: Iterable[RenderedImage]
+) -> dict[str, dict[str, Any]]:
+    """
+    Сохраняет варианты фото в хранилище и возвращает их описание для CityUserPhoto.
+    Если сохранить вариант не удалось, уже сохранённые варианты удаляются.
+    """
+    renditions: dict[str, dict[str, Any]] = {}
+    try:
+        for image in rendered:
+            rendition = renditions.setdefault(
+                image.rendition, {'width': image.width, 'height': image.height}
+            )
+            name = get_rendition_name(image_name, image.rendition, image.format)
+            rendition[image.format] = storage.save(name, ContentFile(image.content))
+    except Exception:
+        _delete_files(storage, get_rendition_keys(renditions))
+        raise
+    return renditions
+
+
+def _delete_files(storage: Storage, names: Iterable[str]) -> None:
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception('Failed to delete city user photo file %s', name)
+
+
+def _read_source(photo: CityUserPhoto) -> bytes | None:
+    try:
+        with photo.image.open('rb') as file:
+            data: bytes = file.read()
+    except Exception:
+        logger.exception('Failed to read city user photo %s', photo.pk)
+        return None
+    return data
+
+
+def _finish_photo(photo: CityUserPhoto, rendered: list[RenderedImage] | None) -> str:
+    """
+    Сохраняет варианты фото и отмечает его обработанным. Возвращает итоговый статус.
+    Строка фото обновляется одним запросом без предварительной блокировки, поэтому
+    изменения пользователя (порядок, фото по умолчанию) не ждут обработки.
+    Ошибка хранилища отмечает обработку только этого фото неудачной.
+    """
+    storage = photo.image.storage
+    source_name = photo.image.name
+    if rendered is not None:
+        try:
+            renditions = store_renditions(storage, source_name, rendered)
+        except Exception:
+            logger.exception('Failed to store renditions of city user photo %s', photo.pk)
+        else:
+            updated = CityUserPhoto.objects.filter(pk=photo.pk).update(
+                image=renditions[MAIN_RENDITION][MAIN_FORMAT],
+                renditions=renditions,
+                status=CityUserPhoto.Status.READY,
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                # Фото удалили во время обработки
+                _delete_files(storage, get_rendition_keys(renditions))
+                return 'deleted'
+            _delete_files(storage, [source_name])
+            return CityUserPhoto.Status.READY
+
+    # Исходник, который не удалось обработать, не показывается и больше не нужен
+    updated = CityUserPhoto.objects.filter(pk=photo.pk).update(
+        image='', status=CityUserPhoto.Status.FAILED, updated_at=timezone.now()
+    )
+    if not updated:
+        return 'deleted'
+    _delete_files(storage, [source_name])
+    return CityUserPhoto.Status.FAILED
+
+
+def claim_city_photo_tasks(limit: int) -> list[CityUserPhotoProcessingTask]:
+    """
+    Забирает из очереди до `limit` задач и отмечает их взятыми в обработку.
+    Задачи блокируются с SKIP LOCKED только на время этой короткой транзакции, поэтому
+    несколько обработчиков не возьмут одну задачу, а загрузка и обработка фото идут
+    без открытой транзакции. Задачи, взятые давно (обработчик упал), забираются повторно.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.CITY_USER_PHOTO_TASK_STALE_SECONDS)
+    with transaction.atomic():
+        tasks = list(
+            CityUserPhotoProcessingTask.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale_before))
+            .order_by('id')[:limit]
+        )
+        CityUserPhotoProcessingTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            claimed_at=now
+        )
+    return tasks
+
+
+def process_city_photo_queue(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    executor: Executor | None = None,
+) -> int:
+    """
+    Обрабатывает фото из очереди, пока она не опустеет. Возвращает количество задач.
+
+    Задачи забираются `claim_city_photo_tasks`, поэтому несколько обработчиков могут
+    работать параллельно. Если передан `executor` (например, ProcessPoolExecutor), фото
+    одной пачки декодируются и кодируются в нём параллельно. Задача удаляется после
+    обработки фото независимо от результата, поэтому неудачное фото не блокирует очередь.
+    """
+    processed = 0
+    while True:
+        started_at = time.monotonic()
+        tasks = claim_city_photo_tasks(batch_size)
+        photos = CityUserPhoto.objects.in_bulk({task.photo_id for task in tasks})
+        pending = [
+            photo for photo in photos.values() if photo.status == CityUserPhoto.Status.PENDING
+        ]
+        sources = [_read_source(photo) for photo in pending]
+        max_pixels = itertools.repeat(settings.CITY_USER_PHOTO_MAX_PIXELS, len(sources))
+        results = (executor.map if executor else map)(try_render_city_photo, sources, max_pixels)
+        for photo, rendered in zip(pending, results):
+            status = _finish_photo(photo, rendered)
+            CITY_PHOTOS_PROCESSED.labels(status=status).inc()
+        CityUserPhotoProcessingTask.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+
+        finished_at = timezone.now()
+        for photo in pending:
+            CITY_PHOTO_PROCESSING_LATENCY_SECONDS.observe(
+                (finished_at - photo.created_at).total_seconds()
+            )
+        if tasks:
+            CITY_PHOTO_PROCESSING_DURATION_SECONDS.observe(time.monotonic() - started_at)
+        processed += len(tasks)
+
+        if len(tasks) < batch_size:
+            return processed
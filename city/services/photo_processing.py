@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
 from io import BytesIO
-from typing import Any
+from typing import IO, Any
 
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import UploadedFile
-from PIL import Image, ImageOps, UnidentifiedImageError
+from PIL import Image, ImageOps, UnidentifiedImageError, features
 from PIL.Image import DecompressionBombError
 
 try:
@@ -16,16 +18,54 @@ except ImportError:  # pragma: no cover - fallback for environments without opti
 else:
     pillow_heif.register_heif_opener()
 
+logger = logging.getLogger(__name__)
+
 ALLOWED_IMAGE_FORMATS = {'JPEG', 'JPG', 'PNG', 'WEBP'}
 MAX_IMAGE_SIDE = 1920
 JPEG_QUALITY = 82
 
+# Варианты пользовательского фото: имя → наибольшая сторона в пикселях
+RENDITION_SIZES = {
+    'thumbnail': 320,
+    'medium': 960,
+    'large': MAX_IMAGE_SIDE,
+}
 
-def compress_city_photo(uploaded_file: UploadedFile) -> ContentFile[Any]:
-    Image.MAX_IMAGE_PIXELS = settings.CITY_USER_PHOTO_MAX_PIXELS
+# Форматы вариантов в порядке предпочтения браузером: формат → (формат Pillow, параметры)
+RENDITION_FORMATS: dict[str, tuple[str, dict[str, Any]]] = {
+    'avif': ('AVIF', {'quality': 55}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedImage:
+    rendition: str
+    format: str
+    width: int
+    height: int
+    content: bytes
+
+
+def get_rendition_formats() -> tuple[str, ...]:
+    """Возвращает форматы вариантов. AVIF — только если Pillow собран с его поддержкой."""
+    return tuple(
+        image_format
+        for image_format in RENDITION_FORMATS
+        if image_format != 'avif' or features.check('avif')
+    )
+
+
+def _open_image(file: IO[bytes], max_pixels: int) -> Image.Image:
+    """
+    Открывает изображение, читая только заголовок файла, и проверяет его размеры.
+    Пиксели декодируются позже, при первом обращении к ним.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
 
     try:
-        image = Image.open(uploaded_file)
+        image = Image.open(file)
     except (DecompressionBombError, UnidentifiedImageError, OSError) as exc:
         raise ValueError('Неподдерживаемый формат изображения') from exc
 
@@ -33,17 +73,33 @@ def compress_city_photo(uploaded_file: UploadedFile) -> ContentFile[Any]:
     if width <= 0 or height <= 0:
         raise ValueError('Неподдерживаемый формат изображения')
 
-    if width * height > settings.CITY_USER_PHOTO_MAX_PIXELS:
+    if width * height > max_pixels:
         raise ValueError('Слишком большое изображение')
 
-    normalized = ImageOps.exif_transpose(image)
-    image_format = (normalized.format or '').upper()
+    return image
 
-    if image_format not in ALLOWED_IMAGE_FORMATS:
-        image_format = 'JPEG'
 
+def _normalize(image: Image.Image) -> Image.Image:
+    normalized = ImageOps.exif_transpose(image)
     if normalized.mode not in ('RGB', 'L'):
         normalized = normalized.convert('RGB')
+    return normalized
+
+
+def inspect_city_photo(uploaded_file: UploadedFile) -> None:
+    """
+    Проверяет загруженное фото по заголовку файла, не декодируя пиксели.
+    Выбрасывает ValueError с текстом ошибки для пользователя.
+    """
+    try:
+        _open_image(uploaded_file, settings.CITY_USER_PHOTO_MAX_PIXELS)
+    finally:
+        uploaded_file.seek(0)
+
+
+def compress_city_photo(uploaded_file: UploadedFile) -> ContentFile[Any]:
+    image = _open_image(uploaded_file, settings.CITY_USER_PHOTO_MAX_PIXELS)
+    normalized = _normalize(image)
 
     normalized.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
     buffer = BytesIO()
@@ -53,3 +109,48 @@ def compress_city_photo(uploaded_file: UploadedFile) -> ContentFile[Any]:
     stem = original_name.rsplit('.', 1)[0]
 
     return ContentFile(buffer.getvalue(), name=f'{stem}.jpg')
+
+
+def render_city_photo(data: bytes, max_pixels: int) -> list[RenderedImage]:
+    """
+    Строит все варианты фото `data` во всех форматах из `get_rendition_formats`.
+
+    Исходник декодируется один раз (JPEG — сразу с уменьшением до наибольшего варианта),
+    а каждый следующий вариант получается уменьшением предыдущего. Функция не обращается
+    к базе и хранилищу, поэтому её можно выполнять в пуле процессов.
+    """
+    image = _open_image(BytesIO(data), max_pixels)
+    image.draft('RGB', (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    normalized = _normalize(image)
+
+    rendered = []
+    for rendition, side in sorted(RENDITION_SIZES.items(), key=lambda item: -item[1]):
+        normalized.thumbnail((side, side))
+        for image_format in get_rendition_formats():
+            pillow_format, options = RENDITION_FORMATS[image_format]
+            buffer = BytesIO()
+            normalized.save(buffer, format=pillow_format, **options)
+            rendered.append(
+                RenderedImage(
+                    rendition=rendition,
+                    format=image_format,
+                    width=normalized.width,
+                    height=normalized.height,
+                    content=buffer.getvalue(),
+                )
+            )
+    return rendered
+
+
+def try_render_city_photo(data: bytes | None, max_pixels: int) -> list[RenderedImage] | None:
+    """
+    Строит варианты фото, а при ошибке записывает её в лог и возвращает None.
+    Выполняется в дочерних процессах пула, поэтому не обращается к настройкам и моделям.
+    """
+    if data is None:
+        return None
+    try:
+        return render_city_photo(data, max_pixels)
+    except Exception:
+        logger.exception('Failed to render city user photo')
+        return None
@@ -9,42 +9,28 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
-from django.db.models import QuerySet, Case, When, IntegerField
-
 from city.models import City
+from city.services.search_index import get_city_search_index
 
 
 class CitySearchService:
     """Сервис для поиска городов."""
 
     @staticmethod
-    def search_cities(query: str, country: str | None = None, limit: int = 50) -> QuerySet[City]:
+    def search_cities(query: str, country: str | None = None, limit: int = 50) -> list[City]:
         """
-        Поиск городов по подстроке с дополнительными фильтрами.
+        Поиск городов по названию с дополнительными фильтрами.
+        Подходящие города ищутся по индексу в памяти (см. `city.services.search_index`),
+        из базы данных они загружаются одним запросом по первичному ключу.
 
-        :param query: Подстрока для поиска в названии города
+        :param query: Строка для поиска в названии города, допускается латиница
         :param country: Код страны для дополнительной фильтрации
         :param limit: Максимальное количество результатов (по умолчанию 50)
-        :return: QuerySet с найденными городами
+        :return: Список найденных городов в порядке релевантности
         """
-        # Базовый запрос с оптимизацией и приоритизацией
-        cities_queryset = (
-            City.objects.select_related('country', 'region')
-            .filter(title__icontains=query)
-            .annotate(
-                # Приоритет для городов, начинающихся с поискового запроса
-                search_priority=Case(
-                    When(title__istartswith=query, then=1),
-                    default=2,
-                    output_field=IntegerField(),
-                )
-            )
-            .order_by('search_priority', 'title')
-        )
-
-        # Дополнительная фильтрация по коду страны
-        if country:
-            cities_queryset = cities_queryset.filter(country__code=country)
-
-        # Ограничиваем количество результатов для производительности
-        return cities_queryset[:limit]
+        city_ids = get_city_search_index().search(query, country_code=country, limit=limit)
+        if not city_ids:
+            return []
+
+        cities = City.objects.select_related('country', 'region').in_bulk(city_ids)
+        return [cities[city_id] for city_id in city_ids if city_id in cities]
@@ -0,0 +1,335 @@
+"""
+Индекс для поиска городов по названию в памяти процесса.
+
+Вместо `title__icontains` по всей таблице City названия нормализуются (регистр, ё/е,
+дефисы и пробелы) и хранятся в отсортированном массиве: совпадения по началу названия
+и по началу отдельных слов находятся двоичным поиском. Запрос латиницей дополнительно
+транслитерируется в кириллицу. Внутри каждой группы совпадений результаты упорядочены
+по триграммному сходству с запросом так же, как его считает pg_trgm.
+
+Индекс строится при старте воркера и перестраивается после изменения справочника городов
+(отслеживается по версии справочника из `services.http_cache.get_catalog_version`).
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from city.models import City
+from services.http_cache import get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+# Минимальное сходство для нечёткого поиска, как порог `pg_trgm.similarity_threshold`
+FUZZY_SIMILARITY_THRESHOLD = 0.3
+# Поиск по подстроке и нечёткий поиск выполняются только для достаточно длинных запросов:
+# одна-две буквы встречаются внутри почти каждого названия
+SUBSTRING_MIN_QUERY_LENGTH = 2
+FUZZY_MIN_QUERY_LENGTH = 3
+
+# Группы совпадений в порядке убывания приоритета
+EXACT_MATCH = 0
+TITLE_PREFIX_MATCH = 1
+WORD_PREFIX_MATCH = 2
+SUBSTRING_MATCH = 3
+FUZZY_MATCH = 4
+
+_SEPARATORS_RE = re.compile(r'[\s\-‐–—.,()«»"\']+')
+
+# Сочетания латинских букв проверяются раньше одиночных букв
+_LATIN_TO_CYRILLIC = {
+    'shch': 'щ',
+    'sch': 'щ',
+    'zh': 'ж',
+    'kh': 'х',
+    'ts': 'ц',
+    'ch': 'ч',
+    'sh': 'ш',
+    'yu': 'ю',
+    'ju': 'ю',
+    'ya': 'я',
+    'ja': 'я',
+    'yo': 'е',
+    'jo': 'е',
+    'ye': 'е',
+    'a': 'а',
+    'b': 'б',
+    'c': 'к',
+    'd': 'д',
+    'e': 'е',
+    'f': 'ф',
+    'g': 'г',
+    'h': 'х',
+    'i': 'и',
+    'j': 'й',
+    'k': 'к',
+    'l': 'л',
+    'm': 'м',
+    'n': 'н',
+    'o': 'о',
+    'p': 'п',
+    'q': 'к',
+    'r': 'р',
+    's': 'с',
+    't': 'т',
+    'u': 'у',
+    'v': 'в',
+    'w': 'в',
+    'x': 'кс',
+    'z': 'з',
+}
+_LATIN_RE = re.compile(
+    '|'.join(sorted((re.escape(latin) for latin in _LATIN_TO_CYRILLIC), key=len, reverse=True))
+    + '|y'
+)
+_CYRILLIC_VOWELS = frozenset('аеиоуыэюя')
+
+
+def normalize_title(text: str) -> str:
+    """Приводит название к виду для сравнения: нижний регистр, ё → е, слова через один пробел."""
+    return _SEPARATORS_RE.sub(' ', text.lower().replace('ё', 'е')).strip()
+
+
+def transliterate(text: str) -> str:
+    """
+    Переводит латинские буквы нормализованной строки в кириллицу.
+    `y` после гласной читается как «й», в остальных случаях — как «ы».
+    """
+    result = ''
+    position = 0
+    for match in _LATIN_RE.finditer(text):
+        result += text[position : match.start()]
+        latin = match.group()
+        if latin == 'y':
+            result += 'й' if result[-1:] in _CYRILLIC_VOWELS else 'ы'
+        else:
+            result += _LATIN_TO_CYRILLIC[latin]
+        position = match.end()
+    return result + text[position:]
+
+
+def get_query_variants(query: str) -> list[str]:
+    """Возвращает нормализованный запрос и, если в нём есть латиница, его транслитерацию."""
+    normalized = normalize_title(query)
+    variants = [normalized]
+    transliterated = transliterate(normalized)
+    if transliterated != normalized:
+        variants.append(transliterated)
+        # Начальная «e» в латинице часто обозначает «э»: Elista — Элиста
+        if normalized.startswith('e'):
+            variants.append('э' + transliterated[1:])
+    return variants
+
+
+def get_trigrams(text: str) -> frozenset[str]:
+    """Возвращает множество триграмм строки по правилам pg_trgm: каждое слово дополняется пробелами."""
+    trigrams: set[str] = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedCity:
+    id: int
+    title: str
+    country_code: str | None
+    normalized_title: str
+    trigrams: frozenset[str]
+
+
+class CitySearchIndex:
+    """
+    Отсортированный массив ключей для поиска городов по началу названия и началу слов
+    и инвертированный индекс триграмм для нечёткого поиска (аналог GIN-индекса pg_trgm).
+    Для названия «Ростов-на-Дону» ключами будут «ростов на дону», «на дону» и «дону».
+    """
+
+    def __init__(self, cities: list[IndexedCity]) -> None:
+        self.cities = cities
+        keys: list[tuple[str, int]] = []
+        trigram_positions: dict[str, list[int]] = {}
+        for position, city in enumerate(cities):
+            words = city.normalized_title.split(' ')
+            for word_number in range(len(words)):
+                keys.append((' '.join(words[word_number:]), position))
+            for trigram in city.trigrams:
+                trigram_positions.setdefault(trigram, []).append(position)
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._positions = [position for _, position in keys]
+        self._trigram_positions = trigram_positions
+        self._trigram_counts = [len(city.trigrams) for city in cities]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[int, str, str | None]]) -> CitySearchIndex:
+        """Строит индекс из строк (ID города, название, код страны)."""
+        cities = []
+        for city_id, title, country_code in rows:
+            normalized_title = normalize_title(title)
+            cities.append(
+                IndexedCity(
+                    id=city_id,
+                    title=title,
+                    country_code=country_code,
+                    normalized_title=normalized_title,
+                    trigrams=get_trigrams(normalized_title),
+                )
+            )
+        return cls(cities)
+
+    def _get_prefix_matches(self, prefix: str) -> list[int]:
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + '\uffff', lo=start)
+        return self._positions[start:end]
+
+    def _count_common_trigrams(self, query_trigrams: frozenset[str]) -> Counter[int]:
+        """Возвращает количество общих с запросом триграмм для каждого города, где оно не нулевое."""
+        common: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            common.update(self._trigram_positions.get(trigram, ()))
+        return common
+
+    def _get_similar(self, query_trigrams: frozenset[str]) -> list[int]:
+        """Возвращает города, сходство которых с запросом не ниже порога нечёткого поиска."""
+        return [
+            position
+            for position, count in self._count_common_trigrams(query_trigrams).items()
+            if count / (len(query_trigrams) + self._trigram_counts[position] - count)
+            >= FUZZY_SIMILARITY_THRESHOLD
+        ]
+
+    def _get_similarity(
+        self, query_trigrams: list[frozenset[str]], positions: Iterable[int]
+    ) -> dict[int, float]:
+        """
+        Возвращает для каждого города из `positions` наибольшее сходство с вариантами запроса.
+        Общие триграммы считаются по инвертированному индексу, а не сравнением множеств.
+        """
+        similarity = dict.fromkeys(positions, 0.0)
+        for trigrams in query_trigrams:
+            common = self._count_common_trigrams(trigrams)
+            for position in similarity:
+                count = common[position]
+                if count:
+                    value = count / (len(trigrams) + self._trigram_counts[position] - count)
+                    similarity[position] = max(similarity[position], value)
+        return similarity
+
+    def search(self, query: str, country_code: str | None = None, limit: int = 50) -> list[int]:
+        """
+        Возвращает ID не более чем `limit` городов, подходящих под `query`.
+        Сначала идут точные совпадения, затем совпадения по началу названия,
+        по началу слова, по подстроке и, если ничего не найдено, нечёткие совпадения.
+        """
+        if limit <= 0:
+            return []
+
+        def is_allowed(position: int) -> bool:
+            return country_code is None or self.cities[position].country_code == country_code
+
+        variants = get_query_variants(query)
+        groups: dict[int, int] = {}
+        for variant in variants:
+            for position in self._get_prefix_matches(variant):
+                if not is_allowed(position):
+                    continue
+                normalized_title = self.cities[position].normalized_title
+                if normalized_title == variant:
+                    group = EXACT_MATCH
+                elif normalized_title.startswith(variant):
+                    group = TITLE_PREFIX_MATCH
+                else:
+                    group = WORD_PREFIX_MATCH
+                groups[position] = min(group, groups.get(position, group))
+
+        # Совпадения по подстроке требуют полного просмотра, поэтому ищутся, только если
+        # совпадений по началу слов не хватает до лимита, а запрос не слишком короткий
+        if len(groups) < limit and len(variants[0]) >= SUBSTRING_MIN_QUERY_LENGTH:
+            for position, city in enumerate(self.cities):
+                if (
+                    position not in groups
+                    and is_allowed(position)
+                    and any(variant in city.normalized_title for variant in variants)
+                ):
+                    groups[position] = SUBSTRING_MATCH
+
+        query_trigrams = [get_trigrams(variant) for variant in variants]
+        if not groups and len(variants[0]) >= FUZZY_MIN_QUERY_LENGTH:
+            for trigrams in query_trigrams:
+                for position in self._get_similar(trigrams):
+                    if is_allowed(position):
+                        groups[position] = FUZZY_MATCH
+
+        similarity = self._get_similarity(query_trigrams, groups)
+        best = heapq.nsmallest(
+            limit,
+            groups,
+            key=lambda position: (
+                groups[position],
+                -similarity[position],
+                self.cities[position].title,
+            ),
+        )
+        return [self.cities[position].id for position in best]
+
+
+_lock = threading.Lock()
+_index: CitySearchIndex | None = None
+_index_version: str | None = None
+
+
+def _load_index() -> CitySearchIndex:
+    return CitySearchIndex.from_rows(City.objects.values_list('id', 'title', 'country__code'))
+
+
+def get_city_search_index() -> CitySearchIndex:
+    """
+    Возвращает индекс поиска городов текущего процесса.
+    Если справочник городов изменился, индекс перестраивается.
+    """
+    global _index, _index_version
+
+    version = get_catalog_version()
+    index = _index
+    if index is not None and _index_version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index_version != version:
+            _index = _load_index()
+            _index_version = version
+            logger.info('City search index built: %s cities', len(_index.cities))
+        return _index
+
+
+def warm_up_city_search_index() -> None:
+    """Строит индекс заранее, чтобы первый запрос к воркеру не ждал его построения."""
+    try:
+        get_city_search_index()
+    except Exception:
+        logger.exception('Failed to build city search index on worker start')
+
+
+def clear_city_search_index() -> None:
+    """Сбрасывает индекс текущего процесса. Используется в тестах."""
+    global _index, _index_version
+
+    with _lock:
+        _index = None
+        _index_version = None
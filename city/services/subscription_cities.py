@@ -0,0 +1,172 @@
+"""
+Посещённые города пользователей из подписок для общей карты.
+
+Доступ ко всем запрошенным пользователям проверяется двумя запросами по множествам ID,
+а города всех пользователей загружаются одним запросом к сводке UserCitySummary,
+в которой посещения уже сгруппированы по паре (user_id, city_id).
+
+Ответ отдаётся потоково в компактном формате: названия полей передаются один раз,
+а каждый город — массивом значений в том же порядке:
+
+    {"users": [[id, username], ...], "fields": ["user_id", "id", ...], "cities": [[...], ...]}
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+from django.contrib.auth.models import User
+
+from account.models import ShareSettings
+from city.models import UserCitySummary
+from subscribe.infrastructure.models import Subscribe
+
+# Количество строк, которое читается из курсора базы данных за один раз
+ROWS_CHUNK_SIZE = 2000
+
+SUBSCRIPTION_CITY_FIELDS = (
+    'user_id',
+    'id',
+    'title',
+    'region_title',
+    'region_id',
+    'country',
+    'country_code',
+    'lat',
+    'lon',
+    'number_of_visits',
+    'first_visit_date',
+    'last_visit_date',
+    'average_rating',
+    'number_of_users_who_visit_city',
+    'number_of_visits_all_users',
+    'visit_years',
+)
+
+
+def get_allowed_user_ids(viewer_id: int, user_ids: Iterable[int]) -> list[int]:
+    """
+    Возвращает те ID из `user_ids`, чьи города может видеть пользователь `viewer_id`:
+    пользователь разрешил подписываться на себя и `viewer_id` на него подписан.
+    Порядок ID сохраняется, повторы убираются.
+    """
+    requested_ids = list(dict.fromkeys(user_ids))
+    if not requested_ids:
+        return []
+
+    can_subscribe_ids = set(
+        ShareSettings.objects.filter(user_id__in=requested_ids, can_subscribe=True).values_list(
+            'user_id', flat=True
+        )
+    )
+    subscribed_ids = set(
+        Subscribe.objects.filter(
+            subscribe_from_id=viewer_id, subscribe_to_id__in=requested_ids
+        ).values_list('subscribe_to_id', flat=True)
+    )
+    return [
+        user_id
+        for user_id in requested_ids
+        if user_id in can_subscribe_ids and user_id in subscribed_ids
+    ]
+
+
+def _to_row(summary: Mapping[str, Any]) -> list[Any]:
+    visit_dates = summary['visit_dates'] or []
+    visit_years = sorted({visit_date.year for visit_date in visit_dates}, reverse=True)
+    average_rating = summary['average_rating']
+    first_visit_date = summary['first_visit_date']
+    last_visit_date = summary['last_visit_date']
+    return [
+        summary['user_id'],
+        summary['city_id'],
+        summary['city__title'],
+        summary['city__region__full_name'],
+        summary['city__region_id'],
+        summary['city__country__name'],
+        summary['city__country__code'],
+        str(summary['city__coordinate_width']),
+        str(summary['city__coordinate_longitude']),
+        summary['number_of_visits'],
+        first_visit_date.isoformat() if first_visit_date else None,
+        last_visit_date.isoformat() if last_visit_date else None,
+        float(average_rating) if average_rating is not None else None,
+        summary['city__popularity__number_of_users'],
+        summary['city__popularity__number_of_visits'],
+        visit_years or None,
+    ]
+
+
+def iter_subscription_city_rows(
+    user_ids: list[int], country_code: str | None = None
+) -> Iterator[list[Any]]:
+    """
+    Возвращает посещённые города пользователей `user_ids` в виде строк,
+    значения в которых идут в порядке `SUBSCRIPTION_CITY_FIELDS`.
+    Все строки читаются одним запросом порциями по `ROWS_CHUNK_SIZE`.
+    """
+    queryset = UserCitySummary.objects.filter(user_id__in=user_ids)
+    if country_code:
+        queryset = queryset.filter(city__country__code=country_code)
+
+    summaries = (
+        queryset.order_by('city__title', 'city_id', 'user_id')
+        .values(
+            'user_id',
+            'city_id',
+            'city__title',
+            'city__region__full_name',
+            'city__region_id',
+            'city__country__name',
+            'city__country__code',
+            'city__coordinate_width',
+            'city__coordinate_longitude',
+            'number_of_visits',
+            'first_visit_date',
+            'last_visit_date',
+            'average_rating',
+            'city__popularity__number_of_users',
+            'city__popularity__number_of_visits',
+            'visit_dates',
+        )
+        .iterator(chunk_size=ROWS_CHUNK_SIZE)
+    )
+    for summary in summaries:
+        yield _to_row(summary)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def stream_subscription_cities(
+    user_ids: list[int], country_code: str | None = None
+) -> Iterator[str]:
+    """
+    Возвращает JSON-документ с городами пользователей `user_ids` по частям,
+    чтобы не собирать весь ответ в памяти. Каждая часть содержит до `ROWS_CHUNK_SIZE` городов.
+    """
+    if not user_ids:
+        yield _dumps({'users': [], 'fields': SUBSCRIPTION_CITY_FIELDS, 'cities': []})
+        return
+
+    users = User.objects.filter(pk__in=user_ids).order_by('id').values_list('id', 'username')
+    yield f'{{"users":{_dumps(list(users))},"fields":{_dumps(SUBSCRIPTION_CITY_FIELDS)},"cities":['
+
+    separator = ''
+    for rows in itertools.batched(
+        iter_subscription_city_rows(user_ids, country_code), ROWS_CHUNK_SIZE
+    ):
+        yield separator + ','.join(_dumps(row) for row in rows)
+        separator = ','
+    yield ']}'
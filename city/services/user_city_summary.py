@@ -0,0 +1,114 @@
+"""
+Поддержка денормализованной таблицы UserCitySummary.
+
+Сводка хранит агрегаты по всем посещениям пары пользователь–город
+(количество посещений, средний рейтинг, наличие сувенира, даты посещений),
+чтобы список и карта посещённых городов не вычисляли их коррелированными подзапросами.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from django.contrib.postgres.aggregates import ArrayAgg, BoolOr
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, QuerySet
+from django.db.models.functions import Round
+
+from city.models import UserCitySummary, VisitedCity
+
+SUMMARY_FIELDS = (
+    'number_of_visits',
+    'average_rating',
+    'has_souvenir',
+    'visit_dates',
+    'first_visit_date',
+    'last_visit_date',
+)
+
+
+def _aggregate_visits(queryset: QuerySet[VisitedCity]) -> QuerySet[Any, dict[str, Any]]:
+    """
+    Группирует посещения по паре (user_id, city_id) и считает все поля сводки одним запросом.
+    """
+    return (
+        queryset.order_by()
+        .values('user_id', 'city_id')
+        .annotate(
+            number_of_visits=Count('id'),
+            average_rating=Round(Avg('rating') * 2, 0) / 2,  # Округление до 0.5
+            has_souvenir=BoolOr('has_magnet'),
+            visit_dates=ArrayAgg(
+                'date_of_visit', filter=~Q(date_of_visit=None), order_by='date_of_visit'
+            ),
+            first_visit_date=Min('date_of_visit'),
+            last_visit_date=Max('date_of_visit'),
+        )
+    )
+
+
+def _upsert(rows: Iterable[dict[str, Any]]) -> int:
+    summaries = [UserCitySummary(**row) for row in rows]
+    if not summaries:
+        return 0
+
+    UserCitySummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['user', 'city'],
+        update_fields=[*SUMMARY_FIELDS, 'updated_at'],
+    )
+    return len(summaries)
+
+
+def refresh_user_city_summary(user_id: int, city_id: int) -> int:
+    """
+    Пересчитывает сводку для одной пары пользователь–город.
+    Если посещений не осталось, строка сводки удаляется.
+    Возвращает актуальное количество посещений города пользователем.
+    """
+    rows = list(_aggregate_visits(VisitedCity.objects.filter(user_id=user_id, city_id=city_id)))
+
+    if not rows:
+        UserCitySummary.objects.filter(user_id=user_id, city_id=city_id).delete()
+        return 0
+
+    _upsert(rows)
+    return int(rows[0]['number_of_visits'])
+
+
+def rebuild_user_city_summaries(
+    user_ids: Iterable[int] | None = None, batch_size: int = 1000
+) -> int:
+    """
+    Полностью пересобирает сводку для указанных пользователей (или для всех, если user_ids не задан).
+    Возвращает количество записанных строк.
+    """
+    visits = VisitedCity.objects.all()
+    summaries = UserCitySummary.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        visits = visits.filter(user_id__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+
+    written = 0
+    with transaction.atomic():
+        summaries.delete()
+
+        batch: list[dict[str, Any]] = []
+        for row in _aggregate_visits(visits).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += _upsert(batch)
+                batch = []
+        written += _upsert(batch)
+
+    return written
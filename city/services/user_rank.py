@@ -0,0 +1,132 @@
+"""
+Индекс рейтинга пользователей по посещённым городам
+(UserVisitCounters и UserCountryVisitCounters).
+
+Для каждого пользователя, а также для каждой пары «пользователь — страна» хранится
+количество уникальных посещённых городов и общее количество посещений. Столбцы
+проиндексированы, поэтому место пользователя считается одним диапазонным запросом
+по индексу вместо группировки всей таблицы VisitedCity.
+
+Сложность такого запроса — O(log n + k), где k — количество пользователей выше
+по рейтингу: Postgres читает из индекса каждую подходящую запись. Хуже всего приходится
+пользователям в конце рейтинга, для которых k близко к общему числу пользователей.
+Это приемлемо, потому что записи индекса — одно целое число на пользователя, и даже
+полный просмотр индекса на порядки дешевле прежней группировки всех посещений
+(их в разы больше, чем пользователей), а счётчики всегда согласованы с посещениями
+в той же транзакции. Поиск за O(log n) потребовал бы хранимой позиции, которую
+пришлось бы пересчитывать у всех пользователей ниже при каждом изменении,
+или отдельного Redis ZSET вне транзакции; если число пользователей вырастет настолько,
+что просмотр индекса станет заметен, позицию можно пересчитывать периодически
+в `reconcile_user_visit_counters`.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Count
+
+from city.models import UserCountryVisitCounters, UserVisitCounters, VisitedCity
+from city.services.visit_counters import change_counters, reconcile_counters
+
+
+def change_user_visit_counters(user_id: int, visits_delta: int, cities_delta: int) -> None:
+    """
+    Атомарно изменяет счётчики пользователя на указанные величины.
+    Строка счётчиков создаётся только при добавлении посещений, чтобы не пересоздавать её
+    при каскадном удалении самого пользователя.
+    """
+    change_counters(
+        UserVisitCounters,
+        {'user_id': user_id},
+        {'number_of_visits': visits_delta, 'number_of_cities': cities_delta},
+    )
+
+
+def change_user_country_visit_counters(
+    user_id: int, country_id: int, visits_delta: int, cities_delta: int
+) -> None:
+    """
+    Атомарно изменяет счётчики пользователя в стране `country_id` на указанные величины.
+    Строка счётчиков, как и в `change_user_visit_counters`,
+    создаётся только при добавлении посещений.
+    """
+    change_counters(
+        UserCountryVisitCounters,
+        {'user_id': user_id, 'country_id': country_id},
+        {'number_of_visits': visits_delta, 'number_of_cities': cities_delta},
+    )
+
+
+def get_unique_visited_cities_rank(number_of_cities: int) -> int:
+    """
+    Возвращает место пользователя с `number_of_cities` уникальными городами:
+    количество пользователей, посетивших больше городов, плюс один.
+    Для пользователя без посещений возвращается 0.
+    Стоимость — O(log n + k) по индексу, где k — количество пользователей выше (см. модуль).
+    """
+    if number_of_cities <= 0:
+        return 0
+
+    return UserVisitCounters.objects.filter(number_of_cities__gt=number_of_cities).count() + 1
+
+
+def get_total_visits_rank(number_of_visits: int) -> int:
+    """
+    Возвращает место пользователя с `number_of_visits` посещениями:
+    количество пользователей, у которых посещений больше, плюс один.
+    Для пользователя без посещений возвращается 0.
+    Стоимость, как и у `get_unique_visited_cities_rank`, — O(log n + k).
+    """
+    if number_of_visits <= 0:
+        return 0
+
+    return UserVisitCounters.objects.filter(number_of_visits__gt=number_of_visits).count() + 1
+
+
+def reconcile_user_visit_counters(batch_size: int = 1000) -> int:
+    """
+    Пересчитывает общие и постранные счётчики всех пользователей по таблице VisitedCity
+    и исправляет расхождения.
+    Предназначена для периодического запуска по cron командой `reconcile_user_visit_counters`.
+    Возвращает количество исправленных строк счётчиков.
+    """
+    counter_fields = ['number_of_cities', 'number_of_visits']
+    visits = VisitedCity.objects.order_by()
+    aggregates = {
+        'number_of_cities': Count('city_id', distinct=True),
+        'number_of_visits': Count('id'),
+    }
+
+    with transaction.atomic():
+        changed = reconcile_counters(
+            UserVisitCounters,
+            key_fields=['user'],
+            counter_fields=counter_fields,
+            actual={
+                (row['user_id'],): (row['number_of_cities'], row['number_of_visits'])
+                for row in visits.values('user_id').annotate(**aggregates)
+            },
+            batch_size=batch_size,
+        )
+        changed += reconcile_counters(
+            UserCountryVisitCounters,
+            key_fields=['user', 'country'],
+            counter_fields=counter_fields,
+            actual={
+                (row['user_id'], row['city__country_id']): (
+                    row['number_of_cities'],
+                    row['number_of_visits'],
+                )
+                for row in visits.values('user_id', 'city__country_id').annotate(**aggregates)
+            },
+            batch_size=batch_size,
+        )
+
+    return changed
@@ -0,0 +1,101 @@
+"""
+Общие операции над строками-счётчиками посещений
+(CityPopularity, UserVisitCounters, UserCountryVisitCounters).
+
+Счётчик — строка модели с уникальным ключом (например, `user` или `user` + `country`)
+и целочисленными полями. Сигналы посещений изменяют счётчики атомарно на приращения
+(`change_counters`), а периодическая сверка (`reconcile_counters`) исправляет расхождения
+с таблицей VisitedCity.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import operator
+from collections.abc import Mapping, Sequence
+from functools import reduce
+from typing import Any
+
+from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Now
+
+
+def change_counters(
+    model: type[models.Model], key: Mapping[str, Any], deltas: Mapping[str, int]
+) -> None:
+    """
+    Атомарно изменяет поля-счётчики строки `model` с ключом `key` на приращения `deltas`.
+    Строка создаётся только при увеличении счётчиков, чтобы не пересоздавать её
+    при каскадном удалении владельца ключа (пользователя, города).
+    """
+    if not any(deltas.values()):
+        return
+
+    counters = model._default_manager.filter(**key)
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    updated = counters.update(**increments, updated_at=Now())
+    if updated or any(delta < 0 for delta in deltas.values()):
+        return
+
+    model._default_manager.bulk_create([model(**key)], ignore_conflicts=True)
+    counters.update(**increments, updated_at=Now())
+
+
+def reconcile_counters(
+    model: type[models.Model],
+    key_fields: Sequence[str],
+    counter_fields: Sequence[str],
+    actual: Mapping[tuple[Any, ...], tuple[int, ...]],
+    batch_size: int,
+) -> int:
+    """
+    Приводит счётчики `model` к значениям `actual` (ключ → значения `counter_fields`
+    в том же порядке) и возвращает количество исправленных строк.
+    Изменённые строки записываются пачками через upsert, а счётчики ключей, которых нет
+    в `actual`, обнуляются одним запросом на пачку. Вызывается внутри транзакции:
+    строки счётчиков блокируются до её конца.
+    """
+    attnames = {field.name: field.attname for field in model._meta.concrete_fields}
+    key_columns = [attnames[field] for field in key_fields]
+    size = len(key_columns)
+    stored = {
+        row[:size]: row[size:]
+        for row in model._default_manager.select_for_update().values_list(
+            *key_columns, *counter_fields
+        )
+    }
+
+    changed = [
+        model(**dict(zip(key_columns, key)), **dict(zip(counter_fields, counters)))
+        for key, counters in actual.items()
+        if stored.get(key) != counters
+    ]
+    zero = (0,) * len(counter_fields)
+    stale_keys = [key for key, counters in stored.items() if key not in actual and counters != zero]
+
+    model._default_manager.bulk_create(
+        changed,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=list(key_fields),
+        update_fields=[*counter_fields, 'updated_at'],
+    )
+    for start in range(0, len(stale_keys), batch_size):
+        model._default_manager.filter(
+            _keys_condition(key_columns, stale_keys[start : start + batch_size])
+        ).update(**dict.fromkeys(counter_fields, 0), updated_at=Now())
+
+    return len(changed) + len(stale_keys)
+
+
+def _keys_condition(key_columns: Sequence[str], keys: Sequence[tuple[Any, ...]]) -> Q:
+    if len(key_columns) == 1:
+        return Q(**{f'{key_columns[0]}__in': [key[0] for key in keys]})
+    return reduce(operator.or_, (Q(**dict(zip(key_columns, key))) for key in keys))
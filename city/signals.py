@@ -6,35 +6,144 @@
 # ----------------------------------------------
 
 from typing import Any, Type
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.db import transaction
 from django.dispatch import receiver
 
-from account.use_cases.visited_cities_countries_coverage import (
-    invalidate_personal_visited_cities_countries_coverage_cache,
+from city.models import City, VisitedCity, VisitedCityDistrict
+from city.services.city_popularity import change_city_popularity
+from city.services.user_city_summary import refresh_user_city_summary
+from city.services.user_rank import (
+    change_user_country_visit_counters,
+    change_user_visit_counters,
 )
-from city.models import City, VisitedCity
-from subscribe.infrastructure.models import Subscribe, VisitedCityNotification
+from services.cache import bump_stats_generation
+from services.http_cache import bump_catalog_version
+from services.reference_cache import (
+    COUNTRIES_WITH_CITIES,
+    NUMBER_OF_CITIES,
+    invalidate_reference_data,
+)
+from subscribe.infrastructure.notification_fanout import enqueue_notification_fanout
 
 
-def _invalidate_visited_cities_countries_coverage_cache(user_id: int) -> None:
-    transaction.on_commit(
-        lambda: invalidate_personal_visited_cities_countries_coverage_cache(user_id)
-    )
+def _invalidate_user_statistics_cache(user_id: int) -> None:
+    transaction.on_commit(lambda: bump_stats_generation(user_id))
 
 
 @receiver(post_save, sender=VisitedCity)
 def invalidate_visited_city_statistics_cache_on_save(
     sender: Type[VisitedCity], instance: VisitedCity, **kwargs: Any
 ) -> None:
-    _invalidate_visited_cities_countries_coverage_cache(instance.user_id)
+    _invalidate_user_statistics_cache(instance.user_id)
 
 
 @receiver(post_delete, sender=VisitedCity)
 def invalidate_visited_city_statistics_cache_on_delete(
     sender: Type[VisitedCity], instance: VisitedCity, **kwargs: Any
 ) -> None:
-    _invalidate_visited_cities_countries_coverage_cache(instance.user_id)
+    _invalidate_user_statistics_cache(instance.user_id)
+
+
+@receiver(post_save, sender=VisitedCityDistrict)
+@receiver(post_delete, sender=VisitedCityDistrict)
+def invalidate_visited_city_district_statistics_cache(
+    sender: Type[VisitedCityDistrict], instance: VisitedCityDistrict, **kwargs: Any
+) -> None:
+    _invalidate_user_statistics_cache(instance.user_id)
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_city_reference_cache(sender: Type[City], instance: City, **kwargs: Any) -> None:
+    invalidate_reference_data(COUNTRIES_WITH_CITIES, NUMBER_OF_CITIES)
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=VisitedCity)
+def remember_previous_city_of_visit(
+    sender: Type[VisitedCity], instance: VisitedCity, **kwargs: Any
+) -> None:
+    """
+    Запоминает город и страну, к которым посещение относилось до редактирования,
+    чтобы после смены города пересчитать агрегаты и для старого города.
+    """
+    if instance.pk is None or kwargs.get('raw'):
+        instance._previous_city_id = None  # type: ignore[attr-defined]
+        instance._previous_country_id = None  # type: ignore[attr-defined]
+        return
+
+    previous = (
+        VisitedCity.objects.filter(pk=instance.pk)
+        .values_list('city_id', 'city__country_id')
+        .first()
+    )
+    previous_city_id, previous_country_id = previous or (None, None)
+    instance._previous_city_id = previous_city_id  # type: ignore[attr-defined]
+    instance._previous_country_id = previous_country_id  # type: ignore[attr-defined]
+
+
+@receiver(post_save, sender=VisitedCity)
+def refresh_visit_aggregates_on_save(
+    sender: Type[VisitedCity], instance: VisitedCity, created: bool, **kwargs: Any
+) -> None:
+    """
+    Обновляет сводку пользователя по городу, счётчики популярности города
+    и счётчики рейтинга пользователя.
+    Город учитывается в счётчиках, когда у пользователя появляется первое посещение города.
+    """
+    number_of_visits = refresh_user_city_summary(instance.user_id, instance.city_id)
+    is_new_city = number_of_visits == 1
+
+    previous_city_id: int | None = getattr(instance, '_previous_city_id', None)
+    previous_country_id: int | None = getattr(instance, '_previous_country_id', None)
+    is_moved = previous_city_id is not None and previous_city_id != instance.city_id
+
+    if created:
+        change_user_visit_counters(instance.user_id, visits_delta=1, cities_delta=int(is_new_city))
+
+    if created or is_moved:
+        change_city_popularity(instance.city_id, visits_delta=1, users_delta=int(is_new_city))
+        change_user_country_visit_counters(
+            instance.user_id,
+            instance.city.country_id,
+            visits_delta=1,
+            cities_delta=int(is_new_city),
+        )
+
+    if previous_city_id is not None and previous_country_id is not None and is_moved:
+        is_previous_city_left = refresh_user_city_summary(instance.user_id, previous_city_id) == 0
+        change_city_popularity(
+            previous_city_id, visits_delta=-1, users_delta=-int(is_previous_city_left)
+        )
+        change_user_country_visit_counters(
+            instance.user_id,
+            previous_country_id,
+            visits_delta=-1,
+            cities_delta=-int(is_previous_city_left),
+        )
+        change_user_visit_counters(
+            instance.user_id,
+            visits_delta=0,
+            cities_delta=int(is_new_city) - int(is_previous_city_left),
+        )
+
+
+@receiver(post_delete, sender=VisitedCity)
+def refresh_visit_aggregates_on_delete(
+    sender: Type[VisitedCity], instance: VisitedCity, **kwargs: Any
+) -> None:
+    is_city_left = refresh_user_city_summary(instance.user_id, instance.city_id) == 0
+    change_city_popularity(instance.city_id, visits_delta=-1, users_delta=-int(is_city_left))
+    change_user_visit_counters(instance.user_id, visits_delta=-1, cities_delta=-int(is_city_left))
+
+    country_id = (
+        City.objects.filter(pk=instance.city_id).values_list('country_id', flat=True).first()
+    )
+    if country_id is not None:
+        change_user_country_visit_counters(
+            instance.user_id, country_id, visits_delta=-1, cities_delta=-int(is_city_left)
+        )
 
 
 @receiver(post_save, sender=VisitedCity)
@@ -44,15 +153,4 @@ def notify_subscribers_on_city_add(
     if not created:
         return
 
-    user = instance.user
-    subscribers = Subscribe.objects.select_related('subscribe_from').filter(subscribe_to=user)
-    city: 'City' = (
-        VisitedCity.objects.select_related('city', 'city__country').get(pk=instance.pk).city
-    )
-
-    for subscriber in subscribers:
-        VisitedCityNotification.objects.create(
-            recipient=subscriber.subscribe_from,
-            sender=user,
-            city=city,
-        )
+    enqueue_notification_fanout(instance.user_id, instance.city_id)
@@ -0,0 +1,25 @@
+"""
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+import pytest
+
+from city.services.search_index import clear_city_search_index
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data_cache() -> None:
+    """
+    Сбрасывает кеш справочных данных и построенные по ним индексы поиска,
+    чтобы данные одного теста не попадали в другой
+    """
+    clear_reference_cache()
+    clear_catalog_search_index()
+    clear_city_search_index()
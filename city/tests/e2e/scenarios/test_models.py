@@ -110,6 +110,7 @@ class TestCityModel:
             'image',
             'image_source_text',
             'image_source_link',
+            'osm_relation_id',
         }
         model_fields = set(f.name for f in City._meta.get_fields() if not f.auto_created)
         assert model_fields == expected_fields, (
@@ -209,6 +210,7 @@ class TestCityModel:
         assert city.region is None
         assert city.population is None
         assert city.date_of_foundation is None
+        assert city.osm_relation_id is None
 
     def test_city_url_fields_validation(self) -> None:
         """Проверяет валидацию URL полей."""
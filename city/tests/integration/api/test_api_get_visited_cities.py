@@ -27,6 +27,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from city.models import City, VisitedCity
+from country.models import Country
+
 VISITED_CITIES_URL = reverse('api__get_visited_cities')
 
 
@@ -390,3 +393,47 @@ def test_get_visited_cities_no_logging_on_prohibited_methods(
     response = client_method(VISITED_CITIES_URL)
     assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
     mock_logger.info.assert_not_called()
+
+
+# Тесты условных запросов
+
+
+@pytest.fixture
+def visited_city(authenticated_user: User) -> VisitedCity:
+    country = Country.objects.create(name='Россия', code='RU')
+    city = City.objects.create(
+        title='Коломна', country=country, coordinate_width=55.1, coordinate_longitude=38.7
+    )
+    return VisitedCity.objects.create(
+        user=authenticated_user, city=city, date_of_visit=date(2024, 5, 1), rating=5
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_get_visited_cities_returns_not_modified_for_matching_etag(
+    api_client: APIClient, visited_city: VisitedCity
+) -> None:
+    """Проверяет, что при совпадении If-None-Match возвращается 304 без тела."""
+    response = api_client.get(VISITED_CITIES_URL)
+
+    not_modified = api_client.get(VISITED_CITIES_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert response['Cache-Control'] == 'private, no-cache'
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.content == b''
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_get_visited_cities_etag_changes_after_visit_deletion(
+    api_client: APIClient, authenticated_user: User, visited_city: VisitedCity
+) -> None:
+    """Проверяет, что после удаления посещения возвращается новый список."""
+    etag = api_client.get(VISITED_CITIES_URL)['ETag']
+    visited_city.delete()
+
+    response = api_client.get(VISITED_CITIES_URL, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
@@ -0,0 +1,251 @@
+"""
+Тесты для эндпоинтов /api/city/list_by_regions и /api/city/list_by_ids.
+
+Покрывает:
+- Валидацию параметров со списками ID
+- Загрузку городов по регионам, странам и ID
+- Информацию о посещениях для авторизованного и анонимного пользователя
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from datetime import date
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from city.models import City, VisitedCity
+from country.models import Country
+from region.models import Region, RegionType
+
+
+@pytest.fixture
+def country() -> Country:
+    return Country.objects.create(name='Россия', code='RU')
+
+
+@pytest.fixture
+def region(country: Country) -> Region:
+    region_type = RegionType.objects.create(title='область')
+    return Region.objects.create(
+        title='Московская',
+        full_name='Московская область',
+        country=country,
+        type=region_type,
+        iso3166='RU-MOS',
+    )
+
+
+@pytest.fixture
+def cities(country: Country, region: Region) -> list[City]:
+    return [
+        City.objects.create(
+            title='Коломна',
+            region=region,
+            country=country,
+            coordinate_width=55.1,
+            coordinate_longitude=38.7,
+        ),
+        City.objects.create(
+            title='Абрау',
+            region=None,
+            country=country,
+            coordinate_width=44.7,
+            coordinate_longitude=37.6,
+        ),
+    ]
+
+
+@pytest.fixture
+def user(api_client: APIClient, django_user_model: type[User]) -> User:
+    user = django_user_model.objects.create_user(username='testuser', password='pass')
+    api_client.force_login(user)
+    return user
+
+
+def visit(user: User, city: City, date_of_visit: date, is_first_visit: bool) -> None:
+    VisitedCity.objects.create(
+        user=user,
+        city=city,
+        date_of_visit=date_of_visit,
+        rating=5,
+        is_first_visit=is_first_visit,
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCityListByRegions:
+    """Тесты для эндпоинта /api/city/list_by_regions."""
+
+    url: str = reverse('api__city_list_by_regions')
+
+    def test_missing_parameters(self, api_client: APIClient) -> None:
+        response = api_client.get(self.url)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'region_ids или country_ids' in response.json()['detail']
+
+    def test_invalid_region_ids(self, api_client: APIClient) -> None:
+        response = api_client.get(self.url, {'region_ids': '1,abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'region_ids должен содержать' in response.json()['detail']
+
+    def test_empty_ids(self, api_client: APIClient) -> None:
+        response = api_client.get(self.url, {'region_ids': ' , '})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['detail'] == 'Не указаны валидные ID регионов или стран'
+
+    def test_cities_by_region_for_anonymous_user(
+        self, api_client: APIClient, region: Region, cities: list[City]
+    ) -> None:
+        response = api_client.get(self.url, {'region_ids': str(region.id)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {
+                'id': cities[0].id,
+                'title': 'Коломна',
+                'lat': '55.1',
+                'lon': '38.7',
+                'region': 'Московская область',
+                'country': 'Россия',
+                'regionId': region.id,
+                'countryCode': 'RU',
+                'isVisited': False,
+                'firstVisitDate': None,
+                'lastVisitDate': None,
+                'numberOfVisits': 0,
+            }
+        ]
+
+    def test_cities_by_country_include_cities_without_region(
+        self, api_client: APIClient, country: Country, cities: list[City]
+    ) -> None:
+        response = api_client.get(self.url, {'country_ids': str(country.id)})
+
+        assert [city['title'] for city in response.json()] == ['Абрау', 'Коломна']
+        assert response.json()[0]['region'] is None
+        assert response.json()[0]['regionId'] is None
+
+    def test_visits_are_aggregated_in_single_query(
+        self, api_client: APIClient, user: User, country: Country, cities: list[City]
+    ) -> None:
+        other_user = User.objects.create_user(username='other', password='pass')
+        visit(user, cities[0], date(2024, 5, 1), True)
+        visit(user, cities[0], date(2022, 1, 3), False)
+        visit(user, cities[0], date(2023, 7, 9), False)
+        visit(other_user, cities[1], date(2024, 1, 1), True)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(self.url, {'country_ids': str(country.id)})
+
+        data: list[dict[str, Any]] = response.json()
+        assert data[0]['isVisited'] is False
+        assert data[0]['numberOfVisits'] == 0
+        assert data[1]['isVisited'] is True
+        assert data[1]['firstVisitDate'] == '2022-01-03'
+        assert data[1]['lastVisitDate'] == '2024-05-01'
+        assert data[1]['numberOfVisits'] == 3
+        assert len([query for query in queries if '"city_city"."title"' in query['sql']]) == 1
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCityListByIds:
+    """Тесты для эндпоинта /api/city/list_by_ids."""
+
+    url: str = reverse('api__city_list_by_ids')
+
+    def test_missing_city_ids(self, api_client: APIClient) -> None:
+        response = api_client.get(self.url)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'city_ids является обязательным' in response.json()['detail']
+
+    def test_invalid_city_ids(self, api_client: APIClient) -> None:
+        response = api_client.get(self.url, {'city_ids': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'city_ids должен содержать' in response.json()['detail']
+
+    def test_cities_by_ids(self, api_client: APIClient, user: User, cities: list[City]) -> None:
+        visit(user, cities[1], date(2021, 8, 2), True)
+
+        response = api_client.get(self.url, {'city_ids': f'{cities[1].id},{cities[0].id}'})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [city['id'] for city in data] == [cities[1].id, cities[0].id]
+        assert data[0]['isVisited'] is True
+        assert data[0]['firstVisitDate'] == '2021-08-02'
+        assert data[0]['numberOfVisits'] == 1
+        assert data[1]['isVisited'] is False
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCityListConditionalRequests:
+    """Тесты условных запросов (ETag, 304) для списка городов."""
+
+    url: str = reverse('api__city_list_by_regions')
+
+    def test_anonymous_response_is_public(
+        self, api_client: APIClient, region: Region, cities: list[City]
+    ) -> None:
+        response = api_client.get(self.url, {'region_ids': str(region.id)})
+
+        assert response['ETag']
+        assert response['Cache-Control'] == 'public, max-age=300'
+
+    def test_returns_not_modified_for_matching_etag(
+        self, api_client: APIClient, user: User, region: Region, cities: list[City]
+    ) -> None:
+        response = api_client.get(self.url, {'region_ids': str(region.id)})
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = api_client.get(
+                self.url, {'region_ids': str(region.id)}, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+
+        assert response['Cache-Control'] == 'private, no-cache'
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified.content == b''
+        assert not_modified['ETag'] == response['ETag']
+        assert not any('"city_city"."title"' in query['sql'] for query in queries)
+
+    def test_etag_changes_after_visit(
+        self, api_client: APIClient, user: User, region: Region, cities: list[City]
+    ) -> None:
+        etag = api_client.get(self.url, {'region_ids': str(region.id)})['ETag']
+
+        visit(user, cities[0], date(2024, 5, 1), True)
+        response = api_client.get(self.url, {'region_ids': str(region.id)}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_etag_changes_after_city_change(
+        self, api_client: APIClient, region: Region, cities: list[City]
+    ) -> None:
+        etag = api_client.get(self.url, {'region_ids': str(region.id)})['ETag']
+
+        cities[0].title = 'Коломна-1'
+        cities[0].save()
+        response = api_client.get(self.url, {'region_ids': str(region.id)}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]['title'] == 'Коломна-1'
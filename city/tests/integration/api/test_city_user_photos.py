@@ -21,7 +21,8 @@ from django.utils import timezone
 from PIL import Image
 from rest_framework import status
 
-from city.models import City, CityUserPhoto
+from city.models import City, CityUserPhoto, CityUserPhotoProcessingTask
+from city.services.photo_pipeline import process_city_photo_queue
 from country.models import Country
 from premium.models import PremiumPlan, PremiumSubscription
 
@@ -148,6 +149,11 @@ def test_upload_photo_success_and_default_first(
     photo = CityUserPhoto.objects.get(user=user, city=city)
     assert photo.is_default is True
     assert photo.position == 1
+    # Варианты фото строит обработчик очереди, исходник сохраняется без изменений
+    assert photo.status == CityUserPhoto.Status.PENDING
+    assert _response_json(response)['photo']['status'] == 'pending'
+    assert photo.image.name.endswith('.png')
+    assert CityUserPhotoProcessingTask.objects.filter(photo=photo).exists()
 
 
 @pytest.mark.django_db
@@ -236,7 +242,7 @@ def test_upload_rejects_too_many_pixels(
     client.force_login(user)
 
     with patch(
-        'city.api.photos.compress_city_photo',
+        'city.api.photos.inspect_city_photo',
         side_effect=ValueError('Слишком большое изображение'),
     ):
         response = client.post(
@@ -436,6 +442,34 @@ def test_list_photos_returns_uploaded_photos(
     assert 'image_url' in data['photos'][0]
 
 
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_unprocessed_photo_is_not_served(
+    client: Client,
+    user: User,
+    city: City,
+    active_advanced_subscription: PremiumSubscription,
+) -> None:
+    client.force_login(user)
+    client.post(
+        reverse('api__upload_city_user_photo'),
+        {'city_id': city.id, 'image': _make_image_file()},
+    )
+    photo = CityUserPhoto.objects.get(user=user, city=city)
+    list_url = f'{reverse("api__city_user_photos")}?{urlencode({"city_id": city.id})}'
+    content_url = reverse('api__city_user_photo_content', kwargs={'photo_id': photo.id})
+
+    [pending] = _response_json(client.get(list_url))['photos']
+    assert (pending['status'], pending['image_url']) == ('pending', '')
+    assert client.get(content_url).status_code == status.HTTP_404_NOT_FOUND
+
+    CityUserPhoto.objects.filter(pk=photo.pk).update(status=CityUserPhoto.Status.FAILED)
+
+    [failed] = _response_json(client.get(list_url))['photos']
+    assert (failed['status'], failed['image_url']) == ('failed', '')
+    assert client.get(content_url).status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_get_photo_binary_for_owner(
@@ -449,6 +483,7 @@ def test_get_photo_binary_for_owner(
         reverse('api__upload_city_user_photo'),
         {'city_id': city.id, 'image': _make_image_file()},
     )
+    process_city_photo_queue()
     photo = CityUserPhoto.objects.get(user=user, city=city)
     response = client.get(reverse('api__city_user_photo_content', kwargs={'photo_id': photo.id}))
     assert response.status_code == status.HTTP_200_OK
@@ -7,6 +7,7 @@
 - Проверку подписок и разрешений пользователей
 - Особые права суперпользователя
 - Обработку пустых списков пользователей
+- Компактный формат ответа и количество запросов к базе
 
 ----------------------------------------------
 
@@ -16,17 +17,66 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import json
+from datetime import date
+from typing import Any
 from unittest.mock import MagicMock, patch
+
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.urls import reverse
 
 from account.models import ShareSettings
+from city.models import City, VisitedCity
+from country.models import Country
+from subscribe.infrastructure.models import Subscribe
+
+
+@pytest.fixture
+def country() -> Country:
+    return Country.objects.create(name='Россия', code='RU')
+
+
+@pytest.fixture
+def cities(country: Country) -> list[City]:
+    return [
+        City.objects.create(
+            title=title, country=country, coordinate_width=55.0, coordinate_longitude=37.0
+        )
+        for title in ('Коломна', 'Тула')
+    ]
+
+
+def create_friend(username: str, follower: User, can_subscribe: bool = True) -> User:
+    friend = User.objects.create_user(username=username, password='pass')
+    ShareSettings.objects.create(user=friend, can_subscribe=can_subscribe)
+    Subscribe.objects.create(subscribe_from=follower, subscribe_to=friend)
+    return friend
+
+
+def visit(user: User, city: City, date_of_visit: date, is_first_visit: bool = True) -> None:
+    VisitedCity.objects.create(
+        user=user, city=city, date_of_visit=date_of_visit, rating=4, is_first_visit=is_first_visit
+    )
+
+
+def read_payload(response: Any) -> dict[str, Any]:
+    assert isinstance(response, StreamingHttpResponse)
+    payload: dict[str, Any] = json.loads(response.getvalue())
+    return payload
+
+
+def decode_cities(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    return [dict(zip(payload['fields'], row)) for row in payload['cities']]
 
 
 @pytest.mark.integration
+@pytest.mark.django_db
 class TestGetVisitedCitiesFromSubscriptions:
     """Тесты для эндпоинта /api/city/visited/subscriptions (GetVisitedCitiesFromSubscriptions)."""
 
@@ -55,66 +105,118 @@ class TestGetVisitedCitiesFromSubscriptions:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         mock_logger.warning.assert_called_once()
 
-    @patch('city.api.common.get_unique_visited_cities')
-    @patch('city.api.common.logger')
-    def test_empty_user_ids(
-        self,
-        mock_logger: MagicMock,
-        mock_get_unique_visited_cities: MagicMock,
-        api_client: APIClient,
-        authenticated_user: User,
-    ) -> None:
+    def test_empty_user_ids(self, api_client: APIClient, authenticated_user: User) -> None:
         """Проверяет обработку пустого списка user_ids."""
         # Пустой список user_ids должен приводить к ошибке валидации
         response = api_client.get(f'{self.url}?user_ids=')
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    @patch('city.api.common.get_unique_visited_cities')
-    @patch('subscribe.repository.is_subscribed')
-    @patch('account.models.ShareSettings.objects.get')
-    @patch('city.api.common.logger')
-    def test_superuser_bypasses_restrictions(
-        self,
-        mock_logger: MagicMock,
-        mock_share_settings: MagicMock,
-        mock_is_subscribed: MagicMock,
-        mock_get_unique_visited_cities: MagicMock,
-        api_client: APIClient,
-        superuser: User,
-        mock_visited_city: MagicMock,
+    def test_no_user_ids_returns_empty_payload(
+        self, api_client: APIClient, authenticated_user: User
     ) -> None:
-        """Проверяет, что суперпользователь может обходить ограничения подписок."""
-        mock_queryset = MagicMock()
-        mock_queryset.__iter__.return_value = [mock_visited_city]
-        mock_get_unique_visited_cities.return_value = mock_queryset
-
-        # Используем валидные user_ids
-        response = api_client.get(f'{self.url}?user_ids=1')
+        """Без user_ids возвращается пустой ответ в компактном формате."""
+        response = api_client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
-        mock_logger.info.assert_called_once()
-        # Superuser bypasses subscription checks
-        mock_is_subscribed.assert_not_called()
-        mock_share_settings.assert_not_called()
-
-    @patch('city.api.common.get_unique_visited_cities')
-    @patch('subscribe.repository.is_subscribed')
-    @patch('account.models.ShareSettings.objects.get')
+        payload = read_payload(response)
+        assert payload['users'] == []
+        assert payload['cities'] == []
+        assert payload['fields'][:2] == ['user_id', 'id']
+
+    def test_returns_cities_of_subscriptions(
+        self, api_client: APIClient, authenticated_user: User, cities: list[City]
+    ) -> None:
+        """Возвращает по одной строке на пару (пользователь, город) с агрегатами посещений."""
+        alice = create_friend('alice', authenticated_user)
+        bob = create_friend('bob', authenticated_user)
+        visit(alice, cities[0], date(2022, 6, 1))
+        visit(alice, cities[0], date(2024, 3, 2), is_first_visit=False)
+        visit(bob, cities[0], date(2023, 1, 5))
+        visit(bob, cities[1], date(2021, 7, 8))
+
+        response = api_client.get(self.url, {'user_ids': [alice.pk, bob.pk]})
+
+        payload = read_payload(response)
+        assert payload['users'] == [[alice.pk, 'alice'], [bob.pk, 'bob']]
+        rows = decode_cities(payload)
+        assert [(row['user_id'], row['title']) for row in rows] == [
+            (alice.pk, 'Коломна'),
+            (bob.pk, 'Коломна'),
+            (bob.pk, 'Тула'),
+        ]
+        assert rows[0]['number_of_visits'] == 2
+        assert rows[0]['first_visit_date'] == '2022-06-01'
+        assert rows[0]['last_visit_date'] == '2024-03-02'
+        assert rows[0]['visit_years'] == [2024, 2022]
+        assert rows[0]['average_rating'] == 4.0
+        assert rows[0]['number_of_users_who_visit_city'] == 2
+        assert rows[0]['number_of_visits_all_users'] == 3
+        assert rows[0]['country_code'] == 'RU'
+
+    def test_filters_by_country(
+        self, api_client: APIClient, authenticated_user: User, cities: list[City]
+    ) -> None:
+        """Параметр country ограничивает города страной."""
+        other_country = Country.objects.create(name='Беларусь', code='BY')
+        minsk = City.objects.create(
+            title='Минск', country=other_country, coordinate_width=53.9, coordinate_longitude=27.5
+        )
+        alice = create_friend('alice', authenticated_user)
+        visit(alice, cities[0], date(2022, 6, 1))
+        visit(alice, minsk, date(2022, 6, 2))
+
+        response = api_client.get(self.url, {'user_ids': str(alice.pk), 'country': 'BY'})
+
+        assert [row['title'] for row in decode_cities(read_payload(response))] == ['Минск']
+
     @patch('city.api.common.logger')
-    def test_user_without_subscription_access_denied(
+    def test_skips_users_without_permission_or_subscription(
         self,
         mock_logger: MagicMock,
-        mock_share_settings: MagicMock,
-        mock_is_subscribed: MagicMock,
-        mock_get_unique_visited_cities: MagicMock,
         api_client: APIClient,
         authenticated_user: User,
+        cities: list[City],
     ) -> None:
-        """Проверяет, что пользователи без подписки не могут получить доступ к данным."""
-        mock_share_settings.side_effect = ShareSettings.DoesNotExist()
-        mock_is_subscribed.return_value = False
+        """Города пользователей без разрешения или без подписки не возвращаются."""
+        alice = create_friend('alice', authenticated_user)
+        private = create_friend('private', authenticated_user, can_subscribe=False)
+        stranger = User.objects.create_user(username='stranger', password='pass')
+        ShareSettings.objects.create(user=stranger, can_subscribe=True)
+        for user in (alice, private, stranger):
+            visit(user, cities[0], date(2022, 6, 1))
+
+        response = api_client.get(self.url, {'user_ids': [alice.pk, private.pk, stranger.pk, 999]})
+
+        payload = read_payload(response)
+        assert payload['users'] == [[alice.pk, 'alice']]
+        assert [row['user_id'] for row in decode_cities(payload)] == [alice.pk]
+        mock_logger.warning.assert_called_once()
 
-        response = api_client.get(f'{self.url}?user_ids=999')
+    def test_superuser_bypasses_restrictions(
+        self, api_client: APIClient, superuser: User, cities: list[City]
+    ) -> None:
+        """Суперпользователь видит города любых пользователей без подписки."""
+        stranger = User.objects.create_user(username='stranger', password='pass')
+        visit(stranger, cities[1], date(2022, 6, 1))
 
-        assert response.status_code == status.HTTP_200_OK
-        assert response.json() == []
+        response = api_client.get(self.url, {'user_ids': stranger.pk})
+
+        assert [row['title'] for row in decode_cities(read_payload(response))] == ['Тула']
+
+    def test_number_of_queries_does_not_depend_on_number_of_users(
+        self, api_client: APIClient, authenticated_user: User, cities: list[City]
+    ) -> None:
+        """Количество запросов не растёт с количеством пользователей в user_ids."""
+        friends = [create_friend(f'friend{index}', authenticated_user) for index in range(5)]
+        for friend in friends:
+            visit(friend, cities[0], date(2022, 6, 1))
+
+        with CaptureQueriesContext(connection) as one_user_queries:
+            read_payload(api_client.get(self.url, {'user_ids': friends[0].pk}))
+        with CaptureQueriesContext(connection) as all_users_queries:
+            payload = read_payload(
+                api_client.get(self.url, {'user_ids': [friend.pk for friend in friends]})
+            )
+
+        assert len(payload['cities']) == 5
+        assert len(all_users_queries) == len(one_user_queries)
@@ -105,48 +105,31 @@ class TestGetNumberOfCities:
 
     def test_without_country_code(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет, что метод возвращает общее количество городов без фильтра."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_count = mock_all.return_value.count
-        mock_count.return_value = 100
+        mocker.patch('city.services.db._count_cities_by_country', return_value={'RU': 60, 'BY': 40})
 
         result = repo.get_number_of_cities()
 
         assert result == 100
-        mock_all.assert_called_once()
-        mock_count.assert_called_once()
 
     def test_with_country_code(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет фильтрацию по коду страны."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_filter = mock_all.return_value.filter
-        mock_count = mock_filter.return_value.count
-        mock_count.return_value = 50
+        mocker.patch('city.services.db._count_cities_by_country', return_value={'RU': 50, 'BY': 40})
 
         result = repo.get_number_of_cities(country_code='RU')
 
         assert result == 50
-        mock_all.assert_called_once()
-        mock_filter.assert_called_once_with(country__code='RU')
-        mock_count.assert_called_once()
 
     def test_with_empty_country_code(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет, что пустой country_code не применяет фильтр."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_count = mock_all.return_value.count
-        mock_count.return_value = 75
+        mocker.patch('city.services.db._count_cities_by_country', return_value={'RU': 50, 'BY': 25})
 
         result = repo.get_number_of_cities(country_code='')
 
         assert result == 75
-        mock_all.assert_called_once()
-        mock_count.assert_called_once()
 
     def test_returns_zero_when_no_cities(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет возврат 0 при отсутствии городов."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_filter = mock_all.return_value.filter
-        mock_count = mock_filter.return_value.count
-        mock_count.return_value = 0
+        mocker.patch('city.services.db._count_cities_by_country', return_value={'RU': 50})
 
         result = repo.get_number_of_cities(country_code='ZZ')
 
@@ -154,21 +137,27 @@ class TestGetNumberOfCities:
 
     def test_with_none_country_code(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет поведение при country_code=None."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_count = mock_all.return_value.count
-        mock_count.return_value = 100
+        mocker.patch('city.services.db._count_cities_by_country', return_value={'RU': 100})
 
         result = repo.get_number_of_cities(country_code=None)
 
         assert result == 100
-        mock_all.assert_called_once()
-        mock_count.assert_called_once()
+
+    def test_uses_reference_cache(self, mocker: Any, repo: CityRepository) -> None:
+        """Проверяет, что количество городов считается один раз и берётся из кеша."""
+        mock_count = mocker.patch(
+            'city.services.db._count_cities_by_country', return_value={'RU': 100}
+        )
+
+        repo.get_number_of_cities()
+        result = repo.get_number_of_cities(country_code='RU')
+
+        assert result == 100
+        mock_count.assert_called_once_with()
 
     def test_exception_propagates(self, mocker: Any, repo: CityRepository) -> None:
         """Проверяет, что исключения из БД пробрасываются."""
-        mock_all = mocker.patch('city.models.City.objects.all')
-        mock_count = mock_all.return_value.count
-        mock_count.side_effect = Exception('DB error')
+        mocker.patch('city.services.db._count_cities_by_country', side_effect=Exception('DB error'))
 
         with pytest.raises(Exception, match='DB error'):
             repo.get_number_of_cities()
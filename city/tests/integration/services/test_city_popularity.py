@@ -0,0 +1,152 @@
+"""
+Integration тесты счётчиков популярности городов (city/services/city_popularity.py).
+
+Проверяются:
+- инкрементальное изменение счётчиков сигналами VisitedCity
+- сверка счётчиков командой reconcile_city_popularity
+- сортировка по популярности на основе счётчиков
+"""
+
+from datetime import date
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+
+from city.models import City, CityPopularity, VisitedCity
+from city.services.city_popularity import reconcile_city_popularity
+from city.services.db import get_unique_visited_cities
+from city.services.sort import apply_sort_to_queryset
+from country.models import Country
+
+
+@pytest.fixture
+def setup_data(django_user_model: Any) -> dict[str, Any]:
+    country = Country.objects.create(name='Россия', code='RU')
+    moscow = City.objects.create(
+        title='Москва', country=country, coordinate_width=55.75, coordinate_longitude=37.62
+    )
+    kazan = City.objects.create(
+        title='Казань', country=country, coordinate_width=55.79, coordinate_longitude=49.12
+    )
+    first_user = django_user_model.objects.create_user(username='first', password='pass')
+    second_user = django_user_model.objects.create_user(username='second', password='pass')
+
+    return {'moscow': moscow, 'kazan': kazan, 'first_user': first_user, 'second_user': second_user}
+
+
+def _counters(city: City) -> tuple[int, int]:
+    popularity = CityPopularity.objects.get(city=city)
+    return popularity.number_of_users, popularity.number_of_visits
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestCityPopularitySignals:
+    def test_counters_incremented_on_visits(self, setup_data: dict[str, Any]) -> None:
+        moscow = setup_data['moscow']
+
+        VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+        VisitedCity.objects.create(
+            user=setup_data['first_user'],
+            city=moscow,
+            date_of_visit=date(2024, 1, 1),
+            rating=5,
+            is_first_visit=False,
+        )
+        VisitedCity.objects.create(user=setup_data['second_user'], city=moscow, rating=4)
+
+        assert _counters(moscow) == (2, 3)
+
+    def test_counters_not_changed_on_visit_update(self, setup_data: dict[str, Any]) -> None:
+        moscow = setup_data['moscow']
+        visit = VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+
+        visit.rating = 3
+        visit.save()
+
+        assert _counters(moscow) == (1, 1)
+
+    def test_counters_moved_with_visit(self, setup_data: dict[str, Any]) -> None:
+        moscow, kazan = setup_data['moscow'], setup_data['kazan']
+        visit = VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+
+        visit.city = kazan
+        visit.save()
+
+        assert _counters(moscow) == (0, 0)
+        assert _counters(kazan) == (1, 1)
+
+    def test_counters_decremented_on_delete(self, setup_data: dict[str, Any]) -> None:
+        moscow = setup_data['moscow']
+        first = VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+        second = VisitedCity.objects.create(
+            user=setup_data['first_user'],
+            city=moscow,
+            date_of_visit=date(2024, 1, 1),
+            rating=5,
+            is_first_visit=False,
+        )
+
+        second.delete()
+        assert _counters(moscow) == (1, 1)
+
+        first.delete()
+        assert _counters(moscow) == (0, 0)
+
+    def test_city_deletion_removes_counters(self, setup_data: dict[str, Any]) -> None:
+        moscow = setup_data['moscow']
+        VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+
+        moscow.delete()
+
+        assert not CityPopularity.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestReconcileCityPopularity:
+    def test_reconcile_fixes_drift(self, setup_data: dict[str, Any]) -> None:
+        moscow, kazan = setup_data['moscow'], setup_data['kazan']
+        VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+        VisitedCity.objects.create(user=setup_data['second_user'], city=moscow, rating=5)
+        CityPopularity.objects.filter(city=moscow).update(number_of_users=10, number_of_visits=1)
+        CityPopularity.objects.create(city=kazan, number_of_users=3, number_of_visits=3)
+
+        changed = reconcile_city_popularity()
+
+        assert changed == 2
+        assert _counters(moscow) == (2, 2)
+        assert _counters(kazan) == (0, 0)
+
+    def test_reconcile_is_noop_for_consistent_counters(self, setup_data: dict[str, Any]) -> None:
+        VisitedCity.objects.create(
+            user=setup_data['first_user'], city=setup_data['moscow'], rating=5
+        )
+
+        assert reconcile_city_popularity() == 0
+
+    def test_management_command(self, setup_data: dict[str, Any]) -> None:
+        moscow = setup_data['moscow']
+        VisitedCity.objects.create(user=setup_data['first_user'], city=moscow, rating=5)
+        CityPopularity.objects.all().delete()
+
+        call_command('reconcile_city_popularity')
+
+        assert _counters(moscow) == (1, 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_sort_by_popularity_uses_counters(setup_data: dict[str, Any]) -> None:
+    user, moscow, kazan = setup_data['first_user'], setup_data['moscow'], setup_data['kazan']
+    VisitedCity.objects.create(user=user, city=moscow, rating=5)
+    VisitedCity.objects.create(user=user, city=kazan, rating=5)
+    CityPopularity.objects.filter(city=kazan).update(number_of_users=100, number_of_visits=200)
+
+    queryset = apply_sort_to_queryset(
+        get_unique_visited_cities(user.id), 'number_of_users_who_visit_city_down'
+    )
+
+    assert [visit.city_id for visit in queryset] == [kazan.id, moscow.id]
+    assert queryset[0].number_of_visits_all_users == 200  # type: ignore[attr-defined]
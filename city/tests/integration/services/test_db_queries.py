@@ -13,7 +13,7 @@ from typing import Any
 
 import pytest
 
-from city.models import City, VisitedCity
+from city.models import City, CityUserPhoto, VisitedCity
 from city.services.db import (
     annotate_visited_city_list_default_photo,
     get_unique_visited_cities,
@@ -179,6 +179,38 @@ class TestUniqueVisitedCitiesFunctions:
         assert city.has_souvenir is True
         assert city.default_city_user_photo_id is None
 
+    def test_default_photo_annotation_skips_unprocessed_photo(
+        self, setup_data: dict[str, Any]
+    ) -> None:
+        """Фото по умолчанию, которое ещё не обработано, в списке не показывается."""
+        user = setup_data['user']
+        moscow = setup_data['moscow']
+        VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=5, is_first_visit=True
+        )
+        photo = CityUserPhoto.objects.create(
+            user=user,
+            city=moscow,
+            image='raw.heic',
+            status=CityUserPhoto.Status.PENDING,
+            is_default=True,
+            position=1,
+        )
+
+        def annotated_photo_id() -> Any:
+            cities = annotate_visited_city_list_default_photo(
+                get_unique_visited_cities(user.id), user.id
+            )
+            city = cities.first()
+            assert city is not None
+            return getattr(city, 'default_city_user_photo_id')
+
+        assert annotated_photo_id() is None
+
+        CityUserPhoto.objects.filter(pk=photo.pk).update(status=CityUserPhoto.Status.READY)
+
+        assert annotated_photo_id() == photo.id
+
 
 @pytest.mark.django_db
 @pytest.mark.integration
@@ -0,0 +1,269 @@
+"""
+Integration тесты обработки пользовательских фото городов (city/services/photo_pipeline.py).
+
+Проверяются:
+- сохранение исходника и постановка фото в очередь при загрузке через API
+- построение вариантов фото обработчиком очереди и удаление исходника
+- обработка фото, удалённых или испорченных до обработки, и ошибок хранилища
+- повторный захват задач, брошенных упавшим обработчиком
+- команда process_city_user_photos
+- построение вариантов для ранее загруженных фото командой backfill_city_user_photo_renditions
+"""
+
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from city.models import City, CityUserPhoto, CityUserPhotoProcessingTask
+from city.services.photo_pipeline import (
+    CITY_PHOTO_QUEUE_DEPTH,
+    enqueue_city_photo,
+    get_rendition_keys,
+    process_city_photo_queue,
+)
+from city.services.photo_processing import get_rendition_formats
+from country.models import Country
+
+
+def _make_image(size: tuple[int, int] = (2400, 1600), image_format: str = 'PNG') -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', size, color=(220, 120, 10)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path: Path) -> Generator[FileSystemStorage, None, None]:
+    storage = FileSystemStorage(location=tmp_path, base_url='/media/')
+    image_field = CityUserPhoto._meta.get_field('image')
+    original_storage = image_field.storage
+    image_field.storage = storage
+    try:
+        yield storage
+    finally:
+        image_field.storage = original_storage
+
+
+@pytest.fixture
+def city() -> City:
+    country = Country.objects.create(code='RU', name='Russia')
+    return City.objects.create(
+        title='Moscow', country=country, coordinate_width=55.75, coordinate_longitude=37.62
+    )
+
+
+@pytest.fixture
+def user(django_user_model: Any) -> Any:
+    return django_user_model.objects.create_user(username='photographer', password='pass')
+
+
+def _upload(user: Any, city: City, content: bytes, position: int = 1) -> CityUserPhoto:
+    photo = CityUserPhoto(
+        user=user, city=city, position=position, status=CityUserPhoto.Status.PENDING
+    )
+    photo.image.save('photo.png', ContentFile(content), save=False)
+    photo.save()
+    enqueue_city_photo(photo)
+    return photo
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestProcessCityPhotoQueue:
+    def test_builds_renditions_and_deletes_source(
+        self,
+        user: Any,
+        city: City,
+        storage: FileSystemStorage,
+        django_capture_on_commit_callbacks: Any,
+    ) -> None:
+        photo = _upload(user, city, _make_image())
+        source_name = photo.image.name
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert process_city_photo_queue() == 1
+
+        photo.refresh_from_db()
+        assert photo.status == CityUserPhoto.Status.READY
+        assert not CityUserPhotoProcessingTask.objects.exists()
+        assert not storage.exists(source_name)
+        assert photo.image.name == photo.renditions['large']['jpeg']
+        assert {
+            name: (rendition['width'], rendition['height'])
+            for name, rendition in photo.renditions.items()
+        } == {'thumbnail': (320, 213), 'medium': (960, 640), 'large': (1920, 1280)}
+        for rendition in photo.renditions.values():
+            assert set(get_rendition_formats()) <= set(rendition)
+            with storage.open(rendition['webp']) as file:
+                assert Image.open(file).format == 'WEBP'
+            with storage.open(rendition['jpeg']) as file:
+                assert Image.open(file).format == 'JPEG'
+
+    def test_processes_photos_in_executor(self, user: Any, city: City) -> None:
+        _upload(user, city, _make_image((800, 600)), position=1)
+        _upload(user, city, _make_image((600, 800), image_format='JPEG'), position=2)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert process_city_photo_queue(batch_size=1, executor=executor) == 2
+
+        sizes = [
+            (photo.renditions['large']['width'], photo.renditions['large']['height'])
+            for photo in CityUserPhoto.objects.order_by('position')
+        ]
+        assert sizes == [(800, 600), (600, 800)]
+
+    def test_broken_source_marks_photo_failed(
+        self, user: Any, city: City, storage: FileSystemStorage
+    ) -> None:
+        photo = _upload(user, city, b'not an image')
+        source_name = photo.image.name
+
+        process_city_photo_queue()
+
+        photo.refresh_from_db()
+        assert photo.status == CityUserPhoto.Status.FAILED
+        assert photo.renditions == {}
+        assert not photo.image
+        assert not storage.exists(source_name)
+        assert not CityUserPhotoProcessingTask.objects.exists()
+
+    def test_storage_error_fails_only_that_photo(
+        self, user: Any, city: City, storage: FileSystemStorage, monkeypatch: Any
+    ) -> None:
+        broken = _upload(user, city, _make_image((400, 300)), position=1)
+        healthy = _upload(user, city, _make_image((400, 300)), position=2)
+        broken_stem = broken.image.name.rsplit('.', 1)[0]
+        broken_source = broken.image.name
+        save = storage.save
+        saved: list[str] = []
+
+        def flaky_save(name: str, content: Any, **kwargs: Any) -> str:
+            if name.startswith(broken_stem) and len(saved) >= 2:
+                raise OSError('S3 is unavailable')
+            saved.append(name)
+            return save(name, content, **kwargs)
+
+        monkeypatch.setattr(storage, 'save', flaky_save)
+
+        assert process_city_photo_queue() == 2
+
+        broken.refresh_from_db()
+        healthy.refresh_from_db()
+        assert broken.status == CityUserPhoto.Status.FAILED
+        assert healthy.status == CityUserPhoto.Status.READY
+        assert not CityUserPhotoProcessingTask.objects.exists()
+        # Варианты, сохранённые до ошибки, и исходник удалены
+        assert not any(storage.exists(name) for name in saved if name.startswith(broken_stem))
+        assert not storage.exists(broken_source)
+
+    def test_claimed_task_is_taken_again_only_when_stale(
+        self, user: Any, city: City, settings: Any
+    ) -> None:
+        photo = _upload(user, city, _make_image((80, 60)))
+        claimed_at = timezone.now()
+        CityUserPhotoProcessingTask.objects.update(claimed_at=claimed_at)
+
+        assert process_city_photo_queue() == 0
+
+        CityUserPhotoProcessingTask.objects.update(
+            claimed_at=claimed_at
+            - timedelta(seconds=settings.CITY_USER_PHOTO_TASK_STALE_SECONDS + 1)
+        )
+
+        assert process_city_photo_queue() == 1
+        photo.refresh_from_db()
+        assert photo.status == CityUserPhoto.Status.READY
+
+    def test_queue_depth_is_counted_at_collection_time(self, user: Any, city: City) -> None:
+        _upload(user, city, _make_image((80, 60)), position=1)
+        _upload(user, city, _make_image((80, 60)), position=2)
+
+        [metric] = CITY_PHOTO_QUEUE_DEPTH.collect()
+        assert metric.samples[0].value == 2
+
+        process_city_photo_queue()
+
+        [metric] = CITY_PHOTO_QUEUE_DEPTH.collect()
+        assert metric.samples[0].value == 0
+
+    def test_task_of_deleted_photo_is_dropped(
+        self, user: Any, city: City, storage: FileSystemStorage
+    ) -> None:
+        photo = _upload(user, city, _make_image())
+        source_name = photo.image.name
+        photo.delete()
+
+        assert process_city_photo_queue() == 1
+
+        assert not CityUserPhotoProcessingTask.objects.exists()
+        _, files = storage.listdir(f'user-{user.id}/city-{city.id}')
+        assert files == [source_name.rsplit('/', 1)[-1]]
+
+    def test_delete_api_removes_renditions(
+        self,
+        client: Any,
+        user: Any,
+        city: City,
+        storage: FileSystemStorage,
+        django_capture_on_commit_callbacks: Any,
+    ) -> None:
+        photo = _upload(user, city, _make_image())
+        with django_capture_on_commit_callbacks(execute=True):
+            process_city_photo_queue()
+        photo.refresh_from_db()
+        keys = get_rendition_keys(photo.renditions)
+        client.force_login(user)
+
+        with (
+            pytest.MonkeyPatch.context() as monkeypatch,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            monkeypatch.setattr('city.api.photos.has_advanced_premium', lambda user: True)
+            response = client.delete(
+                reverse('api__city_user_photo_content', kwargs={'photo_id': photo.id})
+            )
+
+        assert response.status_code == 200
+        assert keys
+        assert not any(storage.exists(key) for key in keys)
+
+    def test_management_command_processes_queue(self, user: Any, city: City) -> None:
+        _upload(user, city, _make_image((400, 300)))
+        out = StringIO()
+
+        call_command('process_city_user_photos', stdout=out)
+
+        assert 'Обработано фото: 1' in out.getvalue()
+        assert CityUserPhoto.objects.get().status == CityUserPhoto.Status.READY
+
+    def test_backfill_command_builds_renditions_for_old_photos(
+        self, user: Any, city: City, storage: FileSystemStorage
+    ) -> None:
+        old_photo = CityUserPhoto(user=user, city=city, position=1)
+        old_photo.image.save('old.jpg', ContentFile(_make_image(image_format='JPEG')), save=False)
+        old_photo.save()
+        failed_photo = CityUserPhoto.objects.create(
+            user=user, city=city, position=2, status=CityUserPhoto.Status.FAILED, image='x.png'
+        )
+        out = StringIO()
+
+        call_command('backfill_city_user_photo_renditions', workers=2, stdout=out)
+
+        assert 'Поставлено в очередь фото: 1' in out.getvalue()
+        assert 'Обработано фото: 1' in out.getvalue()
+        old_photo.refresh_from_db()
+        assert old_photo.status == CityUserPhoto.Status.READY
+        assert set(old_photo.renditions) == {'thumbnail', 'medium', 'large'}
+        assert storage.exists(old_photo.renditions['thumbnail']['webp'])
+        failed_photo.refresh_from_db()
+        assert failed_photo.renditions == {}
@@ -0,0 +1,61 @@
+"""
+Integration тесты индекса поиска городов (city/services/search_index.py).
+
+Проверяются:
+- поиск городов из базы данных через CitySearchService
+- перестроение индекса после изменения справочника городов
+"""
+
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from city.models import City
+from city.services.search import CitySearchService
+from city.services.search_index import clear_city_search_index, get_city_search_index
+from country.models import Country
+
+
+@pytest.fixture(autouse=True)
+def clean_index() -> Iterator[None]:
+    clear_city_search_index()
+    yield
+    clear_city_search_index()
+
+
+@pytest.fixture
+def country() -> Country:
+    return Country.objects.create(name='Россия', code='RU')
+
+
+def create_city(title: str, country: Country) -> City:
+    return City.objects.create(
+        title=title, country=country, coordinate_width=55.0, coordinate_longitude=37.0
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCitySearchIndex:
+    def test_search_returns_cities_from_database(self, country: Country) -> None:
+        moscow = create_city('Москва', country)
+        create_city('Казань', country)
+
+        assert CitySearchService.search_cities('моск') == [moscow]
+
+    def test_index_is_reused_while_catalog_is_unchanged(self, country: Country) -> None:
+        create_city('Москва', country)
+
+        assert get_city_search_index() is get_city_search_index()
+
+    def test_index_is_rebuilt_after_city_is_added(
+        self, country: Country, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        create_city('Москва', country)
+        assert CitySearchService.search_cities('каз') == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            kazan = create_city('Казань', country)
+
+        assert CitySearchService.search_cities('каз') == [kazan]
@@ -0,0 +1,163 @@
+"""
+Integration тесты денормализованной сводки UserCitySummary (city/services/user_city_summary.py).
+
+Проверяются:
+- инкрементальное обновление сводки сигналами при сохранении и удалении VisitedCity
+- полная пересборка сводки командой rebuild_user_city_summary
+- чтение агрегатов из сводки в get_unique_visited_cities
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+
+from city.models import City, UserCitySummary, VisitedCity
+from city.services.db import get_unique_visited_cities
+from city.services.user_city_summary import rebuild_user_city_summaries
+from country.models import Country
+
+
+@pytest.fixture
+def setup_data(django_user_model: Any) -> dict[str, Any]:
+    country = Country.objects.create(name='Россия', code='RU')
+    moscow = City.objects.create(
+        title='Москва', country=country, coordinate_width=55.75, coordinate_longitude=37.62
+    )
+    kazan = City.objects.create(
+        title='Казань', country=country, coordinate_width=55.79, coordinate_longitude=49.12
+    )
+    user = django_user_model.objects.create_user(username='testuser', password='pass')
+
+    return {'user': user, 'moscow': moscow, 'kazan': kazan}
+
+
+def _summary(user_id: int, city_id: int) -> UserCitySummary:
+    return UserCitySummary.objects.get(user_id=user_id, city_id=city_id)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestUserCitySummarySignals:
+    def test_summary_created_on_first_visit(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+
+        VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=4, has_magnet=False
+        )
+
+        summary = _summary(user.id, moscow.id)
+        assert summary.number_of_visits == 1
+        assert summary.average_rating == Decimal('4.0')
+        assert summary.has_souvenir is False
+        assert summary.visit_dates == [date(2024, 1, 1)]
+        assert summary.first_visit_date == date(2024, 1, 1)
+        assert summary.last_visit_date == date(2024, 1, 1)
+
+    def test_summary_aggregates_repeated_visits(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+
+        VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 5, 1), rating=5, has_magnet=True
+        )
+        VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2023, 1, 1), rating=4, is_first_visit=False
+        )
+        VisitedCity.objects.create(user=user, city=moscow, rating=5, is_first_visit=False)
+
+        summary = _summary(user.id, moscow.id)
+        assert summary.number_of_visits == 3
+        # (5 + 4 + 5) / 3 = 4.67 -> округление до 0.5
+        assert summary.average_rating == Decimal('4.5')
+        assert summary.has_souvenir is True
+        assert summary.visit_dates == [date(2023, 1, 1), date(2024, 5, 1)]
+        assert summary.first_visit_date == date(2023, 1, 1)
+        assert summary.last_visit_date == date(2024, 5, 1)
+
+    def test_summary_updated_on_visit_change(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+        visit = VisitedCity.objects.create(user=user, city=moscow, rating=3)
+
+        visit.rating = 5
+        visit.has_magnet = True
+        visit.save()
+
+        summary = _summary(user.id, moscow.id)
+        assert summary.average_rating == Decimal('5.0')
+        assert summary.has_souvenir is True
+
+    def test_summary_moves_when_city_changed(self, setup_data: dict[str, Any]) -> None:
+        user, moscow, kazan = setup_data['user'], setup_data['moscow'], setup_data['kazan']
+        visit = VisitedCity.objects.create(user=user, city=moscow, rating=3)
+
+        visit.city = kazan
+        visit.save()
+
+        assert not UserCitySummary.objects.filter(user=user, city=moscow).exists()
+        assert _summary(user.id, kazan.id).number_of_visits == 1
+
+    def test_summary_deleted_with_last_visit(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+        first = VisitedCity.objects.create(user=user, city=moscow, rating=3)
+        second = VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=5, is_first_visit=False
+        )
+
+        second.delete()
+        assert _summary(user.id, moscow.id).number_of_visits == 1
+
+        first.delete()
+        assert not UserCitySummary.objects.filter(user=user, city=moscow).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestRebuildUserCitySummary:
+    def test_rebuild_restores_missing_rows(self, setup_data: dict[str, Any]) -> None:
+        user, moscow, kazan = setup_data['user'], setup_data['moscow'], setup_data['kazan']
+        VisitedCity.objects.create(user=user, city=moscow, rating=5)
+        VisitedCity.objects.create(user=user, city=kazan, rating=4)
+        UserCitySummary.objects.all().delete()
+
+        written = rebuild_user_city_summaries(batch_size=1)
+
+        assert written == 2
+        assert _summary(user.id, moscow.id).number_of_visits == 1
+        assert _summary(user.id, kazan.id).number_of_visits == 1
+
+    def test_rebuild_removes_stale_rows_for_selected_user(
+        self, setup_data: dict[str, Any], django_user_model: Any
+    ) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+        other_user = django_user_model.objects.create_user(username='other', password='pass')
+        VisitedCity.objects.create(user=other_user, city=moscow, rating=5)
+        UserCitySummary.objects.create(user=user, city=moscow, number_of_visits=10)
+
+        rebuild_user_city_summaries([user.id])
+
+        assert not UserCitySummary.objects.filter(user=user).exists()
+        assert _summary(other_user.id, moscow.id).number_of_visits == 1
+
+    def test_management_command(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['user'], setup_data['moscow']
+        VisitedCity.objects.create(user=user, city=moscow, rating=5)
+        UserCitySummary.objects.all().delete()
+
+        call_command('rebuild_user_city_summary', '--user-id', str(user.id))
+
+        assert _summary(user.id, moscow.id).number_of_visits == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_get_unique_visited_cities_reads_summary(setup_data: dict[str, Any]) -> None:
+    user, moscow = setup_data['user'], setup_data['moscow']
+    VisitedCity.objects.create(user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=5)
+    UserCitySummary.objects.filter(user=user, city=moscow).update(number_of_visits=42)
+
+    city = get_unique_visited_cities(user.id).get()
+
+    assert city.number_of_visits == 42  # type: ignore[attr-defined]
+    assert city.first_visit_date == date(2024, 1, 1)  # type: ignore[attr-defined]
@@ -0,0 +1,235 @@
+"""
+Integration тесты индекса рейтинга пользователей (city/services/user_rank.py).
+
+Проверяются:
+- инкрементальное изменение счётчиков UserVisitCounters и UserCountryVisitCounters
+  сигналами VisitedCity
+- расчёт места пользователя по счётчикам, в том числе по странам
+- сверка счётчиков командой reconcile_user_visit_counters
+"""
+
+from datetime import date
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+
+from city.models import City, UserCountryVisitCounters, UserVisitCounters, VisitedCity
+from city.services.user_rank import (
+    get_total_visits_rank,
+    get_unique_visited_cities_rank,
+    reconcile_user_visit_counters,
+)
+from country.models import Country
+from country.repository import get_unique_visited_cities_country_ranks
+
+
+@pytest.fixture
+def setup_data(django_user_model: Any) -> dict[str, Any]:
+    country = Country.objects.create(name='Россия', code='RU')
+    moscow = City.objects.create(
+        title='Москва', country=country, coordinate_width=55.75, coordinate_longitude=37.62
+    )
+    kazan = City.objects.create(
+        title='Казань', country=country, coordinate_width=55.79, coordinate_longitude=49.12
+    )
+    berlin = City.objects.create(
+        title='Берлин',
+        country=Country.objects.create(name='Германия', code='DE'),
+        coordinate_width=52.52,
+        coordinate_longitude=13.40,
+    )
+    first_user = django_user_model.objects.create_user(username='first', password='pass')
+    second_user = django_user_model.objects.create_user(username='second', password='pass')
+
+    return {
+        'moscow': moscow,
+        'kazan': kazan,
+        'berlin': berlin,
+        'first_user': first_user,
+        'second_user': second_user,
+    }
+
+
+def _counters(user_id: int) -> tuple[int, int]:
+    counters = UserVisitCounters.objects.get(user_id=user_id)
+    return counters.number_of_cities, counters.number_of_visits
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestUserVisitCountersSignals:
+    def test_counters_incremented_on_visits(self, setup_data: dict[str, Any]) -> None:
+        user = setup_data['first_user']
+
+        VisitedCity.objects.create(user=user, city=setup_data['moscow'], rating=5)
+        VisitedCity.objects.create(
+            user=user,
+            city=setup_data['moscow'],
+            date_of_visit=date(2024, 1, 1),
+            rating=5,
+            is_first_visit=False,
+        )
+        VisitedCity.objects.create(user=user, city=setup_data['kazan'], rating=4)
+
+        assert _counters(user.id) == (2, 3)
+
+    def test_counters_follow_moved_visit(self, setup_data: dict[str, Any]) -> None:
+        user, moscow, kazan = setup_data['first_user'], setup_data['moscow'], setup_data['kazan']
+        VisitedCity.objects.create(user=user, city=moscow, rating=5)
+        moved = VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=5, is_first_visit=False
+        )
+
+        moved.city = kazan
+        moved.save()
+        assert _counters(user.id) == (2, 2)
+
+        moved.city = moscow
+        moved.save()
+        assert _counters(user.id) == (1, 2)
+
+    def test_counters_decremented_on_delete(self, setup_data: dict[str, Any]) -> None:
+        user = setup_data['first_user']
+        visit = VisitedCity.objects.create(user=user, city=setup_data['moscow'], rating=5)
+
+        visit.delete()
+
+        assert _counters(user.id) == (0, 0)
+
+    def test_user_deletion_removes_counters(self, setup_data: dict[str, Any]) -> None:
+        user = setup_data['first_user']
+        VisitedCity.objects.create(user=user, city=setup_data['moscow'], rating=5)
+
+        user.delete()
+
+        assert not UserVisitCounters.objects.exists()
+
+
+def _country_counters(user_id: int, city: City) -> tuple[int, int]:
+    counters = UserCountryVisitCounters.objects.get(user_id=user_id, country_id=city.country_id)
+    return counters.number_of_cities, counters.number_of_visits
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestUserCountryVisitCountersSignals:
+    def test_counters_split_by_country(self, setup_data: dict[str, Any]) -> None:
+        user, moscow, berlin = setup_data['first_user'], setup_data['moscow'], setup_data['berlin']
+
+        VisitedCity.objects.create(user=user, city=moscow, rating=5)
+        VisitedCity.objects.create(
+            user=user, city=moscow, date_of_visit=date(2024, 1, 1), rating=5, is_first_visit=False
+        )
+        VisitedCity.objects.create(user=user, city=berlin, rating=5)
+
+        assert _country_counters(user.id, moscow) == (1, 2)
+        assert _country_counters(user.id, berlin) == (1, 1)
+
+    def test_counters_follow_visit_moved_to_other_country(self, setup_data: dict[str, Any]) -> None:
+        user, moscow, berlin = setup_data['first_user'], setup_data['moscow'], setup_data['berlin']
+        visit = VisitedCity.objects.create(user=user, city=moscow, rating=5)
+
+        visit.city = berlin
+        visit.save()
+
+        assert _country_counters(user.id, moscow) == (0, 0)
+        assert _country_counters(user.id, berlin) == (1, 1)
+
+    def test_counters_decremented_on_delete(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['first_user'], setup_data['moscow']
+        visit = VisitedCity.objects.create(user=user, city=moscow, rating=5)
+
+        visit.delete()
+
+        assert _country_counters(user.id, moscow) == (0, 0)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestRanks:
+    def test_ranks_count_users_strictly_ahead(self, setup_data: dict[str, Any]) -> None:
+        first, second = setup_data['first_user'], setup_data['second_user']
+        VisitedCity.objects.create(user=first, city=setup_data['moscow'], rating=5)
+        VisitedCity.objects.create(user=first, city=setup_data['kazan'], rating=5)
+        VisitedCity.objects.create(user=second, city=setup_data['moscow'], rating=5)
+
+        assert get_unique_visited_cities_rank(2) == 1
+        assert get_unique_visited_cities_rank(1) == 2
+        assert get_total_visits_rank(2) == 1
+        assert get_total_visits_rank(1) == 2
+
+    def test_rank_is_zero_without_visits(self, setup_data: dict[str, Any]) -> None:
+        VisitedCity.objects.create(
+            user=setup_data['first_user'], city=setup_data['moscow'], rating=5
+        )
+
+        assert get_unique_visited_cities_rank(0) == 0
+        assert get_total_visits_rank(0) == 0
+
+    def test_country_ranks_use_country_counters(self, setup_data: dict[str, Any]) -> None:
+        first, second = setup_data['first_user'], setup_data['second_user']
+        moscow, kazan, berlin = setup_data['moscow'], setup_data['kazan'], setup_data['berlin']
+        VisitedCity.objects.create(user=first, city=moscow, rating=5)
+        VisitedCity.objects.create(user=first, city=kazan, rating=5)
+        VisitedCity.objects.create(user=second, city=moscow, rating=5)
+        VisitedCity.objects.create(user=second, city=berlin, rating=5)
+
+        ranks = get_unique_visited_cities_country_ranks(
+            {moscow.country_id: 1, berlin.country_id: 1}
+        )
+
+        assert ranks == {moscow.country_id: 2, berlin.country_id: 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestReconcileUserVisitCounters:
+    def test_reconcile_fixes_drift(self, setup_data: dict[str, Any]) -> None:
+        first, second = setup_data['first_user'], setup_data['second_user']
+        VisitedCity.objects.create(user=first, city=setup_data['moscow'], rating=5)
+        UserVisitCounters.objects.filter(user=first).update(number_of_cities=7)
+        UserVisitCounters.objects.create(user=second, number_of_cities=1, number_of_visits=1)
+
+        changed = reconcile_user_visit_counters()
+
+        assert changed == 2
+        assert _counters(first.id) == (1, 1)
+        assert _counters(second.id) == (0, 0)
+
+    def test_reconcile_fixes_country_drift(self, setup_data: dict[str, Any]) -> None:
+        user, moscow = setup_data['first_user'], setup_data['moscow']
+        VisitedCity.objects.create(user=user, city=moscow, rating=5)
+        UserCountryVisitCounters.objects.all().delete()
+
+        changed = reconcile_user_visit_counters()
+
+        assert changed == 1
+        assert _country_counters(user.id, moscow) == (1, 1)
+
+    def test_reconcile_zeroes_stale_country_counters(self, setup_data: dict[str, Any]) -> None:
+        first, second = setup_data['first_user'], setup_data['second_user']
+        moscow, berlin = setup_data['moscow'], setup_data['berlin']
+        VisitedCity.objects.create(user=first, city=moscow, rating=5)
+        UserCountryVisitCounters.objects.create(
+            user=first, country=berlin.country, number_of_cities=2, number_of_visits=3
+        )
+        UserCountryVisitCounters.objects.create(
+            user=second, country=moscow.country, number_of_cities=1, number_of_visits=1
+        )
+
+        changed = reconcile_user_visit_counters()
+
+        assert changed == 2
+        assert _country_counters(first.id, moscow) == (1, 1)
+        assert _country_counters(first.id, berlin) == (0, 0)
+        assert _country_counters(second.id, moscow) == (0, 0)
+
+    def test_management_command(self, setup_data: dict[str, Any]) -> None:
+        user = setup_data['first_user']
+        VisitedCity.objects.create(user=user, city=setup_data['moscow'], rating=5)
+        UserVisitCounters.objects.all().delete()
+
+        call_command('reconcile_user_visit_counters')
+
+        assert _counters(user.id) == (1, 1)
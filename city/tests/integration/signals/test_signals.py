@@ -1,11 +1,18 @@
-from typing import Type
+from collections.abc import Callable
+from typing import Any, Type
+
 import pytest
 from django.contrib.auth.models import User
 
 from city.models import City, VisitedCity
 from country.models import Country
 from region.models import Region, RegionType
-from subscribe.infrastructure.models import Subscribe, VisitedCityNotification
+from subscribe.infrastructure.models import (
+    NotificationFanoutTask,
+    Subscribe,
+    VisitedCityNotification,
+)
+from subscribe.infrastructure.notification_fanout import process_notification_fanout_queue
 
 
 # =============================================================================
@@ -73,9 +80,23 @@ def user_not_subscriber(django_user_model: Type[User]) -> User:
     return django_user_model.objects.create_user(username='not_subscriber', password='password')
 
 
+@pytest.fixture
+def create_visit(django_capture_on_commit_callbacks: Any) -> Callable[..., VisitedCity]:
+    """Создаёт VisitedCity, фиксирует транзакцию и обрабатывает очередь рассылки уведомлений."""
+
+    def create(**kwargs: Any) -> VisitedCity:
+        with django_capture_on_commit_callbacks(execute=True):
+            visited_city = VisitedCity.objects.create(**kwargs)
+        process_notification_fanout_queue()
+        return visited_city
+
+    return create
+
+
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_creates_notification_for_subscriber(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -83,7 +104,7 @@ def test_signal_creates_notification_for_subscriber(
     """При создании VisitedCity для пользователя с подписчиком должно создаться уведомление."""
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -103,6 +124,7 @@ def test_signal_creates_notification_for_subscriber(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_creates_notifications_for_multiple_subscribers(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -112,7 +134,7 @@ def test_signal_creates_notifications_for_multiple_subscribers(
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
     Subscribe.objects.create(subscribe_from=user_subscriber2, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -133,12 +155,13 @@ def test_signal_creates_notifications_for_multiple_subscribers(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_does_not_create_notification_without_subscribers(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_not_subscriber: User,
 ) -> None:
     """При создании VisitedCity для пользователя без подписчиков уведомления не создаются."""
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -150,6 +173,7 @@ def test_signal_does_not_create_notification_without_subscribers(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_does_not_trigger_on_update(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -157,7 +181,7 @@ def test_signal_does_not_trigger_on_update(
     """При обновлении существующего VisitedCity уведомления не создаются."""
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
 
-    visited_city = VisitedCity.objects.create(
+    visited_city = create_visit(
         user=user_owner,
         city=test_city,
         rating=3,
@@ -167,6 +191,7 @@ def test_signal_does_not_trigger_on_update(
     visited_city.rating = 5
     visited_city.has_magnet = True
     visited_city.save()
+    process_notification_fanout_queue()
 
     assert VisitedCityNotification.objects.count() == 1
 
@@ -174,6 +199,7 @@ def test_signal_does_not_trigger_on_update(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_creates_notification_with_correct_city_data(
+    create_visit: Callable[..., VisitedCity],
     test_country: Country,
     test_region: Region,
     user_owner: User,
@@ -190,7 +216,7 @@ def test_signal_creates_notification_with_correct_city_data(
 
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=city,
         rating=5,
@@ -206,13 +232,14 @@ def test_signal_creates_notification_with_correct_city_data(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_does_not_notify_self_subscription(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
 ) -> None:
     """Если пользователь подписан сам на себя, уведомление всё равно создаётся."""
     Subscribe.objects.create(subscribe_from=user_owner, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -229,6 +256,7 @@ def test_signal_does_not_notify_self_subscription(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_only_notifies_subscribers_of_specific_user(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -239,7 +267,7 @@ def test_signal_only_notifies_subscribers_of_specific_user(
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
     Subscribe.objects.create(subscribe_from=user_subscriber2, subscribe_to=user_not_subscriber)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -255,6 +283,7 @@ def test_signal_only_notifies_subscribers_of_specific_user(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_multiple_visited_cities_create_multiple_notifications(
+    create_visit: Callable[..., VisitedCity],
     test_country: Country,
     test_region: Region,
     user_owner: User,
@@ -278,8 +307,8 @@ def test_multiple_visited_cities_create_multiple_notifications(
 
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(user=user_owner, city=city1, rating=4)
-    VisitedCity.objects.create(user=user_owner, city=city2, rating=5)
+    create_visit(user=user_owner, city=city1, rating=4)
+    create_visit(user=user_owner, city=city2, rating=5)
 
     notifications = VisitedCityNotification.objects.all()
     assert notifications.count() == 2
@@ -291,6 +320,7 @@ def test_multiple_visited_cities_create_multiple_notifications(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_handles_deleted_subscription_gracefully(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -301,7 +331,7 @@ def test_signal_handles_deleted_subscription_gracefully(
     )
     subscription.delete()
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -313,6 +343,7 @@ def test_signal_handles_deleted_subscription_gracefully(
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_notification_created_at_is_set(
+    create_visit: Callable[..., VisitedCity],
     test_city: City,
     user_owner: User,
     user_subscriber1: User,
@@ -320,7 +351,7 @@ def test_notification_created_at_is_set(
     """Поле created_at уведомления должно быть автоматически заполнено."""
     Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
 
-    VisitedCity.objects.create(
+    create_visit(
         user=user_owner,
         city=test_city,
         rating=5,
@@ -331,6 +362,54 @@ def test_notification_created_at_is_set(
     assert notification.created_at is not None
 
 
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_notifications_are_created_outside_of_request(
+    django_capture_on_commit_callbacks: Any,
+    test_city: City,
+    user_owner: User,
+    user_subscriber1: User,
+) -> None:
+    """Сохранение VisitedCity только ставит задачу в очередь после фиксации транзакции."""
+    Subscribe.objects.create(subscribe_from=user_subscriber1, subscribe_to=user_owner)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        VisitedCity.objects.create(user=user_owner, city=test_city, rating=5)
+
+    assert NotificationFanoutTask.objects.count() == 0
+    for callback in callbacks:
+        callback()
+    assert NotificationFanoutTask.objects.count() == 1
+    assert VisitedCityNotification.objects.count() == 0
+
+    assert process_notification_fanout_queue() == 1
+    assert NotificationFanoutTask.objects.count() == 0
+    assert VisitedCityNotification.objects.get().recipient == user_subscriber1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_notifications_are_created_in_batches(
+    mocker: Any,
+    settings: Any,
+    create_visit: Callable[..., VisitedCity],
+    django_user_model: Type[User],
+    test_city: City,
+    user_owner: User,
+) -> None:
+    """Уведомления создаются через bulk_create пачками заданного размера."""
+    for index in range(5):
+        subscriber = django_user_model.objects.create_user(username=f'follower{index}')
+        Subscribe.objects.create(subscribe_from=subscriber, subscribe_to=user_owner)
+    settings.SUBSCRIBER_NOTIFICATION_BATCH_SIZE = 2
+    bulk_create = mocker.spy(VisitedCityNotification.objects, 'bulk_create')
+
+    create_visit(user=user_owner, city=test_city, rating=5)
+
+    assert [len(call.args[0]) for call in bulk_create.call_args_list] == [2, 2, 1]
+    assert VisitedCityNotification.objects.filter(sender=user_owner).count() == 5
+
+
 @pytest.mark.django_db
 @pytest.mark.integration
 def test_signal_is_connected_to_visited_city_post_save() -> None:
@@ -31,24 +31,18 @@ def mock_exists() -> MagicMock:
 @pytest.fixture
 def mock_aggregates() -> Generator[dict[str, MagicMock], None, None]:
     with (
-        patch('city.services.db.ArrayAgg'),
         patch('city.services.db.Count'),
-        patch('city.services.db.Avg'),
         patch('city.services.db.Min'),
         patch('city.services.db.Max'),
-        patch('city.services.db.Round'),
         patch('city.services.db.Subquery') as mock_subquery,
-        patch('city.services.db.Exists') as mock_exists,
+        patch('city.services.db.FilteredRelation') as mock_filtered_relation,
     ):
         yield {
-            'ArrayAgg': mock_subquery,
             'Count': mock_subquery,
-            'Avg': mock_subquery,
             'Min': mock_subquery,
             'Max': mock_subquery,
-            'Round': mock_subquery,
             'Subquery': mock_subquery,
-            'Exists': mock_exists,
+            'FilteredRelation': mock_filtered_relation,
         }
 
 
@@ -94,26 +88,24 @@ def test_get_all_visited_cities_annotations(
     assert result is not None
 
 
-@patch('city.services.db.City.objects')
+@patch('city.services.db._count_cities_by_country')
 @pytest.mark.integration
-def test_get_number_of_cities_returns_count(mock_city_objects: Any) -> None:
+def test_get_number_of_cities_returns_count(mock_count_cities_by_country: Any) -> None:
     """
     Тестирует функцию get_number_of_cities, проверяя, что она корректно
-    возвращает количество городов, используя метод count() модели City.
+    возвращает количество городов, суммируя количество городов по странам.
 
-    Мокируется метод count() модели City, чтобы не обращаться к базе данных.
-    Проверяется, что метод count() был вызван один раз и что возвращаемое значение
+    Мокируется подсчёт городов по странам, чтобы не обращаться к базе данных.
+    Проверяется, что подсчёт был вызван один раз и что возвращаемое значение
     соответствует ожидаемому.
     """
-    mock_queryset = MagicMock()
-    mock_city_objects.all.return_value = mock_queryset
-    mock_queryset.count.return_value = 123
+    mock_count_cities_by_country.return_value = {'RU': 100, 'BY': 23}
 
     result = get_number_of_cities()
-    mock_city_objects.all.assert_called_once()
-    mock_queryset.count.assert_called_once()
+    mock_count_cities_by_country.assert_called_once_with()
 
     assert result == 123
+    assert get_number_of_cities('BY') == 23
 
 
 @patch('city.services.db.VisitedCity.objects')
@@ -1,9 +1,9 @@
 """
-Тесты производительности для сервиса поиска городов.
+Тесты производительности для поиска городов.
 
 Покрывает:
-- Время выполнения поиска с разными лимитами
-- Сравнение производительности с приоритизацией и без неё
+- p95 времени поиска по индексу для запросов из 1–3 символов
+- Время построения индекса
 
 ----------------------------------------------
 
@@ -13,102 +13,63 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import itertools
+import random
+import statistics
 import time
-from unittest.mock import MagicMock, patch
 
 import pytest
 
-from city.services.search import CitySearchService
+from city.services.search_index import CitySearchIndex
+
+NUMBER_OF_CITIES = 20_000
+SYLLABLES = ('мо', 'ск', 'ва', 'ро', 'ст', 'ов', 'но', 'во', 'го', 'ро', 'д', 'ель', 'ярс', 'кий')
+
+
+def build_titles() -> list[tuple[int, str, str | None]]:
+    generator = random.Random(42)
+    rows: list[tuple[int, str, str | None]] = []
+    for city_id in range(NUMBER_OF_CITIES):
+        words = [
+            ''.join(generator.choices(SYLLABLES, k=generator.randint(2, 5))).capitalize()
+            for _ in range(generator.choice((1, 1, 1, 2, 3)))
+        ]
+        rows.append((city_id, '-'.join(words), generator.choice(('RU', 'BY', 'KZ'))))
+    return rows
+
+
+def p95(durations: list[float]) -> float:
+    return statistics.quantiles(durations, n=20)[-1]
 
 
 @pytest.mark.slow
 class TestCitySearchPerformance:
-    """Тесты производительности для сервиса CitySearchService."""
-
-    @patch('city.services.search.City.objects')
-    def test_search_performance_with_limit(self, mock_city_objects: MagicMock) -> None:
-        """Тест производительности поиска с ограничением результатов."""
-        # Настройка моков для имитации большого количества результатов
-        mock_queryset = MagicMock()
-        mock_select_related = MagicMock()
-        mock_filter = MagicMock()
-        mock_annotate = MagicMock()
-        mock_order_by = MagicMock()
-
-        mock_city_objects.select_related.return_value = mock_select_related
-        mock_select_related.filter.return_value = mock_filter
-        mock_filter.annotate.return_value = mock_annotate
-        mock_annotate.order_by.return_value = mock_order_by
-        mock_order_by.__getitem__.return_value = mock_queryset
-
-        # Измеряем время выполнения
-        start_time = time.time()
-        result = CitySearchService.search_cities('Moscow', limit=10)
-        end_time = time.time()
-
-        execution_time = end_time - start_time
-
-        # Проверяем, что запрос выполнился быстро (менее 1 секунды для мока)
-        assert execution_time < 1.0
-        assert result == mock_queryset
-
-        # Проверяем, что лимит применился
-        mock_order_by.__getitem__.assert_called_once_with(slice(None, 10))
-
-    @patch('city.services.search.City.objects')
-    def test_search_performance_without_limit(self, mock_city_objects: MagicMock) -> None:
-        """Тест производительности поиска без ограничения результатов."""
-        # Настройка моков
-        mock_queryset = MagicMock()
-        mock_select_related = MagicMock()
-        mock_filter = MagicMock()
-        mock_annotate = MagicMock()
-        mock_order_by = MagicMock()
-
-        mock_city_objects.select_related.return_value = mock_select_related
-        mock_select_related.filter.return_value = mock_filter
-        mock_filter.annotate.return_value = mock_annotate
-        mock_annotate.order_by.return_value = mock_order_by
-        mock_order_by.__getitem__.return_value = mock_queryset
-
-        # Измеряем время выполнения с дефолтным лимитом
-        start_time = time.time()
-        result = CitySearchService.search_cities('Moscow')
-        end_time = time.time()
-
-        execution_time = end_time - start_time
-
-        # Проверяем, что запрос выполнился быстро
-        assert execution_time < 1.0
-        assert result == mock_queryset
-
-        # Проверяем, что применился дефолтный лимит
-        mock_order_by.__getitem__.assert_called_once_with(slice(None, 50))
-
-    def test_search_priority_logic(self) -> None:
-        """Тест логики приоритизации поиска."""
-        # Этот тест проверяет, что логика приоритизации работает корректно
-        # В реальном приложении это будет проверяться через интеграционные тесты
-
-        # Проверяем, что метод принимает все необходимые параметры
-        with patch('city.services.search.City.objects') as mock_objects:
-            mock_queryset = MagicMock()
-            mock_select_related = MagicMock()
-            mock_filter = MagicMock()
-            mock_annotate = MagicMock()
-            mock_order_by = MagicMock()
-
-            mock_objects.select_related.return_value = mock_select_related
-            mock_select_related.filter.return_value = mock_filter
-            mock_filter.annotate.return_value = mock_annotate
-            mock_annotate.order_by.return_value = mock_order_by
-            mock_order_by.__getitem__.return_value = mock_queryset
-
-            # Тестируем с разными параметрами
-            CitySearchService.search_cities('Moscow')
-            CitySearchService.search_cities('Moscow', country='RU')
-            CitySearchService.search_cities('Moscow', limit=20)
-            CitySearchService.search_cities('Moscow', country='RU', limit=20)
-
-            # Проверяем, что все вызовы прошли успешно
-            assert mock_objects.select_related.call_count == 4
+    """Тесты производительности для индекса поиска городов."""
+
+    @pytest.fixture(scope='class')
+    def index(self) -> CitySearchIndex:
+        return CitySearchIndex.from_rows(build_titles())
+
+    def test_index_build_time(self) -> None:
+        rows = build_titles()
+
+        started_at = time.perf_counter()
+        CitySearchIndex.from_rows(rows)
+        duration = time.perf_counter() - started_at
+
+        assert duration < 5.0
+
+    @pytest.mark.parametrize('length', [1, 2, 3])
+    def test_short_queries_p95_latency(self, index: CitySearchIndex, length: int) -> None:
+        letters = 'абвгдеклмнорстуя'
+        queries = [''.join(chars) for chars in itertools.product(letters, repeat=length)][:300]
+        queries += ['mos', 'ro', 'v'][: max(1, length)]
+
+        durations = []
+        for query in queries:
+            started_at = time.perf_counter()
+            index.search(query, limit=50)
+            durations.append(time.perf_counter() - started_at)
+
+        latency = p95(durations)
+        assert latency < 0.05, f'p95 поиска по запросам длиной {length}: {latency * 1000:.2f} мс'
@@ -8,11 +8,13 @@ import pytest
 from django.contrib.auth.models import User
 from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
 
 from city.models import City, CityUserPhoto
 from city.services.city_user_photo_urls import (
     attach_default_city_user_photo_presigned_urls,
     city_user_photo_file_url,
+    city_user_photo_picture,
 )
 from country.models import Country
 
@@ -100,3 +102,181 @@ def test_attach_presigned_urls_dict_and_model() -> None:
     row2 = Row()
     attach_default_city_user_photo_presigned_urls([row2], other.id)
     assert not hasattr(row2, 'default_city_user_photo_url')
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+def test_attach_presigned_urls_uses_renditions_for_srcset() -> None:
+    user = User.objects.create_user(username='u5', password='p')
+    country = Country.objects.create(code='RU', name='Russia')
+    city = City.objects.create(
+        title='Z',
+        country=country,
+        coordinate_width=1.0,
+        coordinate_longitude=1.0,
+        image='',
+    )
+    photo = CityUserPhoto.objects.create(
+        user=user,
+        city=city,
+        image='p/a-large.jpg',
+        renditions={
+            'thumbnail': {
+                'width': 320,
+                'height': 180,
+                'jpeg': 'p/a-thumbnail.jpg',
+                'webp': 'p/a-thumbnail.webp',
+            },
+            'medium': {
+                'width': 960,
+                'height': 540,
+                'jpeg': 'p/a-medium.jpg',
+                'webp': 'p/a-medium.webp',
+            },
+            'large': {
+                'width': 1920,
+                'height': 1080,
+                'jpeg': 'p/a-large.jpg',
+                'webp': 'p/a-large.webp',
+            },
+        },
+        is_default=True,
+        position=1,
+    )
+    item = {'default_city_user_photo_id': photo.id}
+
+    attach_default_city_user_photo_presigned_urls([item], user.id)
+
+    assert item['default_city_user_photo_url'] == '/media/p/a-medium.jpg'
+    assert item['default_city_user_photo_srcset'] == (
+        '/media/p/a-thumbnail.jpg 320w, /media/p/a-medium.jpg 960w'
+    )
+    assert item['default_city_user_photo_sources'] == [
+        {
+            'type': 'image/webp',
+            'srcset': '/media/p/a-thumbnail.webp 320w, /media/p/a-medium.webp 960w',
+        }
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'photo_status', [CityUserPhoto.Status.PENDING, CityUserPhoto.Status.FAILED]
+)
+def test_picture_of_unprocessed_photo_is_hidden(photo_status: str) -> None:
+    user = User.objects.create_user(username='u6', password='p')
+    country = Country.objects.create(code='RU', name='Russia')
+    city = City.objects.create(
+        title='W',
+        country=country,
+        coordinate_width=1.0,
+        coordinate_longitude=1.0,
+        image='',
+    )
+    photo = CityUserPhoto.objects.create(
+        user=user,
+        city=city,
+        image=SimpleUploadedFile('raw.heic', b'x', content_type='image/heic'),
+        status=photo_status,
+        is_default=True,
+        position=1,
+    )
+    items: list[dict[str, Any]] = [{'default_city_user_photo_id': photo.id}]
+
+    attach_default_city_user_photo_presigned_urls(items, user.id)
+
+    assert city_user_photo_picture(photo).url == ''
+    assert 'default_city_user_photo_url' not in items[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+def test_picture_of_photo_without_renditions_has_no_srcset() -> None:
+    user = User.objects.create_user(username='u7', password='p')
+    country = Country.objects.create(code='RU', name='Russia')
+    city = City.objects.create(
+        title='V',
+        country=country,
+        coordinate_width=1.0,
+        coordinate_longitude=1.0,
+        image='',
+    )
+    photo = CityUserPhoto.objects.create(
+        user=user,
+        city=city,
+        image=SimpleUploadedFile('old.jpg', b'x', content_type='image/jpeg'),
+        is_default=True,
+        position=1,
+    )
+
+    picture = city_user_photo_picture(photo)
+
+    assert picture.url == city_user_photo_file_url(photo)
+    assert picture.srcset == ''
+    assert picture.sources == []
+
+
+@pytest.mark.unit
+def test_picture_template_renders_sources_and_srcset() -> None:
+    item = {
+        'default_city_user_photo_id': '8f0c2a8e-6a0e-4b8e-9a52-1d8a3f0b6c11',
+        'default_city_user_photo_url': '/media/a-medium.jpg',
+        'default_city_user_photo_srcset': '/media/a-thumbnail.jpg 320w, /media/a-medium.jpg 960w',
+        'default_city_user_photo_sources': [
+            {'type': 'image/webp', 'srcset': '/media/a-thumbnail.webp 320w'},
+        ],
+    }
+
+    html = render_to_string(
+        'city/partials/city_user_photo_picture.html', {'item': item, 'alt': 'Москва'}
+    )
+
+    assert '<source type="image/webp"' in html
+    assert 'srcset="/media/a-thumbnail.webp 320w"' in html
+    assert 'src="/media/a-medium.jpg"' in html
+    assert 'srcset="/media/a-thumbnail.jpg 320w, /media/a-medium.jpg 960w"' in html
+    assert 'alt="Москва"' in html
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+def test_attach_presigned_urls_signs_page_in_one_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    user = User.objects.create_user(username='u7', password='p')
+    country = Country.objects.create(code='RU', name='Russia')
+    items = []
+    for number in range(3):
+        city = City.objects.create(
+            title=f'C{number}',
+            country=country,
+            coordinate_width=1.0,
+            coordinate_longitude=1.0,
+            image='',
+        )
+        photo = CityUserPhoto.objects.create(
+            user=user,
+            city=city,
+            image=f'p/{number}-large.jpg',
+            renditions={
+                'thumbnail': {'width': 320, 'height': 180, 'jpeg': f'p/{number}-thumbnail.jpg'},
+                'medium': {'width': 960, 'height': 540, 'jpeg': f'p/{number}-medium.jpg'},
+            },
+            is_default=True,
+            position=1,
+        )
+        items.append({'default_city_user_photo_id': photo.id})
+    batches: list[list[str]] = []
+
+    def get_storage_urls(storage: Any, names: list[str]) -> dict[str, str]:
+        batches.append(names)
+        return {name: f'/signed/{name}' for name in names}
+
+    monkeypatch.setattr('city.services.city_user_photo_urls.get_storage_urls', get_storage_urls)
+
+    attach_default_city_user_photo_presigned_urls(items, user.id)
+
+    assert len(batches) == 1
+    assert len(batches[0]) == 6
+    assert [item['default_city_user_photo_url'] for item in items] == [
+        f'/signed/p/{number}-medium.jpg' for number in range(3)
+    ]
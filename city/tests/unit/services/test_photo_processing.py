@@ -8,7 +8,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 from PIL.Image import DecompressionBombError, DecompressionBombWarning
 
-from city.services.photo_processing import compress_city_photo
+from city.services.photo_processing import (
+    compress_city_photo,
+    get_rendition_formats,
+    inspect_city_photo,
+    render_city_photo,
+)
 
 
 def _build_uploaded_image(size: tuple[int, int]) -> SimpleUploadedFile:
@@ -56,3 +61,62 @@ def test_compress_city_photo_rejects_decompression_bomb(
 
     with pytest.raises(ValueError, match='Неподдерживаемый формат изображения'):
         compress_city_photo(source)
+
+
+@pytest.mark.unit
+def test_inspect_city_photo_rewinds_valid_file() -> None:
+    source = _build_uploaded_image((300, 200))
+
+    inspect_city_photo(source)
+
+    assert source.tell() == 0
+
+
+@pytest.mark.unit
+def test_inspect_city_photo_rejects_unsupported_format() -> None:
+    source = SimpleUploadedFile('sample.png', b'not an image', content_type='image/png')
+
+    with pytest.raises(ValueError, match='Неподдерживаемый формат изображения'):
+        inspect_city_photo(source)
+
+
+@pytest.mark.unit
+def test_render_city_photo_builds_all_renditions() -> None:
+    source = _build_uploaded_image((4000, 2500))
+
+    rendered = render_city_photo(source.read(), max_pixels=20_000_000)
+
+    sizes = {(image.rendition, image.format): (image.width, image.height) for image in rendered}
+    formats = get_rendition_formats()
+    assert 'webp' in formats
+    assert 'jpeg' in formats
+    assert sizes == {
+        (rendition, image_format): size
+        for rendition, size in (
+            ('thumbnail', (320, 200)),
+            ('medium', (960, 600)),
+            ('large', (1920, 1200)),
+        )
+        for image_format in formats
+    }
+    for image in rendered:
+        assert Image.open(BytesIO(image.content)).format == image.format.upper()
+
+
+@pytest.mark.unit
+def test_render_city_photo_does_not_upscale_small_images() -> None:
+    source = _build_uploaded_image((200, 100))
+
+    rendered = render_city_photo(source.read(), max_pixels=20_000_000)
+
+    assert {(image.width, image.height) for image in rendered} == {(200, 100)}
+
+
+@pytest.mark.unit
+def test_render_city_photo_rejects_too_many_pixels() -> None:
+    source = _build_uploaded_image((100, 100))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DecompressionBombWarning)
+        with pytest.raises(ValueError, match='Слишком большое изображение'):
+            render_city_photo(source.read(), max_pixels=5000)
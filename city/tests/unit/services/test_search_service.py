@@ -1,9 +1,9 @@
 """
-Unit тесты для CitySearchService (city/services/search.py).
+Unit тесты для поиска городов (city/services/search.py, city/services/search_index.py).
 
 Проверяется:
-- Логика поиска с различными параметрами
-- Приоритизация результатов
+- Нормализация названий и транслитерация запросов
+- Приоритизация результатов и ранжирование по сходству
 - Фильтрация по стране
 - Ограничение количества результатов
 """
@@ -13,187 +13,144 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from city.services.search import CitySearchService
+from city.services.search_index import (
+    CitySearchIndex,
+    get_query_variants,
+    get_trigrams,
+    normalize_title,
+    transliterate,
+)
+
+
+@pytest.fixture
+def index() -> CitySearchIndex:
+    return CitySearchIndex.from_rows(
+        [
+            (1, 'Москва', 'RU'),
+            (2, 'Мосальск', 'RU'),
+            (3, 'Ростов-на-Дону', 'RU'),
+            (4, 'Орёл', 'RU'),
+            (5, 'Нижний Новгород', 'RU'),
+            (6, 'Великий Новгород', 'RU'),
+            (7, 'Элиста', 'RU'),
+            (8, 'Могилёв', 'BY'),
+            (9, 'Ярославль', 'RU'),
+            (10, 'Переславль-Залесский', 'RU'),
+        ]
+    )
 
 
 @pytest.mark.unit
-class TestCitySearchServiceBasic:
-    """Базовые тесты поиска городов."""
+class TestNormalization:
+    """Тесты нормализации названий и запросов."""
 
-    @patch('city.services.search.City.objects')
-    def test_search_cities_basic_query(self, mock_city_objects: MagicMock) -> None:
-        """Базовый поиск по query."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
-
-        CitySearchService.search_cities(query='Москва')
-
-        # Проверяем что был вызван select_related для оптимизации
-        mock_city_objects.select_related.assert_called_once_with('country', 'region')
-
-        # Проверяем фильтрацию по названию
-        mock_queryset.filter.assert_called_once_with(title__icontains='Москва')
-
-    @patch('city.services.search.City.objects')
-    def test_search_cities_with_country_filter(self, mock_city_objects: MagicMock) -> None:
-        """Поиск с фильтрацией по стране."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
-
-        CitySearchService.search_cities(query='Москва', country='RU')
+    def test_normalize_title(self) -> None:
+        assert normalize_title('  Ростов-на-Дону ') == 'ростов на дону'
+        assert normalize_title('Орёл') == 'орел'
 
-        # Должно быть два вызова filter: по title и по country
-        assert mock_queryset.filter.call_count == 2
+    def test_transliterate(self) -> None:
+        assert transliterate('moskva') == 'москва'
+        assert transliterate('yaroslavl') == 'ярославл'
+        assert transliterate('maykop') == 'майкоп'
+        assert transliterate('syktyvkar') == 'сыктывкар'
+        assert transliterate('shchelkovo') == 'щелково'
 
-        # Второй вызов - фильтр по стране
-        second_call = mock_queryset.filter.call_args_list[1]
-        assert 'country__code' in str(second_call)
-
-    @patch('city.services.search.City.objects')
-    def test_search_cities_without_country_filter(self, mock_city_objects: MagicMock) -> None:
-        """Поиск без фильтрации по стране."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
+    def test_query_variants_for_latin_query(self) -> None:
+        assert get_query_variants('Elista') == ['elista', 'елиста', 'элиста']
 
-        CitySearchService.search_cities(query='Москва', country=None)
-
-        # Должен быть только один вызов filter (по title)
-        assert mock_queryset.filter.call_count == 1
-
-    @patch('city.services.search.City.objects')
-    def test_search_cities_applies_limit(self, mock_city_objects: MagicMock) -> None:
-        """Применяется ограничение на количество результатов."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value='limited_queryset')
+    def test_query_variants_for_cyrillic_query(self) -> None:
+        assert get_query_variants('Орёл') == ['орел']
 
-        CitySearchService.search_cities(query='Москва', limit=10)
+    def test_trigrams(self) -> None:
+        assert get_trigrams('кот') == {'  к', ' ко', 'кот', 'от '}
+        assert get_trigrams('') == frozenset()
 
-        # Проверяем что был применён slice [:10]
-        mock_queryset.__getitem__.assert_called_once_with(slice(None, 10, None))
 
-    @patch('city.services.search.City.objects')
-    def test_search_cities_default_limit_is_50(self, mock_city_objects: MagicMock) -> None:
-        """По умолчанию лимит 50."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
+@pytest.mark.unit
+class TestCitySearchIndex:
+    """Тесты поиска по индексу."""
 
-        CitySearchService.search_cities(query='Москва')
+    def test_title_prefix_matches_come_first(self, index: CitySearchIndex) -> None:
+        assert index.search('мос') == [1, 2]
 
-        # Проверяем лимит 50
-        mock_queryset.__getitem__.assert_called_once_with(slice(None, 50, None))
+    def test_exact_match_comes_before_prefix_match(self) -> None:
+        index = CitySearchIndex.from_rows([(1, 'Мирный', 'RU'), (2, 'Мир', 'RU')])
 
+        assert index.search('мир') == [2, 1]
 
-@pytest.mark.unit
-class TestCitySearchServicePrioritization:
-    """Тесты приоритизации результатов поиска."""
+    def test_word_prefix_matches_follow_title_prefix_matches(self, index: CitySearchIndex) -> None:
+        # Более короткое название ближе к запросу по триграммному сходству
+        assert index.search('новг') == [5, 6]
+        assert index.search('дону') == [3]
 
-    @patch('city.services.search.City.objects')
-    def test_search_applies_priority_annotation(self, mock_city_objects: MagicMock) -> None:
-        """Поиск применяет аннотацию для приоритизации."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
+    def test_substring_matches_come_last(self, index: CitySearchIndex) -> None:
+        assert index.search('слав') == [9, 10]
+        result = index.search('ро')
+        assert result[0] == 3
+        assert set(result[1:]) == {5, 6, 9}
 
-        CitySearchService.search_cities(query='Мос')
+    def test_ignores_case_yo_and_hyphens(self, index: CitySearchIndex) -> None:
+        assert index.search('ОРЕЛ') == [4]
+        assert index.search('могилев') == [8]
+        assert index.search('ростов на') == [3]
 
-        # Проверяем что была вызвана annotate
-        assert mock_queryset.annotate.called
-        mock_queryset.order_by.assert_called_once_with('search_priority', 'title')
+    def test_latin_query_is_transliterated(self, index: CitySearchIndex) -> None:
+        assert index.search('mosk') == [1]
+        assert index.search('Elis') == [7]
 
-    @patch('city.services.search.City.objects')
-    def test_search_orders_by_priority_then_title(self, mock_city_objects: MagicMock) -> None:
-        """Сортировка сначала по приоритету, затем по названию."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
+    def test_fuzzy_match_when_nothing_found(self, index: CitySearchIndex) -> None:
+        assert index.search('масква') == [1]
+        assert index.search('абвгд') == []
 
-        CitySearchService.search_cities(query='Москва')
+    def test_filters_by_country(self, index: CitySearchIndex) -> None:
+        assert index.search('мо', country_code='BY') == [8]
 
-        mock_queryset.order_by.assert_called_once_with('search_priority', 'title')
+    def test_applies_limit(self, index: CitySearchIndex) -> None:
+        assert index.search('мо', limit=1) == [1]
+        assert index.search('мо', limit=0) == []
 
 
 @pytest.mark.unit
-class TestCitySearchServiceEdgeCases:
-    """Тесты граничных случаев."""
+class TestCitySearchService:
+    """Тесты CitySearchService."""
 
     @patch('city.services.search.City.objects')
-    def test_search_with_empty_query(self, mock_city_objects: MagicMock) -> None:
-        """Поиск с пустой строкой."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
-
-        CitySearchService.search_cities(query='')
-
-        # Должен отработать фильтр даже с пустой строкой
-        mock_queryset.filter.assert_called_once_with(title__icontains='')
+    @patch('city.services.search.get_city_search_index')
+    def test_loads_found_cities_in_index_order(
+        self, mock_get_index: MagicMock, mock_city_objects: MagicMock
+    ) -> None:
+        mock_get_index.return_value.search.return_value = [2, 1]
+        first, second = MagicMock(), MagicMock()
+        mock_city_objects.select_related.return_value.in_bulk.return_value = {1: first, 2: second}
+
+        result = CitySearchService.search_cities(query='Мос', country='RU', limit=10)
+
+        assert result == [second, first]
+        mock_get_index.return_value.search.assert_called_once_with(
+            'Мос', country_code='RU', limit=10
+        )
+        mock_city_objects.select_related.assert_called_once_with('country', 'region')
+        mock_city_objects.select_related.return_value.in_bulk.assert_called_once_with([2, 1])
 
     @patch('city.services.search.City.objects')
-    def test_search_with_zero_limit(self, mock_city_objects: MagicMock) -> None:
-        """Поиск с лимитом 0."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
-
-        CitySearchService.search_cities(query='Москва', limit=0)
+    @patch('city.services.search.get_city_search_index')
+    def test_does_not_query_database_without_matches(
+        self, mock_get_index: MagicMock, mock_city_objects: MagicMock
+    ) -> None:
+        mock_get_index.return_value.search.return_value = []
 
-        mock_queryset.__getitem__.assert_called_once_with(slice(None, 0, None))
+        assert CitySearchService.search_cities(query='Абвгд') == []
+        mock_city_objects.select_related.assert_not_called()
 
     @patch('city.services.search.City.objects')
-    def test_search_with_large_limit(self, mock_city_objects: MagicMock) -> None:
-        """Поиск с большим лимитом."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
+    @patch('city.services.search.get_city_search_index')
+    def test_default_limit_is_50(
+        self, mock_get_index: MagicMock, mock_city_objects: MagicMock
+    ) -> None:
+        mock_get_index.return_value.search.return_value = []
 
-        CitySearchService.search_cities(query='Москва', limit=1000)
-
-        mock_queryset.__getitem__.assert_called_once_with(slice(None, 1000, None))
+        CitySearchService.search_cities(query='Москва')
 
-    @patch('city.services.search.City.objects')
-    def test_search_with_special_characters(self, mock_city_objects: MagicMock) -> None:
-        """Поиск со специальными символами."""
-        mock_queryset = MagicMock()
-        mock_city_objects.select_related.return_value = mock_queryset
-        mock_queryset.filter.return_value = mock_queryset
-        mock_queryset.annotate.return_value = mock_queryset
-        mock_queryset.order_by.return_value = mock_queryset
-        mock_queryset.__getitem__ = MagicMock(return_value=mock_queryset)
-
-        CitySearchService.search_cities(query='Санкт-Петербург')
-
-        mock_queryset.filter.assert_called_once_with(title__icontains='Санкт-Петербург')
+        mock_get_index.return_value.search.assert_called_once_with(
+            'Москва', country_code=None, limit=50
+        )
@@ -26,17 +26,19 @@ from collection.serializers import (
     PersonalCollectionUpdatePublicStatusSerializer,
     PersonalCollectionUpdateSerializer,
 )
+from services.catalog_search import COLLECTION_CATALOG, get_catalog_search_index
 
 
 @api_view(['GET'])
 def collection_search(request: Request) -> Response:
     """
-    Поиск коллекций по подстроке.
+    Поиск коллекций по названию.
 
     Принимает GET-параметр `query`:
       - если параметр отсутствует → возвращает 400 с сообщением об ошибке,
-      - если параметр указан → ищет объекты `Collection`, у которых поле
-        `title` содержит подстроку (без учёта регистра).
+      - если параметр указан → ищет коллекции по индексу справочников в памяти
+        (`services.catalog_search`): по началу слов, их начальной форме, подстроке
+        и с учётом опечаток.
 
     Возвращает список словарей с полями:
       - `id`: int — идентификатор коллекции,
@@ -56,7 +58,7 @@ def collection_search(request: Request) -> Response:
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    collections = Collection.objects.filter(title__icontains=query).order_by('title')
+    collections = get_catalog_search_index().search(query, catalogs=(COLLECTION_CATALOG,))
 
     collection_list: list[dict[str, Any]] = [
         {'id': collection.id, 'title': collection.title} for collection in collections
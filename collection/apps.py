@@ -14,3 +14,6 @@ class CollectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'collection'
     verbose_name = 'Коллекции'
+
+    def ready(self) -> None:
+        import collection.signals  # noqa: F401 — регистрация обработчиков сигналов
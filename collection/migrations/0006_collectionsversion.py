@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection', '0005_personalcollection_is_copied'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия коллекций',
+                'verbose_name_plural': 'Версии коллекций',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:15
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collection', '0006_collectionsversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collectionsversion',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, verbose_name='Токен версии'),
+        ),
+    ]
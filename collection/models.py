@@ -36,6 +36,25 @@ class Collection(models.Model):
         verbose_name_plural = 'Коллекции'
 
 
+class CollectionsVersion(models.Model):
+    """
+    Версия списка коллекций для внутрипроцессного индекса поиска по справочникам.
+    Единственная строка; счётчик увеличивают сигналы модели Collection.
+    """
+
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Версия')
+    # Меняется при каждом увеличении счётчика: после отката транзакции счётчик может вернуться
+    # к прежнему значению, но пара (версия, токен) не повторяется
+    token = models.UUIDField(default=uuid.uuid4, verbose_name='Токен версии')
+
+    class Meta:
+        verbose_name = 'Версия коллекций'
+        verbose_name_plural = 'Версии коллекций'
+
+    def __str__(self) -> str:
+        return str(self.version)
+
+
 class FavoriteCollection(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorite_collections')
     collection = models.ForeignKey(
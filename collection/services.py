@@ -30,6 +30,7 @@ from django.http import Http404
 from django.utils.safestring import mark_safe
 
 from city.models import City, VisitedCity
+from city.services.city_popularity import popularity_annotations
 from collection.filter import apply_filter_to_queryset
 from collection.models import Collection, PersonalCollection
 from collection.repository import COLLECTION_LIST_PREVIEW_CITIES_LIMIT, CollectionRepository
@@ -406,22 +407,6 @@ def get_all_cities_from_collection(
             .values('count')  # Передаем только поле count
         )
 
-        # Подзапрос для получения количество пользователей, посетивших город
-        number_of_users_who_visit_city = (
-            VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
-        # Подзапрос для получения общего количества посещений города
-        number_of_visits_all_users = (
-            VisitedCity.objects.filter(city=OuterRef('pk'))
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
         return (
             City.objects.filter(id__in=cities_id)
             .select_related('region', 'country')
@@ -435,38 +420,16 @@ def get_all_cities_from_collection(
                 ),  # Округление до 0.5
                 has_souvenir=has_souvenir,
                 number_of_visits=Subquery(city_visits_subquery, output_field=IntegerField()),
-                number_of_users_who_visit_city=Subquery(
-                    number_of_users_who_visit_city, output_field=IntegerField()
-                ),
-                number_of_visits_all_users=Subquery(number_of_visits_all_users),
+                **popularity_annotations(),
             )
         )
     else:
-        # Подзапрос для получения количество пользователей, посетивших город
-        number_of_users_who_visit_city = (
-            VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
-        # Подзапрос для получения общего количества посещений города
-        number_of_visits_all_users = (
-            VisitedCity.objects.filter(city=OuterRef('pk'))
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
         return (
             City.objects.filter(id__in=cities_id)
             .select_related('region', 'country')
             .annotate(
                 is_visited=Value(False),
-                number_of_users_who_visit_city=Subquery(
-                    number_of_users_who_visit_city, output_field=IntegerField()
-                ),
-                number_of_visits_all_users=Subquery(number_of_visits_all_users),
+                **popularity_annotations(),
             )
         )
 
@@ -523,22 +486,6 @@ def get_all_cities_from_personal_collection(
             .values('count')  # Передаем только поле count
         )
 
-        # Подзапрос для получения количество пользователей, посетивших город
-        number_of_users_who_visit_city = (
-            VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
-        # Подзапрос для получения общего количества посещений города
-        number_of_visits_all_users = (
-            VisitedCity.objects.filter(city=OuterRef('pk'))
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
         return (
             City.objects.filter(id__in=cities_id)
             .select_related('region', 'country')
@@ -552,37 +499,15 @@ def get_all_cities_from_personal_collection(
                 ),  # Округление до 0.5
                 has_souvenir=has_souvenir,
                 number_of_visits=Subquery(city_visits_subquery, output_field=IntegerField()),
-                number_of_users_who_visit_city=Subquery(
-                    number_of_users_who_visit_city, output_field=IntegerField()
-                ),
-                number_of_visits_all_users=Subquery(number_of_visits_all_users),
+                **popularity_annotations(),
             )
         )
     else:
-        # Подзапрос для получения количество пользователей, посетивших город
-        number_of_users_who_visit_city = (
-            VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
-        # Подзапрос для получения общего количества посещений города
-        number_of_visits_all_users = (
-            VisitedCity.objects.filter(city=OuterRef('pk'))
-            .values('city')
-            .annotate(count=Count('*'))
-            .values('count')[:1]
-        )
-
         return (
             City.objects.filter(id__in=cities_id)
             .select_related('region', 'country')
             .annotate(
                 is_visited=Value(False),
-                number_of_users_who_visit_city=Subquery(
-                    number_of_users_who_visit_city, output_field=IntegerField()
-                ),
-                number_of_visits_all_users=Subquery(number_of_visits_all_users),
+                **popularity_annotations(),
             )
         )
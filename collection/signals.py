@@ -0,0 +1,22 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from typing import Any, Type
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from collection.models import Collection, CollectionsVersion
+from services.reference_cache import COLLECTIONS_VERSION, bump_version_counter
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def invalidate_collection_reference_cache(
+    sender: Type[Collection], instance: Collection, **kwargs: Any
+) -> None:
+    bump_version_counter(COLLECTIONS_VERSION, CollectionsVersion)
@@ -26,6 +26,7 @@ from country.serializers import (
     CountrySimpleSerializer,
 )
 from services import logger
+from services.reference_cache import COUNTRIES, get_reference_data
 
 
 class GetPartsOfTheWorld(generics.ListAPIView):  # type: ignore[type-arg]
@@ -40,6 +41,11 @@ class GetLocations(generics.ListAPIView):  # type: ignore[type-arg]
     serializer_class = LocationSerializer
 
 
+def _serialize_all_countries() -> list[dict[str, Any]]:
+    serializer = CountrySerializer(Country.objects.all(), many=True)
+    return [dict(country) for country in serializer.data]
+
+
 class GetAllCountry(generics.ListAPIView):  # type: ignore[type-arg]
     queryset = Country.objects.all()  # type: ignore[assignment]
     http_method_names = ['get']
@@ -56,6 +62,9 @@ class GetAllCountry(generics.ListAPIView):  # type: ignore[type-arg]
         )
         return super().get(*args, **kwargs)
 
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return Response(get_reference_data(COUNTRIES, _serialize_all_countries))
+
 
 class GetVisitedCountry(generics.ListAPIView):  # type: ignore[type-arg]
     http_method_names = ['get']
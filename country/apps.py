@@ -14,3 +14,6 @@ class CountryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'country'
     verbose_name = 'Страны'
+
+    def ready(self) -> None:
+        import country.signals  # noqa: F401 — регистрация обработчиков сигналов
@@ -7,6 +7,8 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
+import uuid
+
 from django.contrib.auth.models import User
 from django.db import models
 
@@ -79,3 +81,22 @@ class VisitedCountry(models.Model):
 
     def __str__(self) -> str:
         return str(self.country)
+
+
+class CatalogVersion(models.Model):
+    """
+    Версия справочника стран, регионов и городов для ETag и внутрипроцессных индексов поиска.
+    Единственная строка; счётчик увеличивают сигналы моделей справочника.
+    """
+
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Версия')
+    # Меняется при каждом увеличении счётчика: после отката транзакции счётчик может вернуться
+    # к прежнему значению, но пара (версия, токен) не повторяется
+    token = models.UUIDField(default=uuid.uuid4, verbose_name='Токен версии')
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочника'
+
+    def __str__(self) -> str:
+        return str(self.version)
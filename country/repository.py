@@ -7,11 +7,10 @@
 
 """Репозиторные функции для стран и агрегатов по посещённым городам/регионам."""
 
-from django.db import connection
 from django.db.models import Count, IntegerField, OuterRef, Q, QuerySet, Subquery, Value
 from django.db.models.functions import Coalesce
 
-from city.models import City, VisitedCity
+from city.models import City, UserCountryVisitCounters, VisitedCity
 from country.dto import CountryVisitedCityCounts
 from country.models import Country
 from region.models import Region
@@ -98,55 +97,30 @@ def get_unique_visited_cities_country_ranks(
 
     На вход передаётся словарь `{country_id: visited_cities}` для одного пользователя.
     Rank считается как количество пользователей, посетивших в этой стране больше городов,
-    плюс один. Это повторяет прежнюю формулу endpoint, но делает один bulk-запрос вместо
-    отдельного запроса на каждую страну.
+    плюс один. Количества берутся из счётчиков UserCountryVisitCounters: для всех стран
+    выполняется один запрос, где каждое условие — диапазон по индексу
+    `(country, number_of_cities)`, поэтому стоимость не растёт вместе с таблицей посещений.
+    Каждый диапазон читается целиком: для страны это O(log n + k), где k — количество
+    пользователей, посетивших в ней больше городов (см. city/services/user_rank.py).
     """
     if not country_visit_counts:
         return {}
 
-    users_with_more_by_country = dict.fromkeys(country_visit_counts.keys(), 0)
-    threshold_values_sql = ', '.join(['(%s, %s)'] * len(country_visit_counts))
-    query_params: list[int | bool] = []
+    conditions = Q()
     for country_id, visited_cities in country_visit_counts.items():
-        query_params.extend([country_id, visited_cities])
-    query_params.append(True)
+        conditions |= Q(country_id=country_id, number_of_cities__gt=visited_cities)
 
-    visited_city_table = connection.ops.quote_name(VisitedCity._meta.db_table)
-    city_table = connection.ops.quote_name(City._meta.db_table)
-
-    with connection.cursor() as cursor:
-        cursor.execute(
-            f"""
-            WITH thresholds(country_id, visited_cities) AS (
-                VALUES {threshold_values_sql}
-            ),
-            user_country_counts AS (
-                SELECT
-                    city.country_id,
-                    visited_city.user_id,
-                    COUNT(DISTINCT visited_city.city_id) AS unique_visited_cities
-                FROM {visited_city_table} AS visited_city
-                INNER JOIN {city_table} AS city ON city.id = visited_city.city_id
-                INNER JOIN thresholds ON thresholds.country_id = city.country_id
-                WHERE visited_city.is_first_visit = %s
-                GROUP BY city.country_id, visited_city.user_id
-            )
-            SELECT
-                user_country_counts.country_id,
-                COUNT(*) AS users_with_more
-            FROM user_country_counts
-            INNER JOIN thresholds ON thresholds.country_id = user_country_counts.country_id
-            WHERE user_country_counts.unique_visited_cities > thresholds.visited_cities
-            GROUP BY user_country_counts.country_id
-            """,
-            query_params,
-        )
-        for country_id, users_with_more in cursor.fetchall():
-            users_with_more_by_country[int(country_id)] = int(users_with_more)
+    users_with_more_by_country = dict(
+        UserCountryVisitCounters.objects.filter(conditions)
+        .order_by()
+        .values('country_id')
+        .annotate(users_with_more=Count('user_id'))
+        .values_list('country_id', 'users_with_more')
+    )
 
     return {
-        country_id: users_with_more + 1
-        for country_id, users_with_more in users_with_more_by_country.items()
+        country_id: users_with_more_by_country.get(country_id, 0) + 1
+        for country_id in country_visit_counts
     }
 
 
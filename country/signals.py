@@ -0,0 +1,48 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from typing import Any, Type
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from country.models import Country, Location, PartOfTheWorld, VisitedCountry
+from services.cache import bump_stats_generation
+from services.http_cache import bump_catalog_version
+from services.reference_cache import (
+    COUNTRIES,
+    COUNTRIES_WITH_CITIES,
+    REGIONS_BY_COUNTRY,
+    invalidate_reference_data,
+)
+
+
+@receiver(post_save, sender=VisitedCountry)
+@receiver(post_delete, sender=VisitedCountry)
+def invalidate_visited_country_statistics_cache(
+    sender: Type[VisitedCountry], instance: VisitedCountry, **kwargs: Any
+) -> None:
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_stats_generation(user_id))
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def invalidate_country_reference_cache(
+    sender: Type[Country], instance: Country, **kwargs: Any
+) -> None:
+    invalidate_reference_data(COUNTRIES, COUNTRIES_WITH_CITIES, REGIONS_BY_COUNTRY)
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=PartOfTheWorld)
+@receiver(post_delete, sender=PartOfTheWorld)
+def invalidate_location_reference_cache(sender: Type[Any], instance: Any, **kwargs: Any) -> None:
+    invalidate_reference_data(COUNTRIES)
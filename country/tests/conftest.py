@@ -7,6 +7,9 @@ from django.contrib.auth.models import User
 
 from country.models import PartOfTheWorld, Location
 from region.models import RegionType
+from city.services.search_index import clear_city_search_index
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
 
 
 @pytest.fixture
@@ -33,3 +36,14 @@ def location(part_of_the_world: PartOfTheWorld) -> Location:
 def user() -> User:
     """Создает тестового пользователя."""
     return User.objects.create_user(username='testuser', password='testpass')
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data_cache() -> None:
+    """
+    Сбрасывает кеш справочных данных и построенные по ним индексы поиска,
+    чтобы данные одного теста не попадали в другой
+    """
+    clear_reference_cache()
+    clear_catalog_search_index()
+    clear_city_search_index()
@@ -0,0 +1,33 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+
+from country.models import Country, VisitedCountry
+from services.cache import get_stats_generation
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_visited_country_changes_bump_stats_generation(
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    """Добавление и удаление посещённой страны сбрасывают кеш статистики пользователя."""
+    user = User.objects.create_user(username='traveler', password='pass')
+    country = Country.objects.create(name='Россия', code='RU')
+    generation = get_stats_generation(user.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        visited_country = VisitedCountry.objects.create(user=user, country=country)
+    assert get_stats_generation(user.id) == generation + 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        visited_country.delete()
+    assert get_stats_generation(user.id) == generation + 2
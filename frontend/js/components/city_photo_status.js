@@ -0,0 +1,87 @@
+// ---------------------------------------------
+//
+// Copyright © Egor Vavilov (Shecspi)
+// Licensed under the Apache License, Version 2.0
+//
+// ----------------------------------------------
+
+/** Пауза между запросами статуса обработки фото. */
+export const CITY_PHOTO_STATUS_POLL_INTERVAL_MS = 2000;
+
+/** Сколько раз опрашивать статус, прежде чем перестать (около 5 минут). */
+export const CITY_PHOTO_STATUS_MAX_ATTEMPTS = 150;
+
+const PENDING_STATUS = 'pending';
+
+/**
+ * Следит за фото города, которые ещё обрабатываются на сервере: раз в `intervalMs`
+ * запрашивает список фото пользователя и вызывает `onSettled(photo)` для каждого
+ * отслеживаемого фото, статус которого стал `ready` или `failed`. Фото, которых нет
+ * в ответе (удалены), перестают отслеживаться. Опрос останавливается, когда отслеживать
+ * нечего или после `maxAttempts` запросов.
+ *
+ * Возвращает объект с методами `add(photoId)` — начать следить за фото — и `stop()`.
+ */
+export function watchCityPhotoStatuses({
+  cityId,
+  onSettled,
+  photoIds = [],
+  intervalMs = CITY_PHOTO_STATUS_POLL_INTERVAL_MS,
+  maxAttempts = CITY_PHOTO_STATUS_MAX_ATTEMPTS,
+  fetchImpl = (...args) => fetch(...args),
+}) {
+  const pending = new Set(photoIds.map(String));
+  let timer = null;
+  let attempts = 0;
+  let stopped = false;
+
+  const schedule = () => {
+    if (stopped || timer !== null || pending.size === 0 || attempts >= maxAttempts) return;
+    timer = setTimeout(poll, intervalMs);
+  };
+
+  async function poll() {
+    timer = null;
+    attempts += 1;
+    try {
+      const response = await fetchImpl(`/api/city/photos/?city_id=${encodeURIComponent(cityId)}`, {
+        headers: { Accept: 'application/json' },
+      });
+      if (response.ok) {
+        const data = await response.json();
+        const photos = new Map(
+          (Array.isArray(data?.photos) ? data.photos : []).map((photo) => [String(photo.id), photo]),
+        );
+        for (const photoId of Array.from(pending)) {
+          const photo = photos.get(photoId);
+          if (!photo) {
+            pending.delete(photoId);
+          } else if (photo.status !== PENDING_STATUS) {
+            pending.delete(photoId);
+            if (!stopped) onSettled(photo);
+          }
+        }
+      }
+    } catch {
+      // Сеть недоступна — попробуем при следующем опросе
+    }
+    schedule();
+  }
+
+  schedule();
+
+  return {
+    add(photoId) {
+      pending.add(String(photoId));
+      attempts = 0;
+      schedule();
+    },
+    stop() {
+      stopped = true;
+      if (timer !== null) {
+        clearTimeout(timer);
+        timer = null;
+      }
+    },
+  };
+}
@@ -0,0 +1,70 @@
+// ---------------------------------------------
+//
+// Copyright © Egor Vavilov (Shecspi)
+// Licensed under the Apache License, Version 2.0
+//
+// ----------------------------------------------
+
+import { afterEach, beforeEach, describe, expect, it, vi } from 'vitest';
+
+import { watchCityPhotoStatuses } from './city_photo_status.js';
+
+function respond(photos) {
+  return Promise.resolve({ ok: true, json: () => Promise.resolve({ photos }) });
+}
+
+describe('watchCityPhotoStatuses', () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it('reports photos once their processing has finished', async () => {
+    const fetchImpl = vi
+      .fn()
+      .mockReturnValueOnce(respond([{ id: 'a', status: 'pending' }, { id: 'b', status: 'pending' }]))
+      .mockReturnValueOnce(respond([{ id: 'a', status: 'ready' }, { id: 'b', status: 'failed' }]));
+    const onSettled = vi.fn();
+
+    watchCityPhotoStatuses({ cityId: 7, photoIds: ['a', 'b'], onSettled, intervalMs: 10, fetchImpl });
+
+    await vi.advanceTimersByTimeAsync(10);
+    expect(onSettled).not.toHaveBeenCalled();
+    expect(fetchImpl).toHaveBeenCalledWith('/api/city/photos/?city_id=7', expect.any(Object));
+
+    await vi.advanceTimersByTimeAsync(10);
+    expect(onSettled.mock.calls.map(([photo]) => [photo.id, photo.status])).toEqual([
+      ['a', 'ready'],
+      ['b', 'failed'],
+    ]);
+
+    await vi.advanceTimersByTimeAsync(100);
+    expect(fetchImpl).toHaveBeenCalledTimes(2);
+  });
+
+  it('stops watching deleted photos and after the attempt limit', async () => {
+    const fetchImpl = vi.fn(() => respond([{ id: 'a', status: 'pending' }]));
+    const onSettled = vi.fn();
+
+    const watcher = watchCityPhotoStatuses({
+      cityId: 7,
+      photoIds: ['a', 'deleted'],
+      onSettled,
+      intervalMs: 10,
+      maxAttempts: 3,
+      fetchImpl,
+    });
+
+    await vi.advanceTimersByTimeAsync(100);
+    expect(fetchImpl).toHaveBeenCalledTimes(3);
+    expect(onSettled).not.toHaveBeenCalled();
+
+    watcher.add('a');
+    watcher.stop();
+    await vi.advanceTimersByTimeAsync(100);
+    expect(fetchImpl).toHaveBeenCalledTimes(3);
+  });
+});
@@ -193,8 +193,12 @@ export function initOSMViewer(containerId, sidebarId) {
         throw new Error('Все серверы Overpass заняты')
     }
 
-    async function fetchPolygonFromServer(relationId) {
-        const response = await fetch(`/api/geo-polygons/polygon/${relationId}/`)
+    // Масштаб, для которого сначала загружается грубая геометрия, чтобы подогнать карту
+    const PREVIEW_ZOOM = 4
+
+    async function fetchPolygonFromServer(relationId, zoom) {
+        const query = zoom == null ? '' : `?zoom=${zoom}`
+        const response = await fetch(`/api/geo-polygons/polygon/${relationId}/${query}`)
         if (!response.ok) return null
         return response.json()
     }
@@ -281,13 +285,25 @@ export function initOSMViewer(containerId, sidebarId) {
             btn.textContent = 'Загрузка...'
             btn.disabled = true
             try {
-                const geojson = await fetchPolygonFromServer(obj._relationId)
-                if (geojson && geojson.geometry) {
-                    obj._geojson = geojson
-                    geojsonLayer = L.geoJSON(geojson, {
+                // Сначала грубая геометрия для подгонки карты, затем детальная для итогового масштаба
+                const preview = await fetchPolygonFromServer(obj._relationId, PREVIEW_ZOOM)
+                if (preview && preview.geometry) {
+                    geojsonLayer = L.geoJSON(preview, {
                         style: { color: '#7c5cff', weight: 3, fillOpacity: 0.15, fillColor: '#7c5cff' }
                     }).addTo(map)
                     map.fitBounds(geojsonLayer.getBounds().pad(0.1))
+                    obj._geojson = preview
+                    const zoom = map.getZoom()
+                    const geojson = zoom > PREVIEW_ZOOM
+                        ? await fetchPolygonFromServer(obj._relationId, zoom)
+                        : null
+                    if (geojson && geojson.geometry && selectedObject === obj) {
+                        map.removeLayer(geojsonLayer)
+                        geojsonLayer = L.geoJSON(geojson, {
+                            style: { color: '#7c5cff', weight: 3, fillOpacity: 0.15, fillColor: '#7c5cff' }
+                        }).addTo(map)
+                        obj._geojson = geojson
+                    }
                     updateDownloadButton()
                 } else {
                     btn.textContent = 'Нет полигона'
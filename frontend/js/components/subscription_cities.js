@@ -0,0 +1,26 @@
+// ---------------------------------------------
+//
+// Copyright © Egor Vavilov (Shecspi)
+// Licensed under the Apache License, Version 2.0
+//
+// ----------------------------------------------
+
+/**
+ * Разворачивает компактный ответ API городов из подписок в список объектов.
+ * Сервер передаёт названия полей один раз в `fields`, а каждый город — массивом значений,
+ * имя пользователя подставляется из `users` по `user_id`.
+ * @param {{users: Array<[number, string]>, fields: string[], cities: Array<Array<*>>}} payload
+ * @returns {Array<Object>}
+ */
+export function decodeSubscriptionCities(payload) {
+    const usernames = new Map(payload.users);
+
+    return payload.cities.map((row) => {
+        const city = {};
+        payload.fields.forEach((field, index) => {
+            city[field] = row[index];
+        });
+        city.username = usernames.get(city.user_id);
+        return city;
+    });
+}
@@ -0,0 +1,29 @@
+// ---------------------------------------------
+//
+// Copyright © Egor Vavilov (Shecspi)
+// Licensed under the Apache License, Version 2.0
+//
+// ----------------------------------------------
+
+import { describe, expect, it } from 'vitest';
+
+import { decodeSubscriptionCities } from './subscription_cities.js';
+
+describe('decodeSubscriptionCities', () => {
+  it('собирает объекты городов из полей и строк', () => {
+    const payload = {
+      users: [[1, 'alice'], [2, 'bob']],
+      fields: ['user_id', 'id', 'title'],
+      cities: [[2, 10, 'Коломна'], [1, 11, 'Тула']],
+    };
+
+    expect(decodeSubscriptionCities(payload)).toEqual([
+      { user_id: 2, id: 10, title: 'Коломна', username: 'bob' },
+      { user_id: 1, id: 11, title: 'Тула', username: 'alice' },
+    ]);
+  });
+
+  it('возвращает пустой список без городов', () => {
+    expect(decodeSubscriptionCities({ users: [], fields: ['id'], cities: [] })).toEqual([]);
+  });
+});
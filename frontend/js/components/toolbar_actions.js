@@ -19,6 +19,7 @@ import {getCookie} from './get_cookie.js';
 import {addErrorControl, addLoadControl} from "./map";
 import {bindPopupToMarker} from './city_popup.js';
 import {NotVisitedCityLayer} from './not_visited_city_layer.js';
+import {decodeSubscriptionCities} from './subscription_cities.js';
 
 // Это нужно для того, чтобы open_modal_for_add_city можно было использовать в onclick.
 // Иначе из-за специфичной области видимости доступа к этой функции нет.
@@ -265,7 +266,7 @@ export class ToolbarActions {
             });
 
             if (response.ok) {
-                const subscriptionCities = await response.json();
+                const subscriptionCities = decodeSubscriptionCities(await response.json());
 
                 // Закрываем модальное окно (Preline UI)
                 const modalElement = document.getElementById('subscriptionsModal');
@@ -786,7 +786,11 @@ describe('ToolbarActions: непосещённые города', () => {
         actions.addNotVisitedCitiesOnMap = vi.fn(() => rebuild.promise);
         vi.stubGlobal('fetch', vi.fn().mockResolvedValue({
             ok: true,
-            json: vi.fn().mockResolvedValue([{ id: 2, username: 'new-user' }]),
+            json: vi.fn().mockResolvedValue({
+                users: [[5, 'new-user']],
+                fields: ['user_id', 'id'],
+                cities: [[5, 2]],
+            }),
         }));
 
         const subscriptionPromise = actions.showSubscriptionCities();
@@ -799,7 +803,7 @@ describe('ToolbarActions: непосещённые города', () => {
         clear.resolve();
         await vi.waitFor(() => expect(actions.addNotVisitedCitiesOnMap).toHaveBeenCalledOnce());
 
-        expect(actions.subscriptionCities).toEqual([{ id: 2, username: 'new-user' }]);
+        expect(actions.subscriptionCities).toEqual([{ user_id: 5, id: 2, username: 'new-user' }]);
         expect(actions.addOwnCitiesOnMap).toHaveBeenCalledOnce();
         expect(actions.addSubscriptionsCitiesOnMap).toHaveBeenCalledOnce();
         expect(applyButton.disabled).toBe(true);
@@ -841,7 +845,11 @@ describe('ToolbarActions: непосещённые города', () => {
 
         expect(actions.notVisitedCityLayer.add).not.toHaveBeenCalled();
 
-        subscriptions.resolve([{ id: 1, username: 'new-user' }]);
+        subscriptions.resolve({
+            users: [[5, 'new-user']],
+            fields: ['user_id', 'id'],
+            cities: [[5, 1]],
+        });
         await Promise.all([updatingSubscriptions, showingNotVisited]);
 
         expect(actions.notVisitedCityLayer.add).toHaveBeenCalledOnce();
@@ -876,7 +884,11 @@ describe('ToolbarActions: непосещённые города', () => {
         fail(actions, error);
         vi.stubGlobal('fetch', vi.fn().mockResolvedValue({
             ok: true,
-            json: vi.fn().mockResolvedValue([{ id: 2, username: 'new-user' }]),
+            json: vi.fn().mockResolvedValue({
+                users: [[5, 'new-user']],
+                fields: ['user_id', 'id'],
+                cities: [[5, 2]],
+            }),
         }));
 
         await expect(actions.showSubscriptionCities()).resolves.toBe(false);
@@ -9,6 +9,7 @@ import 'swiper/css/free-mode';
 import 'swiper/css/thumbs';
 import { getCookie } from '../components/get_cookie';
 import { openConfirmModal } from '../components/confirm_modal';
+import { watchCityPhotoStatuses } from '../components/city_photo_status';
 
 let lightboxInstance = null;
 
@@ -126,6 +127,12 @@ function truncateCityPhotoFileName(name, maxLen = 40) {
 const CITY_PHOTO_MISSING_SUB_EMPTY = 'В сервисе пока нет фотографий этого города';
 const CITY_PHOTO_MISSING_SUB_FAILED =
   'Файл недоступен. Удалите снимок и загрузите другой или обновите страницу.';
+/** Подписи для фото, которое сервер ещё обрабатывает или не смог обработать (image_section.html). */
+const CITY_PHOTO_MISSING_SUB_PENDING = 'Фото обрабатывается и скоро появится';
+const CITY_PHOTO_MISSING_SUB_PROCESSING_FAILED =
+  'Не удалось обработать фото. Удалите его и загрузите другое.';
+const CITY_PHOTO_STATUS_READY = 'ready';
+const CITY_PHOTO_STATUS_PENDING = 'pending';
 
 function escapeHtmlText(text) {
   return String(text)
@@ -155,14 +162,60 @@ function replaceCityPhotoMainUserSlideWithMissing(slide) {
   slide.setAttribute('data-is-image-unavailable', 'true');
 }
 
+/** Миниатюра без изображения (как city/partials/city_photo_thumb_unavailable.html). */
+function getCityPhotoThumbUnavailableHtml(label) {
+  return `<div class="city-photo-thumb-unavailable flex h-full w-full flex-col items-center justify-center gap-0.5 bg-neutral-200/70 px-1 text-center dark:bg-neutral-700/55" role="img" aria-label="Превью недоступно">
+    <svg xmlns="http://www.w3.org/2000/svg" class="size-4 shrink-0 text-neutral-500 dark:text-neutral-400" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="1.5" aria-hidden="true"><path stroke-linecap="round" stroke-linejoin="round" d="m2.25 15.75 5.159-5.159a2.25 2.25 0 0 1 3.182 0l5.159 5.159m-1.5-1.5 1.409-1.409a2.25 2.25 0 0 1 3.182 0l2.909 2.909m-18 3.75h16.5a1.5 1.5 0 0 0 1.5-1.5V6a1.5 1.5 0 0 0-1.5-1.5H3A1.5 1.5 0 0 0 1.5 6v12a1.5 1.5 0 0 0 1.5 1.5Zm10.5-11.25h.008v.008H12V8.25Z"/></svg>
+    <span class="city-photo-thumb-unavailable-label text-[9px] font-medium leading-tight text-neutral-600 dark:text-neutral-400">${escapeHtmlText(label)}</span>
+  </div>`;
+}
+
 function replaceCityPhotoThumbWithMissing(img) {
   if (!(img instanceof HTMLImageElement)) return;
   const slide = img.closest('.swiper-slide');
   if (!(slide instanceof HTMLElement)) return;
-  slide.innerHTML = `<div class="flex h-full w-full flex-col items-center justify-center gap-0.5 bg-neutral-200/70 px-1 text-center dark:bg-neutral-700/55" role="img" aria-label="Превью недоступно">
-    <svg xmlns="http://www.w3.org/2000/svg" class="size-4 shrink-0 text-neutral-500 dark:text-neutral-400" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="1.5" aria-hidden="true"><path stroke-linecap="round" stroke-linejoin="round" d="m2.25 15.75 5.159-5.159a2.25 2.25 0 0 1 3.182 0l5.159 5.159m-1.5-1.5 1.409-1.409a2.25 2.25 0 0 1 3.182 0l2.909 2.909m-18 3.75h16.5a1.5 1.5 0 0 0 1.5-1.5V6a1.5 1.5 0 0 0-1.5-1.5H3A1.5 1.5 0 0 0 1.5 6v12a1.5 1.5 0 0 0 1.5 1.5Zm10.5-11.25h.008v.008H12V8.25Z"/></svg>
-    <span class="text-[9px] font-medium leading-tight text-neutral-600 dark:text-neutral-400">Нет фото</span>
-  </div>`;
+  slide.innerHTML = getCityPhotoThumbUnavailableHtml('Нет фото');
+}
+
+/** Содержимое главного слайда фото пользователя: ссылка для лайтбокса с изображением. */
+function createCityPhotoMainSlideContent(imageUrl) {
+  const link = document.createElement('a');
+  link.href = imageUrl;
+  link.className = 'city-glightbox block w-full';
+  link.setAttribute('data-type', 'image');
+
+  const stage = document.createElement('div');
+  stage.className = CITY_PHOTO_STAGE_CLASS;
+
+  const img = document.createElement('img');
+  img.src = imageUrl;
+  img.alt = 'Фото города';
+  img.loading = 'lazy';
+  img.decoding = 'async';
+  img.className = 'city-photo-main-img absolute inset-0 h-full w-full object-contain';
+
+  stage.appendChild(img);
+  link.appendChild(stage);
+  return link;
+}
+
+/** Содержимое главного слайда фото, которое ещё обрабатывается или не обработалось. */
+function getCityPhotoUnavailableSlideHtml(status) {
+  const subtitle =
+    status === CITY_PHOTO_STATUS_PENDING
+      ? CITY_PHOTO_MISSING_SUB_PENDING
+      : CITY_PHOTO_MISSING_SUB_PROCESSING_FAILED;
+  return `<div class="block w-full"><div class="${CITY_PHOTO_STAGE_CLASS}">${getCityPhotoMissingInnerHtml(subtitle)}</div></div>`;
+}
+
+function createCityPhotoThumbImage(imageUrl) {
+  const img = document.createElement('img');
+  img.src = imageUrl;
+  img.alt = 'Миниатюра фото города';
+  img.loading = 'lazy';
+  img.decoding = 'async';
+  img.className = 'city-photo-thumb-img h-full w-full object-cover';
+  return img;
 }
 
 function bindCityPhotoUserMediaErrorHandlers(citySwiper, thumbsElement, syncControlsWithActiveSlide) {
@@ -551,6 +604,57 @@ function initCityPhotoManager() {
       ? uploadMaxMbFromDataset
       : 15;
 
+  /** Заменяет заглушку фото на изображение или сообщение об ошибке, когда сервер его обработал. */
+  const applyCityPhotoStatus = (photo) => {
+    const photoId = String(photo.id);
+    const selector = `.swiper-slide[data-photo-id="${CSS.escape(photoId)}"]`;
+    const slide = citySwiper?.el?.querySelector(selector);
+    const thumb = thumbsElement?.querySelector(selector);
+    const isReady = photo.status === CITY_PHOTO_STATUS_READY && Boolean(photo.image_url);
+
+    [slide, thumb].forEach((el) => {
+      if (el instanceof HTMLElement) el.setAttribute('data-photo-status', photo.status);
+    });
+    if (slide instanceof HTMLElement) {
+      if (isReady) {
+        slide.replaceChildren(createCityPhotoMainSlideContent(photo.image_url));
+      } else {
+        slide.innerHTML = getCityPhotoUnavailableSlideHtml(photo.status);
+      }
+    }
+    if (thumb instanceof HTMLElement) {
+      const placeholder = thumb.querySelector('.city-photo-thumb-unavailable');
+      if (isReady && placeholder) {
+        placeholder.replaceWith(createCityPhotoThumbImage(photo.image_url));
+      } else if (!isReady) {
+        const label = thumb.querySelector('.city-photo-thumb-unavailable-label');
+        if (label) label.textContent = 'Ошибка обработки';
+      }
+    }
+
+    if (isReady) {
+      initCityGallery();
+      if (citySwiper) {
+        bindCityMainSwiperImagesForAutoHeight(citySwiper);
+        bindCityPhotoUserMediaErrorHandlers(citySwiper, thumbsElement, syncControlsWithActiveSlide);
+      }
+    } else {
+      showError(CITY_PHOTO_MISSING_SUB_PROCESSING_FAILED);
+    }
+    citySwiper?.update();
+  };
+
+  const cityIdInput = uploadForm.querySelector('input[name="city_id"]');
+  const photoStatusWatcher = watchCityPhotoStatuses({
+    cityId: cityIdInput instanceof HTMLInputElement ? cityIdInput.value : '',
+    photoIds: Array.from(
+      citySwiper?.el?.querySelectorAll(
+        `.swiper-slide[data-photo-status="${CITY_PHOTO_STATUS_PENDING}"]`,
+      ) ?? [],
+    ).map((slide) => slide.getAttribute('data-photo-id')),
+    onSettled: applyCityPhotoStatus,
+  });
+
   const setLoadingState = (isLoading, action = null, progressMessage = null) => {
     if (fileInput instanceof HTMLInputElement) {
       fileInput.disabled = isLoading;
@@ -612,22 +716,24 @@ function initCityPhotoManager() {
       typeof uploadedPhoto.image_url === 'string' && uploadedPhoto.image_url.length > 0
         ? uploadedPhoto.image_url
         : `/api/city/photos/${uploadedId}/`;
+    // Сервер строит варианты фото в фоне: до этого вместо фото показывается заглушка
+    const uploadedStatus = uploadedPhoto.status || CITY_PHOTO_STATUS_READY;
+    const isUploadedReady = uploadedStatus === CITY_PHOTO_STATUS_READY;
     const uploadedIsDefault = Boolean(uploadedPhoto.is_default);
     const createThumbSlideElement = () => {
       const button = document.createElement('button');
       button.type = 'button';
       button.className = CITY_PHOTO_THUMB_SLIDE_BASE_CLASS;
       button.setAttribute('data-photo-id', String(uploadedId));
+      button.setAttribute('data-photo-status', uploadedStatus);
       button.setAttribute('data-is-default', uploadedIsDefault ? 'true' : 'false');
       button.setAttribute('aria-label', 'Показать фото');
 
-      const img = document.createElement('img');
-      img.src = imageHref;
-      img.alt = 'Миниатюра фото города';
-      img.loading = 'lazy';
-      img.decoding = 'async';
-      img.className = 'city-photo-thumb-img h-full w-full object-cover';
-      button.appendChild(img);
+      if (isUploadedReady) {
+        button.appendChild(createCityPhotoThumbImage(imageHref));
+      } else {
+        button.innerHTML = getCityPhotoThumbUnavailableHtml('Обрабатывается');
+      }
 
       const badgeHost = document.createElement('div');
       badgeHost.innerHTML = getCityPhotoThumbDefaultBadgeMarkup(uploadedIsDefault);
@@ -651,26 +757,14 @@ function initCityPhotoManager() {
       const slide = document.createElement('div');
       slide.className = 'swiper-slide !h-auto';
       slide.setAttribute('data-photo-id', String(uploadedId));
+      slide.setAttribute('data-photo-status', uploadedStatus);
       slide.setAttribute('data-is-default', uploadedIsDefault ? 'true' : 'false');
 
-      const link = document.createElement('a');
-      link.href = imageHref;
-      link.className = 'city-glightbox block w-full';
-      link.setAttribute('data-type', 'image');
-
-      const stage = document.createElement('div');
-      stage.className = CITY_PHOTO_STAGE_CLASS;
-
-      const img = document.createElement('img');
-      img.src = imageHref;
-      img.alt = 'Фото города';
-      img.loading = 'lazy';
-      img.decoding = 'async';
-      img.className = 'city-photo-main-img absolute inset-0 h-full w-full object-contain';
-
-      stage.appendChild(img);
-      link.appendChild(stage);
-      slide.appendChild(link);
+      if (isUploadedReady) {
+        slide.appendChild(createCityPhotoMainSlideContent(imageHref));
+      } else {
+        slide.innerHTML = getCityPhotoUnavailableSlideHtml(uploadedStatus);
+      }
       return slide;
     };
     const serviceSlideIndex = Array.from(citySwiper.slides).findIndex(
@@ -754,6 +848,9 @@ function initCityPhotoManager() {
     initCityGallery();
     bindCityPhotoUserMediaErrorHandlers(citySwiper, thumbsElement, syncControlsWithActiveSlide);
     hideCityPhotoNoImageMessages();
+    if (uploadedStatus === CITY_PHOTO_STATUS_PENDING) {
+      photoStatusWatcher.add(uploadedId);
+    }
     return true;
   };
 
@@ -1,26 +1,35 @@
 import json
 
 from django.contrib import admin
-from django.db.models import QuerySet, Sum, TextField
-from django.db.models.functions import Cast, Length
+from django.db.models import QuerySet, Sum
 from django.http import HttpRequest, HttpResponse
 from django.template.defaultfilters import filesizeformat
 
-from geo_polygons.infrastructure.models import OSMPolygonCache
+from geo_polygons.infrastructure.models import OSMPolygonCache, get_stored_size
 
 
 @admin.register(OSMPolygonCache)
 class OSMPolygonCacheAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     change_list_template = 'admin/geo_polygons/osmpolygoncache/change_list.html'
-    list_display = ('relation_id', 'name', 'get_geojson_size', 'created_at', 'updated_at')
+    list_display = (
+        'relation_id',
+        'name',
+        'status',
+        'get_geojson_size',
+        'expires_at',
+        'created_at',
+        'updated_at',
+    )
+    list_filter = ('status',)
     search_fields = ('relation_id', 'name')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('fetched_at', 'created_at', 'updated_at')
+    exclude = ('zoom_variants', 'geometry_data')
     actions = ['delete_selected']
     ordering = ('-created_at',)
 
     def get_queryset(self, request: HttpRequest) -> QuerySet[OSMPolygonCache]:
         qs = super().get_queryset(request)
-        return qs.annotate(geojson_size=Length(Cast('geojson', TextField())))  # type: ignore[no-any-return]
+        return qs.annotate(geojson_size=get_stored_size())  # type: ignore[no-any-return]
 
     def changelist_view(
         self,
@@ -40,6 +49,10 @@ class OSMPolygonCacheAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
 
     def get_geojson_size(self, obj: OSMPolygonCache) -> str:
         size = getattr(obj, 'geojson_size', None)
+        if size is None and obj.geometry_data is not None:
+            size = len(obj.geometry_data)
+        if size is None and obj.geojson is None:
+            size = 0
         if size is None:
             size = len(
                 json.dumps(obj.geojson, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -11,6 +11,8 @@ from dmr import Controller, ResponseSpec, modify
 from dmr.plugins.msgspec import MsgspecSerializer
 
 from geo_polygons.domain.services import GetPolygonService
+from geo_polygons.domain.simplification import resolve_zoom_band
+from geo_polygons.infrastructure.fetch_lock import CachePolygonFetchLock
 from geo_polygons.infrastructure.nominatim import NominatimPolygonService
 from geo_polygons.infrastructure.repository import DjangoPolygonRepository
 from premium.services.access import has_advanced_premium
@@ -20,9 +22,50 @@ def _get_polygon_service() -> GetPolygonService:
     return GetPolygonService(
         repository=DjangoPolygonRepository(),
         external_service=NominatimPolygonService(),
+        fetch_lock=CachePolygonFetchLock(),
     )
 
 
+# Допустимые значения параметров упрощения геометрии для карты
+MAX_ZOOM = 22
+MAX_TOLERANCE = 1.0
+
+
+class InvalidSimplificationError(ValueError):
+    """Некорректные параметры `zoom`/`tolerance` запроса полигона."""
+
+
+def _parse_simplification(query: Any) -> tuple[int | None, float | None]:
+    """
+    Читает из query-параметров масштаб карты `zoom` (целое 0..MAX_ZOOM) или допуск
+    упрощения `tolerance` в градусах (больше нуля, не больше MAX_TOLERANCE).
+    """
+    zoom: int | None = None
+    tolerance: float | None = None
+
+    raw_zoom = query.get('zoom')
+    if raw_zoom not in (None, ''):
+        try:
+            zoom = int(raw_zoom)
+        except ValueError:
+            raise InvalidSimplificationError('Параметр zoom должен быть целым числом') from None
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise InvalidSimplificationError(f'Параметр zoom должен быть от 0 до {MAX_ZOOM}')
+
+    raw_tolerance = query.get('tolerance')
+    if raw_tolerance not in (None, ''):
+        try:
+            tolerance = float(raw_tolerance)
+        except ValueError:
+            raise InvalidSimplificationError('Параметр tolerance должен быть числом') from None
+        if not 0 < tolerance <= MAX_TOLERANCE:
+            raise InvalidSimplificationError(
+                f'Параметр tolerance должен быть больше 0 и не больше {MAX_TOLERANCE}'
+            )
+
+    return zoom, tolerance
+
+
 def _safe_geojson_filename(name: str) -> str:
     sanitized = re.sub(r'[<>:"/\\|?*\x00-\x1f\r\n\u2028\u2029]', '_', name).strip()
     return sanitized or 'osm_object'
@@ -32,10 +75,15 @@ class GetOSMPolygonController(Controller[MsgspecSerializer]):
     """
     Presentation layer: принимает HTTP-запрос, делегирует domain service,
     возвращает HTTP-ответ для просмотра полигона на карте.
+
+    Параметр `zoom` возвращает заранее упрощённую геометрию для масштаба карты,
+    `tolerance` — вариант, допуск которого ближе всего к указанному (в градусах).
+    Без параметров или пока варианты не построены возвращается полная геометрия.
     """
 
     @modify(
         extra_responses=[
+            ResponseSpec(dict[str, str], status_code=HTTPStatus.BAD_REQUEST),
             ResponseSpec(dict[str, str], status_code=HTTPStatus.UNAUTHORIZED),
             ResponseSpec(dict[str, str], status_code=HTTPStatus.NOT_FOUND),
         ],
@@ -47,10 +95,19 @@ class GetOSMPolygonController(Controller[MsgspecSerializer]):
                 status_code=HTTPStatus.UNAUTHORIZED,
             )
 
+        try:
+            zoom, tolerance = _parse_simplification(self.request.GET)
+        except InvalidSimplificationError as exc:
+            return self.to_response(
+                raw_data={'detail': str(exc)},
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
         relation_id = self.kwargs['relation_id']
+        zoom_band = resolve_zoom_band(zoom, tolerance)
 
         service = _get_polygon_service()
-        polygon = service.execute(relation_id)
+        polygon = service.execute(relation_id, zoom_band)
 
         if polygon is None:
             return self.to_response(
@@ -59,7 +116,7 @@ class GetOSMPolygonController(Controller[MsgspecSerializer]):
             )
 
         return self.to_response(
-            raw_data=polygon.to_geojson_feature(),
+            raw_data=polygon.to_geojson_feature(polygon.get_geometry(zoom_band)),
         )
 
 
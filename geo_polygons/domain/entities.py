@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from functools import cached_property
 from typing import Any
 
+from geo_polygons.domain.simplification import build_zoom_variants
+
 
 @dataclass(frozen=True)
 class GeoJSONGeometry:
@@ -12,20 +16,77 @@ class GeoJSONGeometry:
     coordinates: list[Any]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class OSMPolygon:
-    """Доменная модель OSM полигона."""
+    """
+    Доменная модель OSM полигона.
+    `zoom_variants` — упрощённые варианты геометрии по диапазонам масштабов карты
+    (см. `simplification.build_zoom_variants`): все построенные или только нужный запросу,
+    пустые, если ещё не построены.
+
+    `geometry_source` — полная геометрия или функция, которая её загружает: репозиторий
+    не читает и не декодирует полную геометрию, пока к `geometry` не обратились.
+    """
 
     relation_id: int
     name: str
-    geometry: dict[str, Any]
+    geometry_source: dict[str, Any] | Callable[[], dict[str, Any]] = field(repr=False)
+    zoom_variants: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # Срок хранения в кеше истёк: полигон ещё отдаётся, но его пора обновить
+    is_expired: bool = False
+
+    @cached_property
+    def geometry(self) -> dict[str, Any]:
+        """Полная геометрия GeoJSON, загружается при первом обращении."""
+        source = self.geometry_source
+        return source() if callable(source) else source
+
+    def __eq__(self, other: object) -> bool:
+        # Варианты и срок хранения производны от полной геометрии и на равенство не влияют
+        if not isinstance(other, OSMPolygon):
+            return NotImplemented
+        return (self.relation_id, self.name, self.geometry) == (
+            other.relation_id,
+            other.name,
+            other.geometry,
+        )
+
+    def with_zoom_variants(self) -> OSMPolygon:
+        """Возвращает полигон с построенными упрощёнными вариантами геометрии."""
+        return replace(
+            self, geometry_source=self.geometry, zoom_variants=build_zoom_variants(self.geometry)
+        )
 
-    def to_geojson_feature(self) -> dict[str, Any]:
+    def get_geometry(self, zoom_band: int | None = None) -> dict[str, Any]:
+        """
+        Возвращает геометрию для показа на карте: заранее построенный вариант для диапазона
+        масштабов `zoom_band` (см. `simplification.resolve_zoom_band`). Геометрия при
+        запросе не упрощается: пока варианты не построены командой `simplify_osm_polygons`,
+        а также без диапазона отдаётся полная геометрия.
+        """
+        if zoom_band is None:
+            return self.geometry
+        variant = self.zoom_variants.get(str(zoom_band))
+        return self.geometry if variant is None else variant
+
+    def to_geojson_feature(self, geometry: dict[str, Any] | None = None) -> dict[str, Any]:
         return {
             'type': 'Feature',
-            'geometry': self.geometry,
+            'geometry': self.geometry if geometry is None else geometry,
             'properties': {
                 'name': self.name,
                 'relation_id': self.relation_id,
             },
         }
+
+
+@dataclass(frozen=True)
+class MissingOSMPolygon:
+    """
+    Отрицательный результат: внешний API ответил, но полигона у объекта нет.
+    `reason` — empty, no_geojson или invalid_geometry.
+    """
+
+    relation_id: int
+    reason: str
+    is_expired: bool = field(default=False, compare=False)
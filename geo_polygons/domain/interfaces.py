@@ -1,25 +1,75 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 
-from geo_polygons.domain.entities import OSMPolygon
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
 
 
 class IPolygonRepository(ABC):
     """Интерфейс репозитория полигонов."""
 
     @abstractmethod
-    def get_by_relation_id(self, relation_id: int) -> OSMPolygon | None:
-        """Получить полигон из кеша по relation_id."""
+    def get_by_relation_id(
+        self, relation_id: int, zoom_band: int | None = None
+    ) -> OSMPolygon | MissingOSMPolygon | None:
+        """
+        Получить полигон или закешированный отрицательный результат по relation_id.
+        С `zoom_band` в полигоне есть только вариант геометрии этого диапазона масштабов.
+        """
 
     @abstractmethod
     def save(self, polygon: OSMPolygon) -> None:
         """Сохранить полигон в кеш."""
 
+    @abstractmethod
+    def save_missing(self, missing: MissingOSMPolygon) -> None:
+        """Сохранить в кеш отрицательный результат."""
+
 
 class IExternalPolygonService(ABC):
     """Интерфейс внешнего сервиса полигонов (Nominatim)."""
 
     @abstractmethod
-    def fetch_polygon(self, relation_id: int) -> OSMPolygon | None:
-        """Запросить полигон из внешнего API."""
+    def fetch_polygon(self, relation_id: int) -> OSMPolygon | MissingOSMPolygon | None:
+        """
+        Запросить полигон из внешнего API. MissingOSMPolygon — API ответил, что полигона нет,
+        None — API недоступен.
+        """
+
+    def fetch_polygons(
+        self, relation_ids: Iterable[int]
+    ) -> dict[int, OSMPolygon | MissingOSMPolygon]:
+        """
+        Запросить несколько полигонов. Результаты возвращаются по relation_id, объекты,
+        по которым API недоступен, в результат не попадают.
+        По умолчанию полигоны запрашиваются по одному.
+        """
+        polygons = {}
+        for relation_id in relation_ids:
+            polygon = self.fetch_polygon(relation_id)
+            if polygon is not None:
+                polygons[relation_id] = polygon
+        return polygons
+
+
+class IPolygonFetchLock(ABC):
+    """
+    Блокировка запроса полигона во внешнем API, общая для всех процессов:
+    один relation_id одновременно запрашивает только один запрос.
+    """
+
+    @abstractmethod
+    def acquire(self, relation_id: int) -> int | None:
+        """
+        Взять блокировку. Возвращает токен владельца для `release`
+        или None, если её держит другой запрос.
+        """
+
+    @abstractmethod
+    def release(self, relation_id: int, token: int) -> None:
+        """Освободить блокировку, если она всё ещё принадлежит владельцу `token`."""
+
+    @abstractmethod
+    def wait(self, relation_id: int) -> None:
+        """Дождаться освобождения блокировки, но не дольше её времени жизни."""
@@ -1,31 +1,124 @@
 from __future__ import annotations
 
-from geo_polygons.domain.entities import OSMPolygon
-from geo_polygons.domain.interfaces import IExternalPolygonService, IPolygonRepository
+from collections.abc import Iterable
+
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
+from geo_polygons.domain.interfaces import (
+    IExternalPolygonService,
+    IPolygonFetchLock,
+    IPolygonRepository,
+)
 
 
 class GetPolygonService:
     """
     Use case: получить полигон OSM.
     Сначала проверяет кеш, затем запрашивает внешний API и кеширует результат.
+
+    Отрицательный результат API (полигона нет) тоже кешируется, и до истечения его срока
+    API повторно не запрашивается. Полигон с истёкшим сроком отдаётся из кеша как есть:
+    его в фоне обновляет команда `prefetch_osm_polygons --expired`.
+
+    Упрощённые варианты геометрии на пути запроса не строятся: полученный полигон
+    сохраняется без них, а варианты строит команда `simplify_osm_polygons`.
+
+    С `fetch_lock` одновременные промахи по одному relation_id объединяются: внешний API
+    запрашивает только получивший блокировку запрос, а остальные ждут его и читают кеш.
     """
 
     def __init__(
         self,
         repository: IPolygonRepository,
         external_service: IExternalPolygonService,
+        fetch_lock: IPolygonFetchLock | None = None,
     ) -> None:
         self._repository = repository
         self._external_service = external_service
+        self._fetch_lock = fetch_lock
+
+    def execute(self, relation_id: int, zoom_band: int | None = None) -> OSMPolygon | None:
+        """
+        Возвращает полигон или None. С `zoom_band` из кеша читается только вариант
+        геометрии этого диапазона масштабов, полная геометрия загружается по обращению.
+        """
+        is_cached, polygon = self._read_cache(relation_id, zoom_band)
+        if is_cached:
+            return polygon
+
+        if self._fetch_lock is None:
+            return self._fetch_and_save(relation_id)
 
-    def execute(self, relation_id: int) -> OSMPolygon | None:
-        cached = self._repository.get_by_relation_id(relation_id)
-        if cached is not None:
-            return cached
+        token = self._fetch_lock.acquire(relation_id)
+        if token is None:
+            self._fetch_lock.wait(relation_id)
+            is_cached, polygon = self._read_cache(relation_id, zoom_band)
+            if is_cached:
+                return polygon
+            # Другой запрос ничего не сохранил (ошибка API или блокировка недоступна)
+            return self._fetch_and_save(relation_id)
 
+        try:
+            # Пока блокировка бралась, полигон мог сохранить предыдущий её владелец
+            is_cached, polygon = self._read_cache(relation_id, zoom_band)
+            if is_cached:
+                return polygon
+            return self._fetch_and_save(relation_id)
+        finally:
+            self._fetch_lock.release(relation_id, token)
+
+    def _read_cache(
+        self, relation_id: int, zoom_band: int | None
+    ) -> tuple[bool, OSMPolygon | None]:
+        """
+        Возвращает признак того, что ответ есть в кеше, и полигон.
+        Отрицательный результат с истёкшим сроком считается промахом.
+        """
+        cached = self._repository.get_by_relation_id(relation_id, zoom_band)
+        if cached is None:
+            return False, None
+        if isinstance(cached, MissingOSMPolygon):
+            return not cached.is_expired, None
+        return True, cached
+
+    def _fetch_and_save(self, relation_id: int) -> OSMPolygon | None:
         fetched = self._external_service.fetch_polygon(relation_id)
         if fetched is None:
             return None
+        if isinstance(fetched, MissingOSMPolygon):
+            self._repository.save_missing(fetched)
+            return None
 
         self._repository.save(fetched)
         return fetched
+
+
+class PrefetchPolygonsService:
+    """
+    Use case: заранее заполнить кеш полигонами OSM.
+    Полигоны запрашиваются во внешнем API пачками и сохраняются в кеш без проверки кеша —
+    отбор устаревших записей остаётся вызывающему коду.
+    """
+
+    def __init__(
+        self,
+        repository: IPolygonRepository,
+        external_service: IExternalPolygonService,
+    ) -> None:
+        self._repository = repository
+        self._external_service = external_service
+
+    def execute(self, relation_ids: Iterable[int]) -> dict[int, OSMPolygon | MissingOSMPolygon]:
+        """
+        Возвращает сохранённые результаты, включая отрицательные. Объекты, по которым
+        внешний API недоступен, в результат не попадают.
+        """
+        fetched = self._external_service.fetch_polygons(relation_ids)
+        saved: dict[int, OSMPolygon | MissingOSMPolygon] = {}
+        for relation_id, polygon in fetched.items():
+            if isinstance(polygon, MissingOSMPolygon):
+                self._repository.save_missing(polygon)
+            else:
+                polygon = polygon.with_zoom_variants()
+                self._repository.save(polygon)
+            saved[relation_id] = polygon
+        return saved
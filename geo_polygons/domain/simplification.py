@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from typing import Any
+
+# Верхние границы диапазонов масштабов карты, для которых заранее строятся упрощённые
+# варианты полигона. На масштабах крупнее последнего диапазона отдаётся полная геометрия
+ZOOM_BANDS = (4, 7, 10, 13)
+
+# Ширина тайла Leaflet в пикселях
+TILE_SIZE = 256
+
+# Количество знаков после запятой в координатах полной геометрии (~10 см)
+FULL_PRECISION = 6
+MAX_PRECISION = 7
+
+Point = Sequence[float]
+Ring = list[list[float]]
+
+
+def get_zoom_band(zoom: int) -> int | None:
+    """Возвращает диапазон масштабов для `zoom` или None, если нужна полная геометрия."""
+    for band in ZOOM_BANDS:
+        if zoom <= band:
+            return band
+    return None
+
+
+def snap_tolerance_to_zoom_band(tolerance: float) -> int | None:
+    """
+    Возвращает диапазон масштабов, вариант которого ближе всего к допуску `tolerance`
+    (в градусах), или None, если ближе полная геометрия. Допуски сравниваются по масштабу,
+    на котором пиксель равен допуску; полная геометрия отдаётся начиная с масштаба,
+    следующего за последним диапазоном.
+    """
+    zoom = math.log2(360 / (TILE_SIZE * tolerance))
+    full_geometry_zoom = ZOOM_BANDS[-1] + 1
+    nearest = min((*ZOOM_BANDS, full_geometry_zoom), key=lambda band: abs(band - zoom))
+    return None if nearest == full_geometry_zoom else nearest
+
+
+def resolve_zoom_band(zoom: int | None, tolerance: float | None) -> int | None:
+    """
+    Диапазон масштабов для параметров запроса: по допуску `tolerance`, если он передан,
+    иначе по масштабу `zoom`. None — нужна полная геометрия.
+    """
+    if tolerance is not None:
+        return snap_tolerance_to_zoom_band(tolerance)
+    if zoom is not None:
+        return get_zoom_band(zoom)
+    return None
+
+
+def get_zoom_tolerance(zoom: int) -> float:
+    """Размер пикселя в градусах долготы на масштабе `zoom`."""
+    return 360 / (TILE_SIZE * (1 << zoom))
+
+
+def get_precision(tolerance: float) -> int:
+    """
+    Количество знаков после запятой, при котором ошибка округления координат
+    на порядок меньше допуска упрощения.
+    """
+    if tolerance <= 0:
+        return FULL_PRECISION
+    return min(MAX_PRECISION, max(0, math.ceil(-math.log10(tolerance / 10))))
+
+
+def _simplify_line(points: Sequence[Point], tolerance: float) -> list[int]:
+    """
+    Алгоритм Дугласа — Пекера: возвращает отсортированные индексы точек, которые
+    отстоят от упрощённой линии не больше чем на `tolerance`. Концы линии сохраняются.
+    Рекурсия заменена стеком, чтобы длинные границы не упирались в предел рекурсии.
+    """
+    last = len(points) - 1
+    if last < 2:
+        return list(range(last + 1))
+
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    tolerance_squared = tolerance * tolerance
+    keep = [False] * (last + 1)
+    keep[0] = keep[last] = True
+    stack = [(0, last)]
+    while stack:
+        start, end = stack.pop()
+        ax, ay = xs[start], ys[start]
+        dx, dy = xs[end] - ax, ys[end] - ay
+        length_squared = dx * dx + dy * dy
+
+        max_distance = -1.0
+        farthest = start
+        for index in range(start + 1, end):
+            px, py = xs[index] - ax, ys[index] - ay
+            if length_squared == 0:
+                distance = px * px + py * py
+            else:
+                # Квадрат расстояния от точки до отрезка
+                t = (px * dx + py * dy) / length_squared
+                if t < 0:
+                    t = 0.0
+                elif t > 1:
+                    t = 1.0
+                ex, ey = px - t * dx, py - t * dy
+                distance = ex * ex + ey * ey
+            if distance > max_distance:
+                max_distance = distance
+                farthest = index
+
+        if max_distance > tolerance_squared:
+            keep[farthest] = True
+            if farthest - start > 1:
+                stack.append((start, farthest))
+            if end - farthest > 1:
+                stack.append((farthest, end))
+
+    return [index for index, kept in enumerate(keep) if kept]
+
+
+def _quantize(points: Sequence[Point], precision: int) -> Ring:
+    """Округляет координаты и убирает подряд идущие совпавшие после округления точки."""
+    quantized: Ring = []
+    for point in points:
+        rounded = [round(point[0], precision), round(point[1], precision)]
+        if not quantized or quantized[-1] != rounded:
+            quantized.append(rounded)
+    return quantized
+
+
+def simplify_ring(ring: Sequence[Point], tolerance: float, precision: int) -> Ring | None:
+    """
+    Упрощает замкнутое кольцо полигона. Кольцо делится на две линии в самой удалённой
+    от первой точке, иначе у линии с совпадающими концами нет опорного отрезка.
+    Возвращает None, если кольцо вырождается (меньше четырёх точек).
+    """
+    if len(ring) < 4:
+        return None
+
+    ax, ay = ring[0][0], ring[0][1]
+    middle = max(
+        range(len(ring) - 1),
+        key=lambda index: (ring[index][0] - ax) ** 2 + (ring[index][1] - ay) ** 2,
+    )
+    first_half = _simplify_line(ring[: middle + 1], tolerance)
+    second_half = _simplify_line(ring[middle:], tolerance)
+    indices = first_half + [middle + index for index in second_half[1:]]
+
+    simplified = _quantize([ring[index] for index in indices], precision)
+    if simplified[0] != simplified[-1]:
+        simplified.append(simplified[0])
+    return simplified if len(simplified) >= 4 else None
+
+
+def _simplify_polygon(
+    rings: Sequence[Sequence[Point]], tolerance: float, precision: int
+) -> list[Ring] | None:
+    if not rings:
+        return None
+    outer = simplify_ring(rings[0], tolerance, precision)
+    if outer is None:
+        return None
+    holes = [simplify_ring(ring, tolerance, precision) for ring in rings[1:]]
+    return [outer, *(hole for hole in holes if hole is not None)]
+
+
+def _collapse_polygon(rings: Sequence[Sequence[Point]], precision: int) -> list[Ring]:
+    """
+    Заменяет полигон, который меньше допуска упрощения, четырёхугольником из его точек,
+    чтобы объект не пропал с карты целиком.
+    """
+    ring = rings[0]
+    count = len(ring) - 1
+    points = [ring[0], ring[count // 3], ring[2 * count // 3], ring[0]]
+    return [[[round(x, precision), round(y, precision)] for x, y, *_ in points]]
+
+
+def simplify_geometry(
+    geometry: dict[str, Any], tolerance: float, precision: int | None = None
+) -> dict[str, Any]:
+    """
+    Упрощает GeoJSON Polygon/MultiPolygon с допуском `tolerance` (в градусах)
+    и округляет координаты до `precision` знаков (по умолчанию — по допуску).
+
+    Вырожденные дыры и части мультиполигона отбрасываются: на этом масштабе они меньше
+    пикселя. Остальные типы геометрии возвращаются без изменений.
+    """
+    if precision is None:
+        precision = get_precision(tolerance)
+    geometry_type = geometry.get('type')
+
+    if geometry_type == 'Polygon':
+        rings = geometry['coordinates']
+        simplified = _simplify_polygon(rings, tolerance, precision)
+        if simplified is None:
+            simplified = _collapse_polygon(rings, precision)
+        return {'type': 'Polygon', 'coordinates': simplified}
+
+    if geometry_type == 'MultiPolygon':
+        polygons = [
+            polygon
+            for polygon in (
+                _simplify_polygon(rings, tolerance, precision) for rings in geometry['coordinates']
+            )
+            if polygon is not None
+        ]
+        if not polygons and geometry['coordinates']:
+            largest = max(geometry['coordinates'], key=lambda rings: len(rings[0]))
+            polygons = [_collapse_polygon(largest, precision)]
+        return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+    return geometry
+
+
+def build_zoom_variants(geometry: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    Строит упрощённые варианты геометрии для каждого диапазона масштабов ZOOM_BANDS.
+    Ключ — верхняя граница диапазона строкой (ключи JSON всегда строки).
+    Каждый следующий вариант строится из предыдущего в обратном порядке: от детального
+    к грубому, поэтому грубые варианты обрабатывают уже прореженные точки.
+    """
+    variants: dict[str, dict[str, Any]] = {}
+    source = geometry
+    for band in sorted(ZOOM_BANDS, reverse=True):
+        source = simplify_geometry(source, get_zoom_tolerance(band))
+        variants[str(band)] = source
+    return dict(sorted(variants.items(), key=lambda item: int(item[0])))
+
+
+def count_points(geometry: dict[str, Any]) -> int:
+    """Количество вершин в геометрии Polygon/MultiPolygon."""
+    geometry_type = geometry.get('type')
+    if geometry_type == 'Polygon':
+        return sum(len(ring) for ring in geometry['coordinates'])
+    if geometry_type == 'MultiPolygon':
+        return sum(len(ring) for rings in geometry['coordinates'] for ring in rings)
+    return 0
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+from django.core.cache import caches
+from prometheus_client import Counter
+
+from geo_polygons.domain.interfaces import IPolygonFetchLock
+from services.cache import acquire_lease, release_lease
+
+FETCH_LOCK_CACHE_ALIAS = 'default'
+FETCH_LOCK_KEY_TEMPLATE = 'geo_polygons:fetch:{relation_id}:lock'
+# Время жизни блокировки: больше худшего времени запроса ко всем зеркалам Nominatim
+# (2 зеркала × (3 с соединения + 8 с чтения) = 22 с) с запасом на сохранение полигона,
+# иначе блокировка истечёт посреди запроса и следующий запрос пойдёт во внешний API
+FETCH_LOCK_TIMEOUT_SECONDS = 60
+FETCH_LOCK_POLL_INTERVAL_SECONDS = 0.1
+
+POLYGON_FETCHES_COALESCED = Counter(
+    'geo_polygons_fetches_coalesced_total',
+    'OSM polygon requests that waited for a concurrent Nominatim fetch of the same relation',
+)
+
+
+def _get_lock_key(relation_id: int) -> str:
+    return FETCH_LOCK_KEY_TEMPLATE.format(relation_id=relation_id)
+
+
+class CachePolygonFetchLock(IPolygonFetchLock):
+    """
+    Блокировка запроса полигона — аренда в кеше Django (Redis) с токеном владельца:
+    освобождается только своя аренда, даже если она истекла и её взял другой запрос.
+    Если Redis недоступен, блокировка не берётся и не ждётся — запросы идут
+    во внешний API независимо, как без неё.
+    """
+
+    def acquire(self, relation_id: int) -> int | None:
+        return acquire_lease(
+            FETCH_LOCK_CACHE_ALIAS, _get_lock_key(relation_id), FETCH_LOCK_TIMEOUT_SECONDS
+        )
+
+    def release(self, relation_id: int, token: int) -> None:
+        release_lease(FETCH_LOCK_CACHE_ALIAS, _get_lock_key(relation_id), token)
+
+    def wait(self, relation_id: int) -> None:
+        cache = caches[FETCH_LOCK_CACHE_ALIAS]
+        key = _get_lock_key(relation_id)
+        if cache.get(key) is None:
+            return
+
+        POLYGON_FETCHES_COALESCED.inc()
+        deadline = time.monotonic() + FETCH_LOCK_TIMEOUT_SECONDS
+        while time.monotonic() < deadline and cache.get(key) is not None:
+            time.sleep(FETCH_LOCK_POLL_INTERVAL_SECONDS)
@@ -0,0 +1,139 @@
+"""
+Компактный бинарный формат хранения геометрии OSM полигонов.
+
+Координаты Polygon/MultiPolygon округляются до STORAGE_PRECISION знаков (Nominatim отдаёт
+не больше семи), переводятся в целые числа и кодируются разностями с предыдущей точкой.
+Разности соседних точек малы, поэтому после zlib занимают в несколько раз меньше JSON.
+
+Формат: заголовок `<4sBBB` (MAGIC, версия, точность, тип геометрии), количество
+элементов структуры (uint32), сама структура (uint32: для Polygon — число колец и точек
+в каждом кольце, для MultiPolygon — то же с числом полигонов впереди) и сжатый zlib
+массив разностей координат (int64, x и y через одну).
+
+Декодирование выполняется встроенными функциями (array, itertools.accumulate, map, zip)
+без цикла Python по каждой координате; циклы идут только по кольцам.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Any
+
+MAGIC = b'OSMG'
+VERSION = 1
+STORAGE_PRECISION = 7
+
+_HEADER = struct.Struct('<4sBBB')
+_COUNT = struct.Struct('<I')
+_GEOMETRY_TYPES = {'Polygon': 1, 'MultiPolygon': 2}
+_GEOMETRY_TYPE_NAMES = {code: name for name, code in _GEOMETRY_TYPES.items()}
+# Данные хранятся в little-endian независимо от платформы
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+class GeometryCodecError(ValueError):
+    """Геометрию нельзя закодировать или данные повреждены."""
+
+
+def can_encode_geometry(geometry: dict[str, Any]) -> bool:
+    """Поддерживаются только Polygon и MultiPolygon, остальное хранится в JSON."""
+    return geometry.get('type') in _GEOMETRY_TYPES
+
+
+def encode_geometry(geometry: dict[str, Any], precision: int = STORAGE_PRECISION) -> bytes:
+    """Кодирует GeoJSON Polygon/MultiPolygon. Третья координата точки отбрасывается."""
+    geometry_type = geometry.get('type')
+    if geometry_type not in _GEOMETRY_TYPES:
+        raise GeometryCodecError(f'Unsupported geometry type: {geometry_type}')
+
+    polygons = geometry['coordinates']
+    structure = array('I')
+    if geometry_type == 'MultiPolygon':
+        structure.append(len(polygons))
+    else:
+        polygons = [polygons]
+
+    scale = 10**precision
+    values = array('q')
+    previous_x = previous_y = 0
+    try:
+        for rings in polygons:
+            structure.append(len(rings))
+            for ring in rings:
+                structure.append(len(ring))
+                for point in ring:
+                    x, y = round(point[0] * scale), round(point[1] * scale)
+                    values.append(x - previous_x)
+                    values.append(y - previous_y)
+                    previous_x, previous_y = x, y
+    except (IndexError, TypeError, OverflowError) as exc:
+        raise GeometryCodecError(f'Invalid coordinates: {exc}') from exc
+
+    if _BIG_ENDIAN:
+        structure.byteswap()
+        values.byteswap()
+    return b''.join(
+        (
+            _HEADER.pack(MAGIC, VERSION, precision, _GEOMETRY_TYPES[geometry_type]),
+            _COUNT.pack(len(structure)),
+            structure.tobytes(),
+            zlib.compress(values.tobytes()),
+        )
+    )
+
+
+def decode_geometry(data: bytes) -> dict[str, Any]:
+    """Восстанавливает GeoJSON геометрию из данных `encode_geometry`."""
+    try:
+        magic, version, precision, type_code = _HEADER.unpack_from(data)
+    except struct.error as exc:
+        raise GeometryCodecError(f'Corrupted geometry data: {exc}') from exc
+    if magic != MAGIC or version != VERSION or type_code not in _GEOMETRY_TYPE_NAMES:
+        raise GeometryCodecError('Unknown geometry format')
+
+    try:
+        offset = _HEADER.size
+        (structure_length,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        structure = array('I')
+        structure.frombytes(data[offset : offset + structure_length * structure.itemsize])
+        values = array('q')
+        values.frombytes(zlib.decompress(data[offset + structure_length * structure.itemsize :]))
+    except (struct.error, zlib.error, ValueError) as exc:
+        raise GeometryCodecError(f'Corrupted geometry data: {exc}') from exc
+    if _BIG_ENDIAN:
+        structure.byteswap()
+        values.byteswap()
+
+    divide = float(10**precision).__rtruediv__
+    points = list(
+        map(list, zip(map(divide, accumulate(values[0::2])), map(divide, accumulate(values[1::2]))))
+    )
+
+    counts = iter(structure)
+    position = 0
+
+    def read_polygon() -> list[list[list[float]]]:
+        nonlocal position
+        rings = []
+        for _ in range(next(counts)):
+            length = next(counts)
+            rings.append(points[position : position + length])
+            position += length
+        return rings
+
+    geometry_type = _GEOMETRY_TYPE_NAMES[type_code]
+    try:
+        if geometry_type == 'MultiPolygon':
+            coordinates: list[Any] = [read_polygon() for _ in range(next(counts))]
+        else:
+            coordinates = read_polygon()
+    except StopIteration as exc:
+        raise GeometryCodecError('Corrupted geometry structure') from exc
+    if position != len(points):
+        raise GeometryCodecError('Corrupted geometry structure')
+    return {'type': geometry_type, 'coordinates': coordinates}
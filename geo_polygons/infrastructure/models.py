@@ -1,15 +1,50 @@
+from typing import Any
+
 from django.db import models
+from django.db.models import Func, TextField
+from django.db.models.functions import Cast, Coalesce, Length
+
+from geo_polygons.infrastructure.geometry_codec import decode_geometry
 
 
 class OSMPolygonCache(models.Model):
     """
     Кеш полигонов OSM, полученных из Nominatim API.
     Хранит GeoJSON полигонов для повторного использования без запросов к внешнему API.
+    Отрицательные результаты API (полигона у объекта нет) хранятся без геометрии
+    со статусом причины и коротким сроком хранения.
     """
 
+    class Status(models.TextChoices):
+        FOUND = 'found', 'Найден'
+        EMPTY = 'empty', 'Объект не найден'
+        NO_GEOJSON = 'no_geojson', 'Нет геометрии'
+        INVALID_GEOMETRY = 'invalid_geometry', 'Некорректная геометрия'
+
     relation_id = models.BigIntegerField(unique=True, verbose_name='Nominatim relation ID')
     name = models.CharField(max_length=500, verbose_name='Название объекта', blank=True)
-    geojson = models.JSONField(verbose_name='GeoJSON полигона')
+    # Polygon/MultiPolygon хранятся в geometry_data (см. geometry_codec), остальные
+    # геометрии и записи, ещё не переведённые в бинарный формат, — в geojson
+    geojson = models.JSONField(null=True, blank=True, verbose_name='GeoJSON полигона')
+    geometry_data = models.BinaryField(
+        null=True, blank=True, editable=False, verbose_name='Геометрия в бинарном формате'
+    )
+    # Упрощённые варианты геометрии по диапазонам масштабов карты в бинарном формате
+    # (base64): {'z4': '...', 'z7': '...'}, см. repository.encode_zoom_variants.
+    # В старых записях — GeoJSON с ключами '4', '7', ...; такие варианты не читаются
+    zoom_variants = models.JSONField(
+        default=dict, blank=True, verbose_name='Упрощённые варианты GeoJSON по масштабам'
+    )
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.FOUND, verbose_name='Статус'
+    )
+    fetched_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Дата получения из Nominatim'
+    )
+    # Пустая дата означает, что срок хранения уже истёк
+    expires_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name='Срок хранения'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
@@ -18,5 +53,17 @@ class OSMPolygonCache(models.Model):
         verbose_name_plural = 'OSM полигоны'
         ordering = ['-created_at']
 
+    @property
+    def geometry(self) -> dict[str, Any]:
+        """GeoJSON геометрия полигона независимо от формата хранения."""
+        if self.geometry_data is not None:
+            return decode_geometry(bytes(self.geometry_data))
+        return self.geojson or {}
+
     def __str__(self) -> str:
         return f'{self.name or f"Relation {self.relation_id}"} (#{self.relation_id})'
+
+
+def get_stored_size() -> Func:
+    """Выражение для размера геометрии в базе в байтах в любом из форматов хранения."""
+    return Coalesce(Length('geometry_data'), Length(Cast('geojson', TextField())))
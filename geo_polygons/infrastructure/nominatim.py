@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import itertools
 import logging
 import time
+from collections.abc import Iterable, Sequence
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 from prometheus_client import Histogram
 
-from geo_polygons.domain.entities import OSMPolygon
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
 from geo_polygons.domain.interfaces import IExternalPolygonService
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,25 @@ NOMINATIM_HEADERS = {
     'Accept-Language': 'en',
     'User-Agent': 'MoiGoroda/1.0 (https://moigoroda.ru)',
 }
+# Таймауты соединения и чтения: недоступное зеркало отбрасывается быстрее медленного ответа
+NOMINATIM_TIMEOUT = (3, 8)
+# Максимальное количество объектов в одном запросе lookup
+NOMINATIM_BATCH_SIZE = 50
+NOMINATIM_POOL_SIZE = 10
+
+
+def _create_session() -> requests.Session:
+    """Сессия с пулом соединений к зеркалам, общая для всех потоков процесса."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=len(NOMINATIM_ENDPOINTS), pool_maxsize=NOMINATIM_POOL_SIZE
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+SESSION = _create_session()
 
 
 def _normalize_geometry(geometry: dict[str, Any]) -> dict[str, Any] | None:
@@ -57,65 +79,106 @@ def _normalize_geometry(geometry: dict[str, Any]) -> dict[str, Any] | None:
 class NominatimPolygonService(IExternalPolygonService):
     """Клиент Nominatim API с fallback на зеркала."""
 
-    def fetch_polygon(self, relation_id: int) -> OSMPolygon | None:
+    def fetch_polygon(self, relation_id: int) -> OSMPolygon | MissingOSMPolygon | None:
+        lookup = self._lookup([relation_id])
+        if lookup is None:
+            logger.error('All Nominatim endpoints failed for relation %s', relation_id)
+            return None
+
+        endpoint, start, results = lookup
+        if not results:
+            polygon: OSMPolygon | MissingOSMPolygon = MissingOSMPolygon(relation_id, 'empty')
+        else:
+            polygon = _parse_result(relation_id, results[0])
+        _observe(endpoint, _get_status(polygon), start)
+        return polygon
+
+    def fetch_polygons(
+        self, relation_ids: Iterable[int]
+    ) -> dict[int, OSMPolygon | MissingOSMPolygon]:
+        """
+        Запрашивает полигоны пачками по NOMINATIM_BATCH_SIZE одним запросом lookup
+        с `osm_ids=R1,R2,...`. Объекты, которых нет в ответе, возвращаются как отрицательный
+        результат `empty`; пачки, для которых все зеркала недоступны, пропускаются.
+        """
+        polygons: dict[int, OSMPolygon | MissingOSMPolygon] = {}
+        for batch in itertools.batched(dict.fromkeys(relation_ids), NOMINATIM_BATCH_SIZE):
+            lookup = self._lookup(batch)
+            if lookup is None:
+                logger.error('All Nominatim endpoints failed for relations %s', batch)
+                continue
+
+            endpoint, start, results = lookup
+            by_relation_id = {
+                result.get('osm_id'): result
+                for result in results
+                if result.get('osm_type') == 'relation'
+            }
+            for relation_id in batch:
+                result = by_relation_id.get(relation_id)
+                if result is None:
+                    polygons[relation_id] = MissingOSMPolygon(relation_id, 'empty')
+                else:
+                    polygons[relation_id] = _parse_result(relation_id, result)
+            _observe(endpoint, 'batch', start)
+        return polygons
+
+    def _lookup(self, relation_ids: Sequence[int]) -> tuple[str, float, list[Any]] | None:
+        """
+        Запрашивает relation_ids у зеркал по очереди до первого успешного ответа.
+        Возвращает зеркало, время начала запроса и результаты или None, если все зеркала
+        недоступны.
+        """
         params = {
-            'osm_ids': f'R{relation_id}',
+            'osm_ids': ','.join(f'R{relation_id}' for relation_id in relation_ids),
             'format': 'json',
             'polygon_geojson': '1',
         }
         for endpoint in NOMINATIM_ENDPOINTS:
             start = time.monotonic()
             try:
-                response = requests.get(
+                response = SESSION.get(
                     endpoint,
                     params=params,
                     headers=NOMINATIM_HEADERS,
-                    timeout=8,
+                    timeout=NOMINATIM_TIMEOUT,
                 )
                 response.raise_for_status()
                 results = response.json()
-                if not results:
-                    NOMINATIM_REQUEST_SECONDS.labels(
-                        endpoint=endpoint,
-                        status='empty',
-                    ).observe(time.monotonic() - start)
-                    return None
-
-                result = results[0]
-                raw_geometry = result.get('geojson')
-                if not raw_geometry:
-                    NOMINATIM_REQUEST_SECONDS.labels(
-                        endpoint=endpoint,
-                        status='no_geojson',
-                    ).observe(time.monotonic() - start)
-                    return None
-
-                geometry = _normalize_geometry(raw_geometry)
-                if geometry is None:
-                    NOMINATIM_REQUEST_SECONDS.labels(
-                        endpoint=endpoint,
-                        status='invalid_geometry',
-                    ).observe(time.monotonic() - start)
-                    return None
-
-                NOMINATIM_REQUEST_SECONDS.labels(
-                    endpoint=endpoint,
-                    status='success',
-                ).observe(time.monotonic() - start)
-                return OSMPolygon(
-                    relation_id=relation_id,
-                    name=result.get('display_name', '')[:500],
-                    geometry=geometry,
-                )
+                if not isinstance(results, list):
+                    raise ValueError('Unexpected Nominatim response')
             except (requests.RequestException, ValueError) as e:
-                NOMINATIM_REQUEST_SECONDS.labels(
-                    endpoint=endpoint,
-                    status='error',
-                ).observe(time.monotonic() - start)
+                _observe(endpoint, 'error', start)
                 logger.warning(
-                    'Nominatim API error (%s) for relation %s: %s', endpoint, relation_id, e
+                    'Nominatim API error (%s) for relations %s: %s', endpoint, params['osm_ids'], e
                 )
                 continue
-
-        logger.error('All Nominatim endpoints failed for relation %s', relation_id)
+            return endpoint, start, results
         return None
+
+
+def _observe(endpoint: str, status: str, start: float) -> None:
+    NOMINATIM_REQUEST_SECONDS.labels(endpoint=endpoint, status=status).observe(
+        time.monotonic() - start
+    )
+
+
+def _get_status(polygon: OSMPolygon | MissingOSMPolygon) -> str:
+    return polygon.reason if isinstance(polygon, MissingOSMPolygon) else 'success'
+
+
+def _parse_result(relation_id: int, result: dict[str, Any]) -> OSMPolygon | MissingOSMPolygon:
+    """Возвращает полигон из результата Nominatim или отрицательный результат."""
+    raw_geometry = result.get('geojson')
+    if not raw_geometry:
+        return MissingOSMPolygon(relation_id, 'no_geojson')
+
+    geometry = _normalize_geometry(raw_geometry)
+    if geometry is None:
+        return MissingOSMPolygon(relation_id, 'invalid_geometry')
+
+    return OSMPolygon(
+        relation_id=relation_id,
+        name=result.get('display_name', '')[:500],
+        geometry_source=geometry,
+    )
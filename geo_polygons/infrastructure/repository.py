@@ -1,46 +1,189 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import functools
 import logging
+from datetime import datetime, timedelta
+from typing import Any
 
+from django.conf import settings
 from django.db import IntegrityError
+from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
 from prometheus_client import Counter
 
-from geo_polygons.domain.entities import OSMPolygon
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
 from geo_polygons.domain.interfaces import IPolygonRepository
+from geo_polygons.domain.simplification import get_precision, get_zoom_tolerance
+from geo_polygons.infrastructure.geometry_codec import (
+    GeometryCodecError,
+    can_encode_geometry,
+    decode_geometry,
+    encode_geometry,
+)
 from geo_polygons.infrastructure.models import OSMPolygonCache
 
 logger = logging.getLogger(__name__)
 
+# result: hit, stale (срок хранения истёк, полигон отдан из кеша), negative (действующий
+# отрицательный результат) или miss (записи нет или отрицательный результат истёк)
 POLYGON_CACHE_REQUESTS = Counter(
     'geo_polygons_cache_requests_total',
     'OSM polygon cache lookups',
     ['result'],
 )
+POLYGON_CACHE_NEGATIVE_HITS = Counter(
+    'geo_polygons_cache_negative_hits_total',
+    'OSM polygon cache lookups answered by a cached negative Nominatim result',
+    ['reason'],
+)
+
+
+def get_storage_fields(geometry: dict[str, Any]) -> dict[str, Any]:
+    """
+    Возвращает значения полей OSMPolygonCache для хранения геометрии: Polygon/MultiPolygon
+    хранятся в бинарном формате, остальные геометрии — в JSON.
+    """
+    if can_encode_geometry(geometry):
+        try:
+            return {'geometry_data': encode_geometry(geometry), 'geojson': None}
+        except GeometryCodecError:
+            logger.warning('Failed to encode OSM polygon geometry, storing it as JSON')
+    return {'geometry_data': None, 'geojson': geometry}
+
+
+def get_zoom_variant_key(zoom_band: int | str) -> str:
+    """
+    Ключ варианта в OSMPolygonCache.zoom_variants. Ключ не числовой: числовой ключ
+    PostgreSQL в `->>` понимает как индекс массива, и вариант нельзя было бы прочитать
+    из базы отдельно от остальных.
+    """
+    return f'z{zoom_band}'
+
+
+def encode_zoom_variants(zoom_variants: dict[str, dict[str, Any]]) -> dict[str, str]:
+    """
+    Кодирует упрощённые варианты геометрии в бинарный формат (geometry_codec)
+    с точностью, до которой округлены их координаты, и хранит их в base64.
+    Варианты геометрий, которые нельзя закодировать, не сохраняются: для них
+    отдаётся полная геометрия.
+    """
+    encoded: dict[str, str] = {}
+    for band, geometry in zoom_variants.items():
+        if not can_encode_geometry(geometry):
+            continue
+        precision = get_precision(get_zoom_tolerance(int(band)))
+        try:
+            data = encode_geometry(geometry, precision)
+        except GeometryCodecError:
+            logger.warning('Failed to encode OSM polygon zoom variant %s', band)
+            continue
+        encoded[get_zoom_variant_key(band)] = base64.b64encode(data).decode('ascii')
+    return encoded
+
+
+def decode_zoom_variant(encoded: str) -> dict[str, Any] | None:
+    """Восстанавливает вариант из `encode_zoom_variants` или None, если данные повреждены."""
+    try:
+        return decode_geometry(base64.b64decode(encoded, validate=True))
+    except (binascii.Error, GeometryCodecError):
+        logger.warning('Failed to decode OSM polygon zoom variant, using full geometry')
+        return None
+
+
+def get_expires_at(now: datetime) -> datetime:
+    return now + timedelta(days=settings.GEO_POLYGONS_CACHE_TTL_DAYS)
+
+
+def get_negative_expires_at(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS)
+
+
+def _to_bytes(data: bytes | memoryview | None) -> bytes | None:
+    return None if data is None else bytes(data)
+
+
+def _load_geometry(cached: OSMPolygonCache) -> dict[str, Any]:
+    """
+    Загружает и декодирует полную геометрию записи, прочитанной без неё.
+    Запись, сохранённую до появления бинарного формата, заодно переводит в него.
+    """
+    cached.refresh_from_db(fields=['geojson', 'geometry_data'])
+    geometry = cached.geometry
+    if cached.geometry_data is None:
+        storage_fields = get_storage_fields(geometry)
+        if storage_fields['geometry_data'] is not None:
+            OSMPolygonCache.objects.filter(pk=cached.pk).update(**storage_fields)
+    return geometry
 
 
 class DjangoPolygonRepository(IPolygonRepository):
-    """Django ORM реализация репозитория полигонов."""
+    """
+    Django ORM реализация репозитория полигонов.
+    Поля с геометрией при чтении не загружаются: из вариантов читается только нужный
+    запросу (по ключу JSON в базе), а полная геометрия — при обращении к ней.
+    """
 
-    def get_by_relation_id(self, relation_id: int) -> OSMPolygon | None:
+    def get_by_relation_id(
+        self, relation_id: int, zoom_band: int | None = None
+    ) -> OSMPolygon | MissingOSMPolygon | None:
+        queryset = OSMPolygonCache.objects.defer('geojson', 'geometry_data', 'zoom_variants')
+        if zoom_band is not None:
+            queryset = queryset.annotate(
+                zoom_variant=KeyTextTransform(get_zoom_variant_key(zoom_band), 'zoom_variants')
+            )
         try:
-            cached = OSMPolygonCache.objects.get(relation_id=relation_id)
+            cached = queryset.get(relation_id=relation_id)
         except OSMPolygonCache.DoesNotExist:
             POLYGON_CACHE_REQUESTS.labels(result='miss').inc()
             return None
-        POLYGON_CACHE_REQUESTS.labels(result='hit').inc()
+
+        is_expired = cached.expires_at is None or cached.expires_at <= timezone.now()
+        if cached.status != OSMPolygonCache.Status.FOUND:
+            if is_expired:
+                POLYGON_CACHE_REQUESTS.labels(result='miss').inc()
+            else:
+                POLYGON_CACHE_REQUESTS.labels(result='negative').inc()
+                POLYGON_CACHE_NEGATIVE_HITS.labels(reason=cached.status).inc()
+            return MissingOSMPolygon(
+                relation_id=cached.relation_id, reason=cached.status, is_expired=is_expired
+            )
+
+        POLYGON_CACHE_REQUESTS.labels(result='stale' if is_expired else 'hit').inc()
+        zoom_variants: dict[str, dict[str, Any]] = {}
+        encoded_variant = getattr(cached, 'zoom_variant', None)
+        if encoded_variant is not None:
+            variant = decode_zoom_variant(encoded_variant)
+            if variant is not None:
+                zoom_variants[str(zoom_band)] = variant
         return OSMPolygon(
             relation_id=cached.relation_id,
             name=cached.name,
-            geometry=cached.geojson,
+            geometry_source=functools.partial(_load_geometry, cached),
+            zoom_variants=zoom_variants,
+            is_expired=is_expired,
         )
 
     def save(self, polygon: OSMPolygon) -> None:
+        now = timezone.now()
+        storage_fields = {
+            **get_storage_fields(polygon.geometry),
+            'zoom_variants': encode_zoom_variants(polygon.zoom_variants),
+        }
+        expiration_fields = {
+            'status': OSMPolygonCache.Status.FOUND,
+            'fetched_at': now,
+            'expires_at': get_expires_at(now),
+        }
         try:
             cached, created = OSMPolygonCache.objects.get_or_create(
                 relation_id=polygon.relation_id,
                 defaults={
                     'name': polygon.name,
-                    'geojson': polygon.geometry,
+                    **storage_fields,
+                    **expiration_fields,
                 },
             )
         except IntegrityError:
@@ -52,15 +195,62 @@ class DjangoPolygonRepository(IPolygonRepository):
             created = False
 
         if not created:
-            self._sync_cached_fields(cached, polygon)
+            self._sync_cached_fields(cached, polygon.name, storage_fields, expiration_fields)
+
+    def save_missing(self, missing: MissingOSMPolygon) -> None:
+        """
+        Сохраняет отрицательный результат на GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS.
+        Найденный ранее полигон не затирается: ему только переносится срок хранения,
+        чтобы API не запрашивался повторно до истечения короткого срока.
+        """
+        now = timezone.now()
+        expires_at = get_negative_expires_at(now)
+        found = OSMPolygonCache.objects.filter(
+            relation_id=missing.relation_id, status=OSMPolygonCache.Status.FOUND
+        )
+        if found.exists():
+            found.filter(Q(expires_at__isnull=True) | Q(expires_at__lt=expires_at)).update(
+                expires_at=expires_at
+            )
+            return
 
-    def _sync_cached_fields(self, cached: OSMPolygonCache, polygon: OSMPolygon) -> None:
-        updated_fields: list[str] = []
-        if cached.name != polygon.name:
-            cached.name = polygon.name
+        OSMPolygonCache.objects.update_or_create(
+            relation_id=missing.relation_id,
+            defaults={
+                'name': '',
+                'status': missing.reason,
+                'geojson': None,
+                'geometry_data': None,
+                'zoom_variants': {},
+                'fetched_at': now,
+                'expires_at': expires_at,
+            },
+        )
+
+    def _sync_cached_fields(
+        self,
+        cached: OSMPolygonCache,
+        name: str,
+        storage_fields: dict[str, Any],
+        expiration_fields: dict[str, Any],
+    ) -> None:
+        for field_name, value in expiration_fields.items():
+            setattr(cached, field_name, value)
+        updated_fields: list[str] = list(expiration_fields)
+        if cached.name != name:
+            cached.name = name
             updated_fields.append('name')
-        if cached.geojson != polygon.geometry:
-            cached.geojson = polygon.geometry
-            updated_fields.append('geojson')
-        if updated_fields:
-            cached.save(update_fields=updated_fields)
+        geometry_changed = cached.geojson != storage_fields['geojson'] or (
+            _to_bytes(cached.geometry_data) != storage_fields['geometry_data']
+        )
+        if geometry_changed:
+            cached.geojson = storage_fields['geojson']
+            cached.geometry_data = storage_fields['geometry_data']
+            updated_fields.extend(['geojson', 'geometry_data'])
+        zoom_variants = storage_fields['zoom_variants']
+        if cached.zoom_variants != zoom_variants and (zoom_variants or geometry_changed):
+            # Варианты старой геометрии не годятся, даже если новые ещё не построены
+            cached.zoom_variants = zoom_variants
+            updated_fields.append('zoom_variants')
+        # Дата обновления отмечает повторное получение полигона, даже если он не изменился
+        cached.save(update_fields=[*updated_fields, 'updated_at'])
@@ -0,0 +1,44 @@
+"""
+Команда переводит полигоны кеша, сохранённые в JSON, в бинарный формат (geometry_codec).
+Пока она не прошла по всем записям, репозиторий читает оба формата и переводит
+запись при первом чтении; команда нужна, чтобы не ждать обращения к редким полигонам.
+"""
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from geo_polygons.infrastructure.models import OSMPolygonCache
+from geo_polygons.infrastructure.repository import get_storage_fields
+
+
+class Command(BaseCommand):
+    help = 'Переводит геометрию OSM полигонов из JSON в компактный бинарный формат.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Количество полигонов, читаемых из базы за один запрос.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        queryset = OSMPolygonCache.objects.filter(geometry_data__isnull=True, geojson__isnull=False)
+
+        converted = skipped = 0
+        for cached in queryset.only('id', 'geojson', 'geometry_data').iterator(
+            chunk_size=options['batch_size']
+        ):
+            storage_fields = get_storage_fields(cached.geometry)
+            if storage_fields['geometry_data'] is None:
+                # Точки и прочие геометрии остаются в JSON
+                skipped += 1
+                continue
+            OSMPolygonCache.objects.filter(pk=cached.pk).update(**storage_fields)
+            converted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Переведено полигонов: {converted}, оставлено в JSON: {skipped}')
+        )
@@ -0,0 +1,193 @@
+"""
+Команда заранее заполняет кеш полигонов OSM, чтобы первый посетитель района или региона
+не ждал внешний API. Relation ID берутся из файла (по одному в строке, `R123` или `123`,
+строки с `#` пропускаются), из справочника городов и районов (поле osm_relation_id)
+или из записей кеша с истёкшим сроком хранения (`--expired`, для запуска по расписанию).
+
+Полигоны запрашиваются пачками в несколько потоков с общим ограничением частоты запросов.
+Каждая пачка сохраняется сразу, а записи кеша с действующим сроком хранения пропускаются,
+поэтому прерванную команду достаточно запустить повторно — она продолжит с необработанных
+полигонов. Отрицательные ответы Nominatim (полигона нет) тоже сохраняются в кеш.
+"""
+
+import threading
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from city.models import City, CityDistrict
+from geo_polygons.domain.entities import MissingOSMPolygon
+from geo_polygons.domain.services import PrefetchPolygonsService
+from geo_polygons.infrastructure.models import OSMPolygonCache
+from geo_polygons.infrastructure.nominatim import NOMINATIM_BATCH_SIZE, NominatimPolygonService
+from geo_polygons.infrastructure.repository import DjangoPolygonRepository
+
+
+class RateLimiter:
+    """Пропускает не больше `rate` вызовов `wait` в секунду суммарно по всем потокам."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait_seconds = self._next_at - now
+            self._next_at = max(now, self._next_at) + self._interval
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+
+def read_relation_ids(path: Path) -> list[int]:
+    relation_ids = []
+    for line_number, line in enumerate(path.read_text().splitlines(), start=1):
+        value = line.split('#', 1)[0].strip().removeprefix('R').removeprefix('r')
+        if not value:
+            continue
+        if not value.isdigit():
+            raise CommandError(f'{path}:{line_number}: некорректный relation ID "{line.strip()}"')
+        relation_ids.append(int(value))
+    return relation_ids
+
+
+def get_catalog_relation_ids() -> list[int]:
+    relation_ids: list[int] = []
+    for model in (City, CityDistrict):
+        relation_ids.extend(
+            relation_id
+            for relation_id in model.objects.filter(osm_relation_id__isnull=False).values_list(
+                'osm_relation_id', flat=True
+            )
+            if relation_id is not None
+        )
+    return relation_ids
+
+
+def get_expired_relation_ids() -> list[int]:
+    """Relation ID записей кеша с истёкшим сроком хранения, начиная с записей без срока и давно истёкших."""
+    return list(
+        OSMPolygonCache.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__lte=timezone.now())
+        )
+        .order_by(F('expires_at').asc(nulls_first=True))
+        .values_list('relation_id', flat=True)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее загружает полигоны OSM в кеш из файла, из справочника городов и районов '
+        'или обновляет записи кеша с истёкшим сроком хранения.'
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--file', type=Path, help='Файл с relation ID, по одному в строке.')
+        source.add_argument(
+            '--from-catalog',
+            action='store_true',
+            help='Взять relation ID городов и районов из справочника.',
+        )
+        source.add_argument(
+            '--expired',
+            action='store_true',
+            help='Обновить записи кеша с истёкшим сроком хранения.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4, help='Количество потоков запросов к Nominatim.'
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=1.0,
+            help='Максимум запросов к Nominatim в секунду по всем потокам (0 — без ограничения).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=NOMINATIM_BATCH_SIZE,
+            help='Количество полигонов в одном запросе к Nominatim.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Загрузить и полигоны с действующим сроком хранения в кеше.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        if options['file'] is not None:
+            relation_ids = read_relation_ids(options['file'])
+        elif options['from_catalog']:
+            relation_ids = get_catalog_relation_ids()
+        else:
+            relation_ids = get_expired_relation_ids()
+        relation_ids = list(dict.fromkeys(relation_ids))
+
+        if not options['force']:
+            fresh = set(
+                OSMPolygonCache.objects.filter(
+                    relation_id__in=relation_ids, expires_at__gt=timezone.now()
+                ).values_list('relation_id', flat=True)
+            )
+            relation_ids = [relation_id for relation_id in relation_ids if relation_id not in fresh]
+            self.stdout.write(f'Пропущено свежих полигонов: {len(fresh)}')
+
+        total = len(relation_ids)
+        batch_size = max(1, min(options['batch_size'], NOMINATIM_BATCH_SIZE))
+        batches = [relation_ids[i : i + batch_size] for i in range(0, total, batch_size)]
+        rate_limiter = RateLimiter(options['rate_limit'])
+        service = PrefetchPolygonsService(
+            repository=DjangoPolygonRepository(), external_service=NominatimPolygonService()
+        )
+
+        def prefetch(batch: list[int]) -> tuple[int, int]:
+            """Возвращает количество сохранённых полигонов и отрицательных результатов."""
+            rate_limiter.wait()
+            try:
+                results = service.execute(batch).values()
+            finally:
+                connection.close()
+            missing = sum(isinstance(result, MissingOSMPolygon) for result in results)
+            return len(results) - missing, missing
+
+        processed = saved = not_found = 0
+        executor = ThreadPoolExecutor(max_workers=max(1, options['workers']))
+        try:
+            futures = {executor.submit(prefetch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                processed += len(futures[future])
+                try:
+                    batch_saved, batch_not_found = future.result()
+                except Exception as exc:
+                    self.stderr.write(f'Ошибка загрузки пачки {futures[future]}: {exc}')
+                else:
+                    saved += batch_saved
+                    not_found += batch_not_found
+                self.stdout.write(
+                    f'Обработано {processed} из {total}, сохранено {saved}, полигона нет: {not_found}'
+                )
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Прервано: сохранено {saved}. Повторный запуск продолжит загрузку.'
+                )
+            )
+            raise
+        executor.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Загружено полигонов: {saved} из {total}, полигона нет: {not_found}, '
+                f'не загружено: {processed - saved - not_found}'
+            )
+        )
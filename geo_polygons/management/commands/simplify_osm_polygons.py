@@ -0,0 +1,91 @@
+"""
+Команда строит упрощённые по масштабам варианты геометрии для полигонов в кеше
+и выводит замер для самых больших полигонов: количество точек, размер GeoJSON
+и время построения по каждому диапазону масштабов.
+
+Запрос к API варианты не строит: полигоны, сохранённые при запросе или до появления
+вариантов, отдаются с полной геометрией, пока их не обработает эта команда (полигоны
+из `prefetch_osm_polygons` сохраняются уже с вариантами). Команду стоит запускать
+по расписанию: без `--force` она обрабатывает только полигоны без вариантов или
+с вариантами в прежнем формате GeoJSON (варианты хранятся в бинарном формате).
+"""
+
+import json
+import time
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from geo_polygons.domain.entities import OSMPolygon
+from geo_polygons.domain.simplification import (
+    ZOOM_BANDS,
+    count_points,
+    get_zoom_tolerance,
+    simplify_geometry,
+)
+from geo_polygons.infrastructure.models import OSMPolygonCache, get_stored_size
+from geo_polygons.infrastructure.repository import encode_zoom_variants, get_zoom_variant_key
+
+
+def _geojson_size(geometry: dict[str, Any]) -> int:
+    return len(json.dumps(geometry, separators=(',', ':')).encode())
+
+
+class Command(BaseCommand):
+    help = 'Строит упрощённые варианты геометрии OSM полигонов и замеряет их размер.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перестроить варианты и для полигонов, у которых они уже есть.',
+        )
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Вывести замер для N самых больших полигонов в кеше.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        queryset = OSMPolygonCache.objects.filter(status=OSMPolygonCache.Status.FOUND)
+        if not options['force']:
+            # Без вариантов или с вариантами в прежнем формате GeoJSON
+            queryset = queryset.exclude(zoom_variants__has_key=get_zoom_variant_key(ZOOM_BANDS[0]))
+
+        updated = 0
+        fields = ('id', 'relation_id', 'name', 'geojson', 'geometry_data')
+        for cached in queryset.only(*fields).iterator(chunk_size=50):
+            polygon = OSMPolygon(cached.relation_id, cached.name, cached.geometry)
+            OSMPolygonCache.objects.filter(pk=cached.pk).update(
+                zoom_variants=encode_zoom_variants(polygon.with_zoom_variants().zoom_variants)
+            )
+            updated += 1
+        self.stdout.write(self.style.SUCCESS(f'Построены варианты для полигонов: {updated}'))
+
+        if options['benchmark']:
+            self._benchmark(options['benchmark'])
+
+    def _benchmark(self, limit: int) -> None:
+        largest = (
+            OSMPolygonCache.objects.annotate(size=get_stored_size())
+            .order_by('-size')
+            .only('relation_id', 'name', 'geojson', 'geometry_data')[:limit]
+        )
+        for cached in largest:
+            geometry = cached.geometry
+            self.stdout.write(
+                f'{cached.name or cached.relation_id} (#{cached.relation_id}): '
+                f'полная геометрия — {count_points(geometry)} точек, '
+                f'{_geojson_size(geometry)} байт GeoJSON, {cached.size} байт в базе'
+            )
+            for band in ZOOM_BANDS:
+                started_at = time.perf_counter()
+                simplified = simplify_geometry(geometry, get_zoom_tolerance(band))
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                self.stdout.write(
+                    f'  zoom <= {band}: {count_points(simplified)} точек, '
+                    f'{_geojson_size(simplified)} байт, {elapsed_ms:.1f} мс'
+                )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo_polygons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='osmpolygoncache',
+            name='zoom_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Упрощённые варианты GeoJSON по масштабам'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo_polygons', '0002_osmpolygoncache_zoom_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='osmpolygoncache',
+            name='geometry_data',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Геометрия в бинарном формате'),
+        ),
+        migrations.AlterField(
+            model_name='osmpolygoncache',
+            name='geojson',
+            field=models.JSONField(blank=True, null=True, verbose_name='GeoJSON полигона'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:24
+
+from datetime import timedelta
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import F
+
+
+def set_expiration(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """Срок хранения сохранённых ранее полигонов отсчитывается от даты их обновления."""
+    OSMPolygonCache = apps.get_model('geo_polygons', 'OSMPolygonCache')
+    OSMPolygonCache.objects.update(
+        fetched_at=F('updated_at'),
+        expires_at=F('updated_at') + timedelta(days=settings.GEO_POLYGONS_CACHE_TTL_DAYS),
+    )
+
+
+def noop(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo_polygons', '0003_osmpolygoncache_geometry_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='osmpolygoncache',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Срок хранения'),
+        ),
+        migrations.AddField(
+            model_name='osmpolygoncache',
+            name='fetched_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата получения из Nominatim'),
+        ),
+        migrations.AddField(
+            model_name='osmpolygoncache',
+            name='status',
+            field=models.CharField(choices=[('found', 'Найден'), ('empty', 'Объект не найден'), ('no_geojson', 'Нет геометрии'), ('invalid_geometry', 'Некорректная геометрия')], default='found', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.RunPython(set_expiration, noop),
+    ]
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
+from collections.abc import Generator
+from dataclasses import dataclass, field
 from datetime import timedelta
 from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Any, cast
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 from django.contrib.auth.models import User
@@ -34,7 +40,7 @@ def make_polygon(
     return OSMPolygon(
         relation_id=relation_id,
         name=name,
-        geometry=geometry or POLYGON_GEOMETRY,
+        geometry_source=geometry or POLYGON_GEOMETRY,
     )
 
 
@@ -97,3 +103,60 @@ def mock_polygon_service(mocker: Any) -> Any:
     service.configure = configure
     mocker.patch('geo_polygons.api._get_polygon_service', return_value=service)
     return service
+
+
+@dataclass
+class NominatimStub:
+    """
+    Локальный HTTP-сервер вместо Nominatim lookup. Отвечает на `osm_ids=R1,R2,...`
+    объектами из `polygons` (relation_id -> (название, геометрия)) и записывает запросы.
+    """
+
+    url: str
+    polygons: dict[int, tuple[str, dict[str, Any]]] = field(default_factory=dict)
+    requests: list[list[int]] = field(default_factory=list)
+    delay_seconds: float = 0.0
+    status_code: int = 200
+
+
+@pytest.fixture
+def nominatim_stub(mocker: Any) -> Generator[NominatimStub, None, None]:
+    stub: NominatimStub
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            query = parse_qs(urlparse(self.path).query)
+            relation_ids = [int(osm_id[1:]) for osm_id in query['osm_ids'][0].split(',')]
+            stub.requests.append(relation_ids)
+            time.sleep(stub.delay_seconds)
+
+            results = [
+                {
+                    'osm_type': 'relation',
+                    'osm_id': relation_id,
+                    'display_name': stub.polygons[relation_id][0],
+                    'geojson': stub.polygons[relation_id][1],
+                }
+                for relation_id in relation_ids
+                if relation_id in stub.polygons
+            ]
+            body = json.dumps(results).encode()
+            self.send_response(stub.status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    stub = NominatimStub(url=f'http://127.0.0.1:{server.server_port}/lookup')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    mocker.patch('geo_polygons.infrastructure.nominatim.NOMINATIM_ENDPOINTS', [stub.url])
+    try:
+        yield stub
+    finally:
+        server.shutdown()
+        server.server_close()
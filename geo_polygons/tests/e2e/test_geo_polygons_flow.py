@@ -131,7 +131,7 @@ def test_nominatim_fetch_persists_polygon_for_subsequent_api_calls(
         },
     ]
     mocker.patch(
-        'geo_polygons.infrastructure.nominatim.requests.get',
+        'geo_polygons.infrastructure.nominatim.SESSION.get',
         return_value=nominatim_response,
     )
     service = GetPolygonService(
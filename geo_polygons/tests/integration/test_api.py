@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import json
+from io import StringIO
 from typing import Any
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import Client
 from django.urls import reverse
 
 from geo_polygons.domain.services import GetPolygonService
 from geo_polygons.infrastructure.models import OSMPolygonCache
-from geo_polygons.infrastructure.repository import DjangoPolygonRepository
-from geo_polygons.tests.conftest import RELATION_ID, make_polygon, response_json
+from geo_polygons.infrastructure.repository import DjangoPolygonRepository, decode_zoom_variant
+from geo_polygons.tests.conftest import (
+    POLYGON_GEOMETRY,
+    RELATION_ID,
+    make_polygon,
+    response_json,
+)
 
 
 def _polygon_url(relation_id: int = RELATION_ID) -> str:
@@ -93,6 +100,90 @@ def test_get_polygon_fetches_from_external_service_and_caches(
     external.fetch_polygon.assert_called_once_with(RELATION_ID)
 
 
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_get_polygon_returns_simplified_geometry_for_zoom(
+    client: Client,
+    user: User,
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    call_command('simplify_osm_polygons', stdout=StringIO())
+    client.force_login(user)
+
+    response = client.get(_polygon_url(), {'zoom': 6})
+
+    assert response.status_code == 200
+    cached_polygon.refresh_from_db()
+    assert response_json(response)['geometry'] == decode_zoom_variant(
+        cached_polygon.zoom_variants['z7']
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_get_polygon_returns_full_geometry_until_variants_are_built(
+    client: Client,
+    user: User,
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    client.force_login(user)
+
+    response = client.get(_polygon_url(), {'zoom': 6})
+
+    assert response.status_code == 200
+    assert response_json(response)['geometry'] == POLYGON_GEOMETRY
+    cached_polygon.refresh_from_db()
+    assert cached_polygon.zoom_variants == {}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_get_polygon_returns_400_for_invalid_zoom(
+    client: Client,
+    user: User,
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    client.force_login(user)
+
+    response = client.get(_polygon_url(), {'zoom': 'far'})
+
+    assert response.status_code == 400
+    assert response_json(response) == {'detail': 'Параметр zoom должен быть целым числом'}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_simplify_osm_polygons_command_builds_variants_and_benchmarks(
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    out = StringIO()
+
+    call_command('simplify_osm_polygons', benchmark=1, stdout=out)
+
+    cached_polygon.refresh_from_db()
+    assert set(cached_polygon.zoom_variants) == {'z4', 'z7', 'z10', 'z13'}
+    assert 'Построены варианты для полигонов: 1' in out.getvalue()
+    assert 'zoom <= 13:' in out.getvalue()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_compact_osm_polygons_command_converts_json_rows(
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    OSMPolygonCache.objects.create(
+        relation_id=RELATION_ID + 1, geojson={'type': 'Point', 'coordinates': [0.0, 0.0]}
+    )
+    out = StringIO()
+
+    call_command('compact_osm_polygons', stdout=out)
+
+    cached_polygon.refresh_from_db()
+    assert cached_polygon.geojson is None
+    assert cached_polygon.geometry == make_polygon().geometry
+    assert 'Переведено полигонов: 1, оставлено в JSON: 1' in out.getvalue()
+
+
 @pytest.mark.integration
 @pytest.mark.django_db
 def test_download_requires_authentication(client: Client, cached_polygon: OSMPolygonCache) -> None:
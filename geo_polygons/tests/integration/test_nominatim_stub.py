@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+import pytest
+from django.db import connection
+
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
+from geo_polygons.domain.services import GetPolygonService
+from geo_polygons.infrastructure.fetch_lock import CachePolygonFetchLock
+from geo_polygons.infrastructure.models import OSMPolygonCache
+from geo_polygons.infrastructure.nominatim import NominatimPolygonService
+from geo_polygons.infrastructure.repository import DjangoPolygonRepository
+from geo_polygons.tests.conftest import POLYGON_GEOMETRY, RELATION_ID, NominatimStub
+
+
+@pytest.mark.integration
+def test_fetch_polygon_from_stub_server(nominatim_stub: NominatimStub) -> None:
+    nominatim_stub.polygons[RELATION_ID] = ('Moscow Oblast', POLYGON_GEOMETRY)
+
+    polygon = NominatimPolygonService().fetch_polygon(RELATION_ID)
+
+    assert isinstance(polygon, OSMPolygon)
+    assert polygon.name == 'Moscow Oblast'
+    assert polygon.geometry == POLYGON_GEOMETRY
+    assert nominatim_stub.requests == [[RELATION_ID]]
+
+
+@pytest.mark.integration
+def test_fetch_polygons_uses_one_lookup_per_batch(
+    nominatim_stub: NominatimStub, mocker: Any
+) -> None:
+    mocker.patch('geo_polygons.infrastructure.nominatim.NOMINATIM_BATCH_SIZE', 2)
+    nominatim_stub.polygons.update(
+        {
+            1: ('First', POLYGON_GEOMETRY),
+            2: ('Second', POLYGON_GEOMETRY),
+            3: ('Without geometry', {}),
+        }
+    )
+
+    polygons = NominatimPolygonService().fetch_polygons([1, 2, 3, 4, 1])
+
+    assert {
+        relation_id: polygon.name
+        for relation_id, polygon in polygons.items()
+        if isinstance(polygon, OSMPolygon)
+    } == {1: 'First', 2: 'Second'}
+    assert polygons[3] == MissingOSMPolygon(3, 'no_geojson')
+    assert polygons[4] == MissingOSMPolygon(4, 'empty')
+    assert nominatim_stub.requests == [[1, 2], [3, 4]]
+
+
+@pytest.mark.integration
+def test_fetch_polygons_skips_batch_when_server_fails(nominatim_stub: NominatimStub) -> None:
+    nominatim_stub.status_code = 503
+
+    assert NominatimPolygonService().fetch_polygons([RELATION_ID]) == {}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_misses_are_coalesced_into_one_fetch(nominatim_stub: NominatimStub) -> None:
+    nominatim_stub.polygons[RELATION_ID] = ('Moscow Oblast', POLYGON_GEOMETRY)
+    nominatim_stub.delay_seconds = 0.3
+    service = GetPolygonService(
+        repository=DjangoPolygonRepository(),
+        external_service=NominatimPolygonService(),
+        fetch_lock=CachePolygonFetchLock(),
+    )
+    results: list[Any] = []
+
+    def worker() -> None:
+        try:
+            results.append(service.execute(RELATION_ID))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert nominatim_stub.requests == [[RELATION_ID]]
+    assert len(results) == 6
+    assert all(polygon is not None and polygon.name == 'Moscow Oblast' for polygon in results)
+    assert OSMPolygonCache.objects.filter(relation_id=RELATION_ID).count() == 1
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_negative_result_is_cached_until_it_expires(nominatim_stub: NominatimStub) -> None:
+    service = GetPolygonService(
+        repository=DjangoPolygonRepository(), external_service=NominatimPolygonService()
+    )
+
+    assert service.execute(RELATION_ID) is None
+    assert service.execute(RELATION_ID) is None
+    assert nominatim_stub.requests == [[RELATION_ID]]
+
+    OSMPolygonCache.objects.filter(relation_id=RELATION_ID).update(expires_at=None)
+    nominatim_stub.polygons[RELATION_ID] = ('Moscow Oblast', POLYGON_GEOMETRY)
+    polygon = service.execute(RELATION_ID)
+
+    assert polygon is not None
+    assert polygon.name == 'Moscow Oblast'
+    assert nominatim_stub.requests == [[RELATION_ID], [RELATION_ID]]
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from city.models import City, CityDistrict
+from country.models import Country
+from geo_polygons.infrastructure.models import OSMPolygonCache
+from geo_polygons.management.commands.prefetch_osm_polygons import RateLimiter
+from geo_polygons.tests.conftest import POLYGON_GEOMETRY, NominatimStub
+
+
+def _prefetch(*args: str) -> str:
+    out = StringIO()
+    call_command('prefetch_osm_polygons', *args, '--rate-limit', '0', stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_prefetch_from_file_saves_polygons_and_negative_results(
+    nominatim_stub: NominatimStub, tmp_path: Path
+) -> None:
+    nominatim_stub.polygons.update(
+        {1: ('First', POLYGON_GEOMETRY), 2: ('Second', POLYGON_GEOMETRY)}
+    )
+    path = tmp_path / 'relations.txt'
+    path.write_text('R1\n2  # район\n\n# комментарий\n3\n1\n')
+
+    output = _prefetch('--file', str(path), '--batch-size', '1', '--workers', '2')
+
+    assert sorted(nominatim_stub.requests) == [[1], [2], [3]]
+    assert dict(OSMPolygonCache.objects.values_list('relation_id', 'status')) == {
+        1: OSMPolygonCache.Status.FOUND,
+        2: OSMPolygonCache.Status.FOUND,
+        3: OSMPolygonCache.Status.EMPTY,
+    }
+    assert set(OSMPolygonCache.objects.get(relation_id=1).zoom_variants) == {
+        'z4',
+        'z7',
+        'z10',
+        'z13',
+    }
+    assert 'Обработано 3 из 3' in output
+    assert 'Загружено полигонов: 2 из 3, полигона нет: 1, не загружено: 0' in output
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_prefetch_skips_unexpired_polygons_unless_forced(
+    nominatim_stub: NominatimStub, tmp_path: Path
+) -> None:
+    nominatim_stub.polygons.update(
+        {1: ('First', POLYGON_GEOMETRY), 2: ('Second', POLYGON_GEOMETRY)}
+    )
+    OSMPolygonCache.objects.create(
+        relation_id=1,
+        name='First',
+        geojson=POLYGON_GEOMETRY,
+        expires_at=timezone.now() + timedelta(days=1),
+    )
+    OSMPolygonCache.objects.create(
+        relation_id=2,
+        name='Second',
+        geojson=POLYGON_GEOMETRY,
+        expires_at=timezone.now() - timedelta(days=1),
+    )
+    path = tmp_path / 'relations.txt'
+    path.write_text('1\n2\n')
+
+    output = _prefetch('--file', str(path))
+
+    assert nominatim_stub.requests == [[2]]
+    assert 'Пропущено свежих полигонов: 1' in output
+    assert OSMPolygonCache.objects.filter(relation_id=2, expires_at__gt=timezone.now()).exists()
+
+    _prefetch('--file', str(path), '--force')
+
+    assert nominatim_stub.requests == [[2], [1, 2]]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_prefetch_expired_refreshes_stale_entries(nominatim_stub: NominatimStub) -> None:
+    now = timezone.now()
+    nominatim_stub.polygons.update(
+        {1: ('Updated', POLYGON_GEOMETRY), 2: ('Second', POLYGON_GEOMETRY)}
+    )
+    OSMPolygonCache.objects.create(
+        relation_id=1, name='Old', geojson=POLYGON_GEOMETRY, expires_at=now - timedelta(days=1)
+    )
+    OSMPolygonCache.objects.create(
+        relation_id=2, name='Second', geojson=POLYGON_GEOMETRY, expires_at=now + timedelta(days=1)
+    )
+    OSMPolygonCache.objects.create(
+        relation_id=3,
+        status=OSMPolygonCache.Status.EMPTY,
+        expires_at=now - timedelta(minutes=1),
+    )
+    OSMPolygonCache.objects.create(relation_id=4, name='Legacy', geojson=POLYGON_GEOMETRY)
+    nominatim_stub.polygons[4] = ('Legacy', POLYGON_GEOMETRY)
+
+    output = _prefetch('--expired')
+
+    assert nominatim_stub.requests == [[4, 1, 3]]
+    assert OSMPolygonCache.objects.get(relation_id=1).name == 'Updated'
+    assert set(
+        OSMPolygonCache.objects.filter(expires_at__gt=now).values_list('relation_id', flat=True)
+    ) == {1, 2, 3, 4}
+    assert 'Загружено полигонов: 2 из 3, полигона нет: 1, не загружено: 0' in output
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_prefetch_from_catalog(nominatim_stub: NominatimStub) -> None:
+    country = Country.objects.create(name='Россия', code='RU')
+    city = City.objects.create(
+        title='Москва',
+        country=country,
+        coordinate_width=55.7,
+        coordinate_longitude=37.6,
+        osm_relation_id=10,
+    )
+    City.objects.create(
+        title='Без OSM', country=country, coordinate_width=1, coordinate_longitude=1
+    )
+    CityDistrict.objects.create(title='Арбат', city=city, osm_relation_id=20)
+    nominatim_stub.polygons.update(
+        {10: ('Москва', POLYGON_GEOMETRY), 20: ('Арбат', POLYGON_GEOMETRY)}
+    )
+
+    _prefetch('--from-catalog')
+
+    assert nominatim_stub.requests == [[10, 20]]
+    assert set(OSMPolygonCache.objects.values_list('relation_id', flat=True)) == {10, 20}
+
+
+@pytest.mark.integration
+def test_prefetch_rejects_invalid_relation_id(tmp_path: Path) -> None:
+    path = tmp_path / 'relations.txt'
+    path.write_text('1\nway/2\n')
+
+    with pytest.raises(CommandError, match='relations.txt:2'):
+        _prefetch('--file', str(path))
+
+
+@pytest.mark.unit
+def test_rate_limiter_spaces_calls() -> None:
+    limiter = RateLimiter(rate=20)
+    started_at = time.monotonic()
+
+    for _ in range(4):
+        limiter.wait()
+
+    assert time.monotonic() - started_at >= 0.14
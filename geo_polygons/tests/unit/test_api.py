@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import pytest
 
-from geo_polygons.api import _safe_geojson_filename
+from geo_polygons.api import (
+    InvalidSimplificationError,
+    _parse_simplification,
+    _safe_geojson_filename,
+)
 
 
 @pytest.mark.unit
@@ -20,3 +24,29 @@ from geo_polygons.api import _safe_geojson_filename
 )
 def test_safe_geojson_filename(raw_name: str, expected: str) -> None:
     assert _safe_geojson_filename(raw_name) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ('query', 'expected'),
+    [
+        ({}, (None, None)),
+        ({'zoom': '7'}, (7, None)),
+        ({'zoom': ''}, (None, None)),
+        ({'tolerance': '0.01'}, (None, 0.01)),
+    ],
+)
+def test_parse_simplification(
+    query: dict[str, str], expected: tuple[int | None, float | None]
+) -> None:
+    assert _parse_simplification(query) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'query',
+    [{'zoom': 'abc'}, {'zoom': '-1'}, {'zoom': '23'}, {'tolerance': '0'}, {'tolerance': 'x'}],
+)
+def test_parse_simplification_rejects_invalid_values(query: dict[str, str]) -> None:
+    with pytest.raises(InvalidSimplificationError):
+        _parse_simplification(query)
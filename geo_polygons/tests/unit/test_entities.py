@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
 
+from geo_polygons.domain.entities import OSMPolygon
+
 from geo_polygons.tests.conftest import POLYGON_GEOMETRY, RELATION_ID, make_polygon
 
 
@@ -27,3 +31,47 @@ def test_osm_polygon_is_immutable() -> None:
 
     with pytest.raises(AttributeError):
         polygon.name = 'Other'  # type: ignore[misc]
+
+
+@pytest.mark.unit
+def test_osm_polygon_to_geojson_feature_with_other_geometry() -> None:
+    polygon = make_polygon()
+    geometry = {'type': 'Point', 'coordinates': [0.0, 0.0]}
+
+    assert polygon.to_geojson_feature(geometry)['geometry'] == geometry
+
+
+@pytest.mark.unit
+def test_osm_polygon_get_geometry_uses_zoom_variant() -> None:
+    polygon = make_polygon().with_zoom_variants()
+
+    assert polygon.get_geometry() == POLYGON_GEOMETRY
+    assert polygon.get_geometry(7) == polygon.zoom_variants['7']
+
+
+@pytest.mark.unit
+def test_osm_polygon_get_geometry_without_variants_returns_full_geometry() -> None:
+    polygon = make_polygon()
+
+    assert polygon.get_geometry(7) == POLYGON_GEOMETRY
+
+
+@pytest.mark.unit
+def test_osm_polygon_loads_full_geometry_only_when_needed(mocker: Any) -> None:
+    variant = {'type': 'Polygon', 'coordinates': [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]]]}
+    load_geometry = mocker.Mock(return_value=POLYGON_GEOMETRY)
+    polygon = OSMPolygon(RELATION_ID, 'Test', load_geometry, zoom_variants={'7': variant})
+
+    assert polygon.get_geometry(7) == variant
+    load_geometry.assert_not_called()
+
+    assert polygon.get_geometry() == POLYGON_GEOMETRY
+    assert polygon.geometry == POLYGON_GEOMETRY
+    load_geometry.assert_called_once_with()
+
+
+@pytest.mark.unit
+def test_osm_polygon_equality_ignores_zoom_variants() -> None:
+    polygon = make_polygon()
+
+    assert polygon.with_zoom_variants() == polygon
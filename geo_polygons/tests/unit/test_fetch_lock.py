@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from django.core.cache import caches
+
+from geo_polygons.infrastructure.fetch_lock import (
+    FETCH_LOCK_CACHE_ALIAS,
+    CachePolygonFetchLock,
+    _get_lock_key,
+)
+
+RELATION_ID = 123
+
+
+@pytest.fixture(autouse=True)
+def clear_lock() -> Iterator[None]:
+    caches[FETCH_LOCK_CACHE_ALIAS].delete(_get_lock_key(RELATION_ID))
+    yield
+    caches[FETCH_LOCK_CACHE_ALIAS].delete(_get_lock_key(RELATION_ID))
+
+
+@pytest.mark.unit
+def test_acquire_returns_token_only_to_first_owner() -> None:
+    lock = CachePolygonFetchLock()
+
+    token = lock.acquire(RELATION_ID)
+
+    assert token is not None
+    assert lock.acquire(RELATION_ID) is None
+
+    lock.release(RELATION_ID, token)
+
+    assert lock.acquire(RELATION_ID) is not None
+
+
+@pytest.mark.unit
+def test_release_keeps_lease_taken_by_another_owner() -> None:
+    lock = CachePolygonFetchLock()
+    stale_token = lock.acquire(RELATION_ID)
+    assert stale_token is not None
+    # Аренда истекла, и её взял другой запрос
+    caches[FETCH_LOCK_CACHE_ALIAS].delete(_get_lock_key(RELATION_ID))
+    token = lock.acquire(RELATION_ID)
+    assert token is not None
+
+    lock.release(RELATION_ID, stale_token)
+
+    assert lock.acquire(RELATION_ID) is None
+    lock.release(RELATION_ID, token)
+    assert lock.acquire(RELATION_ID) is not None
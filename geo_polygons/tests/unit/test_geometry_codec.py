@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from geo_polygons.infrastructure.geometry_codec import (
+    GeometryCodecError,
+    can_encode_geometry,
+    decode_geometry,
+    encode_geometry,
+)
+from geo_polygons.tests.conftest import POLYGON_GEOMETRY
+
+MULTI_POLYGON = {
+    'type': 'MultiPolygon',
+    'coordinates': [
+        [
+            [[37.1234567, 55.7654321], [37.2, 55.7], [37.3, 55.9], [37.1234567, 55.7654321]],
+            [[37.15, 55.75], [37.16, 55.75], [37.16, 55.76], [37.15, 55.75]],
+        ],
+        [[[-179.9999999, -89.5], [179.9999999, -89.5], [0.0, 89.9], [-179.9999999, -89.5]]],
+    ],
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('geometry', [POLYGON_GEOMETRY, MULTI_POLYGON])
+def test_encode_decode_round_trip(geometry: dict[str, object]) -> None:
+    assert decode_geometry(encode_geometry(geometry)) == geometry
+
+
+@pytest.mark.unit
+def test_coordinates_are_quantized_to_storage_precision() -> None:
+    geometry = {
+        'type': 'Polygon',
+        'coordinates': [[[0.123456789, 1.0, 150.0], [1.0, 0.0], [1.0, 1.0], [0.123456789, 1.0]]],
+    }
+
+    decoded = decode_geometry(encode_geometry(geometry))
+
+    assert decoded['coordinates'][0][0] == [0.1234568, 1.0]
+
+
+@pytest.mark.unit
+def test_encoded_geometry_is_smaller_than_json() -> None:
+    ring = [[37.0 + index * 1e-5, 55.0 + (index % 7) * 1e-5] for index in range(5000)]
+    geometry = {'type': 'Polygon', 'coordinates': [ring + [ring[0]]]}
+
+    assert len(encode_geometry(geometry)) * 3 < len(json.dumps(geometry))
+
+
+@pytest.mark.unit
+def test_unsupported_geometry_type() -> None:
+    point = {'type': 'Point', 'coordinates': [37.6, 55.7]}
+
+    assert not can_encode_geometry(point)
+    with pytest.raises(GeometryCodecError):
+        encode_geometry(point)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'data', [b'', b'JSON{}', encode_geometry(POLYGON_GEOMETRY)[:-3], b'OSMG\x01\x07\x09\x00']
+)
+def test_decode_rejects_corrupted_data(data: bytes) -> None:
+    with pytest.raises(GeometryCodecError):
+        decode_geometry(data)
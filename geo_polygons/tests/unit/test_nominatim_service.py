@@ -7,6 +7,7 @@ from unittest.mock import MagicMock
 import pytest
 import requests
 
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
 from geo_polygons.infrastructure.nominatim import NOMINATIM_ENDPOINTS, NominatimPolygonService
 from geo_polygons.tests.conftest import POLYGON_GEOMETRY, RELATION_ID
 
@@ -31,11 +32,11 @@ def test_fetch_polygon_returns_osm_polygon_on_success(mocker: Any) -> None:
     response = MagicMock()
     response.raise_for_status.return_value = None
     response.json.return_value = _nominatim_response()
-    mocker.patch('geo_polygons.infrastructure.nominatim.requests.get', return_value=response)
+    mocker.patch('geo_polygons.infrastructure.nominatim.SESSION.get', return_value=response)
 
     polygon = NominatimPolygonService().fetch_polygon(RELATION_ID)
 
-    assert polygon is not None
+    assert isinstance(polygon, OSMPolygon)
     assert polygon.relation_id == RELATION_ID
     assert polygon.name == 'Moscow Oblast, Russia'
     assert polygon.geometry['type'] == 'Polygon'
@@ -47,32 +48,36 @@ def test_fetch_polygon_truncates_long_display_name(mocker: Any) -> None:
     response = MagicMock()
     response.raise_for_status.return_value = None
     response.json.return_value = _nominatim_response(display_name=long_name)
-    mocker.patch('geo_polygons.infrastructure.nominatim.requests.get', return_value=response)
+    mocker.patch('geo_polygons.infrastructure.nominatim.SESSION.get', return_value=response)
 
     polygon = NominatimPolygonService().fetch_polygon(RELATION_ID)
 
-    assert polygon is not None
+    assert isinstance(polygon, OSMPolygon)
     assert len(polygon.name) == 500
 
 
 @pytest.mark.unit
-def test_fetch_polygon_returns_none_for_empty_results(mocker: Any) -> None:
+def test_fetch_polygon_returns_missing_polygon_for_empty_results(mocker: Any) -> None:
     response = MagicMock()
     response.raise_for_status.return_value = None
     response.json.return_value = []
-    mocker.patch('geo_polygons.infrastructure.nominatim.requests.get', return_value=response)
+    mocker.patch('geo_polygons.infrastructure.nominatim.SESSION.get', return_value=response)
 
-    assert NominatimPolygonService().fetch_polygon(RELATION_ID) is None
+    assert NominatimPolygonService().fetch_polygon(RELATION_ID) == MissingOSMPolygon(
+        RELATION_ID, 'empty'
+    )
 
 
 @pytest.mark.unit
-def test_fetch_polygon_returns_none_without_geojson(mocker: Any) -> None:
+def test_fetch_polygon_returns_missing_polygon_without_geojson(mocker: Any) -> None:
     response = MagicMock()
     response.raise_for_status.return_value = None
     response.json.return_value = [{'display_name': 'Test', 'geojson': None}]
-    mocker.patch('geo_polygons.infrastructure.nominatim.requests.get', return_value=response)
+    mocker.patch('geo_polygons.infrastructure.nominatim.SESSION.get', return_value=response)
 
-    assert NominatimPolygonService().fetch_polygon(RELATION_ID) is None
+    assert NominatimPolygonService().fetch_polygon(RELATION_ID) == MissingOSMPolygon(
+        RELATION_ID, 'no_geojson'
+    )
 
 
 @pytest.mark.unit
@@ -81,7 +86,7 @@ def test_fetch_polygon_tries_next_endpoint_after_request_error(mocker: Any) -> N
     success.raise_for_status.return_value = None
     success.json.return_value = _nominatim_response()
     get_mock = mocker.patch(
-        'geo_polygons.infrastructure.nominatim.requests.get',
+        'geo_polygons.infrastructure.nominatim.SESSION.get',
         side_effect=[requests.RequestException('timeout'), success],
     )
 
@@ -96,7 +101,7 @@ def test_fetch_polygon_tries_next_endpoint_after_request_error(mocker: Any) -> N
 @pytest.mark.unit
 def test_fetch_polygon_returns_none_when_all_endpoints_fail(mocker: Any) -> None:
     mocker.patch(
-        'geo_polygons.infrastructure.nominatim.requests.get',
+        'geo_polygons.infrastructure.nominatim.SESSION.get',
         side_effect=requests.RequestException('down'),
     )
 
@@ -112,7 +117,7 @@ def test_fetch_polygon_tries_next_endpoint_after_invalid_json(mocker: Any) -> No
     success.raise_for_status.return_value = None
     success.json.return_value = _nominatim_response()
     get_mock = mocker.patch(
-        'geo_polygons.infrastructure.nominatim.requests.get',
+        'geo_polygons.infrastructure.nominatim.SESSION.get',
         side_effect=[invalid, success],
     )
 
@@ -127,6 +132,6 @@ def test_fetch_polygon_returns_none_when_all_endpoints_return_invalid_json(mocke
     response = MagicMock()
     response.raise_for_status.return_value = None
     response.json.side_effect = json.JSONDecodeError('Expecting value', '', 0)
-    mocker.patch('geo_polygons.infrastructure.nominatim.requests.get', return_value=response)
+    mocker.patch('geo_polygons.infrastructure.nominatim.SESSION.get', return_value=response)
 
     assert NominatimPolygonService().fetch_polygon(RELATION_ID) is None
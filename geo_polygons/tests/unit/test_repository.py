@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import threading
+from datetime import timedelta
 from typing import Any
 
 import pytest
 from django.db import IntegrityError, connection
+from django.utils import timezone
 
-from geo_polygons.domain.entities import OSMPolygon
+from geo_polygons.domain.entities import MissingOSMPolygon, OSMPolygon
 from geo_polygons.infrastructure.models import OSMPolygonCache
-from geo_polygons.infrastructure.repository import DjangoPolygonRepository
+from geo_polygons.infrastructure.repository import (
+    POLYGON_CACHE_NEGATIVE_HITS,
+    POLYGON_CACHE_REQUESTS,
+    DjangoPolygonRepository,
+    decode_zoom_variant,
+    encode_zoom_variants,
+)
 
 RELATION_ID = 42
 POLYGON_GEOMETRY = {
@@ -29,7 +37,17 @@ def _make_polygon(
     return OSMPolygon(
         relation_id=RELATION_ID,
         name=name,
-        geometry=geometry or POLYGON_GEOMETRY,
+        geometry_source=geometry or POLYGON_GEOMETRY,
+    )
+
+
+def _cache_requests(result: str) -> float:
+    return POLYGON_CACHE_REQUESTS.labels(result=result)._value.get()  # type: ignore[no-any-return]
+
+
+def _expire(relation_id: int = RELATION_ID) -> None:
+    OSMPolygonCache.objects.filter(relation_id=relation_id).update(
+        expires_at=timezone.now() - timedelta(seconds=1)
     )
 
 
@@ -44,7 +62,7 @@ def test_get_by_relation_id_returns_none_when_missing() -> None:
 def test_get_by_relation_id_returns_domain_polygon(cached_polygon: OSMPolygonCache) -> None:
     polygon = DjangoPolygonRepository().get_by_relation_id(cached_polygon.relation_id)
 
-    assert polygon is not None
+    assert isinstance(polygon, OSMPolygon)
     assert polygon.relation_id == cached_polygon.relation_id
     assert polygon.name == cached_polygon.name
     assert polygon.geometry == cached_polygon.geojson
@@ -60,7 +78,7 @@ def test_save_updates_name_and_geojson_when_record_exists() -> None:
 
     cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
     assert cached.name == 'Updated name'
-    assert cached.geojson == UPDATED_GEOMETRY
+    assert cached.geometry == UPDATED_GEOMETRY
 
 
 @pytest.mark.unit
@@ -82,11 +100,11 @@ def test_save_handles_integrity_error_from_get_or_create(mocker: Any) -> None:
 
     cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
     assert cached.name == 'Updated after race'
-    assert cached.geojson == UPDATED_GEOMETRY
+    assert cached.geometry == UPDATED_GEOMETRY
 
 
 @pytest.mark.unit
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_concurrent_save_with_same_relation_id_does_not_raise() -> None:
     repository = DjangoPolygonRepository()
     polygon = _make_polygon(name='Concurrent polygon')
@@ -111,4 +129,217 @@ def test_concurrent_save_with_same_relation_id_does_not_raise() -> None:
 
     cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
     assert cached.name == polygon.name
-    assert cached.geojson == polygon.geometry
+    assert cached.geometry == polygon.geometry
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_stores_zoom_variants_in_binary_format() -> None:
+    polygon = _make_polygon().with_zoom_variants()
+
+    DjangoPolygonRepository().save(polygon)
+
+    stored = OSMPolygonCache.objects.get(relation_id=RELATION_ID).zoom_variants
+    assert set(stored) == {'z4', 'z7', 'z10', 'z13'}
+    assert {key[1:]: decode_zoom_variant(value) for key, value in stored.items()} == (
+        polygon.zoom_variants
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_get_by_relation_id_reads_only_requested_zoom_variant(
+    django_assert_num_queries: Any,
+) -> None:
+    polygon = _make_polygon().with_zoom_variants()
+    DjangoPolygonRepository().save(polygon)
+
+    with django_assert_num_queries(1):
+        cached = DjangoPolygonRepository().get_by_relation_id(RELATION_ID, zoom_band=7)
+        assert isinstance(cached, OSMPolygon)
+        assert cached.zoom_variants == {'7': polygon.zoom_variants['7']}
+        assert cached.get_geometry(7) == polygon.zoom_variants['7']
+
+    # Полная геометрия загружается отдельным запросом только при обращении к ней
+    with django_assert_num_queries(1):
+        assert cached.geometry == POLYGON_GEOMETRY
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_get_by_relation_id_ignores_zoom_variants_in_old_format(
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    old_variants = _make_polygon().with_zoom_variants().zoom_variants
+    OSMPolygonCache.objects.filter(pk=cached_polygon.pk).update(zoom_variants=old_variants)
+
+    polygon = DjangoPolygonRepository().get_by_relation_id(cached_polygon.relation_id, zoom_band=7)
+
+    assert isinstance(polygon, OSMPolygon)
+    assert polygon.zoom_variants == {}
+    assert polygon.get_geometry(7) == polygon.geometry
+
+
+@pytest.mark.unit
+def test_encode_zoom_variants_skips_unsupported_geometry() -> None:
+    point = {'type': 'Point', 'coordinates': [37.6, 55.7]}
+
+    assert encode_zoom_variants({'7': point}) == {}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_get_by_relation_id_does_not_build_zoom_variants(
+    cached_polygon: OSMPolygonCache,
+) -> None:
+    polygon = DjangoPolygonRepository().get_by_relation_id(cached_polygon.relation_id)
+
+    assert isinstance(polygon, OSMPolygon)
+    assert polygon.zoom_variants == {}
+    cached_polygon.refresh_from_db()
+    assert cached_polygon.zoom_variants == {}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_stores_polygon_in_binary_format() -> None:
+    DjangoPolygonRepository().save(_make_polygon())
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.geojson is None
+    assert cached.geometry_data is not None
+    assert DjangoPolygonRepository().get_by_relation_id(RELATION_ID) == _make_polygon()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_keeps_unsupported_geometry_in_json() -> None:
+    point = {'type': 'Point', 'coordinates': [37.6, 55.7]}
+
+    DjangoPolygonRepository().save(_make_polygon(geometry=point))
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.geometry_data is None
+    assert cached.geojson == point
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_get_by_relation_id_converts_json_row_to_binary(cached_polygon: OSMPolygonCache) -> None:
+    polygon = DjangoPolygonRepository().get_by_relation_id(cached_polygon.relation_id)
+
+    assert isinstance(polygon, OSMPolygon)
+    # Запись переводится при загрузке полной геометрии
+    geometry = polygon.geometry
+    cached_polygon.refresh_from_db()
+    assert cached_polygon.geojson is None
+    assert cached_polygon.geometry == geometry
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_sets_expiration(settings: Any) -> None:
+    settings.GEO_POLYGONS_CACHE_TTL_DAYS = 10
+
+    DjangoPolygonRepository().save(_make_polygon())
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.status == OSMPolygonCache.Status.FOUND
+    assert cached.fetched_at is not None
+    assert cached.expires_at == cached.fetched_at + timedelta(days=10)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_get_by_relation_id_marks_expired_polygon() -> None:
+    repository = DjangoPolygonRepository()
+    repository.save(_make_polygon())
+    hits, stale = _cache_requests('hit'), _cache_requests('stale')
+
+    fresh = repository.get_by_relation_id(RELATION_ID)
+    _expire()
+    expired = repository.get_by_relation_id(RELATION_ID)
+
+    assert isinstance(fresh, OSMPolygon)
+    assert not fresh.is_expired
+    assert isinstance(expired, OSMPolygon)
+    assert expired.is_expired
+    assert expired == _make_polygon()
+    assert _cache_requests('hit') == hits + 1
+    assert _cache_requests('stale') == stale + 1
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_missing_stores_negative_result(settings: Any) -> None:
+    settings.GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS = 60
+    repository = DjangoPolygonRepository()
+    negative_hits = POLYGON_CACHE_NEGATIVE_HITS.labels(reason='no_geojson')._value.get()
+
+    repository.save_missing(MissingOSMPolygon(RELATION_ID, 'no_geojson'))
+    missing = repository.get_by_relation_id(RELATION_ID)
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.status == OSMPolygonCache.Status.NO_GEOJSON
+    assert cached.geometry == {}
+    assert cached.fetched_at is not None
+    assert cached.expires_at == cached.fetched_at + timedelta(seconds=60)
+    assert missing == MissingOSMPolygon(RELATION_ID, 'no_geojson')
+    assert isinstance(missing, MissingOSMPolygon)
+    assert not missing.is_expired
+    assert POLYGON_CACHE_NEGATIVE_HITS.labels(reason='no_geojson')._value.get() == (
+        negative_hits + 1
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_expired_negative_result_counts_as_miss() -> None:
+    repository = DjangoPolygonRepository()
+    repository.save_missing(MissingOSMPolygon(RELATION_ID, 'empty'))
+    _expire()
+    misses = _cache_requests('miss')
+
+    missing = repository.get_by_relation_id(RELATION_ID)
+
+    assert isinstance(missing, MissingOSMPolygon)
+    assert missing.is_expired
+    assert _cache_requests('miss') == misses + 1
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_missing_keeps_found_polygon(settings: Any) -> None:
+    settings.GEO_POLYGONS_NEGATIVE_CACHE_TTL_SECONDS = 60
+    repository = DjangoPolygonRepository()
+    repository.save(_make_polygon())
+    expires_at = OSMPolygonCache.objects.get(relation_id=RELATION_ID).expires_at
+
+    repository.save_missing(MissingOSMPolygon(RELATION_ID, 'empty'))
+
+    assert OSMPolygonCache.objects.get(relation_id=RELATION_ID).expires_at == expires_at
+
+    _expire()
+    repository.save_missing(MissingOSMPolygon(RELATION_ID, 'empty'))
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.status == OSMPolygonCache.Status.FOUND
+    assert cached.geometry == POLYGON_GEOMETRY
+    assert cached.expires_at is not None
+    assert cached.expires_at > timezone.now()
+    assert repository.get_by_relation_id(RELATION_ID) == _make_polygon()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_save_replaces_negative_result() -> None:
+    repository = DjangoPolygonRepository()
+    repository.save_missing(MissingOSMPolygon(RELATION_ID, 'empty'))
+
+    repository.save(_make_polygon())
+
+    cached = OSMPolygonCache.objects.get(relation_id=RELATION_ID)
+    assert cached.status == OSMPolygonCache.Status.FOUND
+    assert cached.name == 'Test polygon'
+    assert cached.geometry == POLYGON_GEOMETRY
+    assert repository.get_by_relation_id(RELATION_ID) == _make_polygon()
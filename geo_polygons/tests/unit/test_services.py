@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from typing import Any
 
 import pytest
 
-from geo_polygons.domain.services import GetPolygonService
+from geo_polygons.domain.entities import MissingOSMPolygon
+from geo_polygons.domain.services import GetPolygonService, PrefetchPolygonsService
 from geo_polygons.tests.conftest import RELATION_ID, make_polygon
 
 
@@ -18,11 +20,21 @@ def test_get_polygon_service_returns_cached_polygon_without_external_call(mocker
     result = GetPolygonService(repository, external).execute(RELATION_ID)
 
     assert result == polygon
-    repository.get_by_relation_id.assert_called_once_with(RELATION_ID)
+    repository.get_by_relation_id.assert_called_once_with(RELATION_ID, None)
     external.fetch_polygon.assert_not_called()
     repository.save.assert_not_called()
 
 
+@pytest.mark.unit
+def test_get_polygon_service_reads_requested_zoom_band_from_cache(mocker: Any) -> None:
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = make_polygon()
+
+    GetPolygonService(repository, mocker.Mock()).execute(RELATION_ID, zoom_band=7)
+
+    repository.get_by_relation_id.assert_called_once_with(RELATION_ID, 7)
+
+
 @pytest.mark.unit
 def test_get_polygon_service_fetches_and_saves_when_cache_miss(mocker: Any) -> None:
     polygon = make_polygon()
@@ -36,6 +48,8 @@ def test_get_polygon_service_fetches_and_saves_when_cache_miss(mocker: Any) -> N
     assert result == polygon
     external.fetch_polygon.assert_called_once_with(RELATION_ID)
     repository.save.assert_called_once_with(polygon)
+    # Упрощённые варианты на пути запроса не строятся
+    assert repository.save.call_args.args[0].zoom_variants == {}
 
 
 @pytest.mark.unit
@@ -49,3 +63,143 @@ def test_get_polygon_service_returns_none_when_not_found(mocker: Any) -> None:
 
     assert result is None
     repository.save.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_caches_negative_result(mocker: Any) -> None:
+    missing = MissingOSMPolygon(RELATION_ID, 'no_geojson')
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = None
+    external = mocker.Mock()
+    external.fetch_polygon.return_value = missing
+
+    result = GetPolygonService(repository, external).execute(RELATION_ID)
+
+    assert result is None
+    repository.save_missing.assert_called_once_with(missing)
+    repository.save.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_returns_none_for_cached_negative_result(mocker: Any) -> None:
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = MissingOSMPolygon(RELATION_ID, 'empty')
+    external = mocker.Mock()
+
+    result = GetPolygonService(repository, external).execute(RELATION_ID)
+
+    assert result is None
+    external.fetch_polygon.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_refetches_expired_negative_result(mocker: Any) -> None:
+    polygon = make_polygon()
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = MissingOSMPolygon(
+        RELATION_ID, 'empty', is_expired=True
+    )
+    external = mocker.Mock()
+    external.fetch_polygon.return_value = polygon
+
+    result = GetPolygonService(repository, external).execute(RELATION_ID)
+
+    assert result == polygon
+    external.fetch_polygon.assert_called_once_with(RELATION_ID)
+
+
+@pytest.mark.unit
+def test_get_polygon_service_serves_expired_polygon_without_external_call(mocker: Any) -> None:
+    polygon = replace(make_polygon(), is_expired=True)
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = polygon
+    external = mocker.Mock()
+
+    result = GetPolygonService(repository, external).execute(RELATION_ID)
+
+    assert result == polygon
+    external.fetch_polygon.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_fetches_under_lock_and_releases_it(mocker: Any) -> None:
+    polygon = make_polygon()
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = None
+    external = mocker.Mock()
+    external.fetch_polygon.return_value = polygon
+    lock = mocker.Mock()
+    lock.acquire.return_value = 7
+
+    result = GetPolygonService(repository, external, lock).execute(RELATION_ID)
+
+    assert result == polygon
+    external.fetch_polygon.assert_called_once_with(RELATION_ID)
+    lock.release.assert_called_once_with(RELATION_ID, 7)
+    lock.wait.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_waits_for_concurrent_fetch(mocker: Any) -> None:
+    polygon = make_polygon()
+    repository = mocker.Mock()
+    repository.get_by_relation_id.side_effect = [None, polygon]
+    external = mocker.Mock()
+    lock = mocker.Mock()
+    lock.acquire.return_value = None
+
+    result = GetPolygonService(repository, external, lock).execute(RELATION_ID)
+
+    assert result == polygon
+    lock.wait.assert_called_once_with(RELATION_ID)
+    external.fetch_polygon.assert_not_called()
+    lock.release.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_polygon_service_fetches_itself_when_concurrent_fetch_saved_nothing(
+    mocker: Any,
+) -> None:
+    polygon = make_polygon()
+    repository = mocker.Mock()
+    repository.get_by_relation_id.return_value = None
+    external = mocker.Mock()
+    external.fetch_polygon.return_value = polygon
+    lock = mocker.Mock()
+    lock.acquire.return_value = None
+
+    result = GetPolygonService(repository, external, lock).execute(RELATION_ID)
+
+    assert result == polygon
+    external.fetch_polygon.assert_called_once_with(RELATION_ID)
+    repository.save.assert_called_once_with(polygon)
+
+
+@pytest.mark.unit
+def test_prefetch_polygons_service_saves_fetched_polygons(mocker: Any) -> None:
+    polygon = make_polygon()
+    repository = mocker.Mock()
+    external = mocker.Mock()
+    external.fetch_polygons.return_value = {RELATION_ID: polygon}
+
+    result = PrefetchPolygonsService(repository, external).execute([RELATION_ID, 999])
+
+    assert result == {RELATION_ID: polygon}
+    external.fetch_polygons.assert_called_once_with([RELATION_ID, 999])
+    saved = repository.save.call_args.args[0]
+    assert saved.zoom_variants
+    repository.get_by_relation_id.assert_not_called()
+
+
+@pytest.mark.unit
+def test_prefetch_polygons_service_saves_negative_results(mocker: Any) -> None:
+    missing = MissingOSMPolygon(999, 'empty')
+    repository = mocker.Mock()
+    external = mocker.Mock()
+    external.fetch_polygons.return_value = {999: missing}
+
+    result = PrefetchPolygonsService(repository, external).execute([999])
+
+    assert result == {999: missing}
+    repository.save_missing.assert_called_once_with(missing)
+    repository.save.assert_not_called()
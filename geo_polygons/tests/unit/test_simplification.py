@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import pytest
+
+from geo_polygons.domain.simplification import (
+    ZOOM_BANDS,
+    build_zoom_variants,
+    count_points,
+    get_precision,
+    get_zoom_band,
+    get_zoom_tolerance,
+    resolve_zoom_band,
+    simplify_geometry,
+    simplify_ring,
+    snap_tolerance_to_zoom_band,
+)
+
+
+def _circle(points: int, radius: float = 1.0, center: tuple[float, float] = (37.6, 55.7)) -> Any:
+    ring = [
+        [
+            center[0] + radius * math.cos(2 * math.pi * index / points),
+            center[1] + radius * math.sin(2 * math.pi * index / points),
+        ]
+        for index in range(points)
+    ]
+    return ring + [ring[0]]
+
+
+def _distance_to_ring(point: list[float], ring: list[list[float]]) -> float:
+    best = math.inf
+    for (ax, ay), (bx, by) in zip(ring, ring[1:]):
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+        t = (
+            0.0
+            if length == 0
+            else max(0.0, min(1.0, ((point[0] - ax) * dx + (point[1] - ay) * dy) / length))
+        )
+        best = min(best, math.hypot(point[0] - ax - t * dx, point[1] - ay - t * dy))
+    return best
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ('zoom', 'band'),
+    [(0, 4), (4, 4), (5, 7), (10, 10), (13, 13), (14, None), (22, None)],
+)
+def test_get_zoom_band(zoom: int, band: int | None) -> None:
+    assert get_zoom_band(zoom) == band
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ('tolerance', 'band'),
+    [(1.0, 4), (0.08, 4), (0.03, 7), (0.011, 7), (0.0005, 10), (0.0002, 13), (0.00001, None)],
+)
+def test_snap_tolerance_to_zoom_band(tolerance: float, band: int | None) -> None:
+    assert snap_tolerance_to_zoom_band(tolerance) == band
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ('zoom', 'tolerance', 'band'),
+    [(None, None, None), (5, None, 7), (18, None, None), (5, 0.08, 4), (None, 0.00001, None)],
+)
+def test_resolve_zoom_band_prefers_tolerance(
+    zoom: int | None, tolerance: float | None, band: int | None
+) -> None:
+    assert resolve_zoom_band(zoom, tolerance) == band
+
+
+@pytest.mark.unit
+def test_zoom_band_tolerance_snaps_to_its_own_band() -> None:
+    for band in ZOOM_BANDS:
+        assert snap_tolerance_to_zoom_band(get_zoom_tolerance(band)) == band
+
+
+@pytest.mark.unit
+def test_zoom_tolerance_is_one_pixel_in_degrees() -> None:
+    assert get_zoom_tolerance(0) == 360 / 256
+    assert get_zoom_tolerance(1) == get_zoom_tolerance(0) / 2
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('tolerance', 'precision'), [(1.0, 1), (0.01, 3), (1e-5, 6), (1e-9, 7)])
+def test_precision_follows_tolerance(tolerance: float, precision: int) -> None:
+    assert get_precision(tolerance) == precision
+
+
+@pytest.mark.unit
+def test_simplified_ring_stays_within_tolerance() -> None:
+    ring = _circle(2000)
+    tolerance = get_zoom_tolerance(7)
+
+    simplified = simplify_ring(ring, tolerance, get_precision(tolerance))
+
+    assert simplified is not None
+    assert simplified[0] == simplified[-1]
+    assert len(simplified) < len(ring) / 10
+    # Допуск плюс ошибка округления координат
+    assert max(_distance_to_ring(point, simplified) for point in ring) <= tolerance * 1.2
+
+
+@pytest.mark.unit
+def test_straight_edge_points_are_removed() -> None:
+    ring = [[0.0, 0.0], [0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0], [0.0, 1.0], [0.0, 0.0]]
+
+    assert simplify_ring(ring, 0.01, 6) == [
+        [0.0, 0.0],
+        [1.0, 0.0],
+        [1.0, 1.0],
+        [0.0, 1.0],
+        [0.0, 0.0],
+    ]
+
+
+@pytest.mark.unit
+def test_tiny_holes_and_parts_are_dropped() -> None:
+    geometry = {
+        'type': 'MultiPolygon',
+        'coordinates': [
+            [_circle(100), _circle(20, radius=0.001)],
+            [_circle(20, radius=0.001, center=(40.0, 50.0))],
+        ],
+    }
+
+    simplified = simplify_geometry(geometry, get_zoom_tolerance(4))
+
+    assert len(simplified['coordinates']) == 1
+    assert len(simplified['coordinates'][0]) == 1
+
+
+@pytest.mark.unit
+def test_polygon_smaller_than_tolerance_is_kept_visible() -> None:
+    geometry = {'type': 'Polygon', 'coordinates': [_circle(50, radius=0.0001)]}
+
+    simplified = simplify_geometry(geometry, get_zoom_tolerance(4))
+
+    assert count_points(simplified) == 4
+
+
+@pytest.mark.unit
+def test_other_geometry_types_are_returned_as_is() -> None:
+    geometry = {'type': 'Point', 'coordinates': [37.6, 55.7]}
+
+    assert simplify_geometry(geometry, 1.0) is geometry
+
+
+@pytest.mark.unit
+def test_build_zoom_variants_get_coarser_with_lower_zoom() -> None:
+    geometry = {'type': 'Polygon', 'coordinates': [_circle(5000, radius=0.5)]}
+
+    variants = build_zoom_variants(geometry)
+
+    assert list(variants) == [str(band) for band in ZOOM_BANDS]
+    counts = [count_points(variants[str(band)]) for band in ZOOM_BANDS]
+    assert counts == sorted(counts)
+    assert counts[-1] < count_points(geometry)
@@ -5,3 +5,12 @@ from prometheus_client import multiprocess
 def child_exit(server: Any, worker: Any) -> None:
     """Clean up the dead worker's Prometheus metrics file on shutdown."""
     multiprocess.mark_process_dead(worker.pid)  # type: ignore[no-untyped-call]
+
+
+def post_worker_init(worker: Any) -> None:
+    """Build the in-memory search indexes before the worker accepts requests."""
+    from city.services.search_index import warm_up_city_search_index
+    from services.catalog_search import warm_up_catalog_search_index
+
+    warm_up_city_search_index()
+    warm_up_catalog_search_index()
@@ -5,3 +5,6 @@ class PremiumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'premium'
     verbose_name = 'Премиум-подписка'
+
+    def ready(self) -> None:
+        import premium.signals  # noqa: F401 — регистрация обработчиков сигналов
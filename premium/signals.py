@@ -0,0 +1,24 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from typing import Any, Type
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from premium.models import PremiumPlan, PremiumPlanFeature
+from services.reference_cache import PREMIUM_PLANS, invalidate_reference_data
+
+
+@receiver(post_save, sender=PremiumPlan)
+@receiver(post_delete, sender=PremiumPlan)
+@receiver(post_save, sender=PremiumPlanFeature)
+@receiver(post_delete, sender=PremiumPlanFeature)
+def invalidate_premium_plans_reference_cache(
+    sender: Type[Any], instance: Any, **kwargs: Any
+) -> None:
+    invalidate_reference_data(PREMIUM_PLANS)
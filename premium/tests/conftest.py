@@ -23,6 +23,9 @@ from premium.models import (
     PremiumPlanFeature,
     PremiumSubscription,
 )
+from city.services.search_index import clear_city_search_index
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
 
 
 @pytest.fixture
@@ -159,3 +162,14 @@ def make_webhook_payload(
             'status': status,
         },
     }
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data_cache() -> None:
+    """
+    Сбрасывает кеш справочных данных и построенные по ним индексы поиска,
+    чтобы данные одного теста не попадали в другой
+    """
+    clear_reference_cache()
+    clear_catalog_search_index()
+    clear_city_search_index()
@@ -24,6 +24,7 @@ from premium.services.checkout import CheckoutService
 from premium.services.subscription_page import SubscriptionPageService
 from premium.services.subscriptions_management import SubscriptionManagementService
 from premium.webhook.logging import log_yookassa_create_response
+from services.reference_cache import PREMIUM_PLANS, get_reference_data
 
 
 def _require_superuser(request: HttpRequest) -> None:
@@ -31,16 +32,20 @@ def _require_superuser(request: HttpRequest) -> None:
         raise PermissionDenied()
 
 
+def _get_active_plans() -> list[PremiumPlan]:
+    return list(
+        PremiumPlan.objects.filter(is_active=True)
+        .prefetch_related('features')
+        .order_by('sort_order', 'pk')
+    )
+
+
 def promo(request: HttpRequest) -> HttpResponse:
     """
     Страница с промо-предложением премиум-подписки на сервис.
     Доступна всем пользователям.
     """
-    plans = (
-        PremiumPlan.objects.filter(is_active=True)
-        .prefetch_related('features')
-        .order_by('sort_order', 'pk')
-    )
+    plans = get_reference_data(PREMIUM_PLANS, _get_active_plans)
     active_subscription = None
     if request.user.is_authenticated:
         active_subscription = SubscriptionPageRepository().get_active_subscription(request.user)
@@ -13,6 +13,15 @@ from rest_framework.response import Response
 
 from region.models import Region
 from region.serializers import RegionSearchParamsSerializer, RegionSerializer
+from services.catalog_search import REGION_CATALOG, get_catalog_search_index
+from services.http_cache import (
+    CONDITIONAL_RESPONSE_HEADERS,
+    build_etag,
+    get_catalog_version,
+    get_conditional_headers,
+    is_not_modified,
+)
+from services.reference_cache import REGIONS_BY_COUNTRY, get_reference_data
 
 
 @api_view(['GET'])
@@ -87,34 +96,44 @@ class RegionDMR(msgspec.Struct):
     country_code: str
 
 
+def _get_regions_by_country() -> dict[str, list[RegionDMR]]:
+    regions_by_country: dict[str, list[RegionDMR]] = {}
+    for region in Region.objects.select_related('country').order_by('full_name'):
+        regions_by_country.setdefault(region.country.code, []).append(
+            RegionDMR(
+                id=region.id,
+                title=region.full_name,
+                country_name=region.country.name,
+                country_id=region.country.id,
+                iso3166=region.iso3166,
+                country_code=region.country.code,
+            )
+        )
+    return regions_by_country
+
+
 class GetRegionsByCountryController(Controller[MsgspecSerializer]):
     @modify(
+        headers=CONDITIONAL_RESPONSE_HEADERS,
         extra_responses=[
             ResponseSpec(dict[str, str], status_code=HTTPStatus.BAD_REQUEST),
+            ResponseSpec(
+                None, status_code=HTTPStatus.NOT_MODIFIED, headers=CONDITIONAL_RESPONSE_HEADERS
+            ),
         ],
         tags=['Регионы'],
     )
     def get(self) -> Any:
-        country_code = self.kwargs['country_code']
-        regions = (
-            Region.objects.filter(country__code=country_code)
-            .select_related('country')
-            .order_by('full_name')
-        )
+        # Список регионов не зависит от пользователя, поэтому его может кешировать CDN
+        etag = build_etag(self.request.get_full_path(), get_catalog_version())
+        headers = get_conditional_headers(etag, is_public=True)
+        if is_not_modified(self.request, etag):
+            return self.to_response(None, status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
 
-        data = [
-            RegionDMR(
-                id=region.id,
-                title=region.full_name,
-                country_name=region.country.name,
-                country_id=region.country.id,
-                iso3166=region.iso3166,
-                country_code=region.country.code,
-            )
-            for region in regions
-        ]
+        regions_by_country = get_reference_data(REGIONS_BY_COUNTRY, _get_regions_by_country)
+        data = regions_by_country.get(self.kwargs['country_code'], [])
 
-        return self.to_response(raw_data=data)
+        return self.to_response(raw_data=data, headers=headers)
 
 
 @api_view(['GET'])
@@ -131,10 +150,9 @@ def search_region(request: Request) -> Response:
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    regions = Region.objects.filter(title__icontains=query).order_by('title')
-    if country:
-        regions = regions.filter(country__code=country)
-
-    regions_list = [{'id': region.id, 'title': region.full_name} for region in regions]
+    regions = get_catalog_search_index().search(
+        query, catalogs=(REGION_CATALOG,), country_code=country
+    )
+    regions_list = [{'id': region.id, 'title': region.title} for region in regions]
 
     return Response(regions_list, status=status.HTTP_200_OK)
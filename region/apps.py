@@ -14,3 +14,6 @@ class RegionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'region'
     verbose_name = 'Регионы'
+
+    def ready(self) -> None:
+        import region.signals  # noqa: F401 — регистрация обработчиков сигналов
@@ -38,6 +38,7 @@ from django.db.models import (
 from django.db.models.functions import Cast, Coalesce, ExtractYear, Round
 
 from city.models import City, VisitedCity
+from city.services.city_popularity import popularity_annotations
 from region.models import Area, Region
 
 
@@ -185,22 +186,6 @@ def get_all_cities_in_region(
         .values('count')
     )
 
-    # Подзапрос для получения количество пользователей, посетивших город
-    number_of_users_who_visit_city = (
-        VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-        .values('city')
-        .annotate(count=Count('*'))
-        .values('count')[:1]
-    )
-
-    # Подзапрос для получения общего количества посещений города
-    number_of_visits_all_users = (
-        VisitedCity.objects.filter(city=OuterRef('pk'))
-        .values('city')
-        .annotate(count=Count('*'))
-        .values('count')[:1]
-    )
-
     queryset = City.objects.filter(region_id=region_id).annotate(
         # Все даты посещения города (или только за указанный год).
         # Сортируются по возрастанию. Поэтому для получения первого посещения
@@ -226,10 +211,7 @@ def get_all_cities_in_region(
         is_visited=is_visited,
         # Имеется ли сувенир из города. True или False
         has_magnet=has_magnet,
-        number_of_users_who_visit_city=Subquery(
-            number_of_users_who_visit_city, output_field=IntegerField()
-        ),
-        number_of_visits_all_users=Subquery(number_of_visits_all_users),
+        **popularity_annotations(),
     )
 
     queryset = (
@@ -0,0 +1,27 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+from typing import Any, Type
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from region.models import Region
+from services.http_cache import bump_catalog_version
+from services.reference_cache import (
+    REGIONS_BY_COUNTRY,
+    invalidate_reference_data,
+)
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def invalidate_region_reference_cache(
+    sender: Type[Region], instance: Region, **kwargs: Any
+) -> None:
+    invalidate_reference_data(REGIONS_BY_COUNTRY)
+    bump_catalog_version()
@@ -13,6 +13,9 @@ from django.contrib.auth.models import User
 from city.models import City
 from country.models import Country
 from region.models import Region, RegionType, Area
+from city.services.search_index import clear_city_search_index
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
 
 
 @pytest.fixture
@@ -62,3 +65,14 @@ def test_city(test_country: Country, test_region: Region) -> City:
 def test_user() -> User:
     """Создаёт тестового пользователя"""
     return User.objects.create_user(username='testuser', password='testpass123')
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data_cache() -> None:
+    """
+    Сбрасывает кеш справочных данных и построенные по ним индексы поиска,
+    чтобы данные одного теста не попадали в другой
+    """
+    clear_reference_cache()
+    clear_catalog_search_index()
+    clear_city_search_index()
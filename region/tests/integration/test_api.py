@@ -270,6 +270,35 @@ class TestGetRegionsByCountryAPI:
 
         assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
 
+    def test_returns_public_cache_headers(self, client: Client, test_region: Any) -> None:
+        """Тест что ответ содержит ETag и может кешироваться CDN"""
+        response = client.get(regions_by_country_code_url('RU'))
+
+        assert response['ETag']
+        assert response['Cache-Control'] == 'public, max-age=300'
+
+    def test_returns_not_modified_for_matching_etag(self, client: Client, test_region: Any) -> None:
+        """Тест что при совпадении If-None-Match возвращается 304 без тела"""
+        etag = client.get(regions_by_country_code_url('RU'))['ETag']
+
+        response = client.get(regions_by_country_code_url('RU'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+
+    def test_etag_changes_after_region_change(self, client: Client, test_region: Any) -> None:
+        """Тест что после изменения региона возвращается новый список"""
+        etag = client.get(regions_by_country_code_url('RU'))['ETag']
+        test_region.full_name = 'Московская обл.'
+        test_region.save()
+
+        response = client.get(regions_by_country_code_url('RU'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert cast(list[dict[str, Any]], response_json(response))[0]['title'] == (
+            'Московская обл.'
+        )
+
 
 @pytest.mark.integration
 @pytest.mark.django_db
@@ -29,7 +29,7 @@ from django.urls import reverse
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.generic import ListView, View
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import QuerySet, Subquery, IntegerField, OuterRef, Count, Exists
+from django.db.models import QuerySet, OuterRef, Exists
 
 from MoiGoroda.settings import ALLOWED_HOSTS_FOR_EMBEDDED_REGION_MAPS
 from country.models import Country
@@ -37,6 +37,7 @@ from region.models import Region
 from city.models import VisitedCity, City
 from city.services.db import annotate_city_default_user_photo_for_list
 from city.services.city_user_photo_urls import attach_default_city_user_photo_presigned_urls
+from city.services.city_popularity import popularity_annotations
 from services import logger
 from region.services.db import (
     get_all_region_with_visited_cities,
@@ -276,30 +277,9 @@ class CitiesByRegionList(ListView):
                 'default_city_user_photo_id',
             )
         else:
-            # Подзапрос для получения количество пользователей, посетивших город
-            number_of_users_who_visit_city = (
-                VisitedCity.objects.filter(city=OuterRef('pk'), is_first_visit=True)
-                .values('city')
-                .annotate(count=Count('*'))
-                .values('count')[:1]
-            )
-
-            # Подзапрос для получения общего количества посещений города
-            number_of_visits_all_users = (
-                VisitedCity.objects.filter(city=OuterRef('pk'))
-                .values('city')
-                .annotate(count=Count('*'))
-                .values('count')[:1]
-            )
-
             queryset = (
                 City.objects.filter(region=self.region_id)
-                .annotate(
-                    number_of_users_who_visit_city=Subquery(
-                        number_of_users_who_visit_city, output_field=IntegerField()
-                    ),
-                    number_of_visits_all_users=Subquery(number_of_visits_all_users),
-                )
+                .annotate(**popularity_annotations())
                 .values(
                     'id',
                     'title',
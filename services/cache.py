@@ -7,40 +7,304 @@
 
 """Общие helper-функции для cache-aside сценариев."""
 
+import functools
 import logging
+import secrets
+import time
 from collections.abc import Callable
-from typing import TypeVar, cast
+from dataclasses import dataclass
+from typing import Any, Concatenate, ParamSpec, TypeVar, cast
 
 from django.core.cache import caches
+from prometheus_client import Counter
 
 T = TypeVar('T')
+P = ParamSpec('P')
 STATS_CACHE_ALIAS = 'stats'
+STATS_GENERATION_KEY_TEMPLATE = 'stats:generation:user:{user_id}'
+DEFAULT_CACHE_FAMILY = 'other'
+# Время аренды на пересчёт ключа: должно превышать время работы самой медленной factory
+LOCK_TIMEOUT_SECONDS = 30
+LOCK_POLL_INTERVAL_SECONDS = 0.05
 logger = logging.getLogger(__name__)
 
+# Удаляет ключ аренды, только если в нём всё ещё токен владельца
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
 
-def get_or_set_cache(key: str, ttl_seconds: int, factory: Callable[[], T]) -> T:
+STATS_CACHE_REQUESTS = Counter(
+    'stats_cache_requests_total',
+    'Statistics cache lookups',
+    ['family', 'result'],
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _CachedNone:
+    """Маркер закешированного значения `None`: сам `None` кеш возвращает при промахе."""
+
+
+@dataclass(frozen=True, slots=True)
+class _SoftExpiringValue:
+    """Значение с мягким TTL: после `fresh_until` оно отдаётся, но уже требует обновления."""
+
+    value: object
+    fresh_until: float
+
+
+def _wrap(value: object, soft_ttl_seconds: int | None) -> object:
+    stored = _CachedNone() if value is None else value
+    if soft_ttl_seconds is None:
+        return stored
+    return _SoftExpiringValue(value=stored, fresh_until=time.time() + soft_ttl_seconds)
+
+
+def _unwrap(cached: object) -> tuple[object, bool]:
+    """Возвращает значение из кеша и признак того, что его мягкий TTL истёк."""
+    is_stale = False
+    if isinstance(cached, _SoftExpiringValue):
+        is_stale = cached.fresh_until <= time.time()
+        cached = cached.value
+    if isinstance(cached, _CachedNone):
+        cached = None
+    return cached, is_stale
+
+
+def _get_redis_client(cache_alias: str) -> Any | None:
+    """Возвращает клиент Redis алиаса кеша или None, если кеш работает не через Redis."""
+    try:
+        from django_redis import get_redis_connection  # type: ignore[import-untyped]
+
+        return get_redis_connection(cache_alias)
+    except (ImportError, NotImplementedError, AttributeError):
+        return None
+
+
+def acquire_lease(cache_alias: str, key: str, timeout: int) -> int | None:
     """
-    Возвращает значение из кеша или вычисляет и сохраняет его через factory.
+    Берёт аренду `key` в кеше `cache_alias`: SET NX с истечением, чтобы упавший воркер
+    её не удержал. Возвращает токен владельца для `release_lease` или None, если аренда
+    уже занята. Токен — целое число: django-redis хранит его без pickle, поэтому его можно
+    сравнить в скрипте Redis.
+    """
+    token = secrets.randbits(62)
+    if caches[cache_alias].add(key, token, timeout=timeout):
+        return token
+    return None
+
+
+def release_lease(cache_alias: str, key: str, token: int) -> None:
+    """
+    Освобождает аренду, только если она всё ещё принадлежит владельцу `token`.
+    Если аренда истекла и её взял другой воркер, она остаётся у него.
+    """
+    cache = caches[cache_alias]
+    client = _get_redis_client(cache_alias)
+    if client is None:
+        # Кеш без Redis (LocMem в тестах) живёт в одном процессе, атомарность не нужна
+        if cache.get(key) == token:
+            cache.delete(key)
+        return
 
-    Factory вызывается только при cache miss. Значение `None` считается отсутствием кеша,
-    поэтому для кеширования пустых результатов лучше использовать пустые коллекции.
+    try:
+        client.eval(_RELEASE_LEASE_SCRIPT, 1, cache.make_and_validate_key(key), token)
+    except Exception:
+        # Аренда истечёт сама по таймауту
+        logger.warning('Failed to release cache lease %s', key, exc_info=True)
+
+
+def _get_lock_key(key: str) -> str:
+    return f'{key}:lock'
+
+
+def _acquire_lock(key: str) -> int | None:
+    return acquire_lease(STATS_CACHE_ALIAS, _get_lock_key(key), LOCK_TIMEOUT_SECONDS)
+
+
+def _release_lock(key: str, token: int) -> None:
+    release_lease(STATS_CACHE_ALIAS, _get_lock_key(key), token)
+
+
+def _wait_for_value(key: str) -> tuple[bool, object]:
+    """
+    Ждёт, пока воркер, держащий аренду, сохранит значение.
+    Ожидание прекращается, если аренда освобождена без значения или истекла.
     """
     stats_cache = caches[STATS_CACHE_ALIAS]
-    cached = stats_cache.get(key)
+    deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
 
-    if cached is not None:
-        logger.debug('Cache hit: %s', key)
-        return cast(T, cached)
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL_SECONDS)
+        cached = stats_cache.get(key)
+        if cached is not None:
+            return True, _unwrap(cached)[0]
+        if stats_cache.get(_get_lock_key(key)) is None:
+            break
 
-    logger.debug('Cache miss: %s', key)
+    return False, None
+
+
+def _compute_and_set(
+    key: str, ttl_seconds: int, factory: Callable[[], T], soft_ttl_seconds: int | None
+) -> T:
     value = factory()
-    stats_cache.set(key, value, timeout=ttl_seconds)
+    caches[STATS_CACHE_ALIAS].set(key, _wrap(value, soft_ttl_seconds), timeout=ttl_seconds)
     logger.debug('Cache set: %s ttl=%s', key, ttl_seconds)
-
     return value
 
 
+def get_or_set_cache(
+    key: str,
+    ttl_seconds: int,
+    factory: Callable[[], T],
+    family: str = DEFAULT_CACHE_FAMILY,
+    *,
+    single_flight: bool = False,
+    soft_ttl_seconds: int | None = None,
+) -> T:
+    """
+    Возвращает значение из кеша или вычисляет и сохраняет его через factory.
+
+    Factory вызывается только при cache miss. Результат `None` тоже кешируется —
+    в кеше он хранится в виде маркера.
+    `family` — семейство ключей, по которому считаются метрики попаданий и промахов.
+
+    При `single_flight=True` на промахе factory вызывает только воркер, получивший аренду
+    `<key>:lock`, а остальные ждут его результата, не пересчитывая одно и то же одновременно.
+    `soft_ttl_seconds` (меньше `ttl_seconds`) включает stale-while-revalidate: после мягкого
+    TTL значение обновляет один воркер, а остальные до этого получают прежнее значение.
+    """
+    cached = caches[STATS_CACHE_ALIAS].get(key)
+
+    if cached is not None:
+        value, is_stale = _unwrap(cached)
+        if not is_stale:
+            logger.debug('Cache hit: %s', key)
+            STATS_CACHE_REQUESTS.labels(family=family, result='hit').inc()
+            return cast(T, value)
+
+        token = _acquire_lock(key)
+        if token is None:
+            logger.debug('Cache stale: %s', key)
+            STATS_CACHE_REQUESTS.labels(family=family, result='stale').inc()
+            return cast(T, value)
+
+        logger.debug('Cache refresh: %s', key)
+        STATS_CACHE_REQUESTS.labels(family=family, result='refresh').inc()
+        try:
+            return _compute_and_set(key, ttl_seconds, factory, soft_ttl_seconds)
+        finally:
+            _release_lock(key, token)
+
+    logger.debug('Cache miss: %s', key)
+    STATS_CACHE_REQUESTS.labels(family=family, result='miss').inc()
+
+    if not single_flight and soft_ttl_seconds is None:
+        return _compute_and_set(key, ttl_seconds, factory, soft_ttl_seconds)
+
+    token = _acquire_lock(key)
+    if token is not None:
+        try:
+            return _compute_and_set(key, ttl_seconds, factory, soft_ttl_seconds)
+        finally:
+            _release_lock(key, token)
+
+    is_found, value = _wait_for_value(key)
+    if is_found:
+        logger.debug('Cache hit after wait: %s', key)
+        return cast(T, value)
+
+    return _compute_and_set(key, ttl_seconds, factory, soft_ttl_seconds)
+
+
 def delete_cache(key: str) -> None:
     """Удаляет значение из кеша по ключу."""
     caches[STATS_CACHE_ALIAS].delete(key)
     logger.debug('Cache delete: %s', key)
+
+
+def _get_stats_generation_key(user_id: int) -> str:
+    return STATS_GENERATION_KEY_TEMPLATE.format(user_id=user_id)
+
+
+def get_stats_generation(user_id: int) -> int:
+    """
+    Возвращает текущее поколение статистики пользователя.
+
+    Начальное значение берётся из текущего времени, чтобы после вытеснения ключа поколения
+    из Redis не вернуться к номеру, под которым ещё лежат устаревшие значения.
+    """
+    stats_cache = caches[STATS_CACHE_ALIAS]
+    key = _get_stats_generation_key(user_id)
+    generation = stats_cache.get(key)
+
+    if generation is None:
+        initial = time.time_ns()
+        stats_cache.add(key, initial, timeout=None)
+        generation = stats_cache.get(key, initial)
+
+    return int(generation)
+
+
+def bump_stats_generation(user_id: int) -> None:
+    """
+    Переводит статистику пользователя на новое поколение.
+    Все значения, закешированные под прежним поколением, перестают читаться и истекают по TTL.
+    """
+    stats_cache = caches[STATS_CACHE_ALIAS]
+    key = _get_stats_generation_key(user_id)
+
+    try:
+        stats_cache.incr(key)
+    except ValueError:
+        stats_cache.set(key, time.time_ns(), timeout=None)
+    logger.debug('Stats generation bump: %s', key)
+
+
+def build_stats_cache_key(family: str, user_id: int, *parts: object) -> str:
+    """
+    Возвращает ключ кеша статистики пользователя в пространстве его текущего поколения.
+    """
+    key = f'stats:{family}:user:{user_id}:gen:{get_stats_generation(user_id)}'
+    if parts:
+        key += ':' + ':'.join(str(part) for part in parts)
+    return key
+
+
+def cached_user_stats(
+    family: str,
+    ttl_seconds: int,
+    *,
+    single_flight: bool = False,
+    soft_ttl_seconds: int | None = None,
+) -> Callable[[Callable[Concatenate[int, P], T]], Callable[Concatenate[int, P], T]]:
+    """
+    Декоратор для функций статистики, первым аргументом принимающих `user_id`.
+
+    Результат кешируется в алиасе `stats` под ключом семейства `family`, текущего поколения
+    статистики пользователя и остальных аргументов вызова. Значения должны сериализоваться
+    через pickle. `single_flight` и `soft_ttl_seconds` передаются в `get_or_set_cache`.
+    """
+
+    def decorator(func: Callable[Concatenate[int, P], T]) -> Callable[Concatenate[int, P], T]:
+        @functools.wraps(func)
+        def wrapper(user_id: int, /, *args: P.args, **kwargs: P.kwargs) -> T:
+            key = build_stats_cache_key(
+                family, user_id, *args, *(f'{name}={kwargs[name]}' for name in sorted(kwargs))
+            )
+            return get_or_set_cache(
+                key,
+                ttl_seconds,
+                lambda: func(user_id, *args, **kwargs),
+                family=family,
+                single_flight=single_flight,
+                soft_ttl_seconds=soft_ttl_seconds,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,343 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+"""
+Общий индекс поиска по справочникам в памяти процесса: регионы, коллекции и страны.
+
+Названия нормализуются так же, как в индексе поиска городов (`city.services.search_index`),
+и хранятся в отсортированных массивах ключей: по самим названиям и по их начальным формам,
+полученным через pymorphy3, поэтому запрос «московской» находит «Московская область».
+Опечатки прощаются за счёт триграммного сходства запроса с названием и с отдельными
+словами названия. Один индекс обслуживает поиск по любому набору справочников сразу.
+
+Индекс перестраивается после изменения регионов, стран или коллекций, в том числе через
+админку: сигналы моделей меняют версии справочников в `services.reference_cache`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import itertools
+import logging
+import threading
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from city.services.search_index import (
+    FUZZY_MIN_QUERY_LENGTH,
+    FUZZY_SIMILARITY_THRESHOLD,
+    SUBSTRING_MIN_QUERY_LENGTH,
+    get_query_variants,
+    get_trigrams,
+    normalize_title,
+)
+from collection.models import Collection, CollectionsVersion
+from country.models import Country
+from region.models import Region
+from services.morphology import morph
+from services.http_cache import get_catalog_version
+from services.reference_cache import COLLECTIONS_VERSION, get_version_counter
+
+logger = logging.getLogger(__name__)
+
+# Имена справочников
+REGION_CATALOG = 'region'
+COLLECTION_CATALOG = 'collection'
+COUNTRY_CATALOG = 'country'
+CATALOGS = (REGION_CATALOG, COLLECTION_CATALOG, COUNTRY_CATALOG)
+
+# Группы совпадений в порядке убывания приоритета
+EXACT_MATCH = 0
+TITLE_PREFIX_MATCH = 1
+WORD_PREFIX_MATCH = 2
+LEMMA_MATCH = 3
+SUBSTRING_MATCH = 4
+FUZZY_MATCH = 5
+
+LEMMA_MIN_QUERY_LENGTH = 3
+
+
+@functools.lru_cache(maxsize=10_000)
+def lemmatize_word(word: str) -> str:
+    """Возвращает начальную форму слова с заменой ё на е."""
+    normal_form: str = morph.parse(word)[0].normal_form
+    return normal_form.replace('ё', 'е')
+
+
+def lemmatize(text: str) -> str:
+    """Приводит каждое слово нормализованной строки к начальной форме."""
+    return ' '.join(lemmatize_word(word) for word in text.split())
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogEntry:
+    catalog: str
+    id: int
+    title: str
+    country_code: str | None
+    names: tuple[str, ...]
+    lemmas: tuple[str, ...]
+
+    @classmethod
+    def create(
+        cls, catalog: str, id: int, names: Iterable[str | None], country_code: str | None = None
+    ) -> CatalogEntry:
+        """
+        Создаёт запись справочника. Первое из `names` отображается в результатах поиска,
+        остальные (например, краткое название региона) участвуют только в поиске.
+        """
+        titles = [name for name in names if name]
+        normalized_names = tuple(dict.fromkeys(normalize_title(title) for title in titles))
+        return cls(
+            catalog=catalog,
+            id=id,
+            title=titles[0],
+            country_code=country_code,
+            names=normalized_names,
+            lemmas=tuple(dict.fromkeys(lemmatize(name) for name in normalized_names)),
+        )
+
+
+def _get_word_suffixes(text: str) -> list[str]:
+    """Для «ростов на дону» возвращает «ростов на дону», «на дону» и «дону»."""
+    words = text.split(' ')
+    return [' '.join(words[number:]) for number in range(len(words))]
+
+
+def _get_prefix_range(keys: list[str], prefix: str) -> range:
+    """Возвращает диапазон индексов отсортированного массива `keys`, начинающихся с `prefix`."""
+    start = bisect.bisect_left(keys, prefix)
+    return range(start, bisect.bisect_left(keys, prefix + '\uffff', lo=start))
+
+
+class CatalogSearchIndex:
+    """
+    Отсортированные массивы ключей по названиям и их начальным формам для поиска по началу
+    названия и началу слов и инвертированный индекс триграмм для нечёткого поиска.
+    Триграммы строятся и для названия целиком, и для каждого его слова, чтобы опечатка
+    в одном слове длинного названия («краснадарский») не снижала сходство ниже порога.
+    """
+
+    def __init__(self, entries: list[CatalogEntry]) -> None:
+        self.entries = entries
+        keys: list[tuple[str, int, bool]] = []
+        lemma_keys: list[tuple[str, int]] = []
+        trigram_targets: dict[str, list[int]] = {}
+        target_positions: list[int] = []
+        target_sizes: list[int] = []
+        lines: list[str] = []
+        line_positions: list[int] = []
+        for position, entry in enumerate(entries):
+            lines.extend(entry.names)
+            line_positions.extend(position for _ in entry.names)
+            for name in entry.names:
+                keys.extend(
+                    (suffix, position, number == 0)
+                    for number, suffix in enumerate(_get_word_suffixes(name))
+                )
+            for lemma in entry.lemmas:
+                lemma_keys.extend((suffix, position) for suffix in _get_word_suffixes(lemma))
+            targets = dict.fromkeys([*entry.names, *(' '.join(entry.names)).split(' ')])
+            for target in targets:
+                trigrams = get_trigrams(target)
+                for trigram in trigrams:
+                    trigram_targets.setdefault(trigram, []).append(len(target_positions))
+                target_positions.append(position)
+                target_sizes.append(len(trigrams))
+        keys.sort()
+        lemma_keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._key_positions = [position for _, position, _ in keys]
+        # Ключ — название целиком, а не окончание названия с одного из следующих слов
+        self._key_is_title = [is_title for _, _, is_title in keys]
+        self._lemma_keys = [key for key, _ in lemma_keys]
+        self._lemma_key_positions = [position for _, position in lemma_keys]
+        self._trigram_targets = trigram_targets
+        self._target_positions = target_positions
+        self._target_sizes = target_sizes
+        # Все названия одной строкой: подстрока ищется через str.find, а не перебором записей
+        self._text = '\n'.join(lines)
+        self._line_starts = list(itertools.accumulate((len(line) + 1 for line in lines), initial=0))
+        self._line_positions = line_positions
+
+    def _get_substring_matches(self, substring: str) -> list[int]:
+        """Возвращает записи, в одном из названий которых встречается `substring`."""
+        positions = []
+        start = self._text.find(substring)
+        while start != -1:
+            line = bisect.bisect_right(self._line_starts, start) - 1
+            positions.append(self._line_positions[line])
+            start = self._text.find(substring, self._line_starts[line + 1])
+        return positions
+
+    def _get_similarity(self, query_trigrams: Iterable[frozenset[str]]) -> dict[int, float]:
+        """
+        Возвращает наибольшее сходство вариантов запроса с названием или словом названия
+        для каждой записи, у которой есть общие с запросом триграммы.
+        """
+        similarity: dict[int, float] = {}
+        for trigrams in query_trigrams:
+            common: Counter[int] = Counter()
+            for trigram in trigrams:
+                common.update(self._trigram_targets.get(trigram, ()))
+            for target, count in common.items():
+                position = self._target_positions[target]
+                value = count / (len(trigrams) + self._target_sizes[target] - count)
+                if value > similarity.get(position, 0.0):
+                    similarity[position] = value
+        return similarity
+
+    def search(
+        self,
+        query: str,
+        catalogs: Sequence[str] = CATALOGS,
+        country_code: str | None = None,
+        limit: int | None = None,
+    ) -> list[CatalogEntry]:
+        """
+        Возвращает записи справочников `catalogs`, подходящие под `query`, не более `limit`
+        записей из каждого справочника. Фильтр `country_code` не применяется к записям
+        без страны (коллекциям).
+
+        Сначала идут точные совпадения, затем совпадения по началу названия, по началу слова,
+        по начальной форме слов, по подстроке и, если ничего не найдено, нечёткие совпадения.
+        Внутри группы записи упорядочены по убыванию сходства с запросом и по названию.
+        """
+        variants = get_query_variants(query)
+        if not variants[0] or limit == 0:
+            return []
+
+        def is_allowed(position: int) -> bool:
+            entry = self.entries[position]
+            return entry.catalog in catalogs and (
+                country_code is None
+                or entry.country_code is None
+                or entry.country_code == country_code
+            )
+
+        groups: dict[int, int] = {}
+        for variant in variants:
+            for key_index in _get_prefix_range(self._keys, variant):
+                position = self._key_positions[key_index]
+                if not is_allowed(position):
+                    continue
+                if not self._key_is_title[key_index]:
+                    group = WORD_PREFIX_MATCH
+                elif self._keys[key_index] == variant:
+                    group = EXACT_MATCH
+                else:
+                    group = TITLE_PREFIX_MATCH
+                groups[position] = min(group, groups.get(position, group))
+
+        # Начальная форма одной-двух букв не имеет смысла, такие запросы ищутся только по началу
+        if len(variants[0]) >= LEMMA_MIN_QUERY_LENGTH:
+            for lemma in dict.fromkeys(lemmatize(variant) for variant in variants):
+                for key_index in _get_prefix_range(self._lemma_keys, lemma):
+                    position = self._lemma_key_positions[key_index]
+                    if is_allowed(position):
+                        groups.setdefault(position, LEMMA_MATCH)
+
+        if len(variants[0]) >= SUBSTRING_MIN_QUERY_LENGTH:
+            for variant in variants:
+                for position in self._get_substring_matches(variant):
+                    if is_allowed(position):
+                        groups.setdefault(position, SUBSTRING_MATCH)
+
+        similarity = self._get_similarity(get_trigrams(variant) for variant in variants)
+        if not groups and len(variants[0]) >= FUZZY_MIN_QUERY_LENGTH:
+            for position, value in similarity.items():
+                if value >= FUZZY_SIMILARITY_THRESHOLD and is_allowed(position):
+                    groups[position] = FUZZY_MATCH
+
+        ordered = sorted(
+            groups,
+            key=lambda position: (
+                groups[position],
+                -similarity.get(position, 0.0),
+                self.entries[position].title,
+            ),
+        )
+        if limit is None:
+            return [self.entries[position] for position in ordered]
+
+        result = []
+        found_by_catalog: Counter[str] = Counter()
+        for position in ordered:
+            entry = self.entries[position]
+            if found_by_catalog[entry.catalog] < limit:
+                found_by_catalog[entry.catalog] += 1
+                result.append(entry)
+        return result
+
+
+_lock = threading.Lock()
+_index: CatalogSearchIndex | None = None
+_index_version: str | None = None
+
+
+def _get_index_version() -> str:
+    collections_version = get_version_counter(COLLECTIONS_VERSION, CollectionsVersion)
+    return f'{get_catalog_version()}:{collections_version}'
+
+
+def _load_entries() -> list[CatalogEntry]:
+    entries = [
+        CatalogEntry.create(REGION_CATALOG, region_id, (full_name, title), country_code)
+        for region_id, full_name, title, country_code in Region.objects.values_list(
+            'id', 'full_name', 'title', 'country__code'
+        )
+    ]
+    entries += [
+        CatalogEntry.create(COLLECTION_CATALOG, collection_id, (title,))
+        for collection_id, title in Collection.objects.values_list('id', 'title')
+    ]
+    entries += [
+        CatalogEntry.create(COUNTRY_CATALOG, country_id, (name, fullname), code)
+        for country_id, name, fullname, code in Country.objects.values_list(
+            'id', 'name', 'fullname', 'code'
+        )
+    ]
+    return entries
+
+
+def get_catalog_search_index() -> CatalogSearchIndex:
+    """
+    Возвращает индекс поиска по справочникам текущего процесса.
+    Если регионы, страны или коллекции изменились, индекс перестраивается.
+    """
+    global _index, _index_version
+
+    version = _get_index_version()
+    index = _index
+    if index is not None and _index_version == version:
+        return index
+
+    with _lock:
+        if _index is None or _index_version != version:
+            _index = CatalogSearchIndex(_load_entries())
+            _index_version = version
+            logger.info('Catalog search index built: %s entries', len(_index.entries))
+        return _index
+
+
+def warm_up_catalog_search_index() -> None:
+    """Строит индекс заранее, чтобы первый запрос к воркеру не ждал его построения."""
+    try:
+        get_catalog_search_index()
+    except Exception:
+        logger.exception('Failed to build catalog search index on worker start')
+
+
+def clear_catalog_search_index() -> None:
+    """Сбрасывает индекс текущего процесса. Используется в тестах."""
+    global _index, _index_version
+
+    with _lock:
+        _index = None
+        _index_version = None
@@ -7,23 +7,22 @@ from region.services.db import (
     get_number_of_visited_regions,
     get_number_of_finished_regions,
 )
-from city.services.db import (
-    get_number_of_new_visited_cities,
-    get_number_of_total_visited_cities_by_year,
-    get_number_of_new_visited_cities_by_year,
-    get_number_of_total_visited_cities_in_several_month,
-    get_number_of_total_visited_cities_in_several_years,
-    get_number_of_new_visited_cities_in_several_years,
-    get_number_of_new_visited_cities_in_several_month,
-    get_number_of_visited_cities,
-    get_last_10_new_visited_cities,
-)
+from city.services.db import get_last_10_new_visited_cities
 from country.repository import (
     get_countries_with_visited_city,
     get_countries_with_visited_city_in_year,
     get_countries_with_new_visited_city_in_year,
     get_list_of_countries_with_visited_regions,
 )
+from services.db.statistics.visited_cities_statistics import get_visited_cities_statistics
+
+
+def _yearly_series(counts: dict[int, int]) -> list[dict[str, Any]]:
+    return [{'year': datetime.date(year, 1, 1), 'qty': qty} for year, qty in counts.items()]
+
+
+def _monthly_series(counts: dict[datetime.date, int]) -> list[dict[str, Any]]:
+    return [{'month_year': month, 'qty': qty} for month, qty in reversed(counts.items())]
 
 
 def get_info_for_statistic_cards_and_charts(user_id: int) -> dict[str, Any]:
@@ -37,19 +36,17 @@ def get_info_for_statistic_cards_and_charts(user_id: int) -> dict[str, Any]:
     #################################
     # --- Статистика по городам --- #
     #################################
-    number_of_visited_cities = get_number_of_visited_cities(user_id)
-    number_of_new_visited_cities = get_number_of_new_visited_cities(user_id)
-    number_of_visited_cities_current_year = get_number_of_total_visited_cities_by_year(
-        user_id, current_year
+    # Все итоги и ряды по посещениям считаются за один проход по посещениям пользователя
+    statistics = get_visited_cities_statistics(user_id)
+    number_of_visited_cities = statistics.total_visits
+    number_of_new_visited_cities = statistics.unique_cities
+    number_of_visited_cities_current_year = statistics.total_visits_by_year.get(current_year, 0)
+    number_of_new_visited_cities_current_year = statistics.new_cities_by_year.get(current_year, 0)
+    number_of_visited_cities_previous_year = statistics.total_visits_by_year.get(
+        current_year - 1, 0
     )
-    number_of_new_visited_cities_current_year = get_number_of_new_visited_cities_by_year(
-        user_id, current_year
-    )
-    number_of_visited_cities_previous_year = get_number_of_total_visited_cities_by_year(
-        user_id, current_year - 1
-    )
-    number_of_new_visited_cities_previous_year = get_number_of_new_visited_cities_by_year(
-        user_id, current_year - 1
+    number_of_new_visited_cities_previous_year = statistics.new_cities_by_year.get(
+        current_year - 1, 0
     )
     list_of_all_countries_with_visited_cities = get_countries_with_visited_city(user_id)
     # Страны с посещёнными городами (включая повторные посещения) в текущем году
@@ -68,18 +65,10 @@ def get_info_for_statistic_cards_and_charts(user_id: int) -> dict[str, Any]:
     list_of_countries_with_new_visited_cities_previous_year = (
         get_countries_with_new_visited_city_in_year(user_id, current_year - 1)
     )
-    number_of_visited_cities_in_several_years = get_number_of_total_visited_cities_in_several_years(
-        user_id
-    )
-    number_of_new_visited_cities_in_several_years = (
-        get_number_of_new_visited_cities_in_several_years(user_id)
-    )
-    number_of_visited_cities_in_several_month = get_number_of_total_visited_cities_in_several_month(
-        user_id
-    )
-    number_of_new_visited_cities_in_several_month = (
-        get_number_of_new_visited_cities_in_several_month(user_id)
-    )
+    number_of_visited_cities_in_several_years = _yearly_series(statistics.total_visits_by_year)
+    number_of_new_visited_cities_in_several_years = _yearly_series(statistics.new_cities_by_year)
+    number_of_visited_cities_in_several_month = _monthly_series(statistics.total_visits_by_month)
+    number_of_new_visited_cities_in_several_month = _monthly_series(statistics.new_cities_by_month)
     #
     context['cities'] = {
         'number_of_visited_cities': number_of_visited_cities,
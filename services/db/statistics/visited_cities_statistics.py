@@ -0,0 +1,191 @@
+"""
+Однопроходный расчёт статистики посещённых городов пользователя.
+
+Все посещения пользователя загружаются одним запросом в виде компактной проекции
+(город, регион, страна, дата, признак первого посещения), после чего годовые,
+помесячные и региональные ряды считаются за один проход по этим строкам.
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+import calendar
+import datetime
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple
+
+from city.models import VisitedCity
+from services.cache import cached_user_stats
+
+CACHE_TTL_SECONDS = 60 * 60
+
+
+class VisitRow(NamedTuple):
+    city_id: int
+    region_id: int | None
+    country_id: int
+    country_code: str
+    date_of_visit: datetime.date | None
+    is_first_visit: bool
+
+
+@dataclass(frozen=True, slots=True)
+class VisitedCitiesStatistics:
+    """
+    Итоги и ряды статистики посещённых городов.
+    Годовые ряды индексируются номером года, помесячные — первым днём месяца.
+    Все ряды отсортированы по возрастанию ключа.
+    """
+
+    unique_cities: int
+    total_visits: int
+    unique_cities_by_year: dict[int, int]
+    total_visits_by_year: dict[int, int]
+    new_cities_by_year: dict[int, int]
+    unique_cities_by_month: dict[datetime.date, int]
+    total_visits_by_month: dict[datetime.date, int]
+    new_cities_by_month: dict[datetime.date, int]
+    region_visits: int
+    unique_regions: int
+    region_visits_by_year: dict[int, int]
+    unique_regions_by_year: dict[int, int]
+    new_regions_by_year: dict[int, int]
+
+
+def get_visit_rows(user_id: int) -> list[VisitRow]:
+    """
+    Возвращает все посещения пользователя с ID user_id одним запросом.
+    """
+    return [
+        VisitRow(city_id, region_id, country_id, country_code, date_of_visit, bool(is_first_visit))
+        for city_id, region_id, country_id, country_code, date_of_visit, is_first_visit in (
+            VisitedCity.objects.filter(user_id=user_id)
+            .order_by()
+            .values_list(
+                'city_id',
+                'city__region_id',
+                'city__country_id',
+                'city__country__code',
+                'date_of_visit',
+                'is_first_visit',
+            )
+        )
+    ]
+
+
+def get_last_24_months_range(today: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """
+    Возвращает первый и последний день периода из 24 месяцев, заканчивающегося месяцем `today`.
+    """
+    if today.month == 12:
+        start_date = datetime.date(today.year - 1, 1, 1)
+    else:
+        start_date = datetime.date(today.year - 2, today.month + 1, 1)
+    end_date = datetime.date(
+        today.year, today.month, calendar.monthrange(today.year, today.month)[1]
+    )
+    return start_date, end_date
+
+
+def _sorted_counts[K: (int, datetime.date)](counts: dict[K, int]) -> dict[K, int]:
+    return dict(sorted(counts.items()))
+
+
+def _sorted_sizes[K: (int, datetime.date)](sets: dict[K, set[int]]) -> dict[K, int]:
+    return {key: len(values) for key, values in sorted(sets.items())}
+
+
+def calculate_visited_cities_statistics(
+    rows: Iterable[VisitRow],
+    regions_country_code: str | None = None,
+    today: datetime.date | None = None,
+) -> VisitedCitiesStatistics:
+    """
+    Считает все итоги и ряды статистики за один проход по посещениям `rows`.
+
+    Региональная статистика учитывает только города с регионом и,
+    если передан `regions_country_code`, только города этой страны.
+    Помесячные ряды охватывают последние 24 месяца относительно `today`.
+    """
+    month_start, month_end = get_last_24_months_range(today or datetime.date.today())
+
+    unique_cities = 0
+    total_visits = 0
+    cities_by_year: defaultdict[int, set[int]] = defaultdict(set)
+    visits_by_year: Counter[int] = Counter()
+    new_by_year: Counter[int] = Counter()
+    cities_by_month: defaultdict[datetime.date, set[int]] = defaultdict(set)
+    visits_by_month: Counter[datetime.date] = Counter()
+    new_by_month: Counter[datetime.date] = Counter()
+
+    region_visits = 0
+    regions: set[int] = set()
+    region_visits_by_year: Counter[int] = Counter()
+    regions_by_year: defaultdict[int, set[int]] = defaultdict(set)
+    first_region_visit: dict[int, datetime.date] = {}
+
+    for row in rows:
+        total_visits += 1
+        unique_cities += row.is_first_visit
+        visit_date = row.date_of_visit
+
+        if visit_date is not None:
+            year = visit_date.year
+            visits_by_year[year] += 1
+            cities_by_year[year].add(row.city_id)
+            new_by_year[year] += row.is_first_visit
+
+            if month_start <= visit_date <= month_end:
+                month = visit_date.replace(day=1)
+                visits_by_month[month] += 1
+                cities_by_month[month].add(row.city_id)
+                new_by_month[month] += row.is_first_visit
+
+        if row.region_id is None or (
+            regions_country_code is not None and row.country_code != regions_country_code
+        ):
+            continue
+
+        region_visits += 1
+        regions.add(row.region_id)
+        if visit_date is not None:
+            region_visits_by_year[visit_date.year] += 1
+            regions_by_year[visit_date.year].add(row.region_id)
+            first_visit = first_region_visit.get(row.region_id)
+            if first_visit is None or visit_date < first_visit:
+                first_region_visit[row.region_id] = visit_date
+
+    new_regions_by_year = Counter(first_visit.year for first_visit in first_region_visit.values())
+
+    return VisitedCitiesStatistics(
+        unique_cities=unique_cities,
+        total_visits=total_visits,
+        unique_cities_by_year=_sorted_sizes(cities_by_year),
+        total_visits_by_year=_sorted_counts(visits_by_year),
+        new_cities_by_year=_sorted_counts(+new_by_year),
+        unique_cities_by_month=_sorted_sizes(cities_by_month),
+        total_visits_by_month=_sorted_counts(visits_by_month),
+        new_cities_by_month=_sorted_counts(+new_by_month),
+        region_visits=region_visits,
+        unique_regions=len(regions),
+        region_visits_by_year=_sorted_counts(region_visits_by_year),
+        unique_regions_by_year=_sorted_sizes(regions_by_year),
+        new_regions_by_year=_sorted_counts(new_regions_by_year),
+    )
+
+
+@cached_user_stats('visited-cities:statistics', ttl_seconds=CACHE_TTL_SECONDS, single_flight=True)
+def get_visited_cities_statistics(
+    user_id: int, regions_country_code: str | None = None
+) -> VisitedCitiesStatistics:
+    """
+    Возвращает статистику посещённых городов пользователя с ID user_id.
+    Результат кешируется до изменения посещений пользователя.
+    """
+    return calculate_visited_cities_statistics(
+        get_visit_rows(user_id), regions_country_code=regions_country_code
+    )
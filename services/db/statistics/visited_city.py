@@ -8,14 +8,15 @@ Licensed under the Apache License, Version 2.0
 ----------------------------------------------
 """
 
-from city.models import VisitedCity, City
+from city.models import VisitedCity
+from city.services import db as city_db
 
 
 def get_number_of_cities() -> int:
     """
     Возвращает общее количество городов в России.
     """
-    return City.objects.count()
+    return city_db.get_number_of_cities()
 
 
 def get_number_of_visited_cities(user_id: int) -> int:
@@ -29,7 +30,7 @@ def get_number_of_not_visited_cities(user_id: int) -> int:
     """
     Возвращает количество непосещённых городов пользователем с ID, указанном в user_id.
     """
-    return City.objects.count() - VisitedCity.objects.filter(user=user_id).count()
+    return get_number_of_cities() - VisitedCity.objects.filter(user=user_id).count()
 
 
 def get_number_of_visited_cities_by_year(user_id: int, year: int) -> int:
@@ -0,0 +1,82 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+"""
+Условное HTTP-кеширование (ETag, If-None-Match, 304) для эндпоинтов с данными карт.
+
+ETag строится из составных частей ответа: адреса запроса, версии справочника городов
+и регионов и версии данных пользователя. Если клиент прислал совпадающий ETag,
+эндпоинт отвечает 304 без построения и сериализации данных.
+"""
+
+import hashlib
+
+from django.http import HttpRequest
+from django.utils.http import parse_etags
+from dmr.headers import HeaderSpec
+
+from country.models import CatalogVersion
+from services.reference_cache import CATALOG_VERSION, bump_version_counter, get_version_counter
+
+# Время, в течение которого CDN и браузер могут отдавать публичные ответы без перепроверки
+PUBLIC_MAX_AGE_SECONDS = 5 * 60
+
+# Описание заголовков для ответов dmr-контроллеров, поддерживающих условные запросы.
+# Заголовки выставляются не во всех ответах эндпоинта (например, не в ответах 400),
+# поэтому их наличие не проверяется.
+CONDITIONAL_RESPONSE_HEADERS = {
+    'ETag': HeaderSpec(
+        description='Версия ответа для заголовка If-None-Match', skip_validation=True
+    ),
+    'Cache-Control': HeaderSpec(description='Политика кеширования ответа', skip_validation=True),
+}
+
+
+def get_catalog_version() -> str:
+    """
+    Возвращает версию справочника стран, регионов и городов.
+    Версия меняется только при изменении этих моделей (см. `bump_catalog_version`).
+    """
+    return get_version_counter(CATALOG_VERSION, CatalogVersion)
+
+
+def bump_catalog_version() -> None:
+    """Переводит справочник на новую версию. Вызывается сигналами моделей справочника."""
+    bump_version_counter(CATALOG_VERSION, CatalogVersion)
+
+
+def build_etag(*parts: object) -> str:
+    """Возвращает строгий ETag, однозначно соответствующий набору `parts`."""
+    digest = hashlib.md5(
+        '\x1f'.join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: HttpRequest, etag: str) -> bool:
+    """
+    Проверяет, что ETag из заголовка If-None-Match совпадает с `etag`.
+    Сравнение слабое: GZip и прокси могут пометить ETag как слабый (W/).
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+
+    etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+    return '*' in etags or etag.removeprefix('W/') in etags
+
+
+def get_conditional_headers(etag: str, is_public: bool) -> dict[str, str]:
+    """
+    Возвращает заголовки ETag и Cache-Control.
+    Публичные ответы может кешировать CDN, приватные браузер обязан перепроверять по ETag.
+    """
+    if is_public:
+        cache_control = f'public, max-age={PUBLIC_MAX_AGE_SECONDS}'
+    else:
+        cache_control = 'private, no-cache'
+    return {'ETag': etag, 'Cache-Control': cache_control}
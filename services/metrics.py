@@ -0,0 +1,64 @@
+"""
+Общие инструменты для метрик Prometheus.
+
+Фоновые обработчики очередей (рассылка уведомлений, экспорт, обработка фотографий) —
+это отдельные процессы, которые не отдают /metrics. Поэтому глубина очередей не хранится
+в Gauge процесса-обработчика, а считается запросом COUNT в момент сбора метрик
+в веб-процессе (`QueueDepthCollector`). Гистограммы и счётчики обработчиков попадают
+в /metrics через общую с Gunicorn папку PROMETHEUS_MULTIPROC_DIR.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable, Iterator
+
+from django.db import DatabaseError
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+logger = logging.getLogger(__name__)
+
+UNSHARED_WORKER_METRICS_WARNING = (
+    'PROMETHEUS_MULTIPROC_DIR не задана: метрики обработчика не попадут в /metrics'
+)
+
+
+class QueueDepthCollector(Collector):
+    """
+    Отдаёт глубину очереди как Gauge, вычисляя её функцией `count` при каждом сборе метрик.
+    Если база данных недоступна, метрика пропускается, а остальные метрики отдаются как обычно.
+    """
+
+    def __init__(self, name: str, documentation: str, count: Callable[[], int]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._count = count
+
+    def describe(self) -> Iterator[Metric]:
+        # Описание без значения: регистрация коллектора не должна обращаться к базе данных
+        yield GaugeMetricFamily(self.name, self.documentation)
+
+    def collect(self) -> Iterator[Metric]:
+        try:
+            depth = self._count()
+        except DatabaseError:
+            logger.warning('Не удалось посчитать глубину очереди для метрики %s', self.name)
+            return
+        yield GaugeMetricFamily(self.name, self.documentation, value=depth)
+
+
+def worker_metrics_are_shared() -> bool:
+    """
+    Проверяет, что процесс-обработчик пишет метрики в PROMETHEUS_MULTIPROC_DIR.
+    Без неё метрики останутся в памяти процесса и не попадут в /metrics веб-приложения.
+    """
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
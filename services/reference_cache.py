@@ -0,0 +1,262 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+"""
+Двухуровневый кеш справочных данных: списки стран и регионов, тарифы, количество городов.
+
+Такие данные читаются почти на каждом запросе, а меняются только через админку.
+Первый уровень — ограниченный по размеру TTL+LRU кеш внутри процесса, второй — Redis
+(алиас `default`). При изменении данных сигналы моделей вызывают `invalidate_reference_data`,
+который удаляет значения из Redis и рассылает имена изменённых наборов через Redis pub/sub,
+чтобы каждый воркер gunicorn сбросил их из своего локального уровня.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, TypeVar, cast
+
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models import F
+from prometheus_client import Counter
+
+T = TypeVar('T')
+REFERENCE_CACHE_ALIAS = 'default'
+REFERENCE_CACHE_KEY_TEMPLATE = 'reference:{name}'
+REFERENCE_CACHE_CHANNEL = 'reference-data-changed'
+REFERENCE_CACHE_TTL_SECONDS = 24 * 60 * 60
+# Локальный TTL ограничивает устаревание, если сообщение pub/sub было пропущено
+LOCAL_TTL_SECONDS = 60
+LOCAL_MAX_ENTRIES = 256
+LISTENER_RECONNECT_DELAY_SECONDS = 5
+
+# Имена наборов справочных данных
+COUNTRIES = 'countries'
+COUNTRIES_WITH_CITIES = 'countries-with-cities'
+REGIONS_BY_COUNTRY = 'regions-by-country'
+NUMBER_OF_CITIES = 'number-of-cities'
+PREMIUM_PLANS = 'premium-plans'
+CATALOG_VERSION = 'catalog-version'
+COLLECTIONS_VERSION = 'collections-version'
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CACHE_REQUESTS = Counter(
+    'reference_cache_requests_total',
+    'Reference data cache lookups',
+    ['tier', 'result'],
+)
+
+
+class LocalTTLCache:
+    """Потокобезопасный LRU-кеш с ограничением количества записей и временем жизни."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[name]
+                return False, None
+            self._entries.move_to_end(name)
+            return True, value
+
+    def set(self, name: str, value: Any) -> None:
+        with self._lock:
+            self._entries[name] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = LocalTTLCache(max_entries=LOCAL_MAX_ENTRIES, ttl_seconds=LOCAL_TTL_SECONDS)
+_listener_lock = threading.Lock()
+_listener_pid: int | None = None
+
+
+def _get_redis_key(name: str) -> str:
+    return REFERENCE_CACHE_KEY_TEMPLATE.format(name=name)
+
+
+def _get_redis_client() -> Any | None:
+    """Возвращает клиент Redis алиаса кеша или None, если кеш работает не через Redis."""
+    try:
+        from django_redis import get_redis_connection  # type: ignore[import-untyped]
+
+        return get_redis_connection(REFERENCE_CACHE_ALIAS)
+    except (ImportError, NotImplementedError, AttributeError):
+        return None
+
+
+def _listen_for_invalidation(client: Any) -> None:
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REFERENCE_CACHE_CHANNEL)
+            for message in pubsub.listen():
+                _local_cache.delete(*json.loads(message['data']))
+        except Exception:
+            logger.warning('Reference cache listener disconnected', exc_info=True)
+        # Пока подписка не восстановлена, сообщения теряются — локальный уровень сбрасывается
+        _local_cache.clear()
+        time.sleep(LISTENER_RECONNECT_DELAY_SECONDS)
+
+
+def _ensure_invalidation_listener() -> None:
+    """
+    Запускает фоновый поток подписки на канал инвалидации в текущем процессе.
+    Поток запускается лениво при первом обращении, то есть уже после fork воркера gunicorn.
+    """
+    global _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        _local_cache.clear()
+
+        client = _get_redis_client()
+        if client is None:
+            return
+
+        threading.Thread(
+            target=_listen_for_invalidation,
+            args=(client,),
+            name='reference-cache-invalidation',
+            daemon=True,
+        ).start()
+
+
+def get_reference_data(name: str, factory: Callable[[], T]) -> T:
+    """
+    Возвращает справочные данные `name` из локального уровня, Redis или factory.
+
+    Значения должны сериализоваться через pickle и не могут быть `None`.
+    Полученные из Redis или factory значения сохраняются в локальный уровень.
+    """
+    _ensure_invalidation_listener()
+
+    is_found, value = _local_cache.get(name)
+    if is_found:
+        REFERENCE_CACHE_REQUESTS.labels(tier='local', result='hit').inc()
+        return cast(T, value)
+    REFERENCE_CACHE_REQUESTS.labels(tier='local', result='miss').inc()
+
+    reference_cache = caches[REFERENCE_CACHE_ALIAS]
+    value = reference_cache.get(_get_redis_key(name))
+    if value is not None:
+        REFERENCE_CACHE_REQUESTS.labels(tier='redis', result='hit').inc()
+    else:
+        REFERENCE_CACHE_REQUESTS.labels(tier='redis', result='miss').inc()
+        value = factory()
+        reference_cache.set(_get_redis_key(name), value, timeout=REFERENCE_CACHE_TTL_SECONDS)
+        logger.debug('Reference cache set: %s', name)
+
+    _local_cache.set(name, value)
+    return cast(T, value)
+
+
+def _drop(names: tuple[str, ...]) -> None:
+    caches[REFERENCE_CACHE_ALIAS].delete_many([_get_redis_key(name) for name in names])
+    _local_cache.delete(*names)
+
+
+def _publish_invalidation(names: tuple[str, ...]) -> None:
+    _drop(names)
+
+    client = _get_redis_client()
+    if client is None:
+        return
+    try:
+        client.publish(REFERENCE_CACHE_CHANNEL, json.dumps(names))
+    except Exception:
+        logger.warning('Failed to publish reference cache invalidation', exc_info=True)
+
+
+def invalidate_reference_data(*names: str) -> None:
+    """
+    Сбрасывает справочные данные `names` в Redis и в локальном уровне всех воркеров.
+
+    Значения удаляются сразу, чтобы текущая транзакция видела свои изменения,
+    и повторно после фиксации транзакции — на случай, если другой воркер успел
+    закешировать старые данные, пока транзакция была открыта.
+    """
+    _drop(names)
+    transaction.on_commit(lambda: _publish_invalidation(names))
+
+
+def get_version_counter(name: str, model: type[models.Model]) -> str:
+    """
+    Возвращает версию данных `name` из строки-счётчика модели `model` (поля `version`
+    и `token`, единственная строка с pk=1) через кеш справочных данных.
+    Версия хранится в базе, поэтому она одинакова во всех воркерах и не меняется
+    при вытеснении ключа из Redis — только при изменении самих данных.
+    Токен делает версию неповторяющейся: если транзакция с изменением откатилась,
+    следующее изменение не получит ту же версию, что и откаченное.
+    """
+
+    def load() -> str:
+        counter = model._default_manager.filter(pk=1).values_list('version', 'token').first()
+        if counter is None:
+            return '0'
+        version, token = counter
+        return f'{version}-{token.hex}'
+
+    return get_reference_data(name, load)
+
+
+def bump_version_counter(name: str, model: type[models.Model]) -> None:
+    """
+    Увеличивает счётчик версии `model` в текущей транзакции, выдаёт ему новый токен
+    и сбрасывает кеш версии `name`. Строка счётчика создаётся при первом изменении.
+    """
+    counter = model._default_manager.filter(pk=1)
+    if not counter.update(version=F('version') + 1, token=uuid.uuid4()):
+        model._default_manager.bulk_create([model(pk=1)], ignore_conflicts=True)
+        counter.update(version=F('version') + 1, token=uuid.uuid4())
+    invalidate_reference_data(name)
+
+
+def clear_reference_cache() -> None:
+    """Очищает локальный уровень текущего процесса и все справочные данные в Redis."""
+    _drop(
+        (
+            COUNTRIES,
+            COUNTRIES_WITH_CITIES,
+            REGIONS_BY_COUNTRY,
+            NUMBER_OF_CITIES,
+            PREMIUM_PLANS,
+            CATALOG_VERSION,
+            COLLECTIONS_VERSION,
+        )
+    )
@@ -9,6 +9,9 @@ Licensed under the Apache License, Version 2.0
 
 import pytest
 from typing import Any
+from city.services.search_index import clear_city_search_index
+from services.catalog_search import clear_catalog_search_index
+from services.reference_cache import clear_reference_cache
 
 
 # Общие фикстуры для всех тестов приложения services
@@ -62,3 +65,14 @@ def test_city(test_region: Any, test_country: Any) -> Any:
         coordinate_width=55.7558,
         coordinate_longitude=37.6173,
     )
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data_cache() -> None:
+    """
+    Сбрасывает кеш справочных данных и построенные по ним индексы поиска,
+    чтобы данные одного теста не попадали в другой
+    """
+    clear_reference_cache()
+    clear_catalog_search_index()
+    clear_city_search_index()
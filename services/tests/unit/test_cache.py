@@ -9,8 +9,18 @@ from typing import Any
 
 import pytest
 from django.core.cache import caches
+from prometheus_client import REGISTRY
 
-from services.cache import delete_cache, get_or_set_cache
+from services.cache import (
+    acquire_lease,
+    build_stats_cache_key,
+    bump_stats_generation,
+    cached_user_stats,
+    delete_cache,
+    get_or_set_cache,
+    get_stats_generation,
+    release_lease,
+)
 
 stats_cache = caches['stats']
 
@@ -83,3 +93,204 @@ def test_cache_helpers_do_not_write_to_default_cache(mocker: Any) -> None:
 
     assert caches['default'].get('test-key') is None
     assert stats_cache.get('test-key') == {'value': 1}
+
+
+def _requests_count(family: str, result: str) -> float:
+    value = REGISTRY.get_sample_value(
+        'stats_cache_requests_total', {'family': family, 'result': result}
+    )
+    return value or 0.0
+
+
+@pytest.mark.unit
+def test_get_or_set_cache_counts_hits_and_misses_per_family(mocker: Any) -> None:
+    misses = _requests_count('test-family', 'miss')
+    hits = _requests_count('test-family', 'hit')
+    factory = mocker.Mock(return_value={'value': 1})
+
+    get_or_set_cache('test-key', ttl_seconds=60, factory=factory, family='test-family')
+    get_or_set_cache('test-key', ttl_seconds=60, factory=factory, family='test-family')
+
+    assert _requests_count('test-family', 'miss') == misses + 1
+    assert _requests_count('test-family', 'hit') == hits + 1
+
+
+@pytest.mark.unit
+def test_stats_generation_is_stable_until_bump() -> None:
+    generation = get_stats_generation(7)
+
+    assert get_stats_generation(7) == generation
+
+    bump_stats_generation(7)
+
+    assert get_stats_generation(7) == generation + 1
+
+
+@pytest.mark.unit
+def test_bump_stats_generation_without_stored_generation() -> None:
+    bump_stats_generation(7)
+
+    assert get_stats_generation(7) > 0
+
+
+@pytest.mark.unit
+def test_build_stats_cache_key_changes_after_bump() -> None:
+    key = build_stats_cache_key('family', 7, 'RU')
+
+    assert key.startswith('stats:family:user:7:gen:')
+    assert key.endswith(':RU')
+
+    bump_stats_generation(7)
+
+    assert build_stats_cache_key('family', 7, 'RU') != key
+    assert build_stats_cache_key('family', 8, 'RU') != key
+
+
+@pytest.mark.unit
+def test_cached_user_stats_caches_per_user_and_arguments(mocker: Any) -> None:
+    calculate = mocker.Mock(side_effect=lambda user_id, code: {'user': user_id, 'code': code})
+    cached = cached_user_stats('test-family', ttl_seconds=60)(calculate)
+
+    assert cached(1, 'RU') == {'user': 1, 'code': 'RU'}
+    assert cached(1, 'RU') == {'user': 1, 'code': 'RU'}
+    assert cached(1, 'DE') == {'user': 1, 'code': 'DE'}
+    assert cached(2, 'RU') == {'user': 2, 'code': 'RU'}
+
+    assert calculate.call_count == 3
+
+
+@pytest.mark.unit
+def test_cached_user_stats_recomputes_after_generation_bump(mocker: Any) -> None:
+    calculate = mocker.Mock(side_effect=[[1], [1, 2]])
+    cached = cached_user_stats('test-family', ttl_seconds=60)(calculate)
+
+    assert cached(1) == [1]
+
+    bump_stats_generation(1)
+
+    assert cached(1) == [1, 2]
+    assert calculate.call_count == 2
+
+
+@pytest.mark.unit
+def test_get_or_set_cache_caches_none(mocker: Any) -> None:
+    factory = mocker.Mock(return_value=None)
+
+    assert get_or_set_cache('test-key', ttl_seconds=60, factory=factory) is None
+    assert get_or_set_cache('test-key', ttl_seconds=60, factory=factory) is None
+
+    factory.assert_called_once_with()
+
+
+@pytest.mark.unit
+def test_soft_ttl_returns_fresh_value_without_factory(mocker: Any) -> None:
+    get_or_set_cache('test-key', ttl_seconds=60, factory=lambda: [1], soft_ttl_seconds=30)
+    factory = mocker.Mock(return_value=[2])
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=factory, soft_ttl_seconds=30)
+
+    assert result == [1]
+    factory.assert_not_called()
+
+
+@pytest.mark.unit
+def test_soft_ttl_refreshes_stale_value_under_lock(mocker: Any) -> None:
+    get_or_set_cache('test-key', ttl_seconds=60, factory=lambda: [1], soft_ttl_seconds=0)
+    factory = mocker.Mock(return_value=[2])
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=factory, soft_ttl_seconds=30)
+
+    assert result == [2]
+    factory.assert_called_once_with()
+    assert stats_cache.get('test-key:lock') is None
+
+
+@pytest.mark.unit
+def test_soft_ttl_serves_stale_value_while_other_worker_refreshes(mocker: Any) -> None:
+    get_or_set_cache('test-key', ttl_seconds=60, factory=lambda: [1], soft_ttl_seconds=0)
+    stats_cache.set('test-key:lock', 1, timeout=60)
+    factory = mocker.Mock(return_value=[2])
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=factory, soft_ttl_seconds=30)
+
+    assert result == [1]
+    factory.assert_not_called()
+
+
+@pytest.mark.unit
+def test_single_flight_waits_for_lock_holder(mocker: Any) -> None:
+    stats_cache.set('test-key:lock', 1, timeout=60)
+    mocker.patch(
+        'services.cache.time.sleep',
+        side_effect=lambda _: stats_cache.set('test-key', [1], timeout=60),
+    )
+    factory = mocker.Mock(return_value=[2])
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=factory, single_flight=True)
+
+    assert result == [1]
+    factory.assert_not_called()
+
+
+@pytest.mark.unit
+def test_single_flight_computes_when_lock_released_without_value(mocker: Any) -> None:
+    stats_cache.set('test-key:lock', 1, timeout=60)
+    mocker.patch(
+        'services.cache.time.sleep', side_effect=lambda _: stats_cache.delete('test-key:lock')
+    )
+    factory = mocker.Mock(return_value=[2])
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=factory, single_flight=True)
+
+    assert result == [2]
+    factory.assert_called_once_with()
+
+
+@pytest.mark.unit
+def test_single_flight_releases_lock_when_factory_fails() -> None:
+    def failing_factory() -> list[int]:
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        get_or_set_cache('test-key', ttl_seconds=60, factory=failing_factory, single_flight=True)
+
+    assert stats_cache.get('test-key:lock') is None
+
+
+@pytest.mark.unit
+def test_single_flight_keeps_lease_taken_over_by_other_worker() -> None:
+    def slow_factory() -> list[int]:
+        # Аренда истекла во время вычисления, и её взял другой воркер
+        stats_cache.set('test-key:lock', 1, timeout=60)
+        return [2]
+
+    result = get_or_set_cache('test-key', ttl_seconds=60, factory=slow_factory, single_flight=True)
+
+    assert result == [2]
+    assert stats_cache.get('test-key:lock') == 1
+
+
+@pytest.mark.unit
+def test_acquire_lease_returns_token_only_once() -> None:
+    token = acquire_lease('stats', 'test-lease', timeout=60)
+
+    assert token is not None
+    assert acquire_lease('stats', 'test-lease', timeout=60) is None
+
+    release_lease('stats', 'test-lease', token)
+
+    assert acquire_lease('stats', 'test-lease', timeout=60) is not None
+
+
+@pytest.mark.unit
+def test_release_lease_compares_token_in_redis(mocker: Any) -> None:
+    client = mocker.Mock()
+    mocker.patch('services.cache._get_redis_client', return_value=client)
+    stats_cache.set('test-lease', 1, timeout=60)
+
+    release_lease('stats', 'test-lease', 123)
+
+    script, number_of_keys, key, token = client.eval.call_args.args
+    assert "redis.call('get', KEYS[1]) == ARGV[1]" in script
+    assert (number_of_keys, key, token) == (1, stats_cache.make_key('test-lease'), 123)
+    assert stats_cache.get('test-lease') == 1
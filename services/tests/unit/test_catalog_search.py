@@ -0,0 +1,160 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+import pytest
+from django.db import transaction
+
+from collection.models import Collection
+from services.catalog_search import (
+    COLLECTION_CATALOG,
+    COUNTRY_CATALOG,
+    REGION_CATALOG,
+    CatalogEntry,
+    CatalogSearchIndex,
+    _get_index_version,
+    lemmatize,
+)
+from services.reference_cache import (
+    COLLECTIONS_VERSION,
+    clear_reference_cache,
+    invalidate_reference_data,
+)
+
+
+@pytest.fixture
+def index() -> CatalogSearchIndex:
+    return CatalogSearchIndex(
+        [
+            CatalogEntry.create(REGION_CATALOG, 1, ('Московская область', 'Московская'), 'RU'),
+            CatalogEntry.create(REGION_CATALOG, 2, ('Краснодарский край', 'Краснодарский'), 'RU'),
+            CatalogEntry.create(REGION_CATALOG, 3, ('Минская область', 'Минская'), 'BY'),
+            CatalogEntry.create(REGION_CATALOG, 4, ('Москва', 'Москва'), 'RU'),
+            CatalogEntry.create(COLLECTION_CATALOG, 1, ('Золотое кольцо',)),
+            CatalogEntry.create(COLLECTION_CATALOG, 2, ('Города-герои',)),
+            CatalogEntry.create(COUNTRY_CATALOG, 1, ('Россия', 'Российская Федерация'), 'RU'),
+            CatalogEntry.create(COUNTRY_CATALOG, 2, ('Беларусь', 'Республика Беларусь'), 'BY'),
+        ]
+    )
+
+
+def found(entries: list[CatalogEntry]) -> list[tuple[str, int]]:
+    return [(entry.catalog, entry.id) for entry in entries]
+
+
+@pytest.mark.unit
+def test_lemmatize() -> None:
+    assert lemmatize('московской области') == 'московский область'
+    assert lemmatize('орёл') == 'орел'
+
+
+@pytest.mark.unit
+def test_entry_keeps_display_title_and_normalized_names() -> None:
+    entry = CatalogEntry.create(REGION_CATALOG, 1, ('Московская область', 'Московская', None))
+
+    assert entry.title == 'Московская область'
+    assert entry.names == ('московская область', 'московская')
+    assert entry.lemmas == ('московский область', 'московский')
+
+
+@pytest.mark.unit
+def test_searches_all_catalogs(index: CatalogSearchIndex) -> None:
+    assert found(index.search('моск')) == [
+        (REGION_CATALOG, 4),
+        (REGION_CATALOG, 1),
+    ]
+    assert found(index.search('беларусь')) == [(COUNTRY_CATALOG, 2)]
+
+
+@pytest.mark.unit
+def test_exact_match_comes_first(index: CatalogSearchIndex) -> None:
+    assert found(index.search('московская')) == [(REGION_CATALOG, 1)]
+    assert found(index.search('Москва'))[0] == (REGION_CATALOG, 4)
+
+
+@pytest.mark.unit
+def test_searches_by_word_prefix_and_alternative_name(index: CatalogSearchIndex) -> None:
+    assert found(index.search('кольцо')) == [(COLLECTION_CATALOG, 1)]
+    assert found(index.search('федерация')) == [(COUNTRY_CATALOG, 1)]
+    assert found(index.search('города герои')) == [(COLLECTION_CATALOG, 2)]
+
+
+@pytest.mark.unit
+def test_searches_by_morphology(index: CatalogSearchIndex) -> None:
+    assert found(index.search('московской области')) == [(REGION_CATALOG, 1)]
+    assert found(index.search('золотого кольца')) == [(COLLECTION_CATALOG, 1)]
+
+
+@pytest.mark.unit
+def test_tolerates_typos(index: CatalogSearchIndex) -> None:
+    assert found(index.search('краснадарский')) == [(REGION_CATALOG, 2)]
+    assert found(index.search('белорусь')) == [(COUNTRY_CATALOG, 2)]
+    assert index.search('абвгдеж') == []
+
+
+@pytest.mark.unit
+def test_filters_by_catalogs(index: CatalogSearchIndex) -> None:
+    assert found(index.search('бел', catalogs=(REGION_CATALOG,))) == []
+    assert found(index.search('ро', catalogs=(COUNTRY_CATALOG,))) == [(COUNTRY_CATALOG, 1)]
+
+
+@pytest.mark.unit
+def test_country_filter_does_not_apply_to_collections(index: CatalogSearchIndex) -> None:
+    assert found(index.search('обл', country_code='BY')) == [(REGION_CATALOG, 3)]
+    assert found(index.search('золот', country_code='BY')) == [(COLLECTION_CATALOG, 1)]
+
+
+@pytest.mark.unit
+def test_limit_applies_to_each_catalog() -> None:
+    index = CatalogSearchIndex(
+        [
+            CatalogEntry.create(REGION_CATALOG, 1, ('Алтайский край',), 'RU'),
+            CatalogEntry.create(REGION_CATALOG, 2, ('Алтай',), 'RU'),
+            CatalogEntry.create(COLLECTION_CATALOG, 1, ('Алтайские города',)),
+            CatalogEntry.create(COLLECTION_CATALOG, 2, ('Алтайские сёла',)),
+        ]
+    )
+
+    assert found(index.search('алт', limit=1)) == [(REGION_CATALOG, 2), (COLLECTION_CATALOG, 1)]
+    assert index.search('алт', limit=0) == []
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_index_version_survives_cache_invalidation() -> None:
+    version = _get_index_version()
+
+    invalidate_reference_data(COLLECTIONS_VERSION)
+    clear_reference_cache()
+
+    assert _get_index_version() == version
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_index_version_changes_with_collections() -> None:
+    version = _get_index_version()
+
+    Collection.objects.create(title='Золотое кольцо')
+
+    assert _get_index_version() != version
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_index_version_does_not_repeat_after_rollback() -> None:
+    class Rollback(Exception):
+        pass
+
+    with pytest.raises(Rollback), transaction.atomic():
+        Collection.objects.create(title='Золотое кольцо')
+        rolled_back_version = _get_index_version()
+        raise Rollback
+
+    clear_reference_cache()
+    Collection.objects.create(title='Серебряное ожерелье')
+
+    assert _get_index_version() != rolled_back_version
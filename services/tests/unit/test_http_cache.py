@@ -0,0 +1,93 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+import pytest
+from django.test import RequestFactory
+
+from country.models import Country
+from services.http_cache import (
+    build_etag,
+    bump_catalog_version,
+    get_catalog_version,
+    get_conditional_headers,
+    is_not_modified,
+)
+from services.reference_cache import (
+    CATALOG_VERSION,
+    clear_reference_cache,
+    invalidate_reference_data,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    clear_reference_cache()
+
+
+@pytest.mark.unit
+def test_build_etag_depends_on_parts() -> None:
+    etag = build_etag('/api/city/list_by_ids?city_ids=1', 'v1', 5)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == build_etag('/api/city/list_by_ids?city_ids=1', 'v1', 5)
+    assert etag != build_etag('/api/city/list_by_ids?city_ids=1', 'v2', 5)
+    assert etag != build_etag('/api/city/list_by_ids?city_ids=1', 'v1', None)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'if_none_match, expected',
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other", "abc"', True),
+        ('*', True),
+        ('"other"', False),
+    ],
+)
+def test_is_not_modified(if_none_match: str | None, expected: bool) -> None:
+    headers = {} if if_none_match is None else {'If-None-Match': if_none_match}
+    request = RequestFactory().get('/', headers=headers)
+
+    assert is_not_modified(request, '"abc"') is expected
+
+
+@pytest.mark.unit
+def test_get_conditional_headers() -> None:
+    assert get_conditional_headers('"abc"', is_public=True) == {
+        'ETag': '"abc"',
+        'Cache-Control': 'public, max-age=300',
+    }
+    assert get_conditional_headers('"abc"', is_public=False)['Cache-Control'] == (
+        'private, no-cache'
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_catalog_version_survives_cache_invalidation() -> None:
+    version = get_catalog_version()
+    assert get_catalog_version() == version
+
+    invalidate_reference_data(CATALOG_VERSION)
+    clear_reference_cache()
+
+    assert get_catalog_version() == version
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_catalog_version_changes_with_catalog_data() -> None:
+    version = get_catalog_version()
+
+    bump_catalog_version()
+    bumped = get_catalog_version()
+    Country.objects.create(name='Россия', code='RU')
+
+    assert bumped != version
+    assert get_catalog_version() not in {version, bumped}
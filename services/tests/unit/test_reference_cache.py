@@ -0,0 +1,162 @@
+# ---------------------------------------------
+#
+# Copyright © Egor Vavilov (Shecspi)
+# Licensed under the Apache License, Version 2.0
+#
+# ----------------------------------------------
+
+import json
+from typing import Any
+
+import pytest
+from django.core.cache import caches
+
+from services import reference_cache
+from services.reference_cache import (
+    LocalTTLCache,
+    clear_reference_cache,
+    get_reference_data,
+    invalidate_reference_data,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    clear_reference_cache()
+
+
+# ===== Тесты для LocalTTLCache =====
+
+
+@pytest.mark.unit
+def test_local_cache_returns_stored_value() -> None:
+    local_cache = LocalTTLCache(max_entries=2, ttl_seconds=60)
+
+    local_cache.set('countries', [1])
+
+    assert local_cache.get('countries') == (True, [1])
+    assert local_cache.get('regions') == (False, None)
+
+
+@pytest.mark.unit
+def test_local_cache_expires_values(mocker: Any) -> None:
+    monotonic = mocker.patch('services.reference_cache.time.monotonic', return_value=100.0)
+    local_cache = LocalTTLCache(max_entries=2, ttl_seconds=60)
+    local_cache.set('countries', [1])
+
+    monotonic.return_value = 160.0
+
+    assert local_cache.get('countries') == (False, None)
+
+
+@pytest.mark.unit
+def test_local_cache_evicts_least_recently_used_value() -> None:
+    local_cache = LocalTTLCache(max_entries=2, ttl_seconds=60)
+    local_cache.set('countries', [1])
+    local_cache.set('regions', [2])
+    local_cache.get('countries')
+
+    local_cache.set('plans', [3])
+
+    assert local_cache.get('regions') == (False, None)
+    assert local_cache.get('countries') == (True, [1])
+    assert local_cache.get('plans') == (True, [3])
+
+
+# ===== Тесты для get_reference_data =====
+
+
+@pytest.mark.unit
+def test_get_reference_data_calls_factory_once(mocker: Any) -> None:
+    factory = mocker.Mock(return_value=[1, 2])
+
+    assert get_reference_data('countries', factory) == [1, 2]
+    assert get_reference_data('countries', factory) == [1, 2]
+
+    factory.assert_called_once_with()
+    assert caches['default'].get('reference:countries') == [1, 2]
+
+
+@pytest.mark.unit
+def test_get_reference_data_reads_redis_tier_on_local_miss(mocker: Any) -> None:
+    caches['default'].set('reference:countries', [3], timeout=60)
+    factory = mocker.Mock(return_value=[1, 2])
+
+    assert get_reference_data('countries', factory) == [3]
+
+    factory.assert_not_called()
+
+
+@pytest.mark.unit
+def test_get_reference_data_reads_local_tier_without_redis(mocker: Any) -> None:
+    get_reference_data('countries', lambda: [1])
+    cache_get = mocker.patch.object(caches['default'], 'get')
+
+    assert get_reference_data('countries', lambda: [2]) == [1]
+
+    cache_get.assert_not_called()
+
+
+# ===== Тесты для invalidate_reference_data =====
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_invalidate_reference_data_drops_both_tiers(
+    mocker: Any, django_capture_on_commit_callbacks: Any
+) -> None:
+    get_reference_data('countries', lambda: [1])
+    get_reference_data('regions', lambda: [2])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate_reference_data('countries')
+
+    assert caches['default'].get('reference:countries') is None
+    assert get_reference_data('countries', lambda: [3]) == [3]
+    assert get_reference_data('regions', lambda: [4]) == [2]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_invalidate_reference_data_publishes_names_after_commit(
+    mocker: Any, django_capture_on_commit_callbacks: Any
+) -> None:
+    client = mocker.Mock()
+    mocker.patch('services.reference_cache._get_redis_client', return_value=client)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        invalidate_reference_data('countries', 'regions')
+
+    client.publish.assert_not_called()
+    callbacks[0]()
+    client.publish.assert_called_once_with(
+        'reference-data-changed', json.dumps(['countries', 'regions'])
+    )
+
+
+@pytest.mark.unit
+def test_invalidation_listener_drops_local_values(mocker: Any) -> None:
+    get_reference_data('countries', lambda: [1])
+    get_reference_data('regions', lambda: [2])
+    states = []
+
+    def listen() -> Any:
+        yield {'data': json.dumps(['countries'])}
+        states.append(
+            (
+                reference_cache._local_cache.get('countries'),
+                reference_cache._local_cache.get('regions'),
+            )
+        )
+
+    client = mocker.Mock()
+    client.pubsub.return_value.listen.side_effect = listen
+    mocker.patch('services.reference_cache.time.sleep', side_effect=StopIteration)
+
+    with pytest.raises(StopIteration):
+        reference_cache._listen_for_invalidation(client)
+
+    client.pubsub.return_value.subscribe.assert_called_once_with('reference-data-changed')
+    assert states == [((False, None), (True, [2]))]
+    # После отключения от канала локальный уровень сбрасывается полностью
+    assert reference_cache._local_cache.get('regions') == (False, None)
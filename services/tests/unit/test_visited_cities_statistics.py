@@ -0,0 +1,119 @@
+"""
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from datetime import date
+
+import pytest
+
+from services.db.statistics.visited_cities_statistics import (
+    VisitRow,
+    calculate_visited_cities_statistics,
+    get_last_24_months_range,
+)
+
+
+TODAY = date(2025, 6, 15)
+
+ROWS = [
+    VisitRow(1, 10, 1, 'RU', date(2024, 3, 1), True),
+    VisitRow(1, 10, 1, 'RU', date(2025, 5, 2), False),
+    VisitRow(2, 10, 1, 'RU', date(2025, 5, 20), True),
+    VisitRow(3, 11, 1, 'RU', date(2020, 1, 1), True),
+    VisitRow(4, None, 1, 'RU', date(2025, 1, 1), True),
+    VisitRow(5, 20, 2, 'DE', None, True),
+]
+
+
+# ===== Тесты для get_last_24_months_range =====
+
+
+@pytest.mark.unit
+def test_last_24_months_range_in_middle_of_year() -> None:
+    """Тест периода из 24 месяцев, заканчивающегося в середине года"""
+    assert get_last_24_months_range(TODAY) == (date(2023, 7, 1), date(2025, 6, 30))
+
+
+@pytest.mark.unit
+def test_last_24_months_range_in_december() -> None:
+    """Тест периода из 24 месяцев, заканчивающегося в декабре"""
+    assert get_last_24_months_range(date(2025, 12, 1)) == (date(2024, 1, 1), date(2025, 12, 31))
+
+
+# ===== Тесты для calculate_visited_cities_statistics =====
+
+
+@pytest.mark.unit
+def test_calculate_totals() -> None:
+    """Тест итогов по городам"""
+    statistics = calculate_visited_cities_statistics(ROWS, today=TODAY)
+
+    assert statistics.unique_cities == 5
+    assert statistics.total_visits == 6
+
+
+@pytest.mark.unit
+def test_calculate_yearly_series() -> None:
+    """Тест годовых рядов: посещения без даты не учитываются"""
+    statistics = calculate_visited_cities_statistics(ROWS, today=TODAY)
+
+    assert statistics.total_visits_by_year == {2020: 1, 2024: 1, 2025: 3}
+    assert statistics.unique_cities_by_year == {2020: 1, 2024: 1, 2025: 3}
+    assert statistics.new_cities_by_year == {2020: 1, 2024: 1, 2025: 2}
+
+
+@pytest.mark.unit
+def test_calculate_monthly_series() -> None:
+    """Тест помесячных рядов за последние 24 месяца"""
+    statistics = calculate_visited_cities_statistics(ROWS, today=TODAY)
+
+    assert statistics.total_visits_by_month == {
+        date(2024, 3, 1): 1,
+        date(2025, 1, 1): 1,
+        date(2025, 5, 1): 2,
+    }
+    assert statistics.unique_cities_by_month[date(2025, 5, 1)] == 2
+    assert statistics.new_cities_by_month == {
+        date(2024, 3, 1): 1,
+        date(2025, 1, 1): 1,
+        date(2025, 5, 1): 1,
+    }
+
+
+@pytest.mark.unit
+def test_calculate_region_series() -> None:
+    """Тест региональных рядов: учитываются только города с регионом"""
+    statistics = calculate_visited_cities_statistics(ROWS, today=TODAY)
+
+    assert statistics.region_visits == 5
+    assert statistics.unique_regions == 3
+    assert statistics.region_visits_by_year == {2020: 1, 2024: 1, 2025: 2}
+    assert statistics.unique_regions_by_year == {2020: 1, 2024: 1, 2025: 1}
+    assert statistics.new_regions_by_year == {2020: 1, 2024: 1}
+
+
+@pytest.mark.unit
+def test_calculate_region_series_filtered_by_country() -> None:
+    """Тест региональных рядов с фильтром по коду страны"""
+    statistics = calculate_visited_cities_statistics(ROWS, regions_country_code='DE', today=TODAY)
+
+    assert statistics.region_visits == 1
+    assert statistics.unique_regions == 1
+    assert statistics.region_visits_by_year == {}
+    assert statistics.new_regions_by_year == {}
+    assert statistics.total_visits == 6
+
+
+@pytest.mark.unit
+def test_calculate_without_visits() -> None:
+    """Тест статистики пользователя без посещений"""
+    statistics = calculate_visited_cities_statistics([], today=TODAY)
+
+    assert statistics.unique_cities == 0
+    assert statistics.total_visits_by_year == {}
+    assert statistics.unique_regions == 0
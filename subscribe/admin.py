@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from subscribe.infrastructure.models import VisitedCityNotification
+from subscribe.infrastructure.models import NotificationFanoutTask, VisitedCityNotification
 from subscribe.infrastructure.models import Subscribe
 
 
@@ -16,3 +16,8 @@ class SubscribeAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
 @admin.register(VisitedCityNotification)
 class VisitedCityNotificationAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     list_display = ('id', 'recipient', 'sender', 'city', 'is_read', 'created_at', 'read_at')
+
+
+@admin.register(NotificationFanoutTask)
+class NotificationFanoutTaskAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
+    list_display = ('id', 'sender', 'city', 'created_at')
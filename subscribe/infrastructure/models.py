@@ -52,3 +52,32 @@ class VisitedCityNotification(models.Model):
         ordering = ('-created_at',)
         verbose_name = 'Уведомление'
         verbose_name_plural = 'Уведомления'
+
+
+class NotificationFanoutTask(models.Model):
+    """
+    Задача на рассылку уведомлений подписчикам о новом посещённом городе.
+    Очередь обрабатывается вне запроса командой `process_notification_fanout`.
+    """
+
+    sender = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_fanout_tasks',
+        verbose_name='Отправитель',
+    )
+    city = models.ForeignKey(
+        City,
+        on_delete=models.CASCADE,
+        related_name='notification_fanout_tasks',
+        verbose_name='Посещённый город',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')
+
+    def __str__(self) -> str:
+        return f'Рассылка уведомлений от {self.sender} о городе {self.city}'
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Задача рассылки уведомлений'
+        verbose_name_plural = 'Задачи рассылки уведомлений'
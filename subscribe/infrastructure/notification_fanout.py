@@ -0,0 +1,128 @@
+"""
+Рассылка уведомлений подписчикам о новых посещённых городах.
+
+Добавление города не создаёт уведомления в рамках запроса: после фиксации транзакции
+в очередь (таблица NotificationFanoutTask) ставится одна задача, а уведомления
+создаются командой `process_notification_fanout` пачками через bulk_create.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+from services.metrics import QueueDepthCollector
+
+from subscribe.infrastructure.models import (
+    NotificationFanoutTask,
+    Subscribe,
+    VisitedCityNotification,
+)
+
+# Количество задач, забираемых из очереди одной транзакцией
+DEFAULT_TASKS_PER_TRANSACTION = 100
+
+# Считается при сборе метрик в веб-процессе, см. analytics.views.prometheus_metrics_view
+NOTIFICATION_FANOUT_QUEUE_DEPTH = QueueDepthCollector(
+    'subscribe_notification_fanout_queue_depth',
+    'Notification fan-out tasks waiting in the queue',
+    lambda: NotificationFanoutTask.objects.count(),
+)
+NOTIFICATION_FANOUT_LATENCY_SECONDS = Histogram(
+    'subscribe_notification_fanout_latency_seconds',
+    'Time from enqueueing a fan-out task to creating its notifications',
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+NOTIFICATION_FANOUT_DURATION_SECONDS = Histogram(
+    'subscribe_notification_fanout_duration_seconds',
+    'Time spent creating notifications for one fan-out task',
+)
+NOTIFICATIONS_CREATED = Counter(
+    'subscribe_notifications_created_total',
+    'Notifications created by the fan-out worker',
+)
+
+
+def enqueue_notification_fanout(sender_id: int, city_id: int) -> None:
+    """
+    Ставит в очередь рассылку уведомлений подписчикам пользователя `sender_id`
+    после фиксации текущей транзакции. Если транзакция откатится, задача не появится.
+    """
+    transaction.on_commit(
+        lambda: NotificationFanoutTask.objects.create(sender_id=sender_id, city_id=city_id)
+    )
+
+
+def fan_out_notifications(sender_id: int, city_id: int, batch_size: int | None = None) -> int:
+    """
+    Создаёт уведомления о посещении города `city_id` всем подписчикам пользователя `sender_id`.
+    Подписчики читаются и уведомления записываются пачками по `batch_size` штук.
+    Возвращает количество созданных уведомлений.
+    """
+    batch_size = batch_size or settings.SUBSCRIBER_NOTIFICATION_BATCH_SIZE
+    subscriber_ids = (
+        Subscribe.objects.filter(subscribe_to_id=sender_id)
+        .order_by('id')
+        .values_list('subscribe_from_id', flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+
+    created = 0
+    for batch in itertools.batched(subscriber_ids, batch_size):
+        VisitedCityNotification.objects.bulk_create(
+            [
+                VisitedCityNotification(
+                    recipient_id=recipient_id, sender_id=sender_id, city_id=city_id
+                )
+                for recipient_id in batch
+            ]
+        )
+        created += len(batch)
+    return created
+
+
+def process_notification_fanout_queue(
+    batch_size: int | None = None,
+    tasks_per_transaction: int = DEFAULT_TASKS_PER_TRANSACTION,
+) -> int:
+    """
+    Обрабатывает задачи из очереди рассылки, пока она не опустеет.
+    Задачи блокируются с SKIP LOCKED, поэтому несколько обработчиков могут работать
+    параллельно, не создавая дубликатов. Возвращает количество обработанных задач.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            tasks = list(
+                NotificationFanoutTask.objects.select_for_update(skip_locked=True).order_by('id')[
+                    :tasks_per_transaction
+                ]
+            )
+            for task in tasks:
+                started_at = time.monotonic()
+                created = fan_out_notifications(task.sender_id, task.city_id, batch_size)
+                NOTIFICATION_FANOUT_DURATION_SECONDS.observe(time.monotonic() - started_at)
+                NOTIFICATIONS_CREATED.inc(created)
+            NotificationFanoutTask.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+
+        finished_at = timezone.now()
+        for task in tasks:
+            NOTIFICATION_FANOUT_LATENCY_SECONDS.observe(
+                (finished_at - task.created_at).total_seconds()
+            )
+        processed += len(tasks)
+
+        if len(tasks) < tasks_per_transaction:
+            return processed
@@ -0,0 +1,50 @@
+"""
+Команда для обработки очереди рассылки уведомлений подписчикам о новых посещённых городах.
+Запускается по cron или постоянно работающим процессом с ключом `--watch`.
+Процесс должен получать ту же переменную PROMETHEUS_MULTIPROC_DIR, что и Gunicorn,
+иначе его метрики не попадут в /metrics (см. раздел README о фоновых обработчиках).
+"""
+
+import time
+from argparse import ArgumentParser
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from services.metrics import UNSHARED_WORKER_METRICS_WARNING, worker_metrics_are_shared
+from subscribe.infrastructure.notification_fanout import process_notification_fanout_queue
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уведомления подписчикам по задачам из очереди рассылки.'
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SUBSCRIBER_NOTIFICATION_BATCH_SIZE,
+            help='Количество уведомлений, создаваемых за один запрос.',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Не завершаться после опустошения очереди, а ждать новые задачи.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах между проверками пустой очереди в режиме --watch.',
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        if not worker_metrics_are_shared():
+            self.stderr.write(self.style.WARNING(UNSHARED_WORKER_METRICS_WARNING))
+        while True:
+            processed = process_notification_fanout_queue(batch_size=options['batch_size'])
+            if not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f'Обработано задач рассылки: {processed}'))
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
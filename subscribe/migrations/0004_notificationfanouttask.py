@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('city', '0037_usercountryvisitcounters'),
+        ('subscribe', '0003_alter_visitedcitynotification_city'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationFanoutTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_fanout_tasks', to='city.city', verbose_name='Посещённый город')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_fanout_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Отправитель')),
+            ],
+            options={
+                'verbose_name': 'Задача рассылки уведомлений',
+                'verbose_name_plural': 'Задачи рассылки уведомлений',
+                'ordering': ('id',),
+            },
+        ),
+    ]
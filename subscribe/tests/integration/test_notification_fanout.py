@@ -0,0 +1,81 @@
+"""
+Тесты очереди рассылки уведомлений подписчикам и команды `process_notification_fanout`.
+
+----------------------------------------------
+
+Copyright © Egor Vavilov (Shecspi)
+Licensed under the Apache License, Version 2.0
+
+----------------------------------------------
+"""
+
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from city.models import City
+from subscribe.infrastructure.models import (
+    NotificationFanoutTask,
+    Subscribe,
+    VisitedCityNotification,
+)
+from subscribe.infrastructure.notification_fanout import (
+    NOTIFICATION_FANOUT_QUEUE_DEPTH,
+    fan_out_notifications,
+)
+
+
+@pytest.fixture
+def sender() -> User:
+    return User.objects.create_user(username='sender', password='pass')
+
+
+@pytest.fixture
+def followers(sender: User) -> list[User]:
+    users = [User.objects.create_user(username=f'follower{index}') for index in range(3)]
+    for user in users:
+        Subscribe.objects.create(subscribe_from=user, subscribe_to=sender)
+    return users
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_fan_out_notifications_creates_notification_per_follower(
+    sender: User, followers: list[User], test_city: City
+) -> None:
+    assert fan_out_notifications(sender.pk, test_city.pk, batch_size=2) == 3
+
+    assert set(VisitedCityNotification.objects.values_list('recipient_id', flat=True)) == {
+        user.pk for user in followers
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_command_processes_queue(sender: User, followers: list[User], test_city: City) -> None:
+    NotificationFanoutTask.objects.create(sender=sender, city=test_city)
+    NotificationFanoutTask.objects.create(sender=followers[0], city=test_city)
+    stdout = StringIO()
+
+    call_command('process_notification_fanout', '--batch-size=2', stdout=stdout)
+
+    assert 'Обработано задач рассылки: 2' in stdout.getvalue()
+    assert NotificationFanoutTask.objects.count() == 0
+    assert VisitedCityNotification.objects.filter(sender=sender).count() == 3
+    assert VisitedCityNotification.objects.filter(sender=followers[0]).count() == 0
+    [metric] = NOTIFICATION_FANOUT_QUEUE_DEPTH.collect()
+    assert metric.samples[0].value == 0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_queue_depth_is_counted_at_collection_time(sender: User, test_city: City) -> None:
+    NotificationFanoutTask.objects.create(sender=sender, city=test_city)
+    NotificationFanoutTask.objects.create(sender=sender, city=test_city)
+
+    [metric] = NOTIFICATION_FANOUT_QUEUE_DEPTH.collect()
+
+    assert metric.name == 'subscribe_notification_fanout_queue_depth'
+    assert metric.samples[0].value == 2